@@ -345,7 +345,8 @@ local function place_at_position(player, connection_type, current_position, dir,
             name = connection_type,
             position = placement_position,
             direction = dir,
-            force = player.force
+            force = player.force,
+            raise_built = true
         })
 
         if placed_entity then
@@ -1,4 +1,9 @@
-global.actions.get_entities = function(player_index, radius, entity_names_json, position_x, position_y)
+global.actions.get_entities = function(player_index, radius, entity_names_json, position_x, position_y, wait_for_tick)
+    -- Entities are only consistent with the last action once the game has ticked since it ran
+    if wait_for_tick and global.last_action_tick and game.tick <= global.last_action_tick then
+        return "pending"
+    end
+
     local player = game.get_player(player_index)
     local position
     if position_x and position_y then
@@ -33,5 +38,5 @@ global.actions.get_entities = function(player_index, radius, entity_names_json,
             table.insert(result, serialized)
         end
     end
-    return dump(result)
+    return result
 end
\ No newline at end of file
@@ -1,23 +1,24 @@
--- Function to get the path as a JSON object
-global.actions.get_path = function(request_id)
-    local request_data = global.path_requests[request_id]
-    if not request_data then
-        return game.table_to_json({status = "invalid_request"})
-    end
+-- Function to get the path and its status. Paths are recorded by the `on_script_path_request_finished` handler in
+-- request_path.lua, so a request that hasn't finished yet is "pending". With `status_only`, only the status is returned.
+global.actions.get_path = function(request_id, status_only)
+    local request_data = global.path_requests and global.path_requests[request_id]
+    local path = global.paths and global.paths[request_id]
 
-    if request_data == "pending" then
-        return game.table_to_json({status = "pending"})
+    local status = "success"
+    if not request_data then
+        status = "invalid_request"
+    elseif not path then
+        status = "pending"
+    elseif path == "busy" or path == "not_found" then
+        status = path
     end
 
-    local path = global.paths[request_id]
-    if not path then
-        return game.table_to_json({status = "not_found"})
+    if status_only then
+        return status
     end
 
-    if path == "busy" then
-        return game.table_to_json({status = "busy"})
-    elseif path == "not_found" then
-        return game.table_to_json({status = "not_found"})
+    if status ~= "success" then
+        return {status = status}
     else
         local waypoints = {}
         for _, waypoint in ipairs(path) do
@@ -30,9 +31,9 @@ global.actions.get_path = function(request_id)
         local start = path[1].position
         local finish = path[#path].position
         --create_beam_bounding_box(player, surface, 1, {x = start.x - 0.5, y = start.y - 0.5}, {x = finish.x + 0.5, y = finish.y + 0.5})
-        return game.table_to_json({
+        return {
             status = "success",
             waypoints = waypoints
-        })
+        }
     end
 end
\ No newline at end of file
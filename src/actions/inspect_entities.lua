@@ -119,5 +119,5 @@ global.actions.inspect_entities = function(player_index, radius, position_x, pos
         table.insert(result, entity_info)
     end
 
-    return dump(result)
+    return result
 end
\ No newline at end of file
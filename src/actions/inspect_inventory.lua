@@ -89,14 +89,14 @@ global.actions.inspect_inventory = function(player_index, is_character_inventory
     if is_character_inventory then
        local inventory_items = get_player_inventory_items(player)
        if inventory_items then
-           return dump(inventory_items)
+           return inventory_items
        else
            error("Could not get player inventory")
        end
     else
        local inventory_items = get_inventory()
        if inventory_items then
-           return dump(inventory_items)
+           return inventory_items
        else
            error("Could not get inventory of entity at "..x..", "..y)
        end
@@ -179,7 +179,7 @@ global.actions.inspect_inventory2 = function(player_index, is_character_inventor
         local inventory_items = get_player_inventory_items(player)
 
         if inventory_items then
-            return dump(inventory_items)
+            return inventory_items
         else
             error("Could not get player inventory")
         end
@@ -187,7 +187,7 @@ global.actions.inspect_inventory2 = function(player_index, is_character_inventor
         local inventory_items = get_inventory()
 
         if inventory_items then
-            return dump(inventory_items)
+            return inventory_items
         else
             error("Could not get inventory of entity at "..x..", "..y)
         end
@@ -28,7 +28,7 @@ global.actions.load_blueprint = function(player, bp, offset_x, offset_y)
             if (entity ~= nil and entity.name == 'entity-ghost' and entity.ghost_type ~= nil and entity.item_requests ~= nil) then
                 local items = util.table.deepcopy(entity.item_requests)
                 game.print(serpent.block(entity.items))
-                local p, ri = entity.revive();
+                local p, ri = entity.revive({raise_revive = true});
                 if (ri ~= nil) then
                     for k, v in pairs(items) do
                         ri.get_module_inventory().insert({ name = k, count = v })
@@ -36,7 +36,7 @@ global.actions.load_blueprint = function(player, bp, offset_x, offset_y)
                 end
             else
                 -- it's a normal thing like a belt or arm - we can just 'revive' the ghost, which will place the entity with all of the correct settings from the blueprint
-                entity.revive();
+                entity.revive({raise_revive = true});
             end
         end
 
@@ -44,7 +44,7 @@ global.actions.load_blueprint = function(player, bp, offset_x, offset_y)
 
     -- This is used to place all locomotives and other train objects AFTER rails have been placed
     for _, entity in pairs(afterSpawns) do
-        local r, to = entity.revive();
+        local r, to = entity.revive({raise_revive = true});
     end
 
     -- Set all trains to AUTOMATIC mode (manual = false)
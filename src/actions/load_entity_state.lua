@@ -4,6 +4,11 @@ local function unquote_string(str)
     return string.gsub(str, '"', '')
 end
 
+-- Identifies an entity across captures and restores (see save_entity_state)
+local function entity_state_key(state)
+    return string.gsub(state.name, '"', '') .. "@" .. state.position.x .. "," .. state.position.y
+end
+
 -- Main deserialization function
 global.actions.load_entity_state = function(player, stored_json_data)
     local player_entity = game.players[player]
@@ -199,5 +204,20 @@ global.actions.load_entity_state = function(player, stored_json_data)
         end
     end
 
+    -- The loaded state is the baseline that save_entity_state diffs against, by the signatures of the entities it
+    -- created. Entities that couldn't be created have no signature, so the next capture reports them removed.
+    local baseline = {}
+    for _, state in pairs(stored_data) do
+        baseline[entity_state_key(state)] = false
+    end
+    for _, data in pairs(created_entities) do
+        if data.entity.valid then
+            baseline[entity_state_key(data.state)] = global.utils.entity_state_signature(data.entity)
+        end
+    end
+    global.entity_state_baseline = baseline
+    -- Creating the entities raised build events, but they are already in the baseline
+    global.entity_state_dirty = {}
+
     return true
 end
\ No newline at end of file
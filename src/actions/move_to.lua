@@ -90,7 +90,7 @@ global.actions.move_to = function(player_index, path_handle, trailing_entity, is
     local function place(place_position, direction)
         if surface.can_place_entity{name=trailing_entity, position=place_position, direction=direction, force='player', build_check_type=defines.build_check_type.manual} then
             if player.get_item_count(trailing_entity) > 0 then
-                local created = surface.create_entity{name=trailing_entity, position=place_position, direction=direction, force='player', player=player, build_check_type=defines.build_check_type.manual, fast_replace=true}
+                local created = surface.create_entity{name=trailing_entity, position=place_position, direction=direction, force='player', player=player, build_check_type=defines.build_check_type.manual, fast_replace=true, raise_built=true}
                 if created then
                     player.remove_item({name=trailing_entity, count=1})
                 end
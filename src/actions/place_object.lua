@@ -159,7 +159,8 @@ global.actions.place_entity = function(player_index, entity, direction, x, y, ex
                 force = "player",
                 position = position,
                 direction = entity_direction,
-                player = player
+                player = player,
+                raise_built = true
             }
 
             if placed_entity then
@@ -270,7 +271,8 @@ global.actions.place_entity = function(player_index, entity, direction, x, y, ex
                         force = player.force,
                         position = new_position,
                         direction = entity_direction,
-                        player = player
+                        player = player,
+                        raise_built = true
                     }
                     if have_built then
                         player.remove_item{name = entity, count = 1}
@@ -340,7 +342,8 @@ global.actions.place_entity = function(player_index, entity, direction, x, y, ex
             force = player.force,
             position = position,
             direction = entity_direction,
-            player = player
+            player = player,
+            raise_built = true
         }
 
         if have_built then
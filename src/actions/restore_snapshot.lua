@@ -0,0 +1,37 @@
+-- Serialized entity states kept resident between resets, so a hot state can be restored without re-sending it
+global.snapshots = global.snapshots or {entries = {}, order = {}, capacity = 8}
+
+local function touch(key)
+    local order = global.snapshots.order
+    for i = #order, 1, -1 do
+        if order[i] == key then
+            table.remove(order, i)
+        end
+    end
+    table.insert(order, key)
+
+    -- Evict the least recently used snapshots beyond capacity
+    while #order > global.snapshots.capacity do
+        local evicted = table.remove(order, 1)
+        global.snapshots.entries[evicted] = nil
+    end
+end
+
+global.actions.restore_snapshot = function(player, key, stored_json_data, capacity)
+    if capacity then
+        global.snapshots.capacity = capacity
+    end
+
+    if stored_json_data then
+        global.snapshots.entries[key] = stored_json_data
+    end
+
+    local data = global.snapshots.entries[key]
+    if not data then
+        -- Cache miss (e.g the server restarted), the caller has to send the state again
+        return false
+    end
+
+    touch(key)
+    return global.actions.load_entity_state(player, data)
+end
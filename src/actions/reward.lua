@@ -307,8 +307,21 @@ production_score.generate_price_list = function(param)
   return price_list
 end
 
+-- Prices only depend on the prototypes, which only change with the mods, so the price list is generated once per
+-- mod / prototype checksum (global.utils.prototype_checksum) and kept in global rather than being regenerated on
+-- every score
+
+production_score.get_price_list = function()
+  local checksum = global.utils.prototype_checksum()
+  if not global.price_list or global.price_list_checksum ~= checksum then
+    global.price_list = production_score.generate_price_list()
+    global.price_list_checksum = checksum
+  end
+  return global.price_list, checksum
+end
+
 production_score.get_production_scores = function(price_list)
-  local price_list = price_list or production_score.generate_price_list()
+  local price_list = price_list or production_score.get_price_list()
   local scores = {}
   for k, force in pairs (game.forces) do
     local score = 0
@@ -343,7 +356,7 @@ global.actions.score = function()
       if goal_description ~= nil and #goal_description > 1 then
         production_score["goal"] = goal_description[1]:gsub("-", "_")
       end
-      return dump(production_score)
+      return production_score
     end
-    return dump(production_score)
+    return production_score
 end
\ No newline at end of file
@@ -1,6 +1,8 @@
-global.actions.sleep = function(ticks_elapsed)
-    if ticks_elapsed > 0 then
-        global.elapsed_ticks = global.elapsed_ticks + ticks_elapsed
+-- Adds `ticks` to the game time spent by the agent, and returns the current tick and game speed. Callers wait for a
+-- target tick by sleeping for the wall-clock time the remaining ticks take at this speed, then checking again.
+global.actions.sleep = function(ticks)
+    if ticks > 0 then
+        global.elapsed_ticks = global.elapsed_ticks + ticks
     end
-    return game.tick
-end
\ No newline at end of file
+    return {tick = game.tick, speed = game.speed}
+end
@@ -1,3 +1,4 @@
+import functools
 import time
 from timeit import default_timer as timer
 from typing import List, Tuple, Dict, Any
@@ -7,12 +8,46 @@ from slpp import slpp as lua, ParseError
 from factorio_entities import EntityStatus, Direction
 from factorio_lua_script_manager import FactorioLuaScriptManager
 from factorio_namespace import FactorioNamespace
-from factorio_rcon_utils import _lua2python
+from factorio_rcon_utils import _lua2python, _json2python
 
 COMMAND = "/silent-command"
 
+
+def _checks_deadline(call):
+    """
+    Wrap a controller's `__call__` so that the deadline of the program calling it is checked before the outermost
+    tool call starts. Tools are never interrupted once they have started, so their RCON calls always complete.
+    """
+    @functools.wraps(call)
+    def checked_call(self, *args, **kwargs):
+        namespace = self.game_state
+        if not isinstance(namespace, FactorioNamespace):
+            return call(self, *args, **kwargs)
+        if namespace._tool_depth == 0:
+            namespace._check_deadline()
+        namespace._tool_depth += 1
+        try:
+            return call(self, *args, **kwargs)
+        finally:
+            namespace._tool_depth -= 1
+    return checked_call
+
+
 class Controller:
 
+    # Whether calls may change the game, in which case the tick they ran on is recorded in
+    # `global.last_action_tick` so that reads (e.g `get_entities`) can wait for the game to catch up
+    updates_state = True
+
+    # Whether responses are encoded as JSON (see `dump_response` in init/initialise.lua) rather than with `dump()`.
+    # Responses that can't be encoded as JSON fall back to `dump()`, and are still parsed with slpp.
+    json_responses = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if '__call__' in cls.__dict__:
+            cls.__call__ = _checks_deadline(cls.__dict__['__call__'])
+
     def __init__(self, lua_script_manager: 'FactorioLuaScriptManager', game_state: 'FactorioNamespace', *args, **kwargs):
         assert isinstance(lua_script_manager, FactorioLuaScriptManager), "Not correct"
         self.connection = lua_script_manager
@@ -100,7 +135,19 @@ class Controller:
     #             cleaned_response[key] = value
     #     return cleaned_response
 
-    def camel_to_snake(self, camel_str):
+    @classmethod
+    def shared(cls, lua_script_manager: 'FactorioLuaScriptManager', game_state: 'FactorioNamespace'):
+        """
+        The controller of this kind for the game that `lua_script_manager` is connected to, creating it on first use.
+        Controllers that call other controllers get them from here, so each is only created (and loaded) once.
+        """
+        name = cls.camel_to_snake(cls.__name__)
+        if name not in lua_script_manager.controllers:
+            lua_script_manager.controllers[name] = cls(lua_script_manager, game_state)
+        return lua_script_manager.controllers[name]
+
+    @staticmethod
+    def camel_to_snake(camel_str):
         snake_str = ""
         for index, char in enumerate(camel_str):
             if char.isupper():
@@ -121,19 +168,41 @@ class Controller:
             script = command
         return script
 
+    def prepare(self, *args, **kwargs) -> Tuple:
+        """
+        Validate the arguments of a call to this tool, and convert them to the arguments of its Lua action.
+        Tools that implement this and `parse` (so that `__call__` is `parse(execute(*prepare(...)))`) can be batched
+        with `FactorioInstance.execute_many`.
+        """
+        raise NotImplementedError(f"{self.name} can't be batched")
+
+    def parse(self, response, *args, **kwargs) -> Any:
+        """The result of a call to this tool, from its Lua action's response, raising if the call failed"""
+        return response
+
+    def invocation(self, *args) -> str:
+        """The Lua expression that calls this controller's action with `args` under `pcall`"""
+        parameters = [lua.encode(arg) for arg in args]
+        return f"pcall(global.actions.{self.name}{(', ' if parameters else '') + ','.join(parameters)})"
+
     def execute(self, *args) -> Tuple[Dict, Any]:
         lua_response = ""
         try:
             start = time.time()
-            parameters = [lua.encode(arg) for arg in args]
-            invocation = f"pcall(global.actions.{self.name}{(', ' if parameters else '') + ','.join(parameters)})"
-            wrapped = f"{COMMAND} a, b = {invocation}; rcon.print(dump({{a=a, b=b}}))"
+            invocation = self.invocation(*args)
+            barrier = "global.last_action_tick = game.tick; " if self.updates_state else ""
+            encoder = "dump_response(a, b)" if self.json_responses else "dump({a=a, b=b})"
+            wrapped = f"{COMMAND} a, b = {invocation}; {barrier}rcon.print({encoder})"
             lua_response = self.connection.rcon_client.send_command(wrapped)
-            parsed, elapsed = _lua2python(invocation, lua_response, start=start)
-            if not parsed['a'] and 'b' in parsed and isinstance(parsed['b'], str):
-                parts = lua_response.split("[\"b\"] = ")
-                parts[1] = f"{parts[1][:-2]}" if parts[1][-1] == "}" else parts[1]
-                parsed['b'] = parts[1].replace("!!", "\"")
+            json_response = _json2python(invocation, lua_response, start=start) if self.json_responses else None
+            if json_response is not None:
+                parsed, elapsed = json_response
+            else:
+                parsed, elapsed = _lua2python(invocation, lua_response, start=start)
+                if not parsed['a'] and 'b' in parsed and isinstance(parsed['b'], str):
+                    parts = lua_response.split("[\"b\"] = ")
+                    parts[1] = f"{parts[1][:-2]}" if parts[1][-1] == "}" else parts[1]
+                    parsed['b'] = parts[1].replace("!!", "\"")
             if not 'b' in parsed:
                 return {}, elapsed
         except ParseError as e:
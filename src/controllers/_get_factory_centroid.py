@@ -5,6 +5,10 @@ from factorio_entities import BoundingBox, Position
 from factorio_instance import PLAYER
 
 class GetFactoryCentroid(Controller):
+
+    # Locating the factory doesn't change it
+    updates_state = False
+
     def __init__(self, lua_script_manager, game_state):
         self.state = { 'input': {}, 'output': {} }
         super().__init__(lua_script_manager, game_state)
@@ -1,57 +1,62 @@
-import json
 import time
 from time import sleep
-from typing import Tuple, List
+from typing import List
 
 from controllers.__action import Action
-from factorio_entities import Position, Entity
-
-from factorio_instance import PLAYER
-from factorio_types import Prototype
+from factorio_entities import Position
 
 
 class GetPath(Action):
 
+    # Polling the status of a path request doesn't change the game
+    updates_state = False
+
+    # How often to check whether the game has finished a path request
+    poll_interval = 0.005
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
         #self.connection = connection
         #self.game_state = game_state
 
-    def __call__(self, path_handle: int, max_attempts: int = 10) -> List[Position]:
+    def wait(self, path_handle: int, timeout: float = 5) -> str:
+        """
+        Block until the game has finished a path request, returning as soon as it has.
+        :param path_handle: Handle returned by `RequestPath`
+        :param timeout: Maximum number of seconds to wait
+        :return: 'success', 'not_found', 'busy' or 'invalid_request' - or 'pending' if the request timed out
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            status, _ = self.execute(path_handle, True)
+            if status != 'pending' or time.monotonic() >= deadline:
+                return status
+            sleep(self.poll_interval)
+
+    def __call__(self, path_handle: int, timeout: float = 5) -> List[Position]:
         """
-        Retrieve a path requested from the game, using backoff polling.
+        Retrieve a path requested from the game, waiting for the request to finish.
         """
 
         try:
+            status = self.wait(path_handle, timeout)
 
-            walltime_start = time.time()
-            # Backoff polling
-            wait_time = 0.032  # 32ms
-            for attempt in range(max_attempts):
-
-                response, elapsed = self.execute(path_handle)
-
-                if response is None or response == {} or isinstance(response, str):
-                    raise Exception("Could not request path", response)
-
-                path = json.loads(response)
-
-                if path['status'] == 'success':
-                    endtime = time.time()
-                    elapsed = endtime - walltime_start
-                    list_of_positions = []
-                    for pos in path['waypoints']:
-                        list_of_positions.append(Position(x=pos['x'], y=pos['y']))
-                    return list_of_positions
+            if status == 'pending':
+                raise Exception(f"Path request timed out after {timeout} seconds")
+            elif status in ['not_found', 'invalid_request']:
+                raise Exception(f"Path not found or invalid request: {status}")
+            elif status == 'busy':
+                raise Exception("Pathfinder is busy, try again later")
 
-                elif path['status'] in ['not_found', 'invalid_request']:
-                    raise Exception(f"Path not found or invalid request: {path['status']}")
-                elif path['status'] == 'busy':
-                    raise Exception("Pathfinder is busy, try again later")
+            response, elapsed = self.execute(path_handle)
 
-                wait_time *= 2  # Exponential backoff
+            if not isinstance(response, dict) or response.get('status') != 'success':
+                raise Exception("Could not request path", response)
 
-            raise Exception(f"Path request timed out after {max_attempts} attempts")
+            waypoints = response['waypoints']
+            if isinstance(waypoints, dict):
+                waypoints = [waypoints[index] for index in sorted(waypoints)]
+            return [Position(x=pos['x'], y=pos['y']) for pos in waypoints]
 
         except Exception as e:
-            raise ConnectionError(f"Could not get path with handle {path_handle}") from e
\ No newline at end of file
+            raise ConnectionError(f"Could not get path with handle {path_handle}") from e
@@ -7,6 +7,9 @@ from factorio_types import InspectionResults, EntityInfo, EntityStatus
 
 class InspectEntities(Action):
 
+    # Inspecting entities doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
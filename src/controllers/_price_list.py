@@ -0,0 +1,30 @@
+from typing import Dict
+
+from controllers.__controller import Controller
+
+
+class PriceList(Controller):
+
+    # Prices are computed from the recipes, without changing the game
+    updates_state = False
+
+    def __init__(self, lua_script_manager, game_state):
+        self.checksum = None
+        self.prices = {}
+        super().__init__(lua_script_manager, game_state)
+
+    def __call__(self) -> Dict[str, float]:
+        """
+        Gets the price of every item and fluid, as used to calculate the production score.
+        The price list only changes with the mods, so it is only sent again when the game's checksum changes.
+        """
+        result, _ = self.execute(self.checksum)
+
+        if isinstance(result, str):
+            raise Exception(result)
+
+        if 'prices' in result:
+            self.prices = result['prices']
+            self.checksum = result['checksum']
+
+        return self.prices
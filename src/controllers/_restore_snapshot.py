@@ -0,0 +1,32 @@
+import base64
+import zlib
+from typing import Optional
+
+from controllers.__action import Action
+from factorio_instance import PLAYER
+
+
+class RestoreSnapshot(Action):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+
+    def __call__(self, key: str, entities: Optional[str] = None, decompress=False, capacity=8) -> bool:
+        """
+        Restores an entity state that is kept resident in the game under `key`.
+        If `entities` is passed, it is stored under `key` first (evicting the least recently used snapshot).
+        :param key: Identifier of the snapshot, e.g `GameState.entities_hash()`
+        :param entities: Base64 encoded (optionally compressed) JSON data representing the entities to store
+        :param capacity: How many snapshots to keep resident in the game
+        :return: True if the snapshot was restored, False if it isn't resident and needs to be sent again
+        """
+        if entities is None:
+            result, _ = self.execute(PLAYER, key)
+            return result is True
+
+        entities = base64.b64decode(entities)
+        if decompress:
+            entities = zlib.decompress(entities)
+
+        result, _ = self.execute(PLAYER, key, entities, capacity)
+        return result is True
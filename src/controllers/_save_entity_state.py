@@ -9,6 +9,9 @@ from factorio_instance import PLAYER
 
 class SaveEntityState(Action):
 
+    # Serializing entities doesn't change them
+    updates_state = False
+
     def __init__(self, *args):
         super().__init__(*args)
 
@@ -18,7 +21,9 @@ class SaveEntityState(Action):
                  resource_entities=False,
                  encode=False,
                  compress=False,
-                 ) -> Union[List[Dict], str]:
+                 delta=False,
+                 rebase=False,
+                 ) -> Union[List[Dict], Dict, str, None]:
         """
         Saves the current player entities on the map into a blueprint string
         :arg: distance: Distance around the player to search for entities. Default is 100 tiles.
@@ -28,9 +33,15 @@ class SaveEntityState(Action):
         :arg: encode: Whether or not to encode the blueprint string. Default is False.
         :arg: compress: Whether or not to compress the blueprint string before encoding it. Default is False.
             Note: Perform encoding and compression if we are sending this over a network.
+        :arg: delta: Whether to only return what changed since the last loaded (or delta-captured) state,
+            as `{'changed': [...], 'removed': [...]}`. Returns None if the game has no baseline to diff against.
+        :arg: rebase: Whether to diff against an empty baseline, i.e return every entity as changed.
         :return: Blueprint and offset to blueprint from the origin.
         """
-        entities, _ = self.execute(PLAYER, distance, player_entities, resource_entities)
+        entities, _ = self.execute(PLAYER, distance, player_entities, resource_entities, delta, rebase)
+
+        if delta and not isinstance(entities, dict):
+            return None
 
         if encode:
             encoded_string = json.dumps(entities).encode()
@@ -5,6 +5,10 @@ from models.technology_state import TechnologyState
 
 
 class SaveResearchState(Action):
+
+    # Serializing research doesn't change it
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
@@ -8,6 +8,9 @@ from factorio_types import Prototype
 
 class CanPlaceEntity(Action):
 
+    # Checking a placement doesn't place anything
+    updates_state = False
+
     def __init__(self, *args):
         super().__init__(*args)
 
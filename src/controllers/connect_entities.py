@@ -1,4 +1,3 @@
-from time import sleep
 from typing import Union, Optional, List, Dict, cast
 
 import numpy
@@ -34,15 +33,15 @@ class ConnectEntities(Action):
         self._setup_resolvers()
 
     def _setup_actions(self):
-        self.request_path = RequestPath(self.connection, self.game_state)
-        self.get_path = GetPath(self.connection, self.game_state)
-        self.rotate_entity = RotateEntity(self.connection, self.game_state)
-        self.pickup_entity = PickupEntity(self.connection, self.game_state)
-        self.inspect_inventory = InspectInventory(self.connection, self.game_state)
-        self.get_entities = GetEntities(self.connection, self.game_state)
-        self.get_entity = GetEntity(self.connection, self.game_state)
-        self._extend_collision_boxes = ExtendCollisionBoxes(self.connection, self.game_state)
-        self._clear_collision_boxes = ClearCollisionBoxes(self.connection, self.game_state)
+        self.request_path = RequestPath.shared(self.connection, self.game_state)
+        self.get_path = GetPath.shared(self.connection, self.game_state)
+        self.rotate_entity = RotateEntity.shared(self.connection, self.game_state)
+        self.pickup_entity = PickupEntity.shared(self.connection, self.game_state)
+        self.inspect_inventory = InspectInventory.shared(self.connection, self.game_state)
+        self.get_entities = GetEntities.shared(self.connection, self.game_state)
+        self.get_entity = GetEntity.shared(self.connection, self.game_state)
+        self._extend_collision_boxes = ExtendCollisionBoxes.shared(self.connection, self.game_state)
+        self._clear_collision_boxes = ClearCollisionBoxes.shared(self.connection, self.game_state)
 
     def _setup_resolvers(self):
         self.resolvers = {
@@ -198,16 +197,16 @@ class ConnectEntities(Action):
         """Attempt to find a path between two positions"""
         entity_sizes = [2, 1, 0.5, 0.25]  # Ordered from largest to smallest
 
-        for size in entity_sizes:
-            path_handle = self.request_path(
-                finish=target_pos,
-                start=source_pos,
-                allow_paths_through_own_entities=allow_paths_through_own,
-                radius=pathing_radius,
-                entity_size=size
-            )
+        # Request a path for every entity size up front, so that the game computes them in parallel
+        path_handles = [self.request_path(finish=target_pos,
+                                          start=source_pos,
+                                          allow_paths_through_own_entities=allow_paths_through_own,
+                                          radius=pathing_radius,
+                                          entity_size=size) for size in entity_sizes]
 
-            sleep(0.05)  # Allow pathing system time to compute
+        for path_handle in path_handles:
+            # Returns as soon as the game has finished this request (usually already the case for smaller sizes)
+            self.get_path.wait(path_handle)
 
             response, _ = self.execute(
                 PLAYER,
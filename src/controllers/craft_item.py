@@ -10,7 +10,7 @@ class CraftItem(Action):
 
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
-        self.inspect_inventory = InspectInventory(connection, game_state)
+        self.inspect_inventory = InspectInventory.shared(connection, game_state)
 
     def __call__(self, entity: Prototype, quantity: int = 1) -> int:
         """
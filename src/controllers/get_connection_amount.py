@@ -12,7 +12,7 @@ class GetConnectionAmount(Action):
     def __init__(self, connection, game_state):
         self.game_state = game_state
         super().__init__(connection, game_state)
-        self.connect_entities = ConnectEntities(connection, game_state)
+        self.connect_entities = ConnectEntities.shared(connection, game_state)
 
 
     def __call__(self,
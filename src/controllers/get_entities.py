@@ -1,14 +1,43 @@
-from collections import defaultdict
-from time import sleep
+import time
 from typing import List, Set, Union
 from controllers.__action import Action
-from factorio_entities import Position, Entity, BeltGroup, TransportBelt
+from factorio_entities import Position, Entity
 from factorio_instance import PLAYER
 from factorio_types import Prototype
 from utilities.groupable_entities import agglomerate_groupable_entities
 
 
+def _entity_class(prototype: Prototype):
+    metaclass = prototype.value[1]
+    while isinstance(metaclass, tuple):
+        metaclass = metaclass[1]
+    return metaclass
+
+
+# Game entity name -> (Prototype, entity class), so that decoding doesn't scan `Prototype` for every entity
+PROTOTYPES_BY_ENTITY_NAME = {prototype.value[0]: (prototype, _entity_class(prototype)) for prototype in Prototype}
+
+# Entities that are agglomerated into groups, in the order that their groups are appended to the result
+GROUPABLE_PROTOTYPES = (
+    (Prototype.Pipe,),
+    (Prototype.SmallElectricPole, Prototype.BigElectricPole, Prototype.MediumElectricPole),
+    (Prototype.TransportBelt, Prototype.FastTransportBelt, Prototype.ExpressTransportBelt),
+)
+GROUP_INDEX_BY_PROTOTYPE = {prototype: index
+                            for index, prototypes in enumerate(GROUPABLE_PROTOTYPES)
+                            for prototype in prototypes}
+
+
 class GetEntities(Action):
+
+    # Reading entities doesn't change the game, so it shouldn't make the next read wait for a tick
+    updates_state = False
+
+    # Instead of a fixed sleep, wait until the game has ticked since the last action (polling every
+    # `poll_interval`), for at most `barrier_timeout` seconds
+    poll_interval = 0.005
+    barrier_timeout = 0.05
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
@@ -32,14 +61,17 @@ class GetEntities(Action):
             entity_names = "[" + ",".join(
                     [f'"{entity.value[0]}"' for entity in entities]) + "]" if entities else "[]"
 
+            x, y = (position.x, position.y) if position is not None else (None, None)
 
-            # We need to add a small 50ms sleep to ensure that the entities have updated after previous actions
-            sleep(0.05)
-
-            if position is None:
-                response, time_elapsed = self.execute(PLAYER, radius, entity_names)
-            else:
-                response, time_elapsed = self.execute(PLAYER, radius, entity_names, position.x, position.y)
+            # Make sure that the entities have updated after previous actions. This is usually already the case,
+            # so it only costs a round-trip when entities are requested in the same tick as the last action.
+            deadline = time.monotonic() + self.barrier_timeout
+            while True:
+                wait_for_tick = time.monotonic() < deadline
+                response, time_elapsed = self.execute(PLAYER, radius, entity_names, x, y, wait_for_tick)
+                if response != "pending":
+                    break
+                time.sleep(self.poll_interval)
 
             if not response:
                 return []
@@ -47,67 +79,56 @@ class GetEntities(Action):
             if (not isinstance(response, dict) and not response) or isinstance(response, str):# or (isinstance(response, dict) and not response):
                 raise Exception("Could not get entities", response)
 
-            entities_list = []
-            belt_list = []
-            for raw_entity_data in response:
-                if isinstance(raw_entity_data, list):
-                    continue
-
-                entity_data = self.clean_response(raw_entity_data)
-                # Find the matching Prototype
-                matching_prototype = None
-                for prototype in Prototype:
-                    if prototype.value[0] == entity_data['name'].replace('_', '-'):
-                        matching_prototype = prototype
-                        break
-
-                if matching_prototype is None:
-                    print(f"Warning: No matching Prototype found for {entity_data['name']}")
-                    continue
-
-                if matching_prototype not in entities and entities:
-                    continue
-                metaclass = matching_prototype.value[1]
-                while isinstance(metaclass, tuple):
-                    metaclass = metaclass[1]
-
-                # Process nested dictionaries (like inventories)
-                for key, value in entity_data.items():
-                    if isinstance(value, dict):
-                        entity_data[key] = self.process_nested_dict(value)
-
-                entity_data['prototype'] = prototype
-
-                # remove all empty values from the entity_data dictionary
-                entity_data = {k: v for k, v in entity_data.items() if v or isinstance(v, int)}
-
-                try:
-                    entity = metaclass(**entity_data)
-                    entities_list.append(entity)
-                except Exception as e1:
-                    print(f"Could not create {entity_data['name']} object: {e1}")
-
-            # get all pipes into a list
-            pipes = [entity for entity in entities_list if hasattr(entity, 'prototype') and entity.prototype == Prototype.Pipe]
-            group = agglomerate_groupable_entities(pipes)
-            [entities_list.remove(pipe) for pipe in pipes]
-            entities_list.extend(group)
-
-            poles = [entity for entity in entities_list if hasattr(entity, 'prototype') and entity.prototype in (Prototype.SmallElectricPole, Prototype.BigElectricPole, Prototype.MediumElectricPole)]
-            group = agglomerate_groupable_entities(poles)
-            [entities_list.remove(pole) for pole in poles]
-            entities_list.extend(group)
-
-            belts = [entity for entity in entities_list if hasattr(entity, 'prototype') and entity.prototype in (Prototype.TransportBelt, Prototype.FastTransportBelt, Prototype.ExpressTransportBelt)]
-            group = agglomerate_groupable_entities(belts)
-            [entities_list.remove(belt) for belt in belts]
-            entities_list.extend(group)
-
-            return entities_list
+            return self.decode(response, entities)
 
         except Exception as e:
             raise Exception(f"Error in GetEntities: {e}")
 
+    def decode(self, response, entities: Set[Prototype] = frozenset()) -> List[Entity]:
+        """
+        Build entity objects from the serialized entities, in a single pass. Pipes, poles and belts are agglomerated
+        into groups, which are appended after the other entities.
+        """
+        entities_list = []
+        groupable = [[] for _ in GROUPABLE_PROTOTYPES]
+        for raw_entity_data in response:
+            if isinstance(raw_entity_data, list):
+                continue
+
+            entity_data = self.clean_response(raw_entity_data)
+            # Find the matching Prototype
+            match = PROTOTYPES_BY_ENTITY_NAME.get(entity_data['name'].replace('_', '-'))
+            if match is None:
+                print(f"Warning: No matching Prototype found for {entity_data['name']}")
+                continue
+
+            prototype, metaclass = match
+            if entities and prototype not in entities:
+                continue
+
+            # Process nested dictionaries (like inventories), and remove all empty values
+            entity_data = {key: self.process_nested_dict(value) if isinstance(value, dict) else value
+                           for key, value in entity_data.items()
+                           if value or isinstance(value, int)}
+            entity_data['prototype'] = prototype
+
+            try:
+                entity = metaclass(**entity_data)
+            except Exception as e1:
+                print(f"Could not create {entity_data['name']} object: {e1}")
+                continue
+
+            group_index = GROUP_INDEX_BY_PROTOTYPE.get(prototype)
+            if group_index is None:
+                entities_list.append(entity)
+            else:
+                groupable[group_index].append(entity)
+
+        for group in groupable:
+            entities_list.extend(agglomerate_groupable_entities(group))
+
+        return entities_list
+
     def process_nested_dict(self, nested_dict):
         """Helper method to process nested dictionaries"""
         if isinstance(nested_dict, dict):
@@ -115,4 +136,4 @@ class GetEntities(Action):
                 return [self.process_nested_dict(value) for value in nested_dict.values()]
             else:
                 return {key: self.process_nested_dict(value) for key, value in nested_dict.items()}
-        return nested_dict
\ No newline at end of file
+        return nested_dict
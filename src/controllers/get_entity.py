@@ -11,9 +11,12 @@ from factorio_types import Prototype
 
 class GetEntity(Action):
 
+    # Looking an entity up doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
-        self.get_entities = GetEntities(connection, game_state)
+        self.get_entities = GetEntities.shared(connection, game_state)
 
     def __call__(self, entity: Prototype, position: Position) -> Entity:
         """
@@ -9,6 +9,9 @@ from utilities.parse_lua_dict import parse_lua_dict
 
 class GetPrototypeRecipe(Action):
 
+    # Recipes are read from the prototypes, which never change
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
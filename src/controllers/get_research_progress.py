@@ -8,6 +8,10 @@ from factorio_instance import PLAYER
 
 
 class GetResearchProgress(Action):
+
+    # Reading research progress doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
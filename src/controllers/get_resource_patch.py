@@ -12,6 +12,9 @@ from factorio_types import Resource
 
 class GetResourcePatch(Action):
 
+    # Measuring a resource patch doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
@@ -13,9 +13,9 @@ class HarvestResource(Action):
 
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
-        self.move_to = MoveTo(connection, game_state)
-        self.nearest = Nearest(connection, game_state)
-        self.get_entity = GetEntity(connection, game_state)
+        self.move_to = MoveTo.shared(connection, game_state)
+        self.nearest = Nearest.shared(connection, game_state)
+        self.get_entity = GetEntity.shared(connection, game_state)
 
     def __call__(self,
                  position: Position,
@@ -12,7 +12,7 @@ from factorio_types import Prototype
 class InsertItem(Action):
 
     def __init__(self, connection, game_state):
-        self.get_entities = GetEntities(connection, game_state)
+        self.get_entities = GetEntities.shared(connection, game_state)
         super().__init__(connection, game_state)
     def __call__(self, entity: Prototype, target: Union[Entity, EntityGroup], quantity=5) -> Entity:
         """
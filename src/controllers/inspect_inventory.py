@@ -8,6 +8,9 @@ from factorio_types import prototype_by_name
 
 class InspectInventory(Action):
 
+    # Reading an inventory doesn't change the game
+    updates_state = False
+
     def __init__(self, *args):
         super().__init__(*args)
 
@@ -17,7 +20,10 @@ class InspectInventory(Action):
         :param entity: Entity to inspect
         :return: Inventory of the given entity
         """
+        response, execution_time = self.execute(*self.prepare(entity))
+        return self.parse(response, entity)
 
+    def prepare(self, entity=None) -> Tuple:
         if entity:
             if isinstance(entity, Entity):
                 x, y = self.get_position(entity.position)
@@ -27,9 +33,9 @@ class InspectInventory(Action):
                 raise ValueError(f"The first argument must be an Entity or Position object, you passed in a {type(entity)} object.")
         else:
             x, y = 0, 0
+        return PLAYER, entity == None, x, y, entity.name if entity else ""
 
-        response, execution_time = self.execute(PLAYER, entity == None, x, y, entity.name if entity else "")
-
+    def parse(self, response, entity=None) -> Inventory:
         if not isinstance(response, dict):
             if entity:
                 raise Exception(f"Could not inspect inventory of {entity}.", response)
@@ -15,8 +15,8 @@ class MoveTo(Action):
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
         #self.observe = ObserveAll(connection, game_state)
-        self.request_path = RequestPath(connection, game_state)
-        self.get_path = GetPath(connection, game_state)
+        self.request_path = RequestPath.shared(connection, game_state)
+        self.get_path = GetPath.shared(connection, game_state)
 
     def __call__(self, position: Position, laying: Prototype = None, leading: Prototype = None) -> Position:
         """
@@ -39,7 +39,7 @@ class MoveTo(Action):
         path_handle = self.request_path(start=Position(x=self.game_state.player_location.x,
                                                        y=self.game_state.player_location.y), finish=nposition,
                                         allow_paths_through_own_entities=True)
-        sleep(0.05) # Let the pathing complete in the game.
+        self.get_path.wait(path_handle) # Let the pathing complete in the game.
         try:
             if laying is not None:
                 entity_name = laying.value[0]
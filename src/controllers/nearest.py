@@ -9,6 +9,9 @@ from factorio_types import Prototype, Resource
 
 class Nearest(Action):
 
+    # Finding the nearest entity or resource doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
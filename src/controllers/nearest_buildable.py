@@ -9,6 +9,9 @@ from factorio_types import Prototype
 
 class NearestBuildable(Action):
 
+    # Searching for a buildable position doesn't build anything
+    updates_state = False
+
     def __init__(self, lua_script_manager, game_state):
         super().__init__(lua_script_manager, game_state)
         #self.connection = connection
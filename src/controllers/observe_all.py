@@ -13,6 +13,9 @@ from utils import stitch
 
 class ObserveAll(Action):
 
+    # Observing doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state: ObservationState):
         super().__init__(connection, game_state)
         mu, sigma = 0, CHUNK_SIZE * 20
@@ -20,29 +20,38 @@ class PickupEntity(Action):
         :param position: Position to pickup entity
         :return: True if the entity was picked up successfully, False otherwise.
         """
+        if isinstance(entity, BeltGroup):
+            belts = entity.belts
+            for belt in belts:
+                resp = self.__call__(belt)
+                if not resp: return False
+            return True
+        elif isinstance(entity, PipeGroup):
+            pipes = entity.pipes
+            for pipe in pipes:
+                resp = self.__call__(pipe)
+                if not resp: return False
+            return True
+
+        response, elapsed = self.execute(*self.prepare(entity, position))
+        return self.parse(response, entity, position)
+
+    def prepare(self,
+                entity: Union[Entity, Prototype],
+                position: Optional[Position] = None) -> Tuple:
         if not isinstance(entity, (Prototype, Entity, EntityGroup)):
             raise ValueError("The first argument must be an Entity or Prototype object")
         if isinstance(entity, Entity) and isinstance(position, Position):
             raise ValueError("If the first argument is an Entity object, the second argument must be None")
         if position is not None and not isinstance(position, Position):
             raise ValueError("The second argument must be a Position object")
+        if isinstance(entity, (BeltGroup, PipeGroup)):
+            raise ValueError("Groups are picked up one entity at a time, so pick up each of its entities instead")
 
         if isinstance(entity, Prototype):
             name, _ = entity.value
         else:
             name = entity.name
-            if isinstance(entity, BeltGroup):
-                belts = entity.belts
-                for belt in belts:
-                    resp = self.__call__(belt)
-                    if not resp: return False
-                return True
-            elif isinstance(entity, PipeGroup):
-                pipes = entity.pipes
-                for pipe in pipes:
-                    resp = self.__call__(pipe)
-                    if not resp: return False
-                return True
 
         if position:
             x, y = position.x, position.y
@@ -51,7 +60,9 @@ class PickupEntity(Action):
         else:
             raise ValueError("The second argument must be a Position object")
 
-        response, elapsed = self.execute(PLAYER, x, y, name)
+        return PLAYER, x, y, name
+
+    def parse(self, response, entity: Union[Entity, Prototype], position: Optional[Position] = None) -> bool:
         if response != 1 and response != {}:
             raise Exception(f"Could not pickup: {self.get_error_message(response)}")
         return True
@@ -36,13 +36,47 @@ class PlaceObject(Action):
         :param exact: If True, place entity at exact position, else place entity at nearest possible position
         :return: Entity object
         """
+        args = self.prepare(entity, direction, position, exact)
+        try:
+            # If we are in `fast` mode, this is synchronous
+            response, elapsed = self.execute(*args)
+        except Exception as e:
+            _, name, _, x, y, _ = args
+            try:
+                msg = self.get_error_message(str(e))
+                raise Exception(f"Could not place {name} at ({x}, {y}), {msg}")
+            except Exception:
+                raise Exception(f"Could not place {name} at ({x}, {y})", e)
 
-        #if not isinstance(entity, Prototype):
-        #    raise ValueError("The first argument must be a Prototype object")
+        return self.parse(response, entity, direction, position, exact)
 
+    def _resolve(self, entity: Prototype) -> Tuple[str, type]:
+        """The name and entity class of a prototype"""
+        try:
+            name, metaclass = entity.value
+            while isinstance(metaclass, tuple):
+                metaclass = metaclass[1]
+        except Exception as e:
+            raise Exception(f"Passed in {entity} argument is not a valid Prototype", e)
+        return name, metaclass
+
+    @staticmethod
+    def _as_position(position) -> Position:
         # If position is a tuple, cast it to a Position object:
         if isinstance(position, tuple):
             position = Position(x=position[0], y=position[1])
+        return position
+
+    def prepare(self,
+                entity: Prototype,
+                direction: Direction = Direction.UP,
+                position: Position = Position(x=0, y=0),
+                exact: bool = True) -> Tuple:
+
+        #if not isinstance(entity, Prototype):
+        #    raise ValueError("The first argument must be a Prototype object")
+
+        position = self._as_position(position)
 
         if not isinstance(position, Position):
             raise ValueError("The first argument must be a Prototype object")
@@ -51,25 +85,19 @@ class PlaceObject(Action):
             raise ValueError("The second argument must be a Direction object")
 
         x, y = self.get_position(position)
-        try:
-            name, metaclass = entity.value
-            while isinstance(metaclass, tuple):
-                metaclass = metaclass[1]
-        except Exception as e:
-            raise Exception(f"Passed in {entity} argument is not a valid Prototype", e)
-
+        name, _ = self._resolve(entity)
         factorio_direction = Direction.to_factorio_direction(direction)
-
-        try:
-            # If we are in `fast` mode, this is synchronous
-            response, elapsed = self.execute(PLAYER, name, factorio_direction, x, y, exact)
-        except Exception as e:
-            try:
-                msg = self.get_error_message(str(e))
-                raise Exception(f"Could not place {name} at ({x}, {y}), {msg}")
-            except Exception:
-                raise Exception(f"Could not place {name} at ({x}, {y})", e)
-
+        return PLAYER, name, factorio_direction, x, y, exact
+
+    def parse(self,
+              response,
+              entity: Prototype,
+              direction: Direction = Direction.UP,
+              position: Position = Position(x=0, y=0),
+              exact: bool = True) -> Entity:
+        position = self._as_position(position)
+        x, y = self.get_position(position)
+        name, metaclass = self._resolve(entity)
 
         # If we are in `slow` mode, there is a delay between placing the entity and the entity being created
         if not self.game_state.instance.fast:
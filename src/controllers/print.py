@@ -6,6 +6,9 @@ from factorio_entities import Entity, Inventory, Position
 
 class Print(Action):
 
+    # Printing doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
@@ -18,6 +18,10 @@ class RotateEntity(Action):
         :example rotate_entity(iron_chest, Direction.UP)
         :return: Returns the rotated entity
         """
+        response, elapsed = self.execute(*self.prepare(entity, direction))
+        return self.parse(response, entity, direction)
+
+    def prepare(self, entity: Entity, direction: Direction = Direction.UP) -> tuple:
         if not isinstance(entity, Entity):
             raise ValueError("The first argument must be an Entity object")
         if entity is None:
@@ -25,21 +29,16 @@ class RotateEntity(Action):
         if not isinstance(direction, (Direction, DirectionA)) and not (hasattr(direction, "name") and hasattr(direction, "value")):
             raise ValueError("The second argument must be a Direction")
 
-        try:
-            x, y = self.get_position(entity.position)
-
-            # get metaclass from pydantic model
-            metaclass = entity.__class__
+        x, y = self.get_position(entity.position)
+        factorio_direction = Direction.to_factorio_direction(direction)
+        return PLAYER, x, y, factorio_direction, entity.name
 
-            factorio_direction = Direction.to_factorio_direction(direction)
+    def parse(self, response, entity: Entity, direction: Direction = Direction.UP) -> Entity:
+        if not response:
+            raise Exception(f"Could not rotate: {response}")
 
-            response, elapsed = self.execute(PLAYER, x, y, factorio_direction, entity.name)
-
-            if not response:
-                raise Exception(f"Could not rotate: {response}")
-
-        except Exception as e:
-            raise e
+        # get metaclass from pydantic model
+        metaclass = entity.__class__
 
         cleaned_response = self.clean_response(response)
 
@@ -3,6 +3,9 @@ from controllers.__action import Action
 
 class Reward(Action):
 
+    # Reading the production score doesn't change the game
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
         self.name = "score"
@@ -18,7 +18,10 @@ class SetEntityRecipe(Action):
         :param prototype: The prototype to set as recipe
         :return: Entity that had its recipe set
         """
+        response, elapsed = self.execute(*self.prepare(entity, prototype))
+        return self.parse(response, entity, prototype)
 
+    def prepare(self, entity: Entity, prototype: Prototype) -> Tuple:
         x, y = entity.position.x, entity.position.y
         try:
 
@@ -30,8 +33,10 @@ class SetEntityRecipe(Action):
         #    x -= self.game_state.last_observed_player_location[0]
         #    y -= self.game_state.last_observed_player_location[1]
 
-        response, elapsed = self.execute(PLAYER, name, x, y)
+        return PLAYER, name, x, y
 
+    def parse(self, response, entity: Entity, prototype: Prototype) -> Entity:
+        name, _ = prototype.value
         if not isinstance(response, dict):
             raise Exception(f"Could not set recipe to {name}"+str(response).split(":")[-1].strip())
 
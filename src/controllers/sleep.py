@@ -1,10 +1,12 @@
-
 from time import sleep
 
 from controllers.__action import Action
 
 class Sleep(Action):
 
+    # Waiting doesn't change the game, and the game has ticked by the time it returns
+    updates_state = False
+
     def __init__(self, connection, game_state):
         super().__init__(connection, game_state)
 
@@ -14,18 +16,29 @@ class Sleep(Action):
         :param seconds: Number of seconds to sleep.
         :return: True if sleep was successful.
         """
-        # Get initial tick
-        ticks_elapsed = 0
-        start_tick, _ = self.execute(-1)
-        target_ticks = seconds * 60  # Convert seconds to ticks (60 ticks = 1 second)
+        ticks = int(seconds * 60)  # Convert seconds to ticks (60 ticks = 1 second)
+        response, _ = self.execute(ticks)
+        self.wait_until(response['tick'] + ticks)
+        return True
 
-        while True:
-            current_tick, _ = self.execute(ticks_elapsed)
-            ticks_elapsed = current_tick - start_tick
-
-            if ticks_elapsed >= target_ticks:
-                return True
+    def wait_ticks(self, ticks: int) -> int:
+        """
+        Block until `ticks` game ticks have passed, without counting them as time spent by the agent.
+        :return: The current tick
+        """
+        response, _ = self.execute(0)
+        return self.wait_until(response['tick'] + ticks)
 
-            # Sleep for a small interval to prevent excessive polling
-            # Using 0.05 seconds (50ms) as a reasonable polling interval
-            sleep(0.05)
+    def wait_until(self, target_tick: int) -> int:
+        """
+        Block until the game reaches `target_tick`. Rather than polling at a fixed interval, this sleeps for the
+        wall-clock time the remaining ticks take at the current game speed, so that a server running at a raised
+        `game.speed` is waited on for proportionally less time.
+        :return: The current tick
+        """
+        while True:
+            response, _ = self.execute(0)
+            remaining_ticks = target_tick - response['tick']
+            if remaining_ticks <= 0:
+                return response['tick']
+            sleep(remaining_ticks / (60 * response['speed']))
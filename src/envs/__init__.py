@@ -1 +1,9 @@
-from .factorio_environment import FactorioEnv
\ No newline at end of file
+from .factorio_environment import FactorioEnv
+
+
+def __getattr__(name):
+    # The vector env is only imported when it's used
+    if name == 'FactorioVectorEnv':
+        from .factorio_vector_env import FactorioVectorEnv
+        return FactorioVectorEnv
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from copy import deepcopy
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from gymnasium import Env
+from gymnasium.vector import AutoresetMode, SyncVectorEnv
+from gymnasium.vector.utils import concatenate, iterate
+
+from .factorio_environment import FactorioEnv
+
+
+class FactorioVectorEnv(SyncVectorEnv):
+    """
+    Runs several environments (e.g one per Factorio server) behind the batched `reset`/`step` API, stepping them
+    concurrently. Each environment gets its own worker thread, as the time is spent waiting on its server, so a step
+    of N environments takes about as long as the slowest one's rather than the sum of them.
+
+    Spaces, infos and autoreset follow `SyncVectorEnv`. By default an environment that finishes an episode is reset
+    in the same step, with the last observation and info of the episode in the infos' `final_obs` and `final_info`.
+
+        env = FactorioVectorEnv.from_ports([27000, 27001, 27002], address='localhost', inventory={'coal': 50})
+        observations, infos = env.reset()
+        observations, rewards, terminations, truncations, infos = env.step(("print(inspect_inventory())",) * 3)
+
+    :param env_fns: Functions that create the environments, called concurrently (connecting to a server and loading
+    its scripts takes a while)
+    :param copy: Whether `reset` and `step` return a copy of the observations, rather than arrays that the next step
+    overwrites
+    """
+
+    def __init__(self,
+                 env_fns: Iterable[Callable[[], Env]],
+                 copy: bool = True,
+                 observation_mode: str = "same",
+                 autoreset_mode: Union[str, AutoresetMode] = AutoresetMode.SAME_STEP):
+        env_fns = list(env_fns)
+        self.executors = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"factorio-env-{i}")
+                          for i in range(len(env_fns))]
+        envs = self._map(lambda index: env_fns[index](), range(len(env_fns)))
+        super().__init__([lambda env=env: env for env in envs], copy=copy, observation_mode=observation_mode,
+                         autoreset_mode=autoreset_mode)
+        self.env_fns = env_fns
+
+    @classmethod
+    def from_ports(cls, tcp_ports: Iterable[int], env_class: Callable[..., Env] = FactorioEnv,
+                   **env_kwargs) -> 'FactorioVectorEnv':
+        """
+        An environment per Factorio server.
+        :param env_class: The environment to create for each server, which takes its `tcp_port` (and `env_kwargs`)
+        :param env_kwargs: Passed to each environment, e.g `address` or `inventory`
+        """
+        return cls([lambda port=port: env_class(tcp_port=port, **env_kwargs) for port in tcp_ports])
+
+    def _map(self, fn: Callable, indices: Iterable[int], *args_per_env: Sequence) -> List[Any]:
+        """Run `fn(index, *args)` for each environment on its worker, and return the results in order"""
+        futures = [self.executors[index].submit(fn, index, *args)
+                   for index, *args in zip(indices, *args_per_env)]
+        wait(futures)
+        # Raises the first environment's error, if any
+        return [future.result() for future in futures]
+
+    def reset(self, *, seed: Optional[Union[int, List[Optional[int]]]] = None,
+              options: Optional[dict] = None) -> Tuple[Any, Dict[str, Any]]:
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        if len(seed) != self.num_envs:
+            raise ValueError(f"If seeds are passed as a list the length must match num_envs={self.num_envs} but got "
+                             f"length={len(seed)}.")
+
+        reset_mask = np.ones(self.num_envs, dtype=np.bool_)
+        if options is not None and "reset_mask" in options:
+            options = dict(options)
+            reset_mask = np.asarray(options.pop("reset_mask"), dtype=np.bool_)
+        indices = np.flatnonzero(reset_mask)
+
+        def reset(index, single_seed):
+            self._env_obs[index], info = self.envs[index].reset(seed=single_seed, options=options)
+            return info
+
+        self._terminations[reset_mask] = False
+        self._truncations[reset_mask] = False
+        self._autoreset_envs[reset_mask] = False
+        infos = {}
+        for index, info in zip(indices, self._map(reset, indices, [seed[index] for index in indices])):
+            infos = self._add_info(infos, info, index)
+
+        self._observations = concatenate(self.single_observation_space, self._env_obs, self._observations)
+        return deepcopy(self._observations) if self.copy else self._observations, infos
+
+    def _step(self, index: int, action) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Step (or autoreset) one environment, returning its info and, if it was reset, its final observation"""
+        env = self.envs[index]
+        if self.autoreset_mode == AutoresetMode.NEXT_STEP and self._autoreset_envs[index]:
+            self._env_obs[index], info = env.reset()
+            self._rewards[index] = 0.0
+            self._terminations[index] = False
+            self._truncations[index] = False
+            return info, None
+        if self.autoreset_mode == AutoresetMode.DISABLED:
+            assert not self._autoreset_envs[index], f"{self._autoreset_envs=}"
+
+        (self._env_obs[index], self._rewards[index], self._terminations[index], self._truncations[index],
+         info) = env.step(action)
+        if self.autoreset_mode == AutoresetMode.SAME_STEP and (self._terminations[index] or self._truncations[index]):
+            final = {"final_obs": self._env_obs[index], "final_info": info}
+            self._env_obs[index], info = env.reset()
+            return info, final
+        return info, None
+
+    def step(self, actions) -> Tuple[Any, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        results = self._map(self._step, range(self.num_envs), list(iterate(self.action_space, actions)))
+        infos = {}
+        for index, (info, final) in enumerate(results):
+            if final is not None:
+                infos = self._add_info(infos, final, index)
+            infos = self._add_info(infos, info, index)
+
+        self._observations = concatenate(self.single_observation_space, self._env_obs, self._observations)
+        self._autoreset_envs = np.logical_or(self._terminations, self._truncations)
+        return (deepcopy(self._observations) if self.copy else self._observations,
+                np.copy(self._rewards),
+                np.copy(self._terminations),
+                np.copy(self._truncations),
+                infos)
+
+    def call(self, name: str, *args, **kwargs) -> tuple:
+        """Call (or get) `name` on every environment, concurrently"""
+        def call(index):
+            function = getattr(self.envs[index], name)
+            return function(*args, **kwargs) if callable(function) else function
+
+        return tuple(self._map(call, range(self.num_envs)))
+
+    def close_extras(self, **kwargs):
+        super().close_extras(**kwargs)
+        for executor in self.executors:
+            executor.shutdown()
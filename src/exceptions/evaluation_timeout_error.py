@@ -0,0 +1,7 @@
+class EvaluationTimeoutError(BaseException):
+    """
+    Raised in a program that runs past its deadline. It isn't an `Exception`, so that a program's own
+    `except Exception` handlers can't swallow it and carry on.
+    """
+    def __init__(self, message: str = "Evaluation timed out"):
+        super().__init__(message)
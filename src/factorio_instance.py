@@ -3,25 +3,24 @@ import atexit
 import atexit
 import enum
 import functools
-import importlib
 import inspect
 import json
 import os
 import shutil
-import signal
 import sys
 import threading
 import time
 import traceback
 import types
+from collections import OrderedDict
 from concurrent.futures import TimeoutError
 from datetime import datetime
-from pathlib import Path
 from timeit import default_timer as timer
 
 from dotenv import load_dotenv
 from slpp import slpp as lua
 
+from controllers.__action import Action
 from factorio_entities import *
 from factorio_lua_script_manager import FactorioLuaScriptManager
 from factorio_namespace import FactorioNamespace
@@ -29,9 +28,9 @@ from factorio_transaction import FactorioTransaction
 from models.observation_state import ObservationState
 from models.research_state import ResearchState
 from search.model.game_state import GameState
-from src.factorio_rcon_utils import _lua2python
-from src.rcon.factorio_rcon import RCONClient
-from utilities.controller_loader import load_schema, load_definitions, parse_file_for_structure
+from src.factorio_rcon_utils import _lua2python, _json2python
+from src.rcon.factorio_rcon import RCONClient, PipelinedRCONClient
+from utilities.controller_loader import get_controller_artifact
 from vocabulary import Vocabulary
 
 CHUNK_SIZE = 32
@@ -81,12 +80,21 @@ class FactorioInstance:
                  inventory={},
                  cache_scripts=True,
                  all_technologies_researched=True,
-                 peaceful=True
+                 peaceful=True,
+                 pipelined_rcon=False,
+                 snapshot_capacity=8
                  ):
 
         self.persistent_vars = {}
 
         self.tcp_port = tcp_port
+        # A pipelined client keeps many commands in flight on one socket and can be shared between threads
+        self.pipelined_rcon = pipelined_rcon
+        # How many entity states to keep resident in the game for fast resets (0 disables snapshots)
+        self.snapshot_capacity = snapshot_capacity
+        self._resident_snapshots = OrderedDict()
+        # The state the game's entities were last loaded from or captured as, which captures are diffed against
+        self.entity_baseline: Optional[GameState] = None
         self.rcon_client, self.address = self.connect_to_server(address, tcp_port)
         self.all_technologies_researched = all_technologies_researched
         #self.game_state = ObservationState().with_default(vocabulary)
@@ -128,6 +136,8 @@ class FactorioInstance:
         self.namespace.reset()
 
         if not game_state:
+            self.entity_baseline = None
+
             # Reset the game instance
             self._reset(**self.initial_inventory if isinstance(self.initial_inventory,
                                                                dict) else self.initial_inventory.__dict__)
@@ -144,7 +154,8 @@ class FactorioInstance:
             self._reset(**dict(game_state.inventory))
 
             # Load entities into the game
-            self.namespace._load_entity_state(game_state.entities, decompress=True)
+            self._load_entities(game_state)
+            self.entity_baseline = game_state
 
             # Load research state into the game
             self.namespace._load_research_state(game_state.research)
@@ -213,33 +224,22 @@ class FactorioInstance:
         This includes all the available actions, objects, and entities that the agent can interact with.
 
         We get the system prompt by loading the schema, definitions, and entity definitions from their source files.
+        This is done once per process (and content hash of the sources), and shared by all instances.
 
         These are converted to their signatures - leaving out the implementations.
         :return:
         """
         execution_path = os.path.dirname(os.path.realpath(__file__))
-        folder_path = f'{execution_path}/controllers'
-        schema = load_schema(folder_path, with_docstring=True).replace("temp_module.", "")
-        type_definitions = load_definitions(f'{execution_path}/factorio_types.py')
-        # Filter `import` statements and `from` statements
-        type_definitions = "\n".join(list(
-            filter(lambda x: not x.startswith("import") and not x.startswith("from") and not x.lstrip().startswith('#'), type_definitions.split("\n"))))
-        type_definitions = type_definitions.replace("\n\n\n", "\n").replace("\n\n", "\n").strip()
-        # get everything from and including class Prototype(enum.Enum):
-        type_definitions = type_definitions[type_definitions.index("class Prototype(enum.Enum"):]
-        # entity_definitions = load_definitions(f'{execution_path}/factorio_entities.py')
-        entity_definitions = parse_file_for_structure(f'{execution_path}/factorio_entities.py')
-        brief = f"```types\n{type_definitions}\n```\n```objects\n{entity_definitions}\n```\n```tools\n{schema}\n```"
-
-        return brief
+        return get_controller_artifact(execution_path).system_prompt
 
     def connect_to_server(self, address, tcp_port):
+        client_class = PipelinedRCONClient if self.pipelined_rcon else RCONClient
         try:
-            rcon_client = RCONClient(address, tcp_port, 'factorio') #'quai2eeha3Lae7v')
+            rcon_client = client_class(address, tcp_port, 'factorio') #'quai2eeha3Lae7v')
             address = address
         except ConnectionError as e:
             print(e)
-            rcon_client = RCONClient('localhost', tcp_port, 'factorio')
+            rcon_client = client_class('localhost', tcp_port, 'factorio')
             address = 'localhost'
 
         try:
@@ -257,72 +257,58 @@ class FactorioInstance:
         print(f"Connected to {address} client at tcp/{tcp_port}.")
         return rcon_client, address
 
+    def reconnect(self):
+        """
+        Connect to the server again, e.g after it was restarted or stopped responding, and load the scripts and the
+        initial inventory back into it. The namespace's variables are kept.
+        """
+        self.rcon_client.close()
+        self.rcon_client, self.address = self.connect_to_server(self.address, self.tcp_port)
+
+        # A restarted server has lost the scripts, and any snapshots or baseline kept in the game
+        self.lua_script_manager = FactorioLuaScriptManager(self.rcon_client, self.lua_script_manager.cache_scripts)
+        self.script_dict = {**self.lua_script_manager.action_scripts, **self.lua_script_manager.init_scripts}
+        self.setup_controllers(self.lua_script_manager)
+        self._resident_snapshots.clear()
+        self.entity_baseline = None
+
+        self.initialise(self.fast, **self.initial_inventory if isinstance(self.initial_inventory, dict)
+                        else self.initial_inventory.__dict__)
+
     def setup_controllers(self, lua_script_manager):
         """
         Here we load all the Python controllers into the namespace, e.g `inspect_inventory(), nearest(), ect`
         @param lua_script_manager:
         @return:
         """
-        # Define the directory containing the callable class files
-        callable_classes_directory = "controllers"
-
-        # Get the local execution directory
+        # The controller classes are imported once per process, and shared by every instance
         local_directory = os.path.dirname(os.path.realpath(__file__))
+        controller_classes = get_controller_artifact(local_directory).controller_classes
 
-        def snake_to_camel(snake_str):
-            return "".join(word.capitalize() for word in snake_str.split("_"))
+        # Send every action that isn't already in the game in one batch, rather than one round trip per controller
+        lua_script_manager.load_actions_into_game(
+            callable_class.camel_to_snake(callable_class.__name__)
+            for callable_class in controller_classes.values() if issubclass(callable_class, Action))
 
         # Store the callable instances in a dictionary
         self.controllers = {}
 
-        # Loop through the files in the directory
-        for file in os.listdir(os.path.join(local_directory, callable_classes_directory)):
-            # Check if the file is a Python file and does not start with '_'
-            if file.endswith(".py") and not file.startswith("__"):
-                # Load the module
-                module_name = Path(file).stem
-                module_spec = importlib.util.spec_from_file_location(module_name,
-                                                                     os.path.join(os.path.join(local_directory, callable_classes_directory), file))
-                module = importlib.util.module_from_spec(module_spec)
-                module_spec.loader.exec_module(module)
-
-                class_name = snake_to_camel(module_name)
-
-                # We have to rename these because on windows environments it fails silently (for some reason)
-                if module_name == "place_entity":
-                    class_name = "PlaceObject"
-                if module_name == "score":
-                    class_name = "Reward"
-                # Get the callable class
-                callable_class = getattr(module, class_name)
-
-                # Create an instance of the callable class
-                try:
-                    callable_instance = callable_class(lua_script_manager, self.namespace)
-                    self.controllers[module_name.lower()] = callable_instance
-                except Exception as e:
-                    raise Exception(f"Could not instantiate {class_name}. {e}")
-                # Add the instance as a member method
-                setattr(self.namespace, module_name.lower(), callable_instance)
-        pass
+        for module_name, callable_class in controller_classes.items():
+            # Create an instance of the callable class, or get the one that another controller already created
+            try:
+                callable_instance = callable_class.shared(lua_script_manager, self.namespace)
+                self.controllers[module_name] = callable_instance
+            except Exception as e:
+                raise Exception(f"Could not instantiate {callable_class.__name__}. {e}")
+            # Add the instance as a member method
+            setattr(self.namespace, module_name, callable_instance)
 
 
     def eval_with_error(self, expr, timeout=60):
         """ Evaluate an expression with a timeout, and return the result without error handling"""
-        # with ThreadPoolExecutor(max_workers=1) as executor:
-        #     future = executor.submit(self._eval_with_timeout, expr)
-        #     score, goal, result = future.result(timeout)
-        #     return score, goal, result
-        def handler(signum, frame):
-            raise TimeoutError()
-
-        signal.signal(signal.SIGALRM, handler)
-        signal.alarm(timeout)
-
-        try:
-            return self.namespace.eval_with_timeout(expr)
-        finally:
-            signal.alarm(0)
+        # Unlike SIGALRM, the namespace's deadline works off the main thread, so several instances can be evaluated
+        # concurrently from worker threads
+        return self.namespace.eval_with_timeout(expr, timeout)
 
 
     def eval(self, expr, timeout=60):
@@ -494,6 +480,75 @@ class FactorioInstance:
     #     #self.rcon_client.send_command(f'/c game.players[1].print("[img=entity/character][color=orange]" {{"{comment}"}},": ",{args}}})')
     #     self.rcon_client.send_command(f"[img=entity/character] " + str(comment) + ", ".join(args))
 
+    def execute_many(self, calls: List[Tuple]) -> List[Tuple[bool, Any]]:
+        """
+        Make several tool calls in a single RCON round-trip, e.g to place the entities of a blueprint or skill.
+        Each call is `(controller_name, *args)`, with the arguments that the tool takes, e.g
+        `('place_entity', Prototype.IronChest, Direction.UP, Position(x=0, y=0))`. The arguments are checked and
+        converted by the controller's `prepare`, and each response is handled by its `parse`, so a result is what
+        calling the tool would have returned. Every call runs under its own `pcall`, so a failing call doesn't
+        prevent the calls after it from running.
+        :param calls: Tool calls, made in order. Only tools that implement `prepare` can be batched, and invalid
+        arguments raise before any call is made
+        :return: A `(success, result)` tuple per call, where `result` is the exception the call raised if it failed
+        """
+        if not calls:
+            return []
+
+        statements = []
+        updates_state = False
+        for index, (name, *args) in enumerate(calls, 1):
+            if name not in self.controllers:
+                raise ValueError(f"No controller named {name}")
+            controller = self.controllers[name]
+            statements.append(f"r[{index}] = {{{controller.invocation(*controller.prepare(*args))}}}")
+            updates_state = updates_state or controller.updates_state
+
+        barrier = " global.last_action_tick = game.tick;" if updates_state else ""
+        script = f"/silent-command local r = {{}}; {'; '.join(statements)};{barrier} rcon.print(dump_response(true, r))"
+
+        start = timer()
+        lua_response = self.rcon_client.send_command(script)
+        parsed = _json2python(script, lua_response, start=start) or _lua2python(script, lua_response, start=start)
+        output = parsed[0] if parsed else None
+        if not isinstance(output, dict) or 'b' not in output:
+            raise Exception(f"Could not execute batch: {lua_response}")
+
+        results = []
+        for (name, *args), response in zip(calls, output['b']):
+            response = response if isinstance(response, list) else [response]
+            value = response[1] if len(response) > 1 else None
+            try:
+                result = self.controllers[name].parse(value, *args)
+                if not response[0]:
+                    # The tool's own handling didn't reject the error message, so raise it as it is
+                    raise Exception(value)
+                results.append((True, result))
+            except Exception as e:
+                results.append((False, e))
+        return results
+
+    def _load_entities(self, game_state: GameState):
+        """
+        Loads the entities of `game_state`, restoring from a resident snapshot where possible.
+        A hot state is restored with a single small command, rather than re-sending the serialized entities.
+        """
+        if not self.snapshot_capacity:
+            self.namespace._load_entity_state(game_state.resolve().entities, decompress=True)
+            return
+
+        key = game_state.entities_hash()
+        if key in self._resident_snapshots and self.namespace._restore_snapshot(key):
+            self._resident_snapshots.move_to_end(key)
+            return
+
+        # Not resident (or evicted / lost on a server restart), so send it and keep it for next time
+        self.namespace._restore_snapshot(key, game_state.resolve().entities, decompress=True, capacity=self.snapshot_capacity)
+        self._resident_snapshots[key] = True
+        self._resident_snapshots.move_to_end(key)
+        while len(self._resident_snapshots) > self.snapshot_capacity:
+            self._resident_snapshots.popitem(last=False)
+
     def _reset_static_achievement_counters(self):
         """
         This resets the cached production flows that we track for achievements and diversity sampling.
@@ -592,13 +647,8 @@ class FactorioInstance:
         self.add_command(f'/c player = game.players[{PLAYER}]', raw=True)
         self.execute_transaction()
 
-        self.lua_script_manager.load_init_into_game('initialise')
-        self.lua_script_manager.load_init_into_game('clear_entities')
-        self.lua_script_manager.load_init_into_game('alerts')
-        self.lua_script_manager.load_init_into_game('util')
-        self.lua_script_manager.load_init_into_game('serialize')
-        self.lua_script_manager.load_init_into_game('production_score')
-        self.lua_script_manager.load_init_into_game('initialise_inventory')
+        self.lua_script_manager.load_inits_into_game(['initialise', 'clear_entities', 'alerts', 'util', 'serialize',
+                                                      'production_score', 'initialise_inventory'])
 
         self._reset(**kwargs)
 
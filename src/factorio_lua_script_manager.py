@@ -1,18 +1,28 @@
 import hashlib
 import json
+import threading
 from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
 from factorio_rcon_utils import _load_init, _get_action_dir, _get_init_dir, _get_action_names, _load_script, \
     _get_init_names, _load_action
 from src.rcon.factorio_rcon import RCONClient
 
 from lupa.lua54 import LuaRuntime
 
+# Scripts are the same for every instance, so each version of a script (by checksum) only needs to be syntax checked
+# once per process. The runtime isn't thread-safe, so it is shared behind a lock.
+_syntax_checked: Dict[str, Tuple[bool, str]] = {}
+_syntax_lock = threading.Lock()
+_lua = None
+
+
 class FactorioLuaScriptManager:
     def __init__(self,
                  rcon_client: RCONClient,
                  cache_scripts: bool = False):
         self.rcon_client = rcon_client
         self.cache_scripts = cache_scripts
+        self.game_checksums = {}
         if not cache_scripts:
             self._clear_game_checksums(rcon_client)
         self.action_directory = _get_action_dir()
@@ -22,7 +32,10 @@ class FactorioLuaScriptManager:
             self.game_checksums = self._get_game_checksums(rcon_client)
         self.action_scripts = self.get_actions_to_load()
         self.init_scripts = self.get_inits_to_load()
-        self.lua = LuaRuntime(unpack_returned_tuples=True)
+        # Actions that are in the game as they are on disk, and so don't need to be sent again by this manager
+        self.loaded_actions = set()
+        # One controller of each kind per game, shared by the namespace and by the controllers that use it
+        self.controllers = {}
 
     def init_action_checksums(self):
         checksum_init_script = _load_init("checksum")
@@ -30,8 +43,19 @@ class FactorioLuaScriptManager:
         return response
 
     def check_lua_syntax(self, script):
+        global _lua
+        checksum = self.calculate_checksum(script)
+        with _syntax_lock:
+            if checksum not in _syntax_checked:
+                if _lua is None:
+                    _lua = LuaRuntime(unpack_returned_tuples=True)
+                _syntax_checked[checksum] = self._check_lua_syntax(_lua, script)
+            return _syntax_checked[checksum]
+
+    @staticmethod
+    def _check_lua_syntax(lua, script):
         try:
-            self.lua.execute(script)
+            lua.execute(script)
             return True, None
         except Exception as e:
             if 'attempt to index a nil value' in e.args[0]:
@@ -40,41 +64,67 @@ class FactorioLuaScriptManager:
             return False, e.args[0]
 
     def load_action_into_game(self, name):
-
-        if name not in self.action_scripts:
-            # attempt to load the script from the filesystem
-            script = _load_action(name)
-            self.action_scripts[name] = script
-
-        script = self.action_scripts[name]
-        if self.cache_scripts:
-            checksum = self.calculate_checksum(script)
-            if name in self.game_checksums and self.game_checksums[name] == checksum:
-                return
-            self.update_game_checksum(self.rcon_client, name, checksum)
-
-        correct, error = self.check_lua_syntax(script)
-        if not correct:
-            raise Exception(f"Syntax error in: {name}: {error}")
-        print(f"{self.rcon_client.port}: Loading action {name} into game")
-
-        result = self.rcon_client.send_command(f'/c ' + script)
+        self.load_actions_into_game([name])
+
+    def load_actions_into_game(self, names: Iterable[str]):
+        """
+        Send the actions that aren't already in the game, checking their syntax first. All of them are sent in one
+        batch, followed by a single command that records their checksums.
+        """
+        scripts = {}
+        for name in names:
+            if name in self.loaded_actions or name in scripts:
+                continue
+            if name not in self.action_scripts:
+                # attempt to load the script from the filesystem
+                script = _load_action(name)
+                self.action_scripts[name] = script
+            scripts[name] = self.action_scripts[name]
+
+        to_send = self._changed_scripts(scripts)
+        for name, script in to_send.items():
+            correct, error = self.check_lua_syntax(script)
+            if not correct:
+                raise Exception(f"Syntax error in: {name}: {error}")
+        if to_send:
+            print(f"{self.rcon_client.port}: Loading actions {', '.join(to_send)} into game")
+            self._send_scripts(to_send)
+        self.loaded_actions.update(scripts)
 
     def load_init_into_game(self, name):
-        if name not in self.init_scripts:
-            # attempt to load the script from the filesystem
-            script = _load_init(name)
-            self.init_scripts[name] = script
-
-        script = self.init_scripts[name]
+        self.load_inits_into_game([name])
+
+    def load_inits_into_game(self, names: List[str]):
+        """Run the init scripts that have changed, in order and in one batch"""
+        scripts = {}
+        for name in names:
+            if name not in self.init_scripts:
+                # attempt to load the script from the filesystem
+                script = _load_init(name)
+                self.init_scripts[name] = script
+            scripts[name] = self.init_scripts[name]
+
+        to_send = self._changed_scripts(scripts)
+        if to_send:
+            self._send_scripts(to_send)
+
+    def _changed_scripts(self, scripts: Dict[str, str]) -> Dict[str, str]:
+        """The scripts whose checksum in the game differs from the one on disk (or all of them, without caching)"""
+        if not self.cache_scripts:
+            return scripts
+        return {name: script for name, script in scripts.items()
+                if self.game_checksums.get(name) != self.calculate_checksum(script)}
+
+    def _send_scripts(self, scripts: Dict[str, str]):
+        # RCON runs the commands of a batch in the order they are sent
+        commands = {name: '/c ' + script for name, script in scripts.items()}
         if self.cache_scripts:
-            checksum = self.calculate_checksum(script)
-            if name in self.game_checksums and self.game_checksums[name] == checksum:
-                return
-            self.update_game_checksum(self.rcon_client, name, checksum)
-
-        self.rcon_client.send_command(f'/c ' + script)
-
+            checksums = {name: self.calculate_checksum(script) for name, script in scripts.items()}
+            commands['__checksums'] = "/c " + " ".join(f"global.set_lua_script_checksum('{name}', '{checksum}')"
+                                                       for name, checksum in checksums.items())
+        self.rcon_client.send_commands(commands)
+        if self.cache_scripts:
+            self.game_checksums.update(checksums)
 
     def calculate_checksum(self, content: str) -> str:
         return hashlib.md5(content.encode()).hexdigest()
@@ -1,11 +1,16 @@
 import ast
 import builtins
+import copy
 import math
 import pickle
+import time
 import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
 from difflib import get_close_matches
-from typing import Optional, Union, List, Dict, Tuple, Set
+from typing import Any, Optional, Union, List, Dict, Tuple, Set
 
+from exceptions.evaluation_timeout_error import EvaluationTimeoutError
 from exceptions.hinting_name_error import HintingNameError, get_value_type_str
 from factorio_entities import Position, Direction, EntityStatus, BoundingBox, BeltGroup, Recipe, BuildingBox, PipeGroup, \
     ElectricityGroup, Pipe
@@ -14,6 +19,38 @@ from factorio_types import Prototype, Resource, Technology, prototype_by_name
 from search.model.game_state import SerializableFunction, wrap_for_serialization, GameState, \
     unwrap_after_deserialization
 
+# The filename programs are compiled under, which tells their frames apart from those of the tools they call
+PROGRAM_FILENAME = 'file'
+
+# The global through which natively executed program code checks the deadline (see `DeadlineChecks`)
+DEADLINE_CHECK = '__check_deadline__'
+
+
+class DeadlineChecks(ast.NodeTransformer):
+    """
+    Adds a deadline check to the start of every loop iteration and function call in code that runs natively rather
+    than statement by statement (function bodies, and statements such as `with` that aren't interpreted), and to
+    every item of a comprehension, so that such code can time out too. The checks are only compiled into the
+    program's own code, so the tools it calls run unchecked.
+    """
+
+    def _check(self, location):
+        call = ast.Call(func=ast.Name(id=DEADLINE_CHECK, ctx=ast.Load()), args=[], keywords=[])
+        return ast.copy_location(call, location)
+
+    def _prepend_check(self, node):
+        self.generic_visit(node)
+        node.body.insert(0, ast.copy_location(ast.Expr(value=self._check(node.body[0])), node.body[0]))
+        return node
+
+    visit_For = visit_AsyncFor = visit_While = _prepend_check
+    visit_FunctionDef = visit_AsyncFunctionDef = _prepend_check
+
+    def visit_comprehension(self, node):
+        self.generic_visit(node)
+        node.ifs.insert(0, self._check(node.iter))
+        return node
+
 
 class LoopContext:
     def __init__(self):
@@ -59,6 +96,15 @@ class FactorioNamespace:
 
         self.loop_context = LoopContext()
 
+        # Monotonic time after which execution is aborted with an EvaluationTimeoutError (None disables the check)
+        self._deadline = None
+        # Number of tool calls under way, so that the deadline is only checked before the outermost (see Controller)
+        self._tool_depth = 0
+
+        # Parsed programs by source, so that repeated evals of the same program reuse their (compiled) nodes
+        self._parse_cache = OrderedDict()
+        self._parse_cache_size = 128
+
         # Turn this on to capture the outputs of all statements, rather than just `print` statement logs.
         self.capture_whole_output = False
 
@@ -216,7 +262,7 @@ class FactorioNamespace:
         lines = expr.splitlines()
         error_lines = []
         for line in traceback_str.splitlines():
-            if 'File "file", line' in line:
+            if f'File "{PROGRAM_FILENAME}", line' in line:
                 line_num = int(line.split(", line")[1].split(",")[0])
                 if 1 <= line_num <= len(lines):
                     error_lines.append((line_num, lines[line_num - 1].strip()))
@@ -243,6 +289,33 @@ class FactorioNamespace:
                 node.body[subnode_idx] = self._change_print_to_log(subnode)
         return node
 
+    def _parse(self, expr):
+        """Parse a program, reusing the tree (and the code compiled for its nodes) if it was evaluated recently"""
+        tree = self._parse_cache.get(expr)
+        if tree is None:
+            tree = ast.parse(expr)
+            self._parse_cache[expr] = tree
+            if len(self._parse_cache) > self._parse_cache_size:
+                self._parse_cache.popitem(last=False)
+        else:
+            self._parse_cache.move_to_end(expr)
+        return tree
+
+    def _compile(self, node, mode):
+        """
+        Compile a node as an expression ('eval') or a statement ('exec'), caching the code object on the node.
+        Loop tests, iterators and bodies are therefore only compiled once, rather than on every iteration.
+        """
+        cache = node.__dict__.setdefault('_compiled', {})
+        compiled = cache.get(mode)
+        if compiled is None:
+            # The interpreted tree is left as it is, as it's checked statement by statement in `execute_node`
+            checked = DeadlineChecks().visit(copy.deepcopy(node))
+            wrapped = ast.Expression(checked) if mode == 'eval' else ast.Module([checked], type_ignores=[])
+            compiled = compile(ast.fix_missing_locations(wrapped), PROGRAM_FILENAME, mode)
+            cache[mode] = compiled
+        return compiled
+
     def execute_body(self, body, eval_dict, parent_node=None):
         """Execute a sequence of nodes while maintaining line numbers"""
         for n in body:
@@ -294,6 +367,8 @@ class FactorioNamespace:
         if hasattr(node, 'lineno'):
             self.line_value = node.lineno
 
+        self._check_deadline()
+
         if isinstance(node, ast.Break):
             return self.loop_context.handle_break()
 
@@ -303,7 +378,7 @@ class FactorioNamespace:
         elif isinstance(node, ast.For):
             try:
                 self.loop_context.enter_loop(node)
-                iter_obj = eval(compile(ast.Expression(node.iter), 'file', 'eval'), eval_dict)
+                iter_obj = eval(self._compile(node.iter, 'eval'), eval_dict)
                 for item in iter_obj:
                     self._assign_target(node.target, item, eval_dict)
                     result = self.execute_body(node.body, eval_dict, node)
@@ -323,7 +398,7 @@ class FactorioNamespace:
         elif isinstance(node, ast.While):
             self.loop_context.enter_loop(node)
             try:
-                while eval(compile(ast.Expression(node.test), 'file', 'eval'), eval_dict):
+                while eval(self._compile(node.test, 'eval'), eval_dict):
                     result = self.execute_body(node.body, eval_dict, node)
 
                     if self.loop_context.state == "BREAK":
@@ -340,7 +415,7 @@ class FactorioNamespace:
 
         elif isinstance(node, ast.If):
             # Handle if statements
-            test_result = eval(compile(ast.Expression(node.test), 'file', 'eval'), eval_dict)
+            test_result = eval(self._compile(node.test, 'eval'), eval_dict)
             if test_result:
                 self.execute_body(node.body, eval_dict, node)
             elif node.orelse:
@@ -386,9 +461,7 @@ class FactorioNamespace:
                 'args': arg_annotations
             })
 
-            wrapped_node = ast.Module([node], type_ignores=[])
-            compiled = compile(wrapped_node, 'file', 'exec')
-            exec(compiled, eval_dict)
+            exec(self._compile(node, 'exec'), eval_dict)
 
             func = eval_dict[node.name]
 
@@ -403,8 +476,7 @@ class FactorioNamespace:
             return True
 
         elif isinstance(node, ast.Assign):
-            compiled = compile(ast.Module([node], type_ignores=[]), 'file', 'exec')
-            exec(compiled, eval_dict)
+            exec(self._compile(node, 'exec'), eval_dict)
 
             targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
             for name in targets:
@@ -418,8 +490,7 @@ class FactorioNamespace:
 
         elif isinstance(node, ast.AnnAssign):
             if node.value:
-                compiled = compile(ast.Module([node], type_ignores=[]), 'file', 'exec')
-                exec(compiled, eval_dict)
+                exec(self._compile(node, 'exec'), eval_dict)
 
                 if isinstance(node.target, ast.Name):
                     name = node.target.id
@@ -435,9 +506,7 @@ class FactorioNamespace:
         elif isinstance(node, ast.Expr):
 
             # For expressions (including function calls)
-            compiled = compile(ast.Expression(node.value), 'file', 'eval')
-
-            response = eval(compiled, eval_dict)
+            response = eval(self._compile(node.value, 'eval'), eval_dict)
 
             # Only log if it's not a print statement (which has already been converted to log)
             if self.capture_whole_output:
@@ -460,8 +529,7 @@ class FactorioNamespace:
             except Exception as e:
                 handled = False
                 for handler in node.handlers:
-                    if handler.type is None or isinstance(e, eval(compile(ast.Expression(handler.type), 'file',
-                                                                          'eval'), eval_dict)):
+                    if handler.type is None or isinstance(e, eval(self._compile(handler.type, 'eval'), eval_dict)):
                         if handler.name:
                             eval_dict[handler.name] = e
                         self.execute_body(handler.body, eval_dict, handler)
@@ -479,11 +547,53 @@ class FactorioNamespace:
             return True
 
         else:
-            compiled = compile(ast.Module([node], type_ignores=[]), 'file', 'exec')
-            exec(compiled, eval_dict)
+            exec(self._compile(node, 'exec'), eval_dict)
             return True
 
-    def eval_with_timeout(self, expr):
+    def execute_many(self, calls: List[Tuple]) -> List[Tuple[bool, Any]]:
+        """
+        Make several tool calls at once, e.g `execute_many([('place_entity', Prototype.IronChest, Direction.UP,
+        Position(x=0, y=0)), ('place_entity', Prototype.IronChest, Direction.UP, Position(x=2, y=0))])`.
+        :param calls: `(tool_name, *args)` for each call, made in order
+        :return: A `(success, result)` tuple per call, where `result` is the error if the call failed
+        """
+        # Checked like a single tool call (see Controller)
+        if self._tool_depth == 0:
+            self._check_deadline()
+        self._tool_depth += 1
+        try:
+            return self.instance.execute_many(calls)
+        finally:
+            self._tool_depth -= 1
+
+    def _check_deadline(self) -> bool:
+        """Raise an EvaluationTimeoutError if the program has run past its deadline"""
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise EvaluationTimeoutError()
+        return True
+
+    @contextmanager
+    def _deadline_scope(self, timeout: Optional[float]):
+        """
+        Abort the program run within the block with an EvaluationTimeoutError once `timeout` seconds have passed.
+
+        The deadline is checked before each interpreted statement (see `execute_node`), at the start of every loop
+        iteration, function call and comprehension item of natively executed program code (see `DeadlineChecks`),
+        and before each tool call (see `Controller`). A tool that is already running is never interrupted, so its
+        RCON connection is left in a usable state. As the error isn't an Exception, and every further loop iteration
+        raises it again, a program can't catch it and carry on.
+        """
+        if timeout is None:
+            yield
+            return
+
+        self._deadline = time.monotonic() + timeout
+        try:
+            yield
+        finally:
+            self._deadline = None
+
+    def eval_with_timeout(self, expr, timeout: Optional[float] = None):
         """
         Executes a Python expression with a timeout and returns the result.
         Supports try-except blocks, type annotations, and nested control flows.
@@ -511,7 +621,7 @@ class FactorioNamespace:
             return node.lineno
 
 
-        tree = ast.parse(expr)
+        tree = self._parse(expr)
         self.logging_results = {}
         self.line_value = 0
         self.loop_context = LoopContext()
@@ -519,49 +629,51 @@ class FactorioNamespace:
         eval_dict = {
             **{name: getattr(builtins, name) for name in dir(builtins) if not name.startswith('_')},
             **{name: getattr(self, name) for name in dir(self) if not name.startswith('_')},
-            **self.persistent_vars
+            **self.persistent_vars,
+            DEADLINE_CHECK: self._check_deadline
         }
 
         last_successful_state = None
         had_error = False
 
         # Execute the expression
-        for index, node in enumerate(tree.body):
-            try:
-                node = self._change_print_to_log(node)
-                self.execute_node(node, eval_dict)
-                last_successful_state = dict(self.persistent_vars)
-            except (Exception, NameError) as e:
-
-                had_error = True
-                self._sequential_exception_count += 1
-                error_traceback = traceback.format_exc()
-                error_lines = self._extract_error_lines(expr, error_traceback)
-
-                error_message = ""
-                if error_lines:
-                    error_message += "Error occurred:\n"
-                    for line_num, line_content in error_lines:
-                        error_message += f"  Line {line_num}: {line_content}\n"
-                error_type = error_traceback.strip().split('\n')[-1]
-
-                if isinstance(e, NameError) and "name '" in str(e) and "' is not defined" in str(e):
-                    suggestions = [f"{sug} ({_type})" for sug, _type in self._get_suggestions_from_name_error(eval_dict, str(e))]
-                    error_message += f"\n{error_type}"
-                    if suggestions:
-                        error_message+=f"\nDid you mean one of these?\n{suggestions}"
-                else:
-                    error_message += f"\n{error_type}"
-
-                self.log(error_message)
-
-                if last_successful_state is not None:
-                    self.persistent_vars = last_successful_state.copy()
-
-                #if self._sequential_exception_count >= self.max_sequential_exception_count:
-                break
-
-            eval_dict.update(self.persistent_vars)
+        with self._deadline_scope(timeout):
+            for index, node in enumerate(tree.body):
+                try:
+                    node = self._change_print_to_log(node)
+                    self.execute_node(node, eval_dict)
+                    last_successful_state = dict(self.persistent_vars)
+                except (Exception, EvaluationTimeoutError) as e:
+
+                    had_error = True
+                    self._sequential_exception_count += 1
+                    error_traceback = traceback.format_exc()
+                    error_lines = self._extract_error_lines(expr, error_traceback)
+
+                    error_message = ""
+                    if error_lines:
+                        error_message += "Error occurred:\n"
+                        for line_num, line_content in error_lines:
+                            error_message += f"  Line {line_num}: {line_content}\n"
+                    error_type = error_traceback.strip().split('\n')[-1]
+
+                    if isinstance(e, NameError) and "name '" in str(e) and "' is not defined" in str(e):
+                        suggestions = [f"{sug} ({_type})" for sug, _type in self._get_suggestions_from_name_error(eval_dict, str(e))]
+                        error_message += f"\n{error_type}"
+                        if suggestions:
+                            error_message+=f"\nDid you mean one of these?\n{suggestions}"
+                    else:
+                        error_message += f"\n{error_type}"
+
+                    self.log(error_message)
+
+                    if last_successful_state is not None:
+                        self.persistent_vars = last_successful_state.copy()
+
+                    #if self._sequential_exception_count >= self.max_sequential_exception_count:
+                    break
+
+                eval_dict.update(self.persistent_vars)
 
         score, goal = self.score()
         result_output = parse_result_into_str(self.logging_results)
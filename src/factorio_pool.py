@@ -0,0 +1,355 @@
+import asyncio
+import functools
+import socket
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from factorio_instance import FactorioInstance
+
+IDLE = "idle"
+LEASED = "leased"
+CHECKING = "checking"
+QUARANTINED = "quarantined"
+
+
+@dataclass
+class InstanceHealth:
+    status: str = IDLE
+    failures: int = 0  # Consecutive failed checks
+    quarantined_until: float = 0
+    last_healthy: float = 0
+    leases: int = 0
+    errors: int = 0
+    worker: Optional[Future] = None  # The last call submitted to the instance's worker thread
+
+
+class FactorioPool:
+    """
+    A pool of Factorio instances that tasks lease from, rather than each task owning a fixed instance.
+
+    Tasks are dispatched to whichever instance is free first, so a slow server takes fewer tasks rather than holding
+    up the rest. When a task fails, its instance is probed before it is leased again: if the server doesn't answer it
+    is reconnected, and if that fails too it is quarantined, with a backoff, until a later health check can reconnect
+    it. Idle instances are probed every `probe_interval` seconds once `start` has been called.
+
+    Calls to an instance run on its own worker thread (see `call`), which `FactorioEvaluator` shares. A call that
+    times out keeps its worker busy, so its instance is only checked (and leased again) once the call has finished,
+    and is quarantined until then.
+
+    :param probe_timeout: Seconds a server has to answer a probe before it's considered unresponsive
+    :param reconnect_timeout: Seconds to reconnect and reload the scripts into a server
+    :param quarantine_time: Seconds an instance is quarantined for after its first failed check, doubled for each
+    consecutive failure up to `max_quarantine_time`
+    """
+
+    def __init__(self,
+                 instances: Iterable[FactorioInstance] = (),
+                 probe_interval: float = 30,
+                 probe_timeout: float = 10,
+                 reconnect_timeout: float = 60,
+                 quarantine_time: float = 30,
+                 max_quarantine_time: float = 600):
+        self.instances: List[FactorioInstance] = list(instances)
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.reconnect_timeout = reconnect_timeout
+        self.quarantine_time = quarantine_time
+        self.max_quarantine_time = max_quarantine_time
+
+        now = time.monotonic()
+        # By instance, as servers on different hosts can share a port
+        self.health: Dict[FactorioInstance, InstanceHealth] = {instance: InstanceHealth(last_healthy=now)
+                                                               for instance in self.instances}
+        self.executors: Dict[FactorioInstance, ThreadPoolExecutor] = {instance: self._create_executor(instance)
+                                                                      for instance in self.instances}
+        self._idle = deque(self.instances)
+        self._available = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def connect(cls, tcp_ports: Iterable[int], address: str = 'localhost', pool_kwargs: Dict = None,
+                      **instance_kwargs) -> 'FactorioPool':
+        """
+        Connect to the servers on `tcp_ports` concurrently. Servers that can't be connected to are left out.
+        :param instance_kwargs: Passed to each `FactorioInstance`
+        """
+        loop = asyncio.get_running_loop()
+        ports = list(tcp_ports)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(None, functools.partial(FactorioInstance, address=address, tcp_port=port,
+                                                         **instance_kwargs))
+            for port in ports), return_exceptions=True)
+        instances = []
+        for port, result in zip(ports, results):
+            if isinstance(result, Exception):
+                print(f"Could not connect to {address} at tcp/{port}, leaving it out of the pool: {result}")
+            else:
+                instances.append(result)
+        return cls(instances, **(pool_kwargs or {}))
+
+    @staticmethod
+    def _create_executor(instance: FactorioInstance) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"factorio-{instance.tcp_port}")
+
+    # Leasing
+
+    @property
+    def available(self) -> List[FactorioInstance]:
+        """The instances that aren't quarantined"""
+        return [instance for instance in self.instances if self.health[instance].status != QUARANTINED]
+
+    async def acquire(self, instance: Optional[FactorioInstance] = None,
+                      timeout: Optional[float] = None) -> FactorioInstance:
+        """
+        Lease the first instance to become free, or `instance` specifically.
+        :raises asyncio.TimeoutError: If no instance became free within `timeout` seconds
+        """
+        if instance is not None:
+            ready = lambda: instance in self._idle
+        else:
+            ready = lambda: bool(self._idle)
+        async with self._available:
+            await asyncio.wait_for(self._available.wait_for(ready), timeout)
+            if instance is None:
+                instance = self._idle.popleft()
+            else:
+                self._idle.remove(instance)
+        health = self.health[instance]
+        health.status = LEASED
+        health.leases += 1
+        return instance
+
+    async def release(self, instance: FactorioInstance, failed: bool = False) -> bool:
+        """
+        Return a leased instance to the pool. If the lease `failed`, the instance is checked first (and quarantined if
+        it can't be reconnected).
+        :return: Whether the instance is healthy
+        """
+        if failed:
+            self.health[instance].errors += 1
+            return await self._check(instance)
+        self.health[instance].last_healthy = time.monotonic()
+        await self._make_idle(instance)
+        return True
+
+    @asynccontextmanager
+    async def lease(self, instance: Optional[FactorioInstance] = None, timeout: Optional[float] = None):
+        """Lease an instance (see `acquire`) for the duration of the block"""
+        instance = await self.acquire(instance, timeout)
+        failed = True
+        try:
+            yield instance
+            failed = False
+        finally:
+            await self.release(instance, failed=failed)
+
+    async def _make_idle(self, instance: FactorioInstance):
+        async with self._available:
+            self.health[instance].status = IDLE
+            self._idle.append(instance)
+            self._available.notify_all()
+
+    # Dispatch
+
+    async def call(self, instance: FactorioInstance, func: Callable, *args, timeout: Optional[float] = None,
+                   **kwargs) -> Any:
+        """
+        Run a blocking call against `instance` on its worker thread. If it doesn't return within `timeout` seconds,
+        `asyncio.TimeoutError` is raised, and the call carries on in the background until `_check` interrupts it.
+        """
+        worker = self.executors[instance].submit(func, *args, **kwargs)
+        self.health[instance].worker = worker
+        return await asyncio.wait_for(asyncio.wrap_future(worker), timeout)
+
+    async def run(self, task: Callable[[FactorioInstance], Awaitable], retries: int = 2,
+                  timeout: Optional[float] = None, lease_timeout: Optional[float] = None) -> Any:
+        """
+        Run `task(instance)` on the first instance to become free. If the task fails and its instance turns out to be
+        unhealthy, the task is run again on another instance (up to `retries` times). Otherwise the error is the
+        task's own, and is raised.
+        :param timeout: Seconds the task has to finish, after which it's considered to have failed
+        """
+        for attempt in range(retries + 1):
+            instance = await self.acquire(timeout=lease_timeout)
+            try:
+                result = await asyncio.wait_for(task(instance), timeout)
+            except Exception:
+                healthy = await self.release(instance, failed=True)
+                if healthy or attempt == retries:
+                    raise
+                continue
+            except BaseException:
+                await self.release(instance, failed=True)
+                raise
+            await self.release(instance)
+            return result
+
+    async def map(self, task: Callable[[FactorioInstance, Any], Awaitable], items: Iterable, **kwargs) -> List:
+        """Run `task(instance, item)` for every item, each on whichever instance is free first (see `run`)"""
+        return await asyncio.gather(*(self.run(functools.partial(_call_with_item, task, item), **kwargs)
+                                      for item in items))
+
+    async def broadcast(self, func: Callable, *args, **kwargs) -> Dict[FactorioInstance, Any]:
+        """
+        Run a blocking `func(instance, *args, **kwargs)` on every instance that isn't quarantined.
+        :return: The result (or exception) of each instance
+        """
+        async def run_on(instance):
+            async with self.lease(instance):
+                return await self.call(instance, func, instance, *args, **kwargs)
+
+        instances = self.available
+        results = await asyncio.gather(*(run_on(instance) for instance in instances), return_exceptions=True)
+        return dict(zip(instances, results))
+
+    async def initialise(self, **inventory):
+        """Reset every instance, with `inventory` as its starting inventory (e.g `initialise(iron_ore=20)`)"""
+        # Item names are hyphenated, which keywords can't be
+        inventory = {name.replace('_', '-'): count for name, count in inventory.items()}
+
+        def reset(instance):
+            instance.initial_inventory = inventory
+            instance.reset()
+        return await self.broadcast(reset)
+
+    async def act(self, name: str, *args, **kwargs) -> Dict[FactorioInstance, Any]:
+        """Call the tool `name` (e.g `move_to`) in every instance's namespace"""
+        return await self.broadcast(lambda instance: getattr(instance.namespace, name)(*args, **kwargs))
+
+    async def observe(self) -> Dict[FactorioInstance, Any]:
+        """The inventory and entities of every instance"""
+        return await self.broadcast(lambda instance: (instance.namespace.inspect_inventory(),
+                                                      instance.namespace.get_entities()))
+
+    # Health
+
+    @staticmethod
+    def _ping(instance: FactorioInstance) -> bool:
+        # Runs an action, so it also fails if the scripts were lost (e.g the server restarted)
+        response, _ = instance.namespace.sleep.execute(0)
+        return isinstance(response, dict) and 'tick' in response
+
+    async def _probe(self, instance: FactorioInstance) -> bool:
+        try:
+            return await self.call(instance, self._ping, instance, timeout=self.probe_timeout)
+        except Exception:
+            return False
+
+    async def _reconnect(self, instance: FactorioInstance) -> bool:
+        try:
+            await self.call(instance, instance.reconnect, timeout=self.reconnect_timeout)
+            return True
+        except Exception as e:
+            print(f"Could not reconnect to tcp/{instance.tcp_port}: {e!r}")
+            return False
+
+    async def _finish_worker(self, instance: FactorioInstance) -> bool:
+        """
+        Wait for the last call on an instance's worker thread to finish. A call that is still waiting on the server
+        is interrupted by shutting down the instance's connection, which `_reconnect` then replaces.
+        :return: Whether the worker is free, rather than still busy after `probe_timeout` seconds
+        """
+        health = self.health[instance]
+        if health.worker is None or health.worker.done():
+            return True
+        rcon_socket = instance.rcon_client.rcon_socket
+        if rcon_socket is not None:
+            try:
+                rcon_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        # The worker runs its calls in order, so this finishes once every call before it has (or was cancelled)
+        health.worker = self.executors[instance].submit(int)
+        await asyncio.wait([asyncio.wrap_future(health.worker)], timeout=self.probe_timeout)
+        return health.worker.done()
+
+    async def _check(self, instance: FactorioInstance, reconnect: bool = False) -> bool:
+        """
+        Probe an instance that isn't leased or idle, reconnecting it if it doesn't answer. It's made idle if it's
+        healthy and quarantined otherwise, including while a call that timed out still holds its worker.
+        """
+        health = self.health[instance]
+        health.status = CHECKING
+        interrupted = health.worker is not None and not health.worker.done()
+        if await self._finish_worker(instance):
+            healthy = not (reconnect or interrupted) and await self._probe(instance)
+            # A probe that timed out is interrupted in turn
+            if not healthy and await self._finish_worker(instance):
+                healthy = await self._reconnect(instance) and await self._probe(instance)
+        else:
+            print(f"A call on tcp/{instance.tcp_port} is still running")
+            healthy = False
+
+        if healthy:
+            health.failures = 0
+            health.last_healthy = time.monotonic()
+            await self._make_idle(instance)
+        else:
+            health.failures += 1
+            health.status = QUARANTINED
+            backoff = min(self.quarantine_time * 2 ** (health.failures - 1), self.max_quarantine_time)
+            health.quarantined_until = time.monotonic() + backoff
+            print(f"Quarantined tcp/{instance.tcp_port} for {backoff:.0f}s after {health.failures} failed checks")
+        return healthy
+
+    async def check_health(self):
+        """
+        Probe the idle instances that haven't been used for `probe_interval` seconds, and try to reconnect the
+        quarantined instances that are due another attempt.
+        """
+        now = time.monotonic()
+        async with self._available:
+            stale = [instance for instance in self._idle
+                     if now - self.health[instance].last_healthy >= self.probe_interval]
+            for instance in stale:
+                self._idle.remove(instance)
+                self.health[instance].status = CHECKING
+        due = [instance for instance in self.instances
+               if self.health[instance].status == QUARANTINED
+               and self.health[instance].quarantined_until <= now]
+        for instance in due:
+            self.health[instance].status = CHECKING
+        await asyncio.gather(*(self._check(instance) for instance in stale),
+                             *(self._check(instance, reconnect=True) for instance in due))
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"Health check failed: {e}")
+
+    def start(self):
+        """Start checking the instances' health in the background (from within the event loop)"""
+        if self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    async def close(self):
+        await self.stop()
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, int]:
+        """How many instances are in each state"""
+        counts = {IDLE: 0, LEASED: 0, CHECKING: 0, QUARANTINED: 0}
+        for health in self.health.values():
+            counts[health.status] += 1
+        return counts
+
+
+def _call_with_item(task, item, instance):
+    return task(instance, item)
@@ -8,6 +8,14 @@ from factorio_rcon import AsyncRCONClient
 from timeit import default_timer as timer
 from slpp import slpp as lua
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# Version of the JSON response envelope written by `dump_response` in init/initialise.lua
+RESPONSE_PROTOCOL_VERSION = 1
+
 
 def _load_script(filename):
     with open(filename, "r", encoding='utf-8') as file:
@@ -81,6 +89,49 @@ def _remove_numerical_keys(dictionary):
         pruned = parts
     return pruned
 
+def _from_json_key(key):
+    return int(key) if key.lstrip('-').isdigit() else key
+
+def _from_json(value):
+    """Convert decoded JSON into the structure that slpp produces for the equivalent `dump()` output"""
+    if isinstance(value, str):
+        # Strings are quoted on the Lua side because `dump()` doesn't quote them itself
+        if len(value) > 1 and value[0] == '"' and value[-1] == '"':
+            return value[1:-1]
+        return value
+    if isinstance(value, dict):
+        return {_from_json_key(key): _from_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return {index: _from_json(item) for index, item in enumerate(value, 1)}
+    return value
+
+def _json2python(command, response, trace=False, start=0):
+    """
+    Parse a response in the JSON wire protocol. Returns None if the response isn't one (e.g because
+    `game.table_to_json` failed and `dump_response` fell back to `dump()`), so it can be parsed by `_lua2python`.
+    """
+    if not response:
+        return None
+    # Only the last transmission is considered the output - the rest are just messages
+    line = response[response.rfind("\n") + 1:]
+    if not line.startswith('{"'):
+        return None
+    try:
+        output = json_loads(line)
+    except ValueError:
+        return None
+    if not isinstance(output, dict) or output.pop('v', None) != RESPONSE_PROTOCOL_VERSION:
+        return None
+    end = timer()
+
+    if trace:
+        print("{hbar}\nCOMMAND: {command}\n\n{response}\n\nOUTPUT:{output}"
+              .format(hbar="-" * 100, command=command, response=response, output=output))
+
+    if 'b' in output:
+        output['b'] = _remove_numerical_keys(_from_json(output['b']))
+    return output, (end - start)
+
 def _lua2python(command, response, *parameters, trace=False, start=0):
     if trace:
         print(command, parameters, response)
@@ -369,30 +369,119 @@ function round_to_half(number)
 end
 
 
+-- Player entities are registered through build events (actions create entities with raise_built) rather than
+-- found with a full surface scan, and a bounded round-robin slice of them is checked for issues every tick
+global.alert_tracker = {
+    entities = {},
+    unit_numbers = {},
+    index = {}, -- unit_number -> position in entities
+    cursor = 1,
+    checks_per_tick = 50
+}
+
+local function track(entity)
+    if not (entity and entity.valid and entity.unit_number) or entity.force.name ~= "player" then
+        return
+    end
+    local tracker = global.alert_tracker
+    if tracker.index[entity.unit_number] then
+        return
+    end
+    table.insert(tracker.entities, entity)
+    table.insert(tracker.unit_numbers, entity.unit_number)
+    tracker.index[entity.unit_number] = #tracker.entities
+end
+
+-- Swap-remove, so the entity that was last is checked next if the cursor is at i
+local function untrack_at(i)
+    local tracker = global.alert_tracker
+    local last = #tracker.entities
+    tracker.index[tracker.unit_numbers[i]] = nil
+    if i ~= last then
+        tracker.entities[i] = tracker.entities[last]
+        tracker.unit_numbers[i] = tracker.unit_numbers[last]
+        tracker.index[tracker.unit_numbers[i]] = i
+    end
+    tracker.entities[last] = nil
+    tracker.unit_numbers[last] = nil
+end
+
+local function untrack(entity)
+    if not (entity and entity.valid and entity.unit_number) then
+        return
+    end
+    local i = global.alert_tracker.index[entity.unit_number]
+    if i then
+        untrack_at(i)
+    end
+end
+
+local function check_entity(entity, tick)
+    local issues = get_issues(entity)
+
+    if #issues > 0 then
+        local position = entity.position
+        local entity_key = entity.name .. "_" .. position.x .. "_" .. position.y
+        local name = '"'..entity.name:gsub(" ", "_")..'"'
+        if not global.alerts[entity_key] then
+            global.alerts[entity_key] = {
+                position = position,
+                issues = issues,
+                entity_name = name,
+                tick = tick
+            }
+        end
+    end
+end
+
 -- Define a function to be called every tick
 local function on_tick(event)
-    -- Run the check every 60 ticks (1 second)
-    if event.tick % 60 == 0 then
-        for _, surface in pairs(game.surfaces) do
-            local entities = surface.find_entities_filtered({force = "player"})
-            for _, entity in pairs(entities) do
-                local issues = get_issues(entity)
-
-                if #issues > 0 then
-                    local position = entity.position
-                    local entity_key = entity.name .. "_" .. position.x .. "_" .. position.y
-                    local name = '"'..entity.name:gsub(" ", "_")..'"'
-                    if not global.alerts[entity_key] then
-                        global.alerts[entity_key] = {
-                            position = position,
-                            issues = issues,
-                            entity_name = name,
-                            tick = event.tick
-                        }
-                    end
-                end
-            end
+    local tracker = global.alert_tracker
+    local entities = tracker.entities
+    if #entities == 0 then
+        return
+    end
+
+    -- Check every entity about once a second (as the full scan did), but never more than checks_per_tick per tick
+    local budget = math.min(math.ceil(#entities / 60), tracker.checks_per_tick)
+    for _ = 1, budget do
+        if #entities == 0 then
+            return
         end
+        if tracker.cursor > #entities then
+            tracker.cursor = 1
+        end
+        local entity = entities[tracker.cursor]
+        if entity.valid then
+            check_entity(entity, event.tick)
+            tracker.cursor = tracker.cursor + 1
+        else
+            -- Destroyed without raising an event (e.g cleared on reset)
+            untrack_at(tracker.cursor)
+        end
+    end
+end
+
+-- Entities built since the last entity state capture, which save_entity_state serializes even if a rebuilt entity
+-- matches the signature of the one it replaced
+global.entity_state_dirty = {}
+
+local function on_built(event)
+    local entity = event.created_entity or event.entity
+    track(entity)
+    if entity and entity.valid then
+        global.entity_state_dirty[global.utils.entity_state_key(entity)] = true
+    end
+end
+
+local function on_removed(event)
+    untrack(event.entity)
+end
+
+-- Register whatever is already on the map
+for _, surface in pairs(game.surfaces) do
+    for _, entity in pairs(surface.find_entities_filtered({force = "player"})) do
+        track(entity)
     end
 end
 
@@ -412,4 +501,12 @@ global.get_alerts = function(seconds)
 end
 
 -- Register the on_tick function to the on_tick event
-script.on_event(defines.events.on_tick, on_tick)
\ No newline at end of file
+script.on_event(defines.events.on_tick, on_tick)
+script.on_event({defines.events.on_built_entity,
+                 defines.events.on_robot_built_entity,
+                 defines.events.script_raised_built,
+                 defines.events.script_raised_revive}, on_built)
+script.on_event({defines.events.on_player_mined_entity,
+                 defines.events.on_robot_mined_entity,
+                 defines.events.on_entity_died,
+                 defines.events.script_raised_destroy}, on_removed)
\ No newline at end of file
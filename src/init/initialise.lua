@@ -295,6 +295,17 @@ global.utils.describe_placement_issues = function(player, entity_name, position,
     return ""
 end
 
+-- Identifies the loaded mods and prototypes, which the price list (production_score.lua, reward.lua) depends on
+global.utils.prototype_checksum = function()
+    local parts = {}
+    for name, version in pairs(script.active_mods) do
+        table.insert(parts, name .. "=" .. version)
+    end
+    table.sort(parts)
+    table.insert(parts, table_size(game.item_prototypes) .. "/" .. table_size(game.fluid_prototypes) .. "/" .. table_size(game.recipe_prototypes))
+    return table.concat(parts, ",")
+end
+
 global.utils.avoid_entity = function(player_index, entity, position, direction)
     local player = game.get_player(player_index)
     local player_position = player.position
@@ -916,6 +927,20 @@ function observe_buildable (player, inventory)
     return serpent.line(recipes)
 end
 
+-- Encode the result of a pcall'd action as a versioned JSON envelope, falling back to `dump` for
+-- values that can't be encoded as JSON. Parsed by `_json2python` in factorio_rcon_utils.py
+function dump_response(a, b)
+    -- Results that are already serialized as Lua table literals can only be parsed by slpp
+    if type(b) == 'string' and b:sub(1, 1) == '{' then
+        return dump({a = a, b = b})
+    end
+    local ok, json = pcall(game.table_to_json, {v = 1, a = a, b = b})
+    if ok then
+        return json
+    end
+    return dump({a = a, b = b})
+end
+
 function dump(o)
    if type(o) == 'table' then
       local s = '{ '
@@ -309,8 +309,30 @@ global.actions.generate_price_list = function(param)
   return price_list
 end
 
+-- Prices only depend on the prototypes, which only change with the mods, so the price list is generated once per
+-- mod / prototype checksum (global.utils.prototype_checksum) and kept in global rather than being regenerated on
+-- every score
+
+global.actions.get_price_list = function()
+  local checksum = global.utils.prototype_checksum()
+  if not global.price_list or global.price_list_checksum ~= checksum then
+    global.price_list = global.actions.generate_price_list()
+    global.price_list_checksum = checksum
+  end
+  return global.price_list, checksum
+end
+
+-- Only sends the price list back if the caller's copy is out of date
+global.actions.price_list = function(known_checksum)
+  local price_list, checksum = global.actions.get_price_list()
+  if checksum == known_checksum then
+    return {checksum = checksum}
+  end
+  return {checksum = checksum, prices = price_list}
+end
+
 production_score.get_production_scores = function(price_list)
-  local price_list = price_list or global.actions.generate_price_list()
+  local price_list = price_list or global.actions.get_price_list()
   local scores = {}
   for k, force in pairs (game.forces) do
     local score = 0
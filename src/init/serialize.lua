@@ -1439,3 +1439,50 @@ global.utils.serialize_entity = function(entity)
 
 	return serialized
 end
+
+-- Identifies an entity across entity state captures and restores, as `entity_state_key` in load_entity_state.lua
+-- does for a serialized state (unit numbers change whenever a state is restored)
+global.utils.entity_state_key = function(entity)
+    return entity.name .. "@" .. tostring(entity.position.x) .. "," .. tostring(entity.position.y)
+end
+
+-- A cheap summary of the parts of an entity's state that change without raising an event (contents, fuel, fluids,
+-- status...), so that save_entity_state only serializes the entities whose summary changed since the last capture
+global.utils.entity_state_signature = function(entity)
+    local parts = {entity.direction or 0, entity.health or 0}
+    if entity.type ~= "character" then
+        table.insert(parts, entity.energy or 0)
+        table.insert(parts, tostring(entity.active))
+        table.insert(parts, entity.status or 0)
+    end
+
+    for i = 1, entity.get_max_inventory_index() do
+        local inventory = entity.get_inventory(i)
+        if inventory then
+            for name, count in pairs(inventory.get_contents()) do
+                table.insert(parts, name .. "=" .. count)
+            end
+        end
+    end
+    if entity.type == "transport-belt" or entity.type == "splitter" or entity.type == "underground-belt" then
+        for i = 1, entity.get_max_transport_line_index() do
+            table.insert(parts, entity.get_transport_line(i).get_item_count())
+        end
+    end
+    if entity.burner then
+        local burning = entity.burner.currently_burning
+        table.insert(parts, burning and burning.name or "")
+        table.insert(parts, entity.burner.remaining_burning_fuel or 0)
+    end
+    if entity.fluidbox then
+        for i = 1, #entity.fluidbox do
+            local fluid = entity.fluidbox[i]
+            table.insert(parts, fluid and (fluid.name .. "=" .. fluid.amount) or "")
+        end
+    end
+    if entity.type == "assembling-machine" or entity.type == "furnace" or entity.type == "rocket-silo" then
+        local recipe = entity.get_recipe()
+        table.insert(parts, recipe and recipe.name or "")
+    end
+    return table.concat(parts, ",")
+end
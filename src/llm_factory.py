@@ -10,12 +10,53 @@ from tenacity import wait_exponential, retry
 
 load_dotenv()
 
+# API key environment variable and base URL of each OpenAI-compatible provider (None uses the OpenAI default)
+OPENAI_COMPATIBLE_PROVIDERS = {
+    "deepseek": ("DEEPSEEK_API_KEY", "https://api.deepseek.com"),
+    "gemini": ("GEMINI_API_KEY", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+    "together": ("TOGETHER_API_KEY", "https://api.together.xyz/v1"),
+    "openai": ("OPENAI_API_KEY", None),
+}
+
 
 class LLMFactory:
+    # Maximum number of in-flight requests per provider, shared by every factory in the process
+    max_concurrent_requests = 16
+
+    # Retries of rate limited / failed requests, with exponential backoff, made by the clients themselves
+    max_retries = 5
+
+    # Async clients by (provider, event loop). Reusing them keeps their connections alive between calls.
+    _clients = {}
+    _semaphores = {}
+
     def __init__(self, model: str, beam: int = 1):
         self.model = model
         self.beam = beam
 
+    def _get_client(self, provider: str):
+        """
+        Get the async client of a provider, and the semaphore bounding its concurrent requests.
+        Clients and their connection pools are bound to an event loop, so there is one per provider and loop.
+        """
+        loop = asyncio.get_running_loop()
+        key = (provider, loop)
+        if key not in LLMFactory._clients:
+            for stale_key in [k for k in LLMFactory._clients if k[1].is_closed()]:
+                del LLMFactory._clients[stale_key]
+                del LLMFactory._semaphores[stale_key]
+
+            if provider == "anthropic":
+                client = anthropic.AsyncAnthropic(max_retries=self.max_retries)
+            else:
+                api_key_variable, base_url = OPENAI_COMPATIBLE_PROVIDERS[provider]
+                client = AsyncOpenAI(api_key=os.getenv(api_key_variable),
+                                     base_url=base_url,
+                                     max_retries=self.max_retries)
+            LLMFactory._clients[key] = client
+            LLMFactory._semaphores[key] = asyncio.Semaphore(self.max_concurrent_requests)
+        return LLMFactory._clients[key], LLMFactory._semaphores[key]
+
     def merge_contiguous_messages(self, messages):
         if not messages:
             return messages
@@ -69,17 +110,16 @@ class LLMFactory:
                 raise RuntimeError("No system message!!")
             try:
 
-                client = anthropic.Anthropic()
-                # Use asyncio.to_thread for CPU-bound operations
-                response = await asyncio.to_thread(
-                    client.messages.create,
-                    temperature=kwargs.get('temperature', 0.7),
-                    max_tokens=max_tokens,
-                    model=model_to_use,
-                    messages=messages,
-                    system = system_message,
-                    stop_sequences=["```END"],
-                )
+                client, limit = self._get_client("anthropic")
+                async with limit:
+                    response = await client.messages.create(
+                        temperature=kwargs.get('temperature', 0.7),
+                        max_tokens=max_tokens,
+                        model=model_to_use,
+                        messages=messages,
+                        system = system_message,
+                        stop_sequences=["```END"],
+                    )
             except Exception as e:
                 print(e)
                 raise
@@ -87,52 +127,55 @@ class LLMFactory:
             return response
 
         elif "deepseek" in model_to_use:
-            client = AsyncOpenAI(api_key=os.getenv("DEEPSEEK_API_KEY"), base_url="https://api.deepseek.com")
-            response = await client.chat.completions.create(
-                model=model_to_use,
-                max_tokens=kwargs.get('max_tokens', 256),
-                temperature=kwargs.get('temperature', 0.3),
-                messages=kwargs.get('messages', None),
-                logit_bias=kwargs.get('logit_bias', None),
-                n=kwargs.get('n_samples', None),
-                stop=kwargs.get('stop_sequences', None),
-                stream=False,
-                presence_penalty=kwargs.get('presence_penalty', None),
-                frequency_penalty=kwargs.get('frequency_penalty', None),
-            )
+            client, limit = self._get_client("deepseek")
+            async with limit:
+                response = await client.chat.completions.create(
+                    model=model_to_use,
+                    max_tokens=kwargs.get('max_tokens', 256),
+                    temperature=kwargs.get('temperature', 0.3),
+                    messages=kwargs.get('messages', None),
+                    logit_bias=kwargs.get('logit_bias', None),
+                    n=kwargs.get('n_samples', None),
+                    stop=kwargs.get('stop_sequences', None),
+                    stream=False,
+                    presence_penalty=kwargs.get('presence_penalty', None),
+                    frequency_penalty=kwargs.get('frequency_penalty', None),
+                )
             return response
 
         elif "gemini" in model_to_use:
-            client = AsyncOpenAI(api_key=os.getenv("GEMINI_API_KEY"), base_url="https://generativelanguage.googleapis.com/v1beta/openai/")
-            response = await client.chat.completions.create(
-                model=model_to_use,
-                max_tokens=kwargs.get('max_tokens', 256),
-                temperature=kwargs.get('temperature', 0.3),
-                messages=kwargs.get('messages', None),
-                #logit_bias=kwargs.get('logit_bias', None),
-                n=kwargs.get('n_samples', None),
-                #stop=kwargs.get('stop_sequences', None),
-                stream=False
-                #presence_penalty=kwargs.get('presence_penalty', None),
-                #frequency_penalty=kwargs.get('frequency_penalty', None),
-            )
+            client, limit = self._get_client("gemini")
+            async with limit:
+                response = await client.chat.completions.create(
+                    model=model_to_use,
+                    max_tokens=kwargs.get('max_tokens', 256),
+                    temperature=kwargs.get('temperature', 0.3),
+                    messages=kwargs.get('messages', None),
+                    #logit_bias=kwargs.get('logit_bias', None),
+                    n=kwargs.get('n_samples', None),
+                    #stop=kwargs.get('stop_sequences', None),
+                    stream=False
+                    #presence_penalty=kwargs.get('presence_penalty', None),
+                    #frequency_penalty=kwargs.get('frequency_penalty', None),
+                )
             return response
 
         elif any(model in model_to_use for model in ["llama", "Qwen"]):
-            client = AsyncOpenAI(api_key=os.getenv("TOGETHER_API_KEY"), base_url="https://api.together.xyz/v1")
-            return await client.chat.completions.create(
-                model=model_to_use,
-                max_tokens=kwargs.get('max_tokens', 256),
-                temperature=kwargs.get('temperature', 0.3),
-                messages=kwargs.get('messages', None),
-                logit_bias=kwargs.get('logit_bias', None),
-                n=kwargs.get('n_samples', None),
-                stop=kwargs.get('stop_sequences', None),
-                stream=False
-            )
+            client, limit = self._get_client("together")
+            async with limit:
+                return await client.chat.completions.create(
+                    model=model_to_use,
+                    max_tokens=kwargs.get('max_tokens', 256),
+                    temperature=kwargs.get('temperature', 0.3),
+                    messages=kwargs.get('messages', None),
+                    logit_bias=kwargs.get('logit_bias', None),
+                    n=kwargs.get('n_samples', None),
+                    stop=kwargs.get('stop_sequences', None),
+                    stream=False
+                )
         
         elif "o1-mini" in model_to_use or 'o3-mini' in model_to_use:
-            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            client, limit = self._get_client("openai")
             # replace `max_tokens` with `max_completion_tokens` for OpenAI API
             if "max_tokens" in kwargs:
                 kwargs.pop("max_tokens")
@@ -150,48 +193,31 @@ class LLMFactory:
                 elif 'o1-mini' in model:
                     model = 'o1-mini'
 
-                response = await client.chat.completions.create(
-                    *args,
-                    n=self.beam,
-                    model=model,
-                    messages = messages,
-                    stream=False,
-                    response_format={
-                        "type": "text"
-                    },
-                    reasoning_effort=reasoning_length
-                )
+                async with limit:
+                    response = await client.chat.completions.create(
+                        *args,
+                        n=self.beam,
+                        model=model,
+                        messages = messages,
+                        stream=False,
+                        response_format={
+                            "type": "text"
+                        },
+                        reasoning_effort=reasoning_length
+                    )
                 return response
             except Exception as e:
                 print(e)
         else:
+            client, limit = self._get_client("openai")
             try:
-                client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
                 assert "messages" in kwargs, "You must provide a list of messages to the model."
-                return await client.chat.completions.create(
-                    model=model_to_use,
-                    max_tokens=kwargs.get('max_tokens', 256),
-                    temperature=kwargs.get('temperature', 0.3),
-                    messages=kwargs.get('messages', None),
-                    logit_bias=kwargs.get('logit_bias', None),
-                    n=kwargs.get('n_samples', None),
-                    stop=kwargs.get('stop_sequences', None),
-                    stream=False,
-                    presence_penalty=kwargs.get('presence_penalty', None),
-                    frequency_penalty=kwargs.get('frequency_penalty', None),
-                )
-            except Exception as e:
-                print(e)
-                try:
-                    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-                    assert "messages" in kwargs, "You must provide a list of messages to the model."
-                    sys = kwargs.get('messages', None)[0]
-                    messages = [sys] + kwargs.get('messages', None)[8:]
+                async with limit:
                     return await client.chat.completions.create(
                         model=model_to_use,
                         max_tokens=kwargs.get('max_tokens', 256),
                         temperature=kwargs.get('temperature', 0.3),
-                        messages=messages,
+                        messages=kwargs.get('messages', None),
                         logit_bias=kwargs.get('logit_bias', None),
                         n=kwargs.get('n_samples', None),
                         stop=kwargs.get('stop_sequences', None),
@@ -199,6 +225,25 @@ class LLMFactory:
                         presence_penalty=kwargs.get('presence_penalty', None),
                         frequency_penalty=kwargs.get('frequency_penalty', None),
                     )
+            except Exception as e:
+                print(e)
+                try:
+                    assert "messages" in kwargs, "You must provide a list of messages to the model."
+                    sys = kwargs.get('messages', None)[0]
+                    messages = [sys] + kwargs.get('messages', None)[8:]
+                    async with limit:
+                        return await client.chat.completions.create(
+                            model=model_to_use,
+                            max_tokens=kwargs.get('max_tokens', 256),
+                            temperature=kwargs.get('temperature', 0.3),
+                            messages=messages,
+                            logit_bias=kwargs.get('logit_bias', None),
+                            n=kwargs.get('n_samples', None),
+                            stop=kwargs.get('stop_sequences', None),
+                            stream=False,
+                            presence_penalty=kwargs.get('presence_penalty', None),
+                            frequency_penalty=kwargs.get('frequency_penalty', None),
+                        )
                 except Exception as e:
                     print(e)
                     raise
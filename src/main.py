@@ -5,7 +5,9 @@ from timeit import default_timer as timer
 
 from dotenv import load_dotenv
 
+from factorio_entities import Position
 from factorio_instance import FactorioInstance
+from factorio_pool import FactorioPool
 from factorio_runner import FactorioRunner
 from llm_factory import LLMFactory
 from utilities.controller_loader import load_schema, load_definitions, parse_file_for_structure
@@ -19,13 +21,12 @@ vocab = Vocabulary()
 async def main():
     servers = 4
 
-    factorio_pool = None  # FactorioPool(servers, 64, 27016)
-    await factorio_pool.connect()
+    factorio_pool = await FactorioPool.connect(range(27016, 27016 + servers), fast=True)
     await factorio_pool.initialise(iron_ore=20)
     iterations = 1000
     time = timer()
     for i in range(iterations):
-        await factorio_pool.act('move', 2)
+        await factorio_pool.act('move_to', Position(x=i % 2 * 2, y=0))
         responses = await factorio_pool.observe()
         # print(responses)
         # [tg.start_soon(instance.move, 1) for instance in factorio_pool.instances]
@@ -1,4 +1,5 @@
 from .factorio_rcon import (PACKET_PARSER, RCONClient, AsyncRCONClient,
+                            PipelinedRCONClient,
                             RCONBaseError, ClientBusy, InvalidPassword,
                             InvalidResponse, RCONNetworkError, RCONNotConnected,
                             RCONClosed, RCONConnectError, RCONReceiveError,
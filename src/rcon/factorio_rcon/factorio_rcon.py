@@ -1,6 +1,10 @@
 """RCON client for factorio servers"""
+import asyncio
+import concurrent.futures
 import functools
 import socket
+import struct
+import threading
 
 import construct
 
@@ -524,8 +528,256 @@ class AsyncRCONClient(RCONSharedBase):
         return results
 
 
+class PipelinedRCONClient(RCONClient):
+    """Pipelined RCON client for factorio servers
+
+    Params:
+        ip_address: str; IP address to connect to.
+        port: int; port to connect to.
+        password: str; password to use to authenticate.
+        timeout (optional, default None): float; timeout for each command to be answered.
+        connect_on_init (optional, default True): bool; connect to the server when initialised.
+        max_in_flight (optional, default 256): int; maximum number of unanswered commands.
+    Raises:
+        If connect_on_init is set, see RCONClient.connect().
+        Else, no specific exceptions.
+    Extra information:
+        Unlike RCONClient, any number of threads (or coroutines) may issue commands at the
+        same time. Every command is written to the socket as soon as it is submitted and a
+        background reader thread resolves the matching future when the response with the
+        same packet id arrives, so many commands can be in flight on a single connection.
+        Factorio answers RCON packets in the order it receives them, so the results of
+        commands submitted from a single thread are applied in submission order.
+
+        submit_command returns a concurrent.futures.Future, send_command(s) block on it and
+        send_command_async / send_commands_async await it from an asyncio event loop.
+
+        If the connection fails, every pending command fails with the same exception and
+        the client must be reconnected with .connect().
+    """
+    def __init__(self, ip_address, port, password, timeout=None, connect_on_init=True,
+                 max_in_flight=256):
+        self.send_lock = threading.Lock()
+        self.pending = {}
+        self.abandoned = set()
+        self.reader_thread = None
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        super().__init__(ip_address, port, password, timeout=timeout,
+                         connect_on_init=connect_on_init)
+
+    def connect(self):
+        """Connects to the RCON server and starts the response reader
+
+        Params:
+            No params.
+        Raises:
+            RCONConnectError: if there is an error connecting to the server.
+            InvalidPassword: if the password is incorrect.
+            InvalidResponse: if the server returns an invalid response.
+        Returns:
+            Nothing returned.
+        Extra information:
+            Use this function to reconnect to the RCON server after an error.
+        """
+        super().connect()
+        # Timeouts are applied per command by the waiting caller, the reader blocks forever
+        self.rcon_socket.settimeout(None)
+        self.reader_thread = threading.Thread(target=self._read_responses,
+                                              args=(self.rcon_socket,),
+                                              name=f"rcon-reader-{self.port}",
+                                              daemon=True)
+        self.reader_thread.start()
+
+    def close(self):
+        """Closes the connection to the RCON server
+
+        Params:
+            No params.
+        Raises:
+            No specific exceptions.
+        Returns:
+            Nothing returned.
+        Extra information:
+            Guaranteed to succeed, even if the client is not currently connected.
+            Pending commands fail with RCONClosed.
+            After closing, the client can still be reconnected using .connect().
+        """
+        # Detach the socket first so the reader thread knows the close was intentional
+        rcon_socket, self.rcon_socket = self.rcon_socket, None
+        if rcon_socket is not None:
+            try:
+                rcon_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            rcon_socket.close()
+        self._fail_pending(RCONClosed(CONN_CLOSED))
+
+    def submit_command(self, command):
+        """Sends a command without waiting for the response
+
+        Params:
+            command: str; the command to be executed.
+        Raises:
+            RCONNotConnected: if the client is not connected to the RCON server.
+            ClientBusy: if max_in_flight commands are still awaiting a response after the timeout.
+            RCONSendError: if any error occurs while sending the request.
+        Returns:
+            concurrent.futures.Future resolving to the response (str, or None if no data is returned).
+        Extra information:
+            Blocks (for up to the timeout) while max_in_flight commands are already awaiting a response.
+        """
+        if self.rcon_socket is None:
+            raise RCONNotConnected(NOT_CONNECTED)
+        if self.rcon_failure:
+            raise RCONNotConnected(RCON_FAILED)
+        future = concurrent.futures.Future()
+        if not self.in_flight.acquire(timeout=self.timeout):
+            raise ClientBusy(IN_FLIGHT_FULL)
+        try:
+            with self.send_lock:
+                packet_id = self.get_id()
+                self.pending[packet_id] = future
+                future.packet_id = packet_id
+                self.send_packet(packet_id, 2, command)
+        except BaseException as exc:
+            packet_id = getattr(future, "packet_id", None)
+            if packet_id is None or self.pending.pop(packet_id, None) is not None:
+                self.in_flight.release()
+            self.rcon_failure = True
+            self.close()
+            raise exc
+        return future
+
+    def send_commands(self, commands):
+        """Sends multiple commands to the RCON server and waits for all responses
+
+        Params:
+            commands: dict; the dict of commands to be executed.
+        Raises:
+            RCONNotConnected: if the client is not connected to the RCON server.
+            InvalidResponse: if the server returns an invalid response.
+            RCONClosed: if the server closes the connection.
+            RCONSendError: if any other error occurs while sending the request.
+            RCONReceiveError: if any error occurs while receiving the response (including a timeout).
+        Returns:
+            dict of format key: response.
+        Extra information:
+            Structure of the commands dict:
+                key: a name for identifying each command in the response.
+                value: command to be executed.
+            This function can be called from multiple threads simultaneously.
+        """
+        futures = {key: self.submit_command(value) for key, value in commands.items()}
+        return {key: self._wait(future) for key, future in futures.items()}
+
+    async def send_command_async(self, command):
+        """Sends a single command to the RCON server from an asyncio event loop
+
+        Params:
+            command: str; the command to be executed.
+        Raises:
+            See send_commands().
+        Returns:
+            str if data is returned.
+            None if no data is returned.
+        """
+        future = self.submit_command(command)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError as exc:
+            self._abandon(future)
+            raise RCONReceiveError(CONN_TIMEOUT) from exc
+
+    async def send_commands_async(self, commands):
+        """Sends multiple commands to the RCON server from an asyncio event loop
+
+        Params:
+            commands: dict; the dict of commands to be executed.
+        Raises:
+            See send_commands().
+        Returns:
+            dict of format key: response.
+        """
+        keys = list(commands.keys())
+        responses = await asyncio.gather(*(self.send_command_async(commands[key]) for key in keys))
+        return dict(zip(keys, responses))
+
+    def _wait(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError as exc:
+            self._abandon(future)
+            raise RCONReceiveError(CONN_TIMEOUT) from exc
+
+    def _abandon(self, future):
+        """Forget a timed out command, its late response (if any) is discarded"""
+        with self.send_lock:
+            if self.pending.pop(future.packet_id, None) is not None:
+                self.abandoned.add(future.packet_id)
+                self.in_flight.release()
+
+    def _fail_pending(self, exc):
+        with self.send_lock:
+            pending = list(self.pending.values())
+            self.pending.clear()
+            self.abandoned.clear()
+            for _ in pending:
+                self.in_flight.release()
+        for future in pending:
+            if not future.done():
+                future.set_exception(exc)
+
+    def _resolve(self, response):
+        with self.send_lock:
+            future = self.pending.pop(response.id, None)
+            if future is None:
+                if response.id in self.abandoned:
+                    self.abandoned.discard(response.id)
+                    return
+                raise InvalidResponse(INVALID_ID)
+            self.in_flight.release()
+        if not future.done():
+            future.set_result(response.body.rstrip() if response.body else None)
+
+    def _read_responses(self, rcon_socket):
+        """Reader thread: splits the stream into length-prefixed packets and resolves futures"""
+        data = b""
+        try:
+            while True:
+                read_data = rcon_socket.recv(65536)
+                if not read_data:
+                    raise RCONClosed(CONN_CLOSED)
+                data += read_data
+                # Find the end of the last complete packet in the buffer
+                end = 0
+                while len(data) - end >= 4:
+                    size = struct.unpack_from("<i", data, end)[0]
+                    if len(data) - end - 4 < size:
+                        break
+                    end += 4 + size
+                if not end:
+                    continue
+                try:
+                    responses = PACKET_PARSER.parse(data[:end])
+                except construct.ConstructError as exc:
+                    raise InvalidResponse(PARSE_FAILED) from exc
+                data = data[end:]
+                for response in responses:
+                    self._resolve(response)
+        except BaseException as exc:
+            if rcon_socket is not self.rcon_socket:
+                # Closed locally (or reconnected), close() has already failed the pending commands
+                return
+            if not isinstance(exc, RCONBaseError):
+                exc = RCONReceiveError(RECEIVE_ERROR)
+            self.rcon_failure = True
+            self._fail_pending(exc)
+
+
 CLIENT_BUSY = ("The client is already busy with another call. If sending multiple commands, "
                "use send_commands() rather than calling send_command() multiple times.")
+IN_FLIGHT_FULL = ("The RCON server has not answered max_in_flight commands within the timeout, "
+                  "so no more can be sent")
 INVALID_PASS = "The RCON password is incorrect"
 INVALID_ID = ("The RCON server returned a response with an unknown sequence ID. This means that "
               "a response was received for a command that was not sent. This situation implies "
@@ -20,6 +20,7 @@ from search.model.instance_group import InstanceGroup
 from search.model.conversation import Conversation, Message, GenerationParameters
 from search.model.game_state import GameState
 from search.model.program import Program
+from search.program_buffer import ProgramWriteBuffer
 from search.mcts.formatters.conversation_formatter import ConversationFormatter, DefaultFormatter
 from factorio_instance import FactorioInstance
 
@@ -101,6 +102,7 @@ class ParallelBeamConfig:
     initial_state: GameState
     beam_kwargs: Dict[str, Any]
     model: Optional[str] = None
+    buffered_writes: bool = False  # Save the beam's new programs through a write-behind buffer
 
     def __post_init__(self):
         if self.model:
@@ -136,6 +138,8 @@ class BeamGroup(InstanceGroup):
         self.current_program: Optional[Program] = resume_head  # Initialize with resume head if available
         self.current_state: Optional[GameState] = resume_head.state if resume_head else None
         self.current_conversation: Optional[Conversation] = resume_head.conversation if resume_head else None
+        # Resolves once `current_program` is saved, when it is saved through a write buffer
+        self.saved_program: Optional[asyncio.Future] = None
 
 
 class BeamSearch(MCTS):
@@ -292,6 +296,10 @@ class ParallelBeamSearch:
         self._monitor_task = None
         self._monitoring_active = True
 
+        # Flushed as soon as the whole beam has moved on, so the next iteration doesn't wait for the delay
+        self.write_buffer = ProgramWriteBuffer(db_client, max_size=config.beam_width) \
+            if config.buffered_writes else None
+
         # Create beam groups
         self.beam_groups = self._create_beam_groups(instances)
 
@@ -414,6 +422,8 @@ class ParallelBeamSearch:
                     raise ValueError("No current program available for beam group")
                 state = group.current_state
                 conversation = copy.deepcopy(group.current_conversation)
+                if group.saved_program is not None:
+                    await group.saved_program
                 parent_id = group.current_program.id
 
             result = await group.beam.evaluate_candidates(
@@ -432,16 +442,19 @@ class ParallelBeamSearch:
             return []
 
     async def _update_beam_groups(self, best_programs):
-        """Update beam groups with proper connection handling"""
-        update_tasks = []
+        """Update beam groups, saving their new programs with a single batched insert"""
         try:
-            with self.db_client.get_connection() as conn:
-                for group, program in zip(self.beam_groups, best_programs):
-                    if program:
-                        update_tasks.append(self._update_single_group(conn, group, program))
-
-                if update_tasks:
-                    await asyncio.gather(*update_tasks)
+            programs = []
+            for group, program in zip(self.beam_groups, best_programs):
+                if program:
+                    self._update_single_group(group, program)
+                    programs.append(program)
+                    if self.write_buffer is not None:
+                        # Written behind, the group's next candidates wait for it only when they need its id
+                        group.saved_program = self.write_buffer.add(program)
+
+            if programs and self.write_buffer is None:
+                await self.db_client.create_programs(programs)
 
             self.current_depth += 1
             self.logger.update_progress()
@@ -449,88 +462,14 @@ class ParallelBeamSearch:
             logger.error(f"Error updating beam groups: {e}")
             raise
 
-    async def _create_program(self, cur, program: Program) -> Optional[int]:
-        """Create a new program entry in the database using the provided cursor.
-
-        Args:
-            cur: Database cursor from the connection
-            program: Program object to store
-        Returns:
-            int: The ID of the created program
-        """
-        query = """
-            INSERT INTO programs (
-                code, value, visits, parent_id, state_json, conversation_json,
-                completion_token_usage, prompt_token_usage, token_usage, response,
-                holdout_value, raw_reward, version, version_description, model, meta,
-                achievements_json, instance, depth, advantage, ticks
-            )
-            VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-            )
-            RETURNING id, created_at;
-        """
-
-        try:
-            # Prepare values with proper null handling
-            cur.execute(
-                query,
-                (
-                    program.code,
-                    program.value,
-                    0,  # visits starts at 0
-                    program.parent_id,
-                    program.state.to_raw() if program.state else None,
-                    json.dumps(program.conversation.dict()),
-                    getattr(program, 'completion_token_usage', None),
-                    getattr(program, 'prompt_token_usage', None),
-                    getattr(program, 'token_usage', None),
-                    getattr(program, 'response', None),
-                    getattr(program, 'holdout_value', None),
-                    getattr(program, 'raw_reward', None),
-                    self.version,
-                    self.version_description,
-                    getattr(program, 'model', None),
-                    json.dumps(getattr(program, 'meta', {})),
-                    json.dumps(getattr(program, 'achievements', [])),
-                    getattr(program, 'instance', None),
-                    program.depth / 2,  # Maintain the depth division from original
-                    getattr(program, 'advantage', None),
-                    getattr(program, 'ticks', None)
-                )
-            )
-
-            # Get the inserted program's ID and created_at timestamp
-            id, created_at = cur.fetchone()
-
-            # Update the program object
-            program.id = id
-            program.created_at = created_at
-
-            return id
-
-        except Exception as e:
-            logger.error(f"Error creating program in database: {e}")
-            # Let the error propagate up to be handled by the connection context
-            raise
-
-    async def _update_single_group(self, conn, group, program):
-        """Update a single beam group using provided connection"""
-        try:
-            group.current_program = program
-            group.current_state = program.state
-            group.current_conversation = copy.deepcopy(program.conversation)
-            program.depth = self.current_depth * 2
-
-            # Use the provided connection
-            with conn.cursor() as cur:
-                # Your program creation SQL here
-                await self._create_program(cur, program)
-
-        except Exception as e:
-            logger.error(f"Error updating group {group.group_id}: {e}")
-            raise
+    def _update_single_group(self, group, program):
+        """Move a beam group on to its new program, which is saved by `_update_beam_groups`"""
+        group.current_program = program
+        group.current_state = program.state
+        group.current_conversation = copy.deepcopy(program.conversation)
+        program.depth = self.current_depth * 2
+        program.version = self.version
+        program.version_description = self.version_description
 
     async def _run_beam_iteration(self, n_iterations: int):
         """Run beam search iterations with improved monitoring"""
@@ -639,6 +578,8 @@ class ParallelBeamSearch:
     async def cleanup(self):
         """Clean up resources"""
         try:
+            if self.write_buffer is not None:
+                await self.write_buffer.close()
             self.logger.stop()
             for group in self.beam_groups:
                 if hasattr(group.evaluator, 'logger'):
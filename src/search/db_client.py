@@ -1,28 +1,70 @@
 import asyncio
+import functools
 import json
 import logging
 import math
 import random
+import re
 import statistics
 import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from contextlib import contextmanager, asynccontextmanager
 
 import psycopg2
 import tenacity
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, execute_values
 from psycopg2.pool import ThreadedConnectionPool
 from tenacity import wait_exponential, retry_if_exception_type, wait_random_exponential
+from search.model.game_state import GameState
 from search.model.program import Program
+from search.program_index import ProgramIndex
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def blocking(method):
+    """
+    Run a method that makes blocking database calls on the client's executor, so that the event loop (and the other
+    MCTS groups sharing it) keeps running while it waits on the database.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self.run_in_executor(method, self, *args, **kwargs)
+    return wrapper
+
+
 class DBClient:
-    def __init__(self, max_conversation_length: int = 20, min_connections: int = 5, max_connections: int = 20, **db_config):
+
+    # Hot queries, which are prepared once per connection. Parameters use the `%s` placeholder.
+    PREPARED_STATEMENTS = {
+        "get_program": "SELECT * FROM programs WHERE id = %s",
+        "get_parent_state": "SELECT parent_id, state_json FROM programs WHERE id = %s",
+        "add_visits": "UPDATE programs SET visits = visits + %s WHERE id = %s AND visits IS NOT NULL RETURNING visits, version",
+        "get_child_values": "SELECT id, value FROM programs WHERE parent_id = %s AND value IS NOT NULL",
+        "set_advantage": "UPDATE programs SET advantage = %s WHERE id = %s",
+    }
+
+    # Number of messages in a program's conversation, as read by the program index. It is stored in `meta` when
+    # the program is created, so that the conversation needn't be read; older programs fall back to counting them.
+    CONVERSATION_LENGTH = "COALESCE((meta->>'conversation_length')::int, " \
+                          "jsonb_array_length(conversation_json->'messages'))"
+
+    def __init__(self, max_conversation_length: int = 20, min_connections: int = 5, max_connections: int = 20,
+                 delta_states: bool = False, **db_config):
         self.db_config = db_config
         self.max_conversation_length = max_conversation_length
+        # Store states captured as a delta against their parent program's state without their full entities
+        self.delta_states = delta_states
+        # `entities_hash()` of the states of the programs recently created or loaded, by id, which tells whether a
+        # delta state was captured against its parent program's state
+        self._state_hashes = OrderedDict()
+        self._state_hashes_lock = threading.Lock()
+        self.max_state_hashes = 10000
         # Don't store connection as instance variable
         # Instead create connection pool
         # self.pool = []
@@ -31,18 +73,35 @@ class DBClient:
         self.min_connections = min_connections
         self.max_connections = max_connections
         self._lock = threading.Lock()
+        # Light columns of recent programs, so that samplers don't have to query them on every sample
+        self.index = ProgramIndex(self)
+        # Blocking database calls run here rather than on the event loop, with a thread per pooled connection
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="db")
+        # Names of the statements prepared on each connection
+        self._prepared = weakref.WeakKeyDictionary()
 
 
     async def initialize(self):
         """Initialize the connection pool"""
-        if self._pool is None:
-            async with self._lock:
-                if self._pool is None:  # Double check pattern
-                    self._pool = ThreadedConnectionPool(
-                        self.min_connections,
-                        self.max_connections,
-                        **self.db_config
-                    )
+        await self.run_in_executor(self._ensure_pool)
+
+    async def run_in_executor(self, fn, *args, **kwargs):
+        """Run a blocking function (e.g. one that uses `get_connection`) without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def execute_prepared(self, cur, name: str, params: tuple = ()):
+        """Execute one of `PREPARED_STATEMENTS`, preparing it the first time it is used on the cursor's connection"""
+        prepared = self._prepared.setdefault(cur.connection, set())
+        if name not in prepared:
+            placeholders = iter(range(1, len(params) + 1))
+            statement = re.sub("%s", lambda match: f"${next(placeholders)}", self.PREPARED_STATEMENTS[name])
+            cur.execute(f"PREPARE {name} AS {statement}")
+            prepared.add(name)
+        if params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cur.execute(f"EXECUTE {name}")
 
     def _ensure_pool(self):
         """Ensure connection pool exists with proper locking"""
@@ -110,45 +169,49 @@ class DBClient:
     #         if conn:
     #             conn.close()
     #         raise e
-    async def get_beam_heads(self, version: int, beam_width: int) -> List[Program]:
+    BEAM_HEADS_QUERY = """
+        WITH ProgramsByDepth AS (
+            SELECT DISTINCT ON (depth) *
+            FROM programs
+            WHERE version = %s
+            AND state_json IS NOT NULL
+            AND value IS NOT NULL
+            ORDER BY depth, value DESC
+        )
+        SELECT * FROM (
+            SELECT * FROM ProgramsByDepth
+            ORDER BY value DESC
+            LIMIT %s
+        ) as depth_diverse
+        UNION DISTINCT
+        SELECT * FROM (
+            SELECT * FROM programs
+            WHERE version = %s
+            AND state_json IS NOT NULL
+            AND value IS NOT NULL
+            ORDER BY value DESC
+            LIMIT %s
+        ) as value_focused
+        ORDER BY value DESC
+        LIMIT %s
+    """
+
+    @blocking
+    def get_beam_heads(self, version: int, beam_width: int) -> List[Program]:
         """Get the highest value programs across all depths for a given version."""
         try:
             with self.get_connection() as conn:
                 with conn.cursor(cursor_factory=DictCursor) as cur:
                     # Use a CTE to get diverse set of programs
-                    cur.execute("""
-                        WITH ProgramsByDepth AS (
-                            SELECT DISTINCT ON (depth) *
-                            FROM programs
-                            WHERE version = %s
-                            AND state_json IS NOT NULL
-                            AND value IS NOT NULL
-                            ORDER BY depth, value DESC
-                        )
-                        SELECT * FROM (
-                            SELECT * FROM ProgramsByDepth
-                            ORDER BY value DESC
-                            LIMIT %s
-                        ) as depth_diverse
-                        UNION DISTINCT
-                        SELECT * FROM (
-                            SELECT * FROM programs
-                            WHERE version = %s
-                            AND state_json IS NOT NULL
-                            AND value IS NOT NULL
-                            ORDER BY value DESC
-                            LIMIT %s
-                        ) as value_focused
-                        ORDER BY value DESC
-                        LIMIT %s
-                    """, (version, beam_width, version, beam_width * 2, beam_width))
+                    cur.execute(self.BEAM_HEADS_QUERY,
+                                (version, beam_width, version, beam_width * 2, beam_width))
 
                     results = cur.fetchall()
                     if not results:
                         logger.warning(f"No programs found for version {version}")
                         return []
 
-                    programs = [Program.from_row(dict(row)) for row in results]
+                    programs = [self._resolve_state(Program.from_row(dict(row))) for row in results]
                     depths = [p.depth for p in programs]
                     logger.info(f"Found {len(programs)} beam heads for version {version} - {depths}")
                     return programs
@@ -157,7 +220,8 @@ class DBClient:
             return []
 
 
-    async def get_beam_heads2(self, version: int, beam_width: int) -> List[Program]:
+    @blocking
+    def get_beam_heads2(self, version: int, beam_width: int) -> List[Program]:
         """Get the highest value programs at max depth for a given version"""
         try:
             with self.get_connection() as conn:
@@ -183,12 +247,13 @@ class DBClient:
                     """, (version, max_depth, beam_width))
 
                     results = cur.fetchall()
-                    return [Program.from_row(dict(row)) for row in results]
+                    return [self._resolve_state(Program.from_row(dict(row))) for row in results]
         except Exception as e:
             print(f"Error fetching beam heads: {e}")
             return []
 
-    async def version_exists(self, version: int) -> bool:
+    @blocking
+    def version_exists(self, version: int) -> bool:
         """Check if a version exists in the database"""
         try:
             with self.get_connection() as conn:
@@ -203,7 +268,8 @@ class DBClient:
             print(f"Error checking version existence: {e}")
             return False
 
-    async def get_version_metadata(self, version: int) -> dict:
+    @blocking
+    def get_version_metadata(self, version: int) -> dict:
         """Get metadata for a specific version"""
         try:
             with self.get_connection() as conn:
@@ -220,50 +286,139 @@ class DBClient:
             print(f"Error fetching version metadata: {e}")
             return {}
 
+    PROGRAM_COLUMNS = ("code", "value", "visits", "parent_id", "state_json", "conversation_json",
+                       "completion_token_usage", "prompt_token_usage", "token_usage", "response",
+                       "holdout_value", "raw_reward", "version", "version_description", "model", "meta",
+                       "achievements_json", "instance", "depth", "advantage", "ticks")
+
+    def _stores_delta(self, program: Program) -> bool:
+        """
+        Whether a program's state can be stored without its full entities. `_resolve_state` rebuilds it from its
+        parent program's state, so it must have been captured as a delta against that state, rather than against one
+        that was never saved as a program (e.g the initial state, or a state captured partway through a program).
+        """
+        if not self.delta_states or not program.state.entities_delta or program.parent_id is None:
+            return False
+        with self._state_hashes_lock:
+            return self._state_hashes.get(program.parent_id) == program.state.parent_hash
+
+    def _remember_state(self, program: Program):
+        """Keep the entities hash of a saved program's state, for its children's `_stores_delta`"""
+        if not self.delta_states or program.id is None or not program.state or \
+                (program.state.entities is None and not program.state.entities_delta):
+            return
+        entities_hash = program.state.entities_hash()
+        with self._state_hashes_lock:
+            self._state_hashes[program.id] = entities_hash
+            self._state_hashes.move_to_end(program.id)
+            while len(self._state_hashes) > self.max_state_hashes:
+                self._state_hashes.popitem(last=False)
+
+    def _program_values(self, program: Program) -> tuple:
+        """The values of `PROGRAM_COLUMNS` for a new program"""
+        return (program.code, program.value, 0, program.parent_id,
+                program.state.to_raw(compact=self._stores_delta(program)) if program.state else None,
+                json.dumps(program.conversation.dict()),
+                program.completion_token_usage,
+                program.prompt_token_usage,
+                program.token_usage,
+                program.response,
+                program.holdout_value,
+                program.raw_reward,
+                program.version,
+                program.version_description,
+                program.model,
+                json.dumps({**program.meta, 'conversation_length': len(program.conversation.messages)}),
+                json.dumps(program.achievements),
+                program.instance,
+                program.depth/2,
+                program.advantage,
+                program.ticks
+                )
+
+    async def create_program(self, program: Program) -> Program:
+        """Create a new program, now with connection management"""
+        return (await self.create_programs([program]))[0]
+
     @tenacity.retry(
         retry=retry_if_exception_type((psycopg2.OperationalError, psycopg2.InterfaceError, psycopg2.DatabaseError)),
         wait=wait_random_exponential(multiplier=1, min=4, max=10))
-    async def create_program(self, program: Program) -> Program:
-        """Create a new program, now with connection management"""
-        try:
-            with self.get_connection() as conn:
+    @blocking
+    def create_programs(self, programs: List[Program]) -> List[Program]:
+        """Create several programs with a single multi-row insert, in one round-trip and one transaction"""
+        if not programs:
+            return []
+        with self.get_connection() as conn:
+            try:
                 with conn.cursor() as cur:
-                    cur.execute("""
-                        INSERT INTO programs (code, value, visits, parent_id, state_json, conversation_json, 
-                                           completion_token_usage, prompt_token_usage, token_usage, response, 
-                                           holdout_value, raw_reward, version, version_description, model, meta, 
-                                           achievements_json, instance, depth, advantage, ticks)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        RETURNING id, created_at
-                    """, (program.code, program.value, 0, program.parent_id,
-                          program.state.to_raw() if program.state else None,
-                          json.dumps(program.conversation.dict()),
-                          program.completion_token_usage,
-                          program.prompt_token_usage,
-                          program.token_usage,
-                          program.response,
-                          program.holdout_value,
-                          program.raw_reward,
-                          program.version,
-                          program.version_description,
-                          program.model,
-                          json.dumps(program.meta),
-                          json.dumps(program.achievements),
-                          program.instance,
-                          program.depth/2,
-                          program.advantage,
-                          program.ticks
-                          ))
-
-                    id, created_at = cur.fetchone()
-                    conn.commit()
-                    program.id = id
-                    program.created_at = created_at
-                    return program
-        except Exception as e:
-            conn.rollback()
-            print(f"Error creating program: {e}")
-            raise e
+                    rows = self._insert_programs(cur, [self._program_values(program) for program in programs])
+                conn.commit()
+            except Exception as e:
+                # Roll back before the connection goes back to the pool, where another thread may take it
+                conn.rollback()
+                print(f"Error creating programs: {e}")
+                raise e
+
+        # Rows are returned in the order of the VALUES list
+        for program, (id, created_at) in zip(programs, rows):
+            program.id = id
+            program.created_at = created_at
+            self.index.add(program)
+            self._remember_state(program)
+        return programs
+
+    def _insert_programs(self, cur, values: List[tuple]) -> List[tuple]:
+        """Insert rows of `PROGRAM_COLUMNS` in one statement, returning the (id, created_at) of each in order"""
+        return execute_values(cur, f"""
+            INSERT INTO programs ({', '.join(self.PROGRAM_COLUMNS)})
+            VALUES %s
+            RETURNING id, created_at
+        """, values, page_size=len(values), fetch=True)
+
+    @blocking
+    def get_program(self, program_id: int) -> Optional[Program]:
+        """Load a single program in full (conversation and state included)"""
+        return self._get_program(program_id)
+
+    def _get_program(self, program_id: int) -> Optional[Program]:
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                self.execute_prepared(cur, "get_program", (program_id,))
+                row = cur.fetchone()
+        return self._resolve_state(Program.from_row(dict(row))) if row else None
+
+    async def resolve_state(self, program: Optional[Program]) -> Optional[Program]:
+        """
+        Rebuild the full state of a program stored as a delta, by walking up its parents to the nearest full state.
+        Programs that already have a full state are returned without touching the database.
+        """
+        if not program or not program.state or program.state.entities is not None:
+            return program
+        return await self.run_in_executor(self._resolve_state, program)
+
+    def _resolve_state(self, program: Optional[Program]) -> Optional[Program]:
+        if not program or not program.state or program.state.entities is not None:
+            if program:
+                self._remember_state(program)
+            return program
+
+        chain = [program.state]
+        parent_id = program.parent_id
+        with self.get_connection() as conn:
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                while chain[-1].entities is None:
+                    if parent_id is None:
+                        raise ValueError(f"Program {program.id} has a delta state without a full ancestor state")
+                    self.execute_prepared(cur, "get_parent_state", (parent_id,))
+                    row = cur.fetchone()
+                    if not row or not row['state_json']:
+                        raise ValueError(f"Program {program.id} has a delta state without a full ancestor state")
+                    chain.append(GameState.parse(row['state_json']))
+                    parent_id = row['parent_id']
+
+        program.state = GameState.from_chain(list(reversed(chain)))
+        self._remember_state(program)
+        return program
 
     async def cleanup(self):
         """Clean up database resources"""
@@ -279,11 +434,12 @@ class DBClient:
 
     @tenacity.retry(retry=retry_if_exception_type((psycopg2.OperationalError, psycopg2.InterfaceError)),
                     wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def get_all_program_rewards(self, version: int = None) -> List[float]:
+    @blocking
+    def get_all_program_rewards(self, version: int = None) -> List[float]:
         """Get all program rewards with proper connection management"""
         query = """
-            SELECT value 
-            FROM programs 
+            SELECT value
+            FROM programs
             WHERE value IS NOT NULL
         """
         if version is not None:
@@ -305,7 +461,8 @@ class DBClient:
 
     @tenacity.retry(retry=retry_if_exception_type((psycopg2.OperationalError, psycopg2.InterfaceError)),
                     wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def get_largest_version(self) -> int:
+    @blocking
+    def get_largest_version(self) -> int:
         query = """
             SELECT MAX(version)
             FROM programs
@@ -320,7 +477,8 @@ class DBClient:
         except Exception as e:
             print(f"Error fetching largest version: {e}")
 
-    async def get_largest_depth_in_version(self, version):
+    @blocking
+    def get_largest_depth_in_version(self, version):
         query = f"""
                     SELECT MAX(depth)
                     FROM programs
@@ -339,7 +497,8 @@ class DBClient:
 
     @tenacity.retry(retry=retry_if_exception_type((psycopg2.OperationalError, psycopg2.InterfaceError)),
                     wait=wait_random_exponential(multiplier=1, min=4, max=10))
-    async def sample_parent(self, version=1, compression_strength: Optional[float] = None,
+    @blocking
+    def sample_parent(self, version=1, compression_strength: Optional[float] = None,
                             adaptive_period: int = 100) -> Optional[Program]:
         """
         Sample parent with proper connection management and adjusted reward scaling.
@@ -351,90 +510,77 @@ class DBClient:
             adaptive_period: Number of steps for a full sine wave cycle when using
                             adaptive compression.
         """
-        max_assistant_length = (self.max_conversation_length * 2) + 1
-
         try:
-            with self.get_connection() as conn:
-                with conn.cursor(cursor_factory=DictCursor) as cur:
-                    # First get the current step count for adaptive compression
-                    if compression_strength is None:
-                        cur.execute(f"SELECT COUNT(*) as step_count FROM programs WHERE version = {version}")
-                        step_count = cur.fetchone()['step_count']
-                        # Calculate adaptive compression using sine wave
-                        # sin goes from -1 to 1, so we transform to 0 to 1
-                        compression_strength = (math.sin(2 * math.pi * step_count / adaptive_period) + 1) / 2
-
-                    cur.execute("""
-                        WITH recent AS (
-                            SELECT id, value, conversation_json
-                            FROM programs
-                            WHERE version = %s 
-                            AND advantage IS NOT NULL
-                            -- AND jsonb_array_length(conversation_json->'messages') < %s
-                            ORDER BY created_at DESC
-                            LIMIT 300
-                        )
-                        SELECT id, advantage 
-                        FROM recent
-                        """, (version)) #, max_assistant_length))
-
-                    results = cur.fetchall()
-                    if not results:
-                        return None
-
-                    # Get statistics of the value distribution
-                    values = [row['advantage'] for row in results]
-                    mean_value = statistics.mean(values)
-                    std_value = statistics.stdev(values) if len(values) > 1 else 1.0
-
-                    # Apply reward transformation to handle power-law distribution
-                    def transform_reward(value):
-                        # Z-score normalization
-                        z_score = (value - mean_value) / std_value if std_value > 0 else 0
-
-                        # Compress extreme values using tanh with current compression strength
-                        compressed = math.tanh(z_score * compression_strength)
-
-                        # Scale back to positive values and add small epsilon
-                        return (compressed + 1.0) / 2.0 + 1e-6
-
-                    # Log current compression state
-                    print(f"Using compression strength: {compression_strength:.3f} "
-                          f"({'adaptive' if compression_strength is None else 'fixed'})")
-
-                    # Calculate transformed weights
-                    weights = [
-                        (row['id'], transform_reward(row['advantage']))
-                        for row in results
-                    ]
-
-                    # Normalize weights
-                    total_weight = sum(w[1] for w in weights)
-                    if total_weight == 0:
-                        sampled_id = random.choice([w[0] for w in weights])
-                    else:
-                        normalized_weights = [(id, w / total_weight) for id, w in weights]
-                        sampled_id = random.choices(
-                            [id for id, _ in normalized_weights],
-                            weights=[w for _, w in normalized_weights],
-                            k=1
-                        )[0]
-
-                    # Fetch the selected program
-                    cur.execute("""
-                        SELECT * FROM programs WHERE id = %s
-                        """, (sampled_id,))
-
-                    row = cur.fetchone()
-                    return Program.from_row(dict(row)) if row else None
+            results = self.index.select(version, lambda program: program.advantage is not None, limit=300)
+            if not results:
+                return None
+
+            # Get the current step count for adaptive compression
+            if compression_strength is None:
+                step_count = self.index.count(version)
+                # Calculate adaptive compression using sine wave
+                # sin goes from -1 to 1, so we transform to 0 to 1
+                compression_strength = (math.sin(2 * math.pi * step_count / adaptive_period) + 1) / 2
+
+            # Get statistics of the value distribution
+            values = [program.advantage for program in results]
+            mean_value = statistics.mean(values)
+            std_value = statistics.stdev(values) if len(values) > 1 else 1.0
+
+            # Apply reward transformation to handle power-law distribution
+            def transform_reward(value):
+                # Z-score normalization
+                z_score = (value - mean_value) / std_value if std_value > 0 else 0
+
+                # Compress extreme values using tanh with current compression strength
+                compressed = math.tanh(z_score * compression_strength)
+
+                # Scale back to positive values and add small epsilon
+                return (compressed + 1.0) / 2.0 + 1e-6
+
+            # Log current compression state
+            print(f"Using compression strength: {compression_strength:.3f} "
+                  f"({'adaptive' if compression_strength is None else 'fixed'})")
+
+            # Calculate transformed weights
+            weights = [
+                (program.id, transform_reward(program.advantage))
+                for program in results
+            ]
+
+            # Normalize weights
+            total_weight = sum(w[1] for w in weights)
+            if total_weight == 0:
+                sampled_id = random.choice([w[0] for w in weights])
+            else:
+                normalized_weights = [(id, w / total_weight) for id, w in weights]
+                sampled_id = random.choices(
+                    [id for id, _ in normalized_weights],
+                    weights=[w for _, w in normalized_weights],
+                    k=1
+                )[0]
+
+            # Fetch the selected program
+            return self._get_program(sampled_id)
         except Exception as e:
             print(f"Error sampling parent: {e}")
             raise e
 
     @tenacity.retry(retry=retry_if_exception_type((psycopg2.OperationalError, psycopg2.InterfaceError)),
                     wait=wait_random_exponential(multiplier=1, min=4, max=10))
-    async def get_parent_visit_stats(self, version: int = None) -> Dict[str, float]:
-        """Get visit statistics with proper connection management"""
+    @blocking
+    def get_parent_visit_stats(self, version: int = None) -> Dict[str, float]:
+        """
+        Get visit statistics of the visited programs of a version, as maintained by the index, or of every version
+        with proper connection management
+        """
+        if version is not None:
+            try:
+                return self.index.stats(version).visit_stats()
+            except Exception as e:
+                print(f"Error fetching visit statistics: {e}")
+                return {}
+
         query = """
             SELECT 
                 AVG(visits) as avg_visits,
@@ -444,15 +590,10 @@ class DBClient:
             FROM programs 
             WHERE visits > 0
         """
-        if version is not None:
-            query += " AND version = %s"
-
-        params = (version,) if version is not None else ()
-
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cur:
-                    cur.execute(query, params)
+                    cur.execute(query)
                     result = cur.fetchone()
                     return {
                         'avg_visits': result[0],
@@ -464,7 +605,8 @@ class DBClient:
             print(f"Error fetching visit statistics: {e}")
             return {}
 
-    async def update_program(self, program_id: int, updates: Dict[str, Any]) -> Program:
+    @blocking
+    def update_program(self, program_id: int, updates: Dict[str, Any]) -> Program:
         """Update program with proper connection management"""
         try:
             with self.get_connection() as conn:
@@ -479,9 +621,11 @@ class DBClient:
                         RETURNING *
                     """, values + [program_id])
 
-                    conn.commit()
                     row = cur.fetchone()
-                    return Program.from_row(dict(zip([desc[0] for desc in cur.description], row)))
+                    conn.commit()
+                    program = Program.from_row(dict(zip([desc[0] for desc in cur.description], row)))
+            self.index.update(program_id, updates)
+            return self._resolve_state(program)
         except Exception as e:
             print(f"Error updating program: {e}")
             raise e
@@ -1,6 +1,8 @@
 import asyncio
 import copy
+import functools
 import pickle
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Union, Dict
 
 from search.db_client import DBClient
@@ -9,6 +11,7 @@ from search.mcts.logger import FactorioLogger
 from search.model.program import Program
 from factorio_entities import Entity, EntityGroup
 from factorio_instance import FactorioInstance
+from factorio_pool import FactorioPool
 from utils import get_achievements
 
 
@@ -18,11 +21,19 @@ class FactorioEvaluator:
                  instances: List[FactorioInstance],
                  value_accrual_time=10,
                  error_penalty=10,
-                 logger=None):
+                 logger=None,
+                 accrual_speed=None,
+                 pool: FactorioPool = None,
+                 task_timeout=None):
         self.db = db_client
         self.instances = instances  # Main instances
+        # When given, programs are evaluated on whichever of the pool's instances is free first (which may be
+        # shared with other evaluators), rather than on `instances`
+        self.pool = pool
+        self.task_timeout = task_timeout  # Seconds an evaluation has on a pool instance before it's retried elsewhere
         #self.holdout = instances[-1]  # Holdout instance
         self.value_accrual_time = value_accrual_time  # Time to accrue value before evaluating
+        self.accrual_speed = accrual_speed  # Game speed to run at while accruing value (None keeps the current speed)
         self.error_penalty = error_penalty  # Penalty for errors during evaluation
 
 
@@ -40,6 +51,16 @@ class FactorioEvaluator:
         }
         #self.instance_to_port[len(self.instances)] = self.holdout.tcp_port  # Add holdout mapping
 
+        # One worker thread per instance. Calls into the same instance are serialised on its thread, while
+        # different instances run concurrently and the event loop stays free for the other groups.
+        if pool:
+            self.executors = pool.executors
+        else:
+            self.executors = {
+                instance: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"factorio-{instance.tcp_port}")
+                for instance in self.instances
+            }
+
 
         if logger:
             self.port_to_group = logger.port_to_group
@@ -66,6 +87,31 @@ class FactorioEvaluator:
             # Also update holdout status
             # self.logger.update_instance(self.holdout.tcp_port, iteration=iteration, n_iterations=n_iterations)
 
+    async def _run_on_instance(self, instance: FactorioInstance, func, *args, **kwargs):
+        """Run a blocking call against `instance` on its worker thread"""
+        if self.pool:
+            # So that the pool knows when a call that timed out has finished with the instance
+            return await self.pool.call(instance, func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        executor = self.executors.get(instance)  # Unknown instances fall back to the default pool
+        return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    async def _reset_and_evaluate(self, program: Program, instance: FactorioInstance, start_state: GameState):
+        if self.logger:
+            self.logger.update_instance(instance.tcp_port, program_id=program.id, status="resetting")
+        await self._run_on_instance(instance, instance.reset, start_state)
+        return instance, await self._evaluate_single(instance.tcp_port, program, instance)
+
+    async def reset_and_get_entities(self, start_state: GameState) -> List[Union[Entity, EntityGroup]]:
+        """The entities of `start_state`, read from an instance reset to it"""
+        if self.pool:
+            async with self.pool.lease() as instance:
+                await self.pool.call(instance, instance.reset, start_state)
+                return await self.pool.call(instance, instance.namespace.get_entities)
+        instance = self.instances[0]
+        await self._run_on_instance(instance, instance.reset, start_state)
+        return await self._run_on_instance(instance, instance.namespace.get_entities)
+
     async def evaluate_batch(self, programs: List[Program], start_state: GameState) -> List[Program]:
         try:
             # Reset holdout and start its baseline run
@@ -76,11 +122,14 @@ class FactorioEvaluator:
 
             # Evaluate programs in parallel
             eval_futures = []
-            for i, (prog, inst) in enumerate(zip(programs, self.instances)):
-                inst.reset(start_state)
-                if self.logger:
-                    self.logger.update_instance(inst.tcp_port, program_id=prog.id, status="resetting")
-                eval_futures.append(self._evaluate_single(inst.tcp_port, prog, inst))
+            if self.pool:
+                for prog in programs:
+                    eval_futures.append(self.pool.run(
+                        functools.partial(self._reset_and_evaluate, prog, start_state=start_state),
+                        timeout=self.task_timeout))
+            else:
+                for i, (prog, inst) in enumerate(zip(programs, self.instances)):
+                    eval_futures.append(self._reset_and_evaluate(prog, inst, start_state))
 
             # Wait for all evaluations and holdout
             eval_results = await asyncio.gather(*eval_futures)
@@ -95,19 +144,19 @@ class FactorioEvaluator:
             #     )
 
             # Update program results
-            for i, (program, (raw_reward, state, response, entities, achievements, ticks)) in enumerate(zip(programs, eval_results)):
+            for i, (program, (instance, (raw_reward, state, response, entities, achievements, ticks))) in enumerate(zip(programs, eval_results)):
                 relative_reward = raw_reward# - holdout_value
 
                 if self.logger:
                     self.logger.update_instance(
-                        self.instances[i].tcp_port,
+                        instance.tcp_port,
                         status="completed",
                         raw_reward=raw_reward,
                         holdout_value=raw_reward,
                         relative_reward=relative_reward,
                         total_programs=self.logger.groups[
-                                           self.port_to_group[self.instances[i].tcp_port]
-                                       ].instances[self.instances[i].tcp_port].total_programs + 1
+                                           self.port_to_group[instance.tcp_port]
+                                       ].instances[instance.tcp_port].total_programs + 1
                     )
 
                 program.value = relative_reward
@@ -154,6 +203,37 @@ class FactorioEvaluator:
 
         return result, achievements, post_production_flows
     
+    @staticmethod
+    def _capture_start(instance: FactorioInstance):
+        return (instance.namespace.get_entities(),
+                instance.namespace.inspect_inventory(),
+                instance.namespace._get_production_stats(),
+                instance.namespace.score())
+
+    @staticmethod
+    def _capture_entities(instance: FactorioInstance):
+        return instance.namespace.get_entities(), instance.namespace.inspect_inventory()
+
+    @staticmethod
+    def _capture_end(instance: FactorioInstance):
+        score, _ = instance.namespace.score()
+        return score, instance.get_elapsed_ticks(), instance.namespace._get_production_stats()
+
+    def _accrue_value(self, instance: FactorioInstance):
+        """
+        Let the game run for `value_accrual_time` seconds at the instance's game speed. This is measured in ticks,
+        so the same amount of game time passes when it is run at a raised `accrual_speed`, only sooner.
+        """
+        speed = instance._speed
+        ticks = int(self.value_accrual_time * 60 * speed)
+        if self.accrual_speed:
+            instance.speed(self.accrual_speed)
+        try:
+            instance.namespace.sleep.wait_ticks(ticks)
+        finally:
+            if self.accrual_speed:
+                instance.speed(speed)
+
     async def _evaluate_single(self, instance_id: int, program: Program, instance: FactorioInstance) \
             -> Tuple[float, GameState, str, List[Union[Entity, EntityGroup]], Dict[str, Dict[str, int]], int]:
         try:
@@ -165,27 +245,24 @@ class FactorioEvaluator:
         try:
             # Get initial state information
             self.logger.update_instance(tcp_port, status="starting value")
-            start_entities = instance.namespace.get_entities()
-            start_inventory = instance.namespace.inspect_inventory()
-            start_production_flows = instance.namespace._get_production_stats()
-            initial_value, start_time = instance.namespace.score()
+            start_entities, start_inventory, start_production_flows, (initial_value, start_time) = \
+                await self._run_on_instance(instance, self._capture_start, instance)
 
             # Executing code
             self.logger.update_instance(tcp_port, status="executing")
-            reward, time, result = instance.eval(program.code, timeout=60)
+            reward, time, result = await self._run_on_instance(instance, instance.eval, program.code, timeout=60)
 
             # Capturing immediate resulting state
             self.logger.update_instance(tcp_port, status="capturing state")
-            state = GameState.from_instance(instance)
+            state = await self._run_on_instance(instance, GameState.from_instance, instance)
 
             # Get the namespace variables in a human readable format for debugging purposes
             vars = pickle.loads(state.namespace)
 
             self.logger.update_instance(tcp_port, status=f"accruing value ({self.value_accrual_time}s)")
-            await asyncio.sleep(self.value_accrual_time)
+            await self._run_on_instance(instance, self._accrue_value, instance)
 
-            entities = instance.namespace.get_entities()
-            final_inventory = instance.namespace.inspect_inventory()
+            entities, final_inventory = await self._run_on_instance(instance, self._capture_entities, instance)
 
             # Check to see if the inventories are different
             # If so, we manually put a hint in the generated code and result from the game
@@ -212,11 +289,9 @@ class FactorioEvaluator:
                 result += f'(\'Current inventory: {final_inventory}\',)\n'
                 result += f'(\'Entities on the map after the current step: {entities}\',)'
 
-            score, _ = instance.namespace.score()
+            score, ticks, post_production_flows = await self._run_on_instance(instance, self._capture_end, instance)
             final_reward = score - initial_value
-            ticks = instance.get_elapsed_ticks()
 
-            post_production_flows = instance.namespace._get_production_stats()
             achievements = get_achievements(start_production_flows, post_production_flows)
 
             group_id = self.port_to_group[tcp_port]
@@ -256,7 +331,6 @@ class FactorioEvaluator:
             traceback.print_exc()
 
             if self.logger:
-                tcp_port = self.instance_to_port[instance_id]
                 group_id = self.port_to_group[tcp_port]
                 group = self.logger.groups[group_id]
                 instance_metrics = group.instances[tcp_port]
@@ -310,5 +384,9 @@ class FactorioEvaluator:
     #         raise e
 
     def __del__(self):
-        """Clean up logger on deletion"""
-        self.logger.stop()
\ No newline at end of file
+        """Clean up logger and worker threads on deletion"""
+        self.logger.stop()
+        if getattr(self, 'pool', None):
+            return  # The pool's worker threads are shut down with the pool
+        for executor in getattr(self, 'executors', {}).values():
+            executor.shutdown(wait=False)
\ No newline at end of file
@@ -102,8 +102,9 @@ class SimpleFactorioEvaluator:
                 result += f'final: (\'Current inventory: {final_inventory}\',)\n'
                 result += f'final: (\'Entities on the map after the current step: {entities}\',)'
 
-            # Sleep for 3 seconds to get output flows
-            await asyncio.sleep(self.value_accrual_time)
+            # Let the game run to get output flows, measured in ticks at the instance's game speed
+            await asyncio.to_thread(instance.namespace.sleep.wait_ticks,
+                                    int(self.value_accrual_time * 60 * instance._speed))
             state = GameState.from_instance(instance)
 
             score, _ = instance.namespace.score()
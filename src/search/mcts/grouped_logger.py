@@ -45,7 +45,11 @@ class InstanceMetrics:
 class GroupedFactorioLogger:
     """Logger that displays instances grouped by their MCTS parallel groups"""
 
-    def __init__(self, n_groups: int, instances_per_group: int, base_port = 27000, resume_version=0):
+    def __init__(self, n_groups: int, instances_per_group: int, base_port = 27000, resume_version=0,
+                 ports: Optional[List[int]] = None):
+        """
+        :param ports: The tcp ports of the instances, group by group. Defaults to consecutive ports from `base_port`
+        """
         self.console = Console()
         self.layout = Layout()
         self.groups: Dict[int, InstanceGroupMetrics] = {}
@@ -65,18 +69,20 @@ class GroupedFactorioLogger:
         self.progress_task = None
 
         # Initialize metrics for each group and their instances
-        current_port = base_port
+        if ports is None:
+            ports = list(range(base_port, base_port + n_groups * instances_per_group))
+        ports = iter(ports)
 
         for group_id in range(n_groups):
             group_instances = {}
             for i in range(instances_per_group):
                 #is_holdout = (i == instances_per_group - 1)  # Last instance in group is holdout
+                current_port = next(ports)
                 group_instances[current_port] = InstanceMetrics(
                     tcp_port=current_port,
                     is_holdout=False
                 )
                 self.port_to_group[current_port] = group_id
-                current_port += 1
 
             self.groups[group_id] = InstanceGroupMetrics(
                 group_id=group_id,
@@ -3,6 +3,7 @@ import asyncio
 from dotenv import load_dotenv
 from cluster.local.cluster_ips import get_local_container_ips
 from search.db_client import DBClient
+from search.sqlite_db_client import SQLiteDBClient
 from search.mcts.mcts_factory import MCTSFactory
 from search.plots.run_results import RunResults
 from factorio_instance import FactorioInstance
@@ -61,14 +62,18 @@ with open("../TEST_PROMPT.md", "r") as f:
 
 async def main():
     try:
-        db_client = DBClient(
-            max_conversation_length=40,
-            host=os.getenv("SKILLS_DB_HOST"),
-            port=os.getenv("SKILLS_DB_PORT"),
-            dbname=os.getenv("SKILLS_DB_NAME"),
-            user=os.getenv("SKILLS_DB_USER"),
-            password=os.getenv("SKILLS_DB_PASSWORD")
-        )
+        if os.getenv("SKILLS_DB_FILE"):
+            # Local run without a Postgres server
+            db_client = SQLiteDBClient(os.getenv("SKILLS_DB_FILE"), max_conversation_length=40)
+        else:
+            db_client = DBClient(
+                max_conversation_length=40,
+                host=os.getenv("SKILLS_DB_HOST"),
+                port=os.getenv("SKILLS_DB_PORT"),
+                dbname=os.getenv("SKILLS_DB_NAME"),
+                user=os.getenv("SKILLS_DB_USER"),
+                password=os.getenv("SKILLS_DB_PASSWORD")
+            )
     except Exception as e:
         print("\033[91mError connecting to the database. Please check your credentials and try again.\033[91m")
         return
@@ -4,7 +4,7 @@ import json
 import re
 from asyncio import sleep
 from random import random
-from typing import Optional, List
+from typing import Optional, List, Set
 
 import psycopg2
 import tenacity
@@ -18,6 +18,7 @@ from search.factorio_evaluator import FactorioEvaluator
 from search.model.game_state import GameState
 from search.model.program import Program
 from search.mcts.samplers.db_sampler import DBSampler
+from search.program_buffer import ProgramWriteBuffer
 
 
 class MCTS:
@@ -34,7 +35,8 @@ class MCTS:
                  presence_penalty=0,
                  frequency_penalty=0,
                  error_penalty=0,
-                 maximum_lookback=20
+                 maximum_lookback=20,
+                 write_buffer: Optional[ProgramWriteBuffer] = None
                  ):
 
         self.llm = llm_factory
@@ -52,6 +54,11 @@ class MCTS:
         self.frequency_penalty = frequency_penalty
         self.error_penalty = error_penalty
         self.maximum_lookback = maximum_lookback
+        # Optional write-behind buffer (e.g shared by the searches of a ParallelMCTS), so that iterations save their
+        # programs in batches rather than each waiting for its own insert
+        self.write_buffer = write_buffer
+        self._pending_visits: Set[asyncio.Task] = set()
+        self._visit_errors: List[BaseException] = []
         self.parser = PythonParser()
 
 
@@ -310,6 +317,29 @@ class MCTS:
             print(f"Starting iteration {iteration}")
             await self.run_iteration(samples_per_iteration, skip_failures, iteration, n_iterations)
             self.evaluator.logger.update_progress()
+        await self.flush_writes()
+
+    async def flush_writes(self):
+        """Wait for the programs in the write buffer to be saved and their parents visited, raising the first error"""
+        if self.write_buffer is None:
+            return
+        try:
+            await self.write_buffer.close()
+        finally:
+            await asyncio.gather(*self._pending_visits, return_exceptions=True)
+        if self._visit_errors:
+            error, self._visit_errors = self._visit_errors[0], []
+            raise error
+
+    def _visited(self, task: asyncio.Task):
+        self._pending_visits.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._visit_errors.append(task.exception())
+
+    async def _visit_once_saved(self, saved: asyncio.Future, parent_id: int, children: int):
+        # The visit recomputes the advantages of the parent's saved children, so it waits for them to be saved
+        await saved
+        await self.sampler.visit(parent_id, children)
 
     @tenacity.retry(
         retry=retry_if_exception_type(psycopg2.Error),
@@ -325,8 +355,7 @@ class MCTS:
                 conversation = parent.conversation
             else:
                 start_state = self.initial_state
-                self.evaluator.instances[0].reset(start_state)
-                entities = self.evaluator.instances[0].get_entities()
+                entities = await self.evaluator.reset_and_get_entities(start_state)
                 conversation = Conversation(messages=[
                     Message(role="system", content=self.system_prompt),
                     # Message(role="user", content=PLANNING_ADDITION_PROMPT),
@@ -352,18 +381,21 @@ class MCTS:
 
             evaluated_programs = await self.evaluator.evaluate_batch(programs, start_state)
 
-            # Use a connection pool or new connections for parallel saves
-            save_tasks = []
-            for program in evaluated_programs:
-                if program.state is not None:
-                    if not skip_failures or program.value is not None:
-                        save_tasks.append(self.db.create_program(program))
+            # Save the programs in a single batched insert
+            save_programs = [program for program in evaluated_programs
+                             if program.state is not None and (not skip_failures or program.value is not None)]
 
-            if save_tasks:
-                await asyncio.gather(*save_tasks)
+            if save_programs and self.write_buffer is not None:
+                # Saved along with the programs of other iterations, and the parent visited once they are
+                saved = asyncio.gather(*(self.write_buffer.add(program) for program in save_programs))
+                visit = asyncio.ensure_future(self._visit_once_saved(saved, parent.id, len(save_programs)))
+                self._pending_visits.add(visit)
+                visit.add_done_callback(self._visited)
+            elif save_programs:
+                await self.db.create_programs(save_programs)
 
                 # Visit parent
-                await self.sampler.visit(parent.id, len(save_tasks))
+                await self.sampler.visit(parent.id, len(save_programs))
 
         except Exception as e:
             self.retry_count += 1
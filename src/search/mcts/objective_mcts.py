@@ -299,15 +299,12 @@ class ObjectiveMCTS(MCTS):
 
             evaluated_programs = await self.evaluator.evaluate_batch(programs, start_state)
 
-            # Use a connection pool or new connections for parallel saves
-            save_tasks = []
-            for program in evaluated_programs:
-                if program.state is not None:
-                    if not skip_failures or program.value is not None:
-                        save_tasks.append(self.db.create_program(program))
-
-            if save_tasks:
-                await asyncio.gather(*save_tasks)
+            # Save the programs in a single batched insert
+            save_programs = [program for program in evaluated_programs
+                             if program.state is not None and (not skip_failures or program.value is not None)]
+
+            if save_programs:
+                await self.db.create_programs(save_programs)
 
         except Exception as e:
             self.retry_count += 1
@@ -11,6 +11,8 @@ from search.mcts.grouped_logger import GroupedFactorioLogger
 from search.model.instance_group import InstanceGroup
 from search.mcts.parallel_mcts_config import ParallelMCTSConfig
 from factorio_instance import FactorioInstance
+from factorio_pool import FactorioPool
+from search.program_buffer import ProgramWriteBuffer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -55,6 +57,13 @@ class ParallelMCTS:
         )
         self.logger.start()
 
+        # With `shared_pool`, the groups evaluate on whichever instance is free, so a slow or unresponsive server
+        # doesn't hold up its group
+        self.pool = FactorioPool(instances) if getattr(config, 'shared_pool', False) else None
+
+        # With `buffered_writes`, the groups save their programs through one write-behind buffer, in batches
+        self.write_buffer = ProgramWriteBuffer(db_client) if getattr(config, 'buffered_writes', False) else None
+
         # Create instance groups
         self.instance_groups = self._create_instance_groups(instances)
 
@@ -96,7 +105,8 @@ class ParallelMCTS:
                 instances=group_instances,
                 value_accrual_time=3,
                 logger=self.logger,
-                error_penalty=self.config.mcts_kwargs['error_penalty']
+                error_penalty=self.config.mcts_kwargs['error_penalty'],
+                pool=self.pool
             )
 
             # Create MCTS instance
@@ -109,6 +119,7 @@ class ParallelMCTS:
                 initial_state=self.config.initial_state,
                 **self.config.mcts_kwargs
             )
+            mcts.write_buffer = self.write_buffer
 
             groups.append(InstanceGroup(
                 group_id=group_id,
@@ -128,6 +139,8 @@ class ParallelMCTS:
             n_iterations: Number of iterations to run
             skip_failures: Whether to skip failed program generations
         """
+        if self.pool:
+            self.pool.start()
         try:
             search_tasks = [
                 self._run_group_search(group, n_iterations, skip_failures)
@@ -139,6 +152,8 @@ class ParallelMCTS:
             logger.error(f"Error during parallel search: {str(e)}", exc_info=True)
             raise
         finally:
+            if self.pool:
+                await self.pool.stop()
             self.cleanup()
 
     async def _run_group_search(self,
@@ -157,6 +172,7 @@ class ParallelMCTS:
                     n_iterations
                 )
                 self.logger.update_progress()
+            await group.mcts.flush_writes()
 
         except Exception as e:
             logger.error(f"Error in group {group.group_id}: {str(e)}", exc_info=True)
@@ -558,7 +558,7 @@ class ParallelPlanningMCTS:
         )
 
         inventory_dict = self.get_inventory_dict(starting_inventory)
-        game_state_str = GameState.from_instance(first_instance).entities
+        game_state_str = GameState.from_instance(first_instance).resolve().entities
 
         tasks = await self._generate_natural_language_batch(
             conversation,
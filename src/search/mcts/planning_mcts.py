@@ -174,7 +174,7 @@ class PlanningMCTS(MCTS):
             stop_sequences=["\n"]
         )
         inventory_dict = self.get_inventory_dict(starting_inventory)
-        game_state_str = GameState.from_instance(self.evaluator.instances[0]).entities
+        game_state_str = GameState.from_instance(self.evaluator.instances[0]).resolve().entities
         tasks = await self._generate_natural_language_batch(conversation, generation_params, meta={"type": "objective_generation",
                                                                                                    "inventory": inventory_dict,
                                                                                                    "mining_setup": mining_setup,
@@ -54,64 +54,25 @@ class BeamSampler(DBSampler):
         max_assistant_length = (self.max_conversation_length * 2) + 1
 
         try:
-            with self.db_client.get_connection() as conn:
-                with conn.cursor(cursor_factory=DictCursor) as cur:
-                    # Decide whether to explore or exploit
-                    if random.random() < self.exploration_prob:
-                        # Exploration: Sample from recent programs outside the beam
-                        cur.execute("""
-                            WITH beam AS (
-                                SELECT id
-                                FROM programs 
-                                WHERE version = %s
-                                AND value IS NOT NULL
-                                AND jsonb_array_length(conversation_json->'messages') < %s
-                                ORDER BY value DESC
-                                LIMIT %s
-                            ),
-                            exploration_candidates AS (
-                                SELECT id 
-                                FROM programs
-                                WHERE version = %s
-                                AND value IS NOT NULL
-                                AND jsonb_array_length(conversation_json->'messages') < %s
-                                AND id NOT IN (SELECT id FROM beam)
-                                ORDER BY created_at DESC
-                                LIMIT 100
-                            )
-                            SELECT id FROM exploration_candidates
-                            ORDER BY RANDOM()
-                            LIMIT 1
-                        """, (version, max_assistant_length, self.beam_width,
-                              version, max_assistant_length))
-                    else:
-                        # Exploitation: Sample from the beam (top N programs)
-                        cur.execute("""
-                            WITH beam AS (
-                                SELECT id, value
-                                FROM programs 
-                                WHERE version = %s
-                                AND value IS NOT NULL
-                                AND jsonb_array_length(conversation_json->'messages') < %s
-                                ORDER BY value DESC
-                                LIMIT %s
-                            )
-                            SELECT id FROM beam
-                            ORDER BY RANDOM()
-                            LIMIT 1
-                        """, (version, max_assistant_length, self.beam_width))
-
-                    result = cur.fetchone()
-                    if not result:
-                        return None
-
-                    # Fetch the complete program
-                    cur.execute("""
-                        SELECT * FROM programs WHERE id = %s
-                    """, (result['id'],))
-
-                    row = cur.fetchone()
-                    return Program.from_row(dict(row)) if row else None
+            candidates = await self.db_client.run_in_executor(
+                self.db_client.index.select, version, lambda program: program.value is not None and program.conversation_length < max_assistant_length
+            )
+            beam = sorted(candidates, key=lambda program: program.value, reverse=True)[:self.beam_width]
+
+            # Decide whether to explore or exploit
+            if random.random() < self.exploration_prob:
+                # Exploration: Sample from recent programs outside the beam
+                beam_ids = {program.id for program in beam}
+                choices = [program for program in candidates if program.id not in beam_ids][:100]
+            else:
+                # Exploitation: Sample from the beam (top N programs)
+                choices = beam
+
+            if not choices:
+                return None
+
+            # Fetch the complete program
+            return await self.db_client.get_program(random.choice(choices).id)
 
         except Exception as e:
             print(f"Error sampling parent: {e}")
@@ -128,28 +89,30 @@ class BeamSampler(DBSampler):
             Dictionary containing beam statistics
         """
         try:
-            with self.db_client.get_connection() as conn:
-                with conn.cursor(cursor_factory=DictCursor) as cur:
-                    cur.execute("""
-                        WITH beam AS (
-                            SELECT value
-                            FROM programs 
-                            WHERE version = %s
-                            AND value IS NOT NULL
-                            ORDER BY value DESC
-                            LIMIT %s
-                        )
-                        SELECT 
-                            COUNT(*) as beam_size,
-                            AVG(value) as mean_value,
-                            MIN(value) as min_value,
-                            MAX(value) as max_value
-                        FROM beam
-                    """, (version, self.beam_width))
-
-                    result = cur.fetchone()
-                    return dict(result) if result else {}
-
+            return await self.db_client.run_in_executor(self._get_beam_stats, version)
         except Exception as e:
             print(f"Error getting beam stats: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+    def _get_beam_stats(self, version: int) -> dict:
+        with self.db_client.get_connection() as conn:
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                cur.execute("""
+                    WITH beam AS (
+                        SELECT value
+                        FROM programs 
+                        WHERE version = %s
+                        AND value IS NOT NULL
+                        ORDER BY value DESC
+                        LIMIT %s
+                    )
+                    SELECT 
+                        COUNT(*) as beam_size,
+                        AVG(value) as mean_value,
+                        MIN(value) as min_value,
+                        MAX(value) as max_value
+                    FROM beam
+                """, (version, self.beam_width))
+
+                result = cur.fetchone()
+                return dict(result) if result else {}
\ No newline at end of file
@@ -29,26 +29,24 @@ class DBSampler(ABC):
         if children == 0:
             return
 
+        await self.db_client.run_in_executor(self._visit, id, children)
+
+    def _visit(self, id, children):
         with self.db_client.get_connection() as conn:
             with conn.cursor(cursor_factory=DictCursor) as cur:
                 # First update the visit count as before
-                cur.execute("SELECT visits FROM programs WHERE id = %s", (id,))
-                visits = cur.fetchone()['visits']
-                if visits is None:
+                self.db_client.execute_prepared(cur, "add_visits", (children, id))
+                visited = cur.fetchone()
+                if visited is None:
                     return
-
-                cur.execute("UPDATE programs SET visits = visits + %s WHERE id = %s",
-                            (children, id))
+                self.db_client.index.visit(id, children, {}, version=visited['version'], visits=visited['visits'])
 
                 # Get all children of this program
-                cur.execute("""
-                    SELECT id, value 
-                    FROM programs 
-                    WHERE parent_id = %s AND value IS NOT NULL
-                    """, (id,))
+                self.db_client.execute_prepared(cur, "get_child_values", (id,))
                 children_data = cur.fetchall()
 
                 if not children_data:
+                    conn.commit()
                     return
 
                 # Calculate mean value across all children
@@ -56,10 +54,10 @@ class DBSampler(ABC):
                 mean_value = sum(values) / len(values)
 
                 # Calculate and update advantage for each child
+                advantages = {}
                 for child in children_data:
                     advantage = child['value'] - mean_value
-                    cur.execute("""
-                        UPDATE programs 
-                        SET advantage = %s 
-                        WHERE id = %s
-                        """, (advantage, child['id']))
\ No newline at end of file
+                    self.db_client.execute_prepared(cur, "set_advantage", (advantage, child['id']))
+                    advantages[child['id']] = advantage
+                conn.commit()
+                self.db_client.index.visit(id, 0, advantages)
\ No newline at end of file
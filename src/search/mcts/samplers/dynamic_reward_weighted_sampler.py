@@ -5,7 +5,6 @@ from typing import Optional
 
 import psycopg2
 import tenacity
-from psycopg2.extras import DictCursor
 from tenacity import retry_if_exception_type, wait_exponential
 
 from search.db_client import DBClient
@@ -56,92 +55,68 @@ class DynamicRewardWeightedSampler(DBSampler):
             """
             max_assistant_length = (self.max_conversation_length * 2) + 1
             try:
-                with self.db_client.get_connection() as conn:
-                    with conn.cursor(cursor_factory=DictCursor) as cur:
-                        # First get the current step count for adaptive compression
-                        if self.compression_strength is None:
-                            cur.execute(f"SELECT COUNT(*) as step_count FROM programs WHERE version = {version}")
-                            step_count = cur.fetchone()['step_count']
-                            # Calculate adaptive compression using sine wave
-                            # sin goes from -1 to 1, so we transform to 0 to 1
-                            compression_strength = (math.sin(2 * math.pi * step_count / self.adaptive_period) + 1) / 2
-                        else:
-                            compression_strength = self.compression_strength
-
-                        cur.execute(f"""select max(depth) from programs where version = {version}""")
-                        max_depth = cur.fetchone()['max']
-                        if not max_depth:
-                            max_depth = 0
-                        min_depth = max(0, max_depth - self.maximum_lookback)
-
-                        cur.execute("""
-                                WITH recent AS (
-                                    SELECT id, advantage, conversation_json
-                                    FROM programs
-                                    WHERE version = %s 
-                                    AND advantage IS NOT NULL
-                                    AND depth > %s
-                                    ORDER BY created_at DESC
-                                    LIMIT 300
-                                )
-                                SELECT id, advantage 
-                                FROM recent
-                                """, (version, min_depth))
-
-                        results = cur.fetchall()
-                        if not results:
-                            return None
-
-                        # Get statistics of the value distribution
-                        values = [row['advantage'] for row in results]
-                        mean_value = statistics.mean(values)
-                        std_value = statistics.stdev(values) if len(values) > 1 else 1.0
-
-                        # Apply reward transformation to handle power-law distribution
-                        def transform_reward(value):
-                            # Z-score normalization
-                            z_score = (value - mean_value) / std_value if std_value > 0 else 0
-
-                            # Compress extreme values using tanh with current compression strength
-                            compressed = math.tanh(z_score * compression_strength)
-
-                            # Scale back to positive values and add small epsilon
-                            return (compressed + 1.0) / 2.0 + 1e-6
-
-                        # Log current compression state
-                        if compression_strength:
-                            print(f"Using compression strength: {compression_strength:.3f}")
-                        else:
-                            print(f"Using adaptive compression strength")
-
-                        # Calculate transformed weights
-                        weights = [
-                            (row['id'], transform_reward(row['advantage']))
-                            for row in results
-                        ]
-
-                        # Normalize weights
-                        total_weight = sum(w[1] for w in weights)
-                        if total_weight == 0:
-                            sampled_id = random.choice([w[0] for w in weights])
-                        else:
-                            normalized_weights = [(id, w / total_weight) for id, w in weights]
-                            sampled_id = random.choices(
-                                [id for id, _ in normalized_weights],
-                                weights=[w for _, w in normalized_weights],
-                                k=1
-                            )[0]
-
-                        # Fetch the selected program
-                        cur.execute("""
-                                SELECT * FROM programs WHERE id = %s
-                                """, (sampled_id,))
-
-                        row = cur.fetchone()
-                        if row:
-                            program = Program.from_row(dict(row))
-                            return program
-                        return None
+                programs = await self.db_client.run_in_executor(self.db_client.index.select, version)
+
+                # First get the current step count for adaptive compression
+                if self.compression_strength is None:
+                    step_count = self.db_client.index.count(version)
+                    # Calculate adaptive compression using sine wave
+                    # sin goes from -1 to 1, so we transform to 0 to 1
+                    compression_strength = (math.sin(2 * math.pi * step_count / self.adaptive_period) + 1) / 2
+                else:
+                    compression_strength = self.compression_strength
+
+                # Over the whole version, not only the programs in the index's window
+                max_depth = self.db_client.index.stats(version, refresh=False).max_depth
+                min_depth = max(0, max_depth - self.maximum_lookback)
+
+                results = [program for program in programs
+                           if program.advantage is not None and program.depth > min_depth][:300]
+                if not results:
+                    return None
+
+                # Get statistics of the value distribution
+                values = [program.advantage for program in results]
+                mean_value = statistics.mean(values)
+                std_value = statistics.stdev(values) if len(values) > 1 else 1.0
+
+                # Apply reward transformation to handle power-law distribution
+                def transform_reward(value):
+                    # Z-score normalization
+                    z_score = (value - mean_value) / std_value if std_value > 0 else 0
+
+                    # Compress extreme values using tanh with current compression strength
+                    compressed = math.tanh(z_score * compression_strength)
+
+                    # Scale back to positive values and add small epsilon
+                    return (compressed + 1.0) / 2.0 + 1e-6
+
+                # Log current compression state
+                if compression_strength:
+                    print(f"Using compression strength: {compression_strength:.3f}")
+                else:
+                    print(f"Using adaptive compression strength")
+
+                # Calculate transformed weights
+                weights = [
+                    (program.id, transform_reward(program.advantage))
+                    for program in results
+                ]
+
+                # Normalize weights
+                total_weight = sum(w[1] for w in weights)
+                if total_weight == 0:
+                    sampled_id = random.choice([w[0] for w in weights])
+                else:
+                    normalized_weights = [(id, w / total_weight) for id, w in weights]
+                    sampled_id = random.choices(
+                        [id for id, _ in normalized_weights],
+                        weights=[w for _, w in normalized_weights],
+                        k=1
+                    )[0]
+
+                # Fetch the selected program
+                return await self.db_client.get_program(sampled_id)
 
             except Exception as e:
                 print(f"Error sampling parent: {e}")
@@ -1,11 +1,11 @@
 import math
+import threading
 from collections import Counter
 from typing import Dict, Optional, Tuple, List
 
 import numpy as np
 import psycopg2
 import tenacity
-from psycopg2.extras import DictCursor
 from tenacity import retry_if_exception_type, wait_exponential
 
 from search.db_client import DBClient
@@ -13,6 +13,41 @@ from search.model.program import Program
 from search.mcts.samplers.db_sampler import DBSampler
 
 
+class AchievementMatrix:
+    """
+    Achievement frequencies of the most recent programs as a dense matrix (one row per program),
+    over a vocabulary that grows as new achievements appear.
+    """
+
+    def __init__(self, window_size: int):
+        self.window_size = window_size
+        self.vocabulary: Dict[str, int] = {}
+        self.ids: List[int] = []
+        self.counts = np.zeros((0, 0))
+
+    @property
+    def last_id(self) -> Optional[int]:
+        return max(self.ids) if self.ids else None
+
+    def add(self, programs: List[Tuple[int, Counter]]):
+        """Append programs (oldest first), dropping the oldest rows beyond the window"""
+        if not programs:
+            return
+        for _, frequencies in programs:
+            for key in frequencies:
+                if key not in self.vocabulary:
+                    self.vocabulary[key] = len(self.vocabulary)
+
+        rows = np.zeros((len(programs), len(self.vocabulary)))
+        for i, (_, frequencies) in enumerate(programs):
+            for key, value in frequencies.items():
+                rows[i, self.vocabulary[key]] = value
+
+        counts = np.pad(self.counts, ((0, 0), (0, len(self.vocabulary) - self.counts.shape[1])))
+        self.counts = np.vstack([counts, rows])[-self.window_size:]
+        self.ids = (self.ids + [program_id for program_id, _ in programs])[-self.window_size:]
+
+
 class KLDiversityAchievementSampler(DBSampler):
     """
         A sampler that promotes diversity in achievements by computing KL divergence
@@ -31,6 +66,10 @@ class KLDiversityAchievementSampler(DBSampler):
         super().__init__(db_client)
         self.window_size = window_size
         self.temperature = temperature
+        # Achievement matrices per version, only new programs are fetched and appended
+        self.matrices: Dict[int, AchievementMatrix] = {}
+        # Samples run on the database client's executor threads, which must not update a matrix at the same time
+        self._lock = threading.Lock()
 
     def _normalize_scores(self, scores: np.ndarray) -> np.ndarray:
         """
@@ -125,6 +164,24 @@ class KLDiversityAchievementSampler(DBSampler):
 
         return kld
 
+    def _compute_diversity_scores(self, counts: np.ndarray) -> np.ndarray:
+        """
+        Compute the sum of KL divergences against every other program, for all programs at once.
+        Equivalent to summing `_compute_kl_divergence` over all pairs (smoothing over the shared vocabulary),
+        using sum_j KL(p_i || p_j) = n * sum_k p_ik log p_ik - sum_k p_ik sum_j log p_jk.
+        Programs without achievements are treated as uniform over the shared vocabulary.
+
+        Args:
+            counts: Achievement matrix, one row per program
+
+        Returns:
+            Array of total KL divergence per program
+        """
+        epsilon = 1e-10
+        probs = (counts + epsilon) / (counts.sum(axis=1, keepdims=True) + epsilon * counts.shape[1])
+        log_probs = np.log(probs)
+        return len(probs) * (probs * log_probs).sum(axis=1) - probs @ log_probs.sum(axis=0)
+
     @tenacity.retry(
         retry=retry_if_exception_type((psycopg2.OperationalError, psycopg2.InterfaceError)),
         wait=wait_exponential(multiplier=1, min=4, max=10)
@@ -141,61 +198,47 @@ class KLDiversityAchievementSampler(DBSampler):
             Sampled Program object or None if no valid programs found
         """
         try:
-            with self.db_client.get_connection() as conn:
-                with conn.cursor(cursor_factory=DictCursor) as cur:
-                    # Fetch recent programs with achievements
-                    cur.execute("""
-                            SELECT id, achievements_json
-                            FROM programs
-                            WHERE version = %s 
-                            AND achievements_json IS NOT NULL
-                            ORDER BY created_at DESC
-                            LIMIT %s
-                        """, (version, self.window_size))
-
-                    results = cur.fetchall()
-                    if not results:
-                        return None
-
-                    # Compute frequency distributions for each program
-                    programs: List[Tuple[int, Counter]] = [
-                        (row['id'], self._compute_achievement_frequencies(row['achievements_json']))
-                        for row in results
-                    ]
-
-                    if len(programs) < 2:
-                        # If only one program, return it
-                        program_id = programs[0][0]
-                    else:
-                        # Compute pairwise KL divergences
-                        diversity_scores = []
-                        for i, (prog_id, freq1) in enumerate(programs):
-                            # Sum of KL divergences against all other programs
-                            total_kld = sum(
-                                self._compute_kl_divergence(freq1, freq2)
-                                for j, (_, freq2) in enumerate(programs)
-                                if i != j
-                            )
-                            diversity_scores.append((prog_id, total_kld))
-
-                        # Apply softmax to diversity scores
-                        scores = np.array([score for _, score in diversity_scores])
-                        normalized_scores = self._normalize_scores(scores)
-
-                        normalized_scores = normalized_scores / self.temperature  # Apply temperature scaling
-                        softmax_probs = np.exp(normalized_scores - np.max(normalized_scores))
-                        softmax_probs = softmax_probs / softmax_probs.sum()
-
-                        # Sample program ID based on softmax probabilities
-                        program_ids = [prog_id for prog_id, _ in diversity_scores]
-                        program_id = np.random.choice(program_ids, p=softmax_probs)
-
-                    # Fetch the selected program
-                    cur.execute(f"SELECT * FROM programs WHERE id = {int(program_id)}")
-
-                    row = cur.fetchone()
-                    return Program.from_row(dict(row)) if row else None
+            program_id = await self.db_client.run_in_executor(self._sample_program_id, version)
+            return await self.db_client.get_program(int(program_id)) if program_id is not None else None
 
         except Exception as e:
             print(f"Error sampling parent: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+    def _sample_program_id(self, version: int) -> Optional[int]:
+        """Update the achievement matrix with new programs, and sample the id of a program from it"""
+        # Recent programs with achievements, newest first
+        programs = self.db_client.index.select(version, lambda program: program.achievements is not None,
+                                               limit=self.window_size)
+        with self._lock:
+            matrix = self.matrices.get(version)
+            if matrix is None:
+                matrix = self.matrices[version] = AchievementMatrix(self.window_size)
+
+            # Compute frequency distributions for the programs that arrived since the last sample (oldest first)
+            last_id = matrix.last_id or 0
+            matrix.add([
+                (program.id, self._compute_achievement_frequencies(program.achievements))
+                for program in reversed(programs) if program.id > last_id
+            ])
+            if not matrix.ids:
+                return None
+
+            if len(matrix.ids) < 2:
+                # If only one program, return it
+                program_id = matrix.ids[0]
+            else:
+                # Sum of KL divergences against all other programs
+                scores = self._compute_diversity_scores(matrix.counts)
+
+                # Apply softmax to diversity scores
+                normalized_scores = self._normalize_scores(scores)
+
+                normalized_scores = normalized_scores / self.temperature  # Apply temperature scaling
+                softmax_probs = np.exp(normalized_scores - np.max(normalized_scores))
+                softmax_probs = softmax_probs / softmax_probs.sum()
+
+                # Sample program ID based on softmax probabilities
+                program_id = np.random.choice(matrix.ids, p=softmax_probs)
+
+            return program_id
\ No newline at end of file
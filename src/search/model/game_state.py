@@ -1,9 +1,12 @@
+import base64
 import builtins
+import hashlib
 import json
 import marshal
 import pickle
 import time
 import types
+import zlib
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Dict, Any, Optional
@@ -67,6 +70,9 @@ class SerializableFunction:
         for name in dir(builtins):
             if not name.startswith('_'):
                 globals_dict[name] = getattr(builtins, name)
+        # The deadline checks compiled into program code (see `DeadlineChecks` in factorio_namespace)
+        if hasattr(instance, '_check_deadline'):
+            globals_dict['__check_deadline__'] = instance._check_deadline
 
         code = marshal.loads(func_data.code_bytes)
 
@@ -135,20 +141,76 @@ def filter_serializable_vars(vars_dict: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def encode_entities(entities: List[Dict]) -> str:
+    """Same encoding as `_save_entity_state(compress=True, encode=True)`"""
+    return base64.b64encode(zlib.compress(json.dumps(entities).encode())).decode()
+
+def decode_entities(entities: str) -> List[Dict]:
+    return json.loads(zlib.decompress(base64.b64decode(entities)))
+
+def _as_list(value) -> List:
+    """Empty / sparse Lua tables can come back from slpp as dicts"""
+    if isinstance(value, dict):
+        return list(value.values())
+    return list(value or [])
+
+def entity_key(state: Dict) -> str:
+    """Identifies an entity across captures and restores, matching `entity_state_key` in save_entity_state.lua"""
+    name = str(state['name']).replace('"', '')
+    return f"{name}@{state['position']['x']},{state['position']['y']}"
+
+def apply_entity_delta(entities: List[Dict], delta: Dict) -> List[Dict]:
+    """Apply a `{'changed': [...], 'removed': [...]}` delta to a list of serialized entities"""
+    removed = set(_as_list(delta.get('removed')))
+    changed = {entity_key(state): state for state in _as_list(delta.get('changed'))}
+    result = [state for state in entities
+              if entity_key(state) not in removed and entity_key(state) not in changed]
+    result.extend(changed.values())
+
+    # Unchanged entities keep the unit numbers of whichever game captured them, so renumber to keep them unique
+    # (load_entity_state uses them to pair the created entities with their state)
+    return [dict(state, entity_number=i + 1) for i, state in enumerate(result)]
+
+
 @dataclass
 class GameState:
     """Serializable Factorio game state"""
-    entities: str # Serialized list of entities
+    entities: Optional[str] # Serialized list of entities (None for a delta that hasn't been resolved yet)
     inventory: Dict[str, int]
     research: Optional[ResearchState] = field()
     timestamp: float = field(default_factory=time.time)
     namespace: bytes = field(default_factory=bytes)
+    parent_hash: Optional[str] = None # `entities_hash()` of the state this was captured as a delta against
+    entities_delta: Optional[str] = None # Serialized changes since that state
+
+    # The state a capture was diffed against in this process, which `resolve` rebuilds its entities from (not fields,
+    # so they aren't compared or serialized)
+    _parent = None
+    _unresolved_parents = 0
+    # Captures rebuild their full entities at least this often, so the chain of parents kept in memory stays short
+    MAX_UNRESOLVED_PARENTS = 32
 
     @classmethod
     def from_instance(cls, instance: 'FactorioInstance') -> 'GameState':
 
         """Capture current game state from Factorio instance"""
-        entities = instance.namespace._save_entity_state(compress=True, encode=True)
+        # Only the entities that changed since the state the instance was last reset to (or captured) are sent back
+        baseline = instance.entity_baseline
+        delta = instance.namespace._save_entity_state(delta=True, rebase=baseline is None)
+        if delta is None:
+            # The game lost its baseline (e.g the server restarted), so fall back to a full capture
+            baseline = None
+            delta = instance.namespace._save_entity_state(delta=True, rebase=True)
+
+        if baseline is not None:
+            # The full entities are only rebuilt from the baseline's when they are first needed (see `resolve`)
+            entities = None
+            parent_hash = baseline.entities_hash()
+            entities_delta = encode_entities(delta)
+        else:
+            entities = encode_entities(apply_entity_delta([], delta))
+            parent_hash = None
+            entities_delta = None
 
         # Get research state
         research_state = instance.namespace._save_research_state()
@@ -160,12 +222,68 @@ class GameState:
         else:
             namespace = bytes()
 
-        return cls(
+        state = cls(
             entities=entities,
             inventory=instance.namespace.inspect_inventory(),
             namespace=namespace,
             research=research_state,
+            parent_hash=parent_hash,
+            entities_delta=entities_delta,
         )
+        if baseline is not None:
+            state._parent = baseline
+            state._unresolved_parents = baseline._unresolved_parents + 1
+            if state._unresolved_parents >= cls.MAX_UNRESOLVED_PARENTS:
+                state.resolve()
+        instance.entity_baseline = state
+        return state
+
+    def resolve(self, parent: Optional['GameState'] = None) -> 'GameState':
+        """
+        Rebuild the full entities of a delta state from the state it was captured against
+        :param parent: The state it was captured against, by default the one `from_instance` captured it against
+        """
+        if self.entities is not None:
+            return self
+        parent = parent or self._parent
+        if parent is None:
+            raise ValueError("Can't resolve a delta state without the state it was captured against")
+
+        # Captures whose parents haven't been resolved either are rebuilt oldest first
+        chain = [self]
+        while parent.entities is None:
+            if parent._parent is None:
+                raise ValueError("Can't resolve a delta state without the state it was captured against")
+            chain.append(parent)
+            parent = parent._parent
+        for state in reversed(chain):
+            if parent.entities_hash() != state.parent_hash:
+                raise ValueError(f"Can't resolve state against {parent.entities_hash()}, it was captured against {state.parent_hash}")
+            state.entities = encode_entities(apply_entity_delta(decode_entities(parent.entities),
+                                                                decode_entities(state.entities_delta)))
+            state._parent = None
+            state._unresolved_parents = 0
+            parent = state
+        return self
+
+    @staticmethod
+    def from_chain(states: List['GameState']) -> 'GameState':
+        """Rebuild the last state of a chain, starting from a full state and followed by the deltas captured from it"""
+        state = states[0]
+        for child in states[1:]:
+            state = child.resolve(state)
+        return state
+
+    def entities_hash(self) -> str:
+        """
+        Stable key for the entity state, used to keep recently restored states resident in the game. A delta state's
+        is derived from the state it was captured against, so it doesn't need its full entities.
+        """
+        if self.entities_delta is not None and self.parent_hash is not None:
+            return hashlib.md5((self.parent_hash + self.entities_delta).encode()).hexdigest()
+        if self.entities is None:
+            raise ValueError("Can't hash a state without its entities")
+        return hashlib.md5(self.entities.encode()).hexdigest()
 
     def __repr__(self):
         readable_namespace=pickle.loads(self.namespace)
@@ -191,11 +309,13 @@ class GameState:
             )
 
         return cls(
-            entities=data['entities'],
+            entities=data.get('entities'),
             inventory=data['inventory'],
             timestamp=data['timestamp'] if 'timestamp' in data else time.time(),
             namespace=namespace,
-            research=research
+            research=research,
+            parent_hash=data.get('parent_hash'),
+            entities_delta=data.get('entities_delta')
         )
 
     @classmethod
@@ -216,11 +336,13 @@ class GameState:
             )
 
         return cls(
-            entities=data['entities'],
+            entities=data.get('entities'),
             inventory=data['inventory'],
             timestamp=data['timestamp'] if 'timestamp' in data else time.time(),
             namespace=namespace,
-            research=research
+            research=research,
+            parent_hash=data.get('parent_hash'),
+            entities_delta=data.get('entities_delta')
         )
 
     def to_raw(self) -> str:
@@ -246,18 +368,29 @@ class GameState:
 
         return json.dumps(data)
 
-    def to_raw(self) -> str:
-        """Convert state to JSON string"""
-        return json.dumps({
+    def to_raw(self, compact=False) -> str:
+        """
+        Convert state to JSON string
+        :param compact: Leave out the full entities of a delta state, which then needs `resolve` after parsing
+        """
+        if not (compact and self.entities_delta) and self._parent is not None:
+            self.resolve()
+        data = {
             'entities': self.entities,
             'inventory': self.inventory.__dict__ if hasattr(self.inventory, '__dict__') else self.inventory,
             'timestamp': self.timestamp,
             'namespace': self.namespace.hex() if self.namespace else ''
-        })
+        }
+        if self.entities_delta:
+            data['parent_hash'] = self.parent_hash
+            data['entities_delta'] = self.entities_delta
+            if compact:
+                del data['entities']
+        return json.dumps(data)
 
     def to_instance(self, instance: 'FactorioInstance'):
         """Restore game state to Factorio instance"""
-        instance.namespace._load_entity_state(self.entities, decode=True)
+        instance.namespace._load_entity_state(self.resolve().entities, decode=True)
         instance.set_inventory(**self.inventory)
 
         # Restore research state if present
@@ -0,0 +1,80 @@
+import asyncio
+from typing import List, Tuple, Optional, Set
+
+from search.model.program import Program
+
+
+class ProgramWriteBuffer:
+    """
+    Write-behind buffer for new programs. Programs are queued and written with a single `DBClient.create_programs`
+    call once `max_size` programs are waiting, or `max_delay` seconds after the first of them was queued.
+
+    Each `add` returns a future that resolves to the saved program (with its id) once its batch is written, so
+    callers that need the id can await it, and callers that don't can carry on. `close` waits for the batches still
+    being written and raises the first error of any of them.
+    """
+
+    def __init__(self, db_client: 'DBClient', max_size: int = 32, max_delay: float = 1.0):
+        self.db_client = db_client
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[Program, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        # Flushes started by `add`, kept until they finish so that they aren't garbage collected mid-write, and the
+        # errors of those that failed, for `close` to raise
+        self._flushes: Set[asyncio.Task] = set()
+        self._errors: List[BaseException] = []
+
+    def add(self, program: Program) -> asyncio.Future:
+        """Queue a program to be written, flushing if the buffer is full"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((program, future))
+        if len(self._pending) >= self.max_size:
+            self._track(asyncio.ensure_future(self.flush()))
+        elif self._timer is None:
+            self._timer = self._track(asyncio.ensure_future(self._flush_after_delay()))
+        return future
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self._flushes.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task: asyncio.Task):
+        self._flushes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._errors.append(task.exception())
+
+    async def _flush_after_delay(self):
+        await asyncio.sleep(self.max_delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Write every queued program now. If the batch fails, its futures fail with the same error, which is raised"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            await self.db_client.create_programs([program for program, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+        for program, future in pending:
+            if not future.done():
+                future.set_result(program)
+
+    async def close(self):
+        """Flush the remaining programs and wait for the flushes under way, raising the first error of any of them"""
+        try:
+            await self.flush()
+        finally:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        if self._errors:
+            error, self._errors = self._errors[0], []
+            raise error
@@ -0,0 +1,289 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, List, Callable, Set
+
+from psycopg2.extras import DictCursor
+
+from search.model.program import Program
+from search.program_stats import VersionStats, CountSketch
+
+
+@dataclass
+class ProgramSummary:
+    """The light columns of a program, which is all the samplers need to choose a parent"""
+    id: int
+    version: int
+    parent_id: Optional[int]
+    value: Optional[float]
+    advantage: Optional[float]
+    visits: int
+    depth: float
+    created_at: datetime
+    conversation_length: int
+    has_state: bool
+    achievements: Optional[Dict] = None
+
+
+class ProgramIndex:
+    """
+    Process-local index of the most recent programs of the versions being sampled, so that samplers can choose a
+    parent without querying (and deserializing) recent programs on every sample. Only the chosen program is then
+    loaded in full.
+
+    A version is loaded the first time it is selected from, and only its newest `window` programs are kept. Writes
+    made through the DBClient / samplers in this process are applied directly, so selecting doesn't query the table.
+    Programs created by other processes are picked up by a cheap `id > last_id` query at most every
+    `poll_interval` seconds, and visits / advantages updated by other processes by reloading the window's light
+    columns every `refresh_interval` seconds.
+
+    Statistics over every program of each loaded version (its number of programs, greatest depth and visit
+    quantiles, see `VersionStats`) are aggregated from the table once when it is loaded, then kept up to date as
+    programs are added and visited. Visits made by other processes are picked up by aggregating the visits again
+    every `refresh_interval` seconds.
+    """
+
+    def __init__(self, db_client: 'DBClient', refresh_interval: float = 60, window: int = 5000,
+                 poll_interval: float = 5):
+        self.db_client = db_client
+        self.refresh_interval = refresh_interval
+        self.poll_interval = poll_interval
+        self.window = window
+        self.programs: Dict[int, ProgramSummary] = {}
+        # The summaries of each loaded version by id, oldest first
+        self.versions: Dict[int, Dict[int, ProgramSummary]] = {}
+        self.version_stats: Dict[int, VersionStats] = {}
+        self.last_ids: Dict[int, int] = {}
+        # Ids of the programs added by this process that a refresh hasn't returned yet, so they aren't counted twice
+        self._added: Dict[int, Set[int]] = {}
+        self._last_full_refresh: Dict[int, float] = {}
+        self._last_poll: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    # The columns of a summary. Only values, advantages and visits change once a program is created, so the others
+    # (in particular the conversation length, which legacy rows count from the conversation) are read once
+    COLUMNS = """id, version, parent_id, value, advantage, visits, depth, created_at,
+                 {conversation_length} AS conversation_length,
+                 state_json IS NOT NULL AS has_state, achievements_json"""
+
+    def refresh(self, version: int, full: Optional[bool] = None):
+        """
+        Load the programs of a version created since the last refresh, and reload the values, advantages and visits
+        of its window
+        :param full: Whether to reload the window, by default if it was last reloaded over `refresh_interval` ago
+        """
+        now = time.time()
+        loaded = version in self.versions
+        if full is None:
+            full = now - self._last_full_refresh.get(version, 0) > self.refresh_interval
+        columns = self.COLUMNS.format(conversation_length=self.db_client.CONVERSATION_LENGTH)
+        stats, changes = None, []
+        with self.db_client.get_connection() as conn:
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                if not loaded:
+                    cur.execute(f"""
+                        SELECT {columns}
+                        FROM programs
+                        WHERE version = %s
+                        ORDER BY id DESC
+                        LIMIT %s
+                    """, (version, self.window))
+                    # Oldest first, as the window is kept
+                    rows = list(reversed(cur.fetchall()))
+                    # Aggregated once, up to the newest program loaded; later programs are added as they arrive
+                    last_id = rows[-1]['id'] if rows else 0
+                    cur.execute("""
+                        SELECT COUNT(*) AS programs, MAX(depth) AS max_depth
+                        FROM programs
+                        WHERE version = %s AND id <= %s
+                    """, (version, last_id))
+                    totals = cur.fetchone()
+                    stats = VersionStats(programs=totals['programs'], max_depth=totals['max_depth'] or 0,
+                                         visits=self._visit_counts(cur, version, last_id))
+                else:
+                    last_id = self.last_ids.get(version, 0)
+                    window = self.versions[version]
+                    if full:
+                        if window:
+                            cur.execute("""
+                                SELECT id, value, advantage, visits
+                                FROM programs
+                                WHERE version = %s AND id >= %s AND id <= %s
+                            """, (version, next(iter(window)), last_id))
+                            changes = cur.fetchall()
+                        visits = self._visit_counts(cur, version)
+                    cur.execute(f"""
+                        SELECT {columns}
+                        FROM programs
+                        WHERE version = %s AND id > %s
+                        ORDER BY id
+                    """, (version, last_id))
+                    rows = cur.fetchall()
+
+        with self._lock:
+            if version not in self.versions:
+                self.versions[version] = {}
+                self.version_stats[version] = stats
+                self._added[version] = set()
+            stats = self.version_stats[version]
+            added = self._added[version]
+
+            for row in changes:
+                summary = self.programs.get(row['id'])
+                if summary is not None:
+                    summary.value, summary.advantage, summary.visits = row['value'], row['advantage'], row['visits'] or 0
+            if loaded and full:
+                # Aggregated again over the whole version, which counts the visits of the new programs below
+                stats.visits = visits
+
+            for row in rows:
+                summary = ProgramSummary(
+                    id=row['id'],
+                    version=row['version'],
+                    parent_id=row['parent_id'],
+                    value=row['value'],
+                    advantage=row['advantage'],
+                    visits=row['visits'] or 0,
+                    depth=row['depth'] or 0,
+                    created_at=row['created_at'],
+                    conversation_length=row['conversation_length'] or 0,
+                    has_state=bool(row['has_state']),
+                    achievements=row['achievements_json']
+                )
+                if loaded and row['id'] not in self.programs:
+                    if row['id'] in added:
+                        added.discard(row['id'])
+                    else:
+                        # Created by another process
+                        stats.add(summary)
+                        if full:
+                            stats.visit(summary.visits, 0)  # Already aggregated
+                self._put(summary)
+                self.last_ids[version] = max(self.last_ids.get(version, 0), row['id'])
+            # Programs of ours that were committed after a later one of another process are never returned
+            self._added[version] = {program_id for program_id in added
+                                    if program_id > self.last_ids.get(version, 0)}
+        if full or not loaded:
+            self._last_full_refresh[version] = now
+        self._last_poll[version] = now
+
+    @staticmethod
+    def _visit_counts(cur, version: int, last_id: Optional[int] = None) -> CountSketch:
+        """The visit counts of the visited programs of a version (up to `last_id`), aggregated in the table"""
+        cur.execute(f"""
+            SELECT visits, COUNT(*) AS programs
+            FROM programs
+            WHERE version = %s AND visits > 0 {'AND id <= %s' if last_id is not None else ''}
+            GROUP BY visits
+        """, (version, last_id) if last_id is not None else (version,))
+        sketch = CountSketch()
+        for row in cur.fetchall():
+            sketch.counts[row['visits']] = row['programs']
+            sketch.total += row['programs']
+            sketch.sum += row['visits'] * row['programs']
+        return sketch
+
+    def _refresh_if_due(self, version: int):
+        """Refresh a version if it hasn't been loaded, or hasn't been polled for `poll_interval` seconds"""
+        if version not in self.versions or time.time() - self._last_poll.get(version, 0) > self.poll_interval:
+            self.refresh(version)
+
+    def add(self, program: Program):
+        """Called by `DBClient.create_program` once the program has an id"""
+        with self._lock:
+            # Versions that haven't been selected from yet are loaded from the table when they are
+            if program.version not in self.versions:
+                return
+            summary = ProgramSummary(
+                id=program.id,
+                version=program.version,
+                parent_id=program.parent_id,
+                value=program.value,
+                advantage=program.advantage,
+                visits=program.visits,
+                depth=program.depth / 2,  # As stored by create_program
+                created_at=program.created_at,
+                conversation_length=len(program.conversation.messages),
+                has_state=program.state is not None,
+                achievements=program.achievements
+            )
+            self.version_stats[program.version].add(summary)
+            self._added[program.version].add(program.id)
+            self._put(summary)
+
+    def update(self, program_id: int, updates: Dict):
+        """Called by `DBClient.update_program` with the columns it updated"""
+        with self._lock:
+            summary = self.programs.get(program_id)
+            if not summary:
+                return
+            if 'achievements_json' in updates:
+                updates = {**updates, 'achievements': updates['achievements_json']}
+            if 'visits' in updates:
+                self.version_stats[summary.version].visit(summary.visits, updates['visits'] or 0)
+            for column, value in updates.items():
+                if hasattr(summary, column):
+                    setattr(summary, column, value)
+
+    def visit(self, program_id: int, children: int, advantages: Dict[int, float],
+              version: Optional[int] = None, visits: Optional[int] = None):
+        """
+        Called by `DBSampler.visit` with the child advantages, and when `children` visits were added to the program,
+        its version and new visit count
+        """
+        with self._lock:
+            summary = self.programs.get(program_id)
+            if children and visits is None and summary is not None:
+                version, visits = summary.version, summary.visits + children
+            if children and version in self.version_stats:
+                self.version_stats[version].visit(visits - children, visits)
+            if children and summary is not None:
+                summary.visits = visits
+            for child_id, advantage in advantages.items():
+                if child_id in self.programs:
+                    self.programs[child_id].advantage = advantage
+
+    def select(self, version: int, where: Optional[Callable[[ProgramSummary], bool]] = None,
+               limit: Optional[int] = None) -> List[ProgramSummary]:
+        """
+        Return up to `limit` of the programs of a version (newest first) that match `where`, refreshing the version
+        first if it is due
+        """
+        self._refresh_if_due(version)
+        programs = []
+        with self._lock:
+            for summary in reversed(self.versions[version].values()):
+                if limit is not None and len(programs) >= limit:
+                    break
+                if where is None or where(summary):
+                    programs.append(summary)
+        return programs
+
+    def count(self, version: int) -> int:
+        """The number of programs of a version in the table, beyond its window too"""
+        return self.stats(version, refresh=False).programs if version in self.versions else 0
+
+    def stats(self, version: int, refresh: bool = True) -> VersionStats:
+        """
+        Return a snapshot of the statistics of every program of a version
+        :param refresh: Whether to load the version, or refresh it if it is due, first
+        """
+        if refresh:
+            self._refresh_if_due(version)
+        with self._lock:
+            return self.version_stats.get(version, VersionStats()).copy()
+
+    def _put(self, summary: ProgramSummary):
+        """Add or replace a summary, evicting the oldest of its version beyond the window. Must hold `_lock`."""
+        previous = self.programs.get(summary.id)
+        window = self.versions[summary.version]
+        newest = next(reversed(window), None)
+        self.programs[summary.id] = window[summary.id] = summary
+
+        if newest is not None and summary.id < newest and previous is None:
+            # Rare: a program of another process that arrived before one of ours with a higher id
+            self.versions[summary.version] = window = dict(sorted(window.items()))
+        while len(window) > self.window:
+            evicted = window.pop(next(iter(window)))
+            del self.programs[evicted.id]
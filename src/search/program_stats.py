@@ -0,0 +1,101 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, Dict
+
+
+@dataclass
+class CountSketch:
+    """
+    Histogram of integer observations (e.g. visit counts), from which quantiles are read without sorting the
+    observations. Visit counts take few distinct values, so this is exact and its size is the number of distinct
+    counts rather than the number of programs.
+    """
+    counts: Counter = field(default_factory=Counter)
+    total: int = 0
+    sum: int = 0
+
+    def add(self, x: int):
+        self.counts[x] += 1
+        self.total += 1
+        self.sum += x
+
+    def remove(self, x: int):
+        self.counts[x] -= 1
+        if self.counts[x] <= 0:
+            del self.counts[x]
+        self.total -= 1
+        self.sum -= x
+
+    def merge(self, other: 'CountSketch'):
+        self.counts.update(other.counts)
+        self.total += other.total
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Continuous quantile, interpolated as Postgres' `PERCENTILE_CONT` does"""
+        if not self.total:
+            return None
+        position = q * (self.total - 1)
+        lower, upper = math.floor(position), math.ceil(position)
+        lower_value = upper_value = None
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if lower_value is None and seen > lower:
+                lower_value = value
+            if seen > upper:
+                upper_value = value
+                break
+        return lower_value + (upper_value - lower_value) * (position - lower)
+
+    @property
+    def min(self) -> Optional[int]:
+        return min(self.counts) if self.counts else None
+
+    @property
+    def max(self) -> Optional[int]:
+        return max(self.counts) if self.counts else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.total if self.total else None
+
+    def copy(self) -> 'CountSketch':
+        return CountSketch(Counter(self.counts), self.total, self.sum)
+
+
+@dataclass
+class VersionStats:
+    """
+    Statistics over every program of a version, which `ProgramIndex` seeds from the table and then keeps up to date as
+    programs are added and visited
+    """
+    programs: int = 0
+    max_depth: float = 0
+    visits: CountSketch = field(default_factory=CountSketch)  # Programs with at least one visit
+
+    def add(self, summary: 'ProgramSummary'):
+        self.programs += 1
+        self.max_depth = max(self.max_depth, summary.depth)
+        if summary.visits:
+            self.visits.add(summary.visits)
+
+    def visit(self, before: int, after: int):
+        """A program's visit count changed from `before` to `after`"""
+        if before:
+            self.visits.remove(before)
+        if after:
+            self.visits.add(after)
+
+    def visit_stats(self) -> Dict[str, Optional[float]]:
+        """Visit statistics in the shape returned by `DBClient.get_parent_visit_stats`"""
+        return {
+            'avg_visits': self.visits.mean,
+            'min_visits': self.visits.min,
+            'max_visits': self.visits.max,
+            'median_visits': self.visits.quantile(0.5)
+        }
+
+    def copy(self) -> 'VersionStats':
+        return VersionStats(self.programs, self.max_depth, self.visits.copy())
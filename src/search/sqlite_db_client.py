@@ -0,0 +1,212 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List
+
+from search.db_client import DBClient
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS programs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        code TEXT NOT NULL,
+        value REAL,
+        visits INTEGER DEFAULT 0,
+        parent_id INTEGER,
+        state_json TEXT,
+        conversation_json TEXT NOT NULL,
+        completion_token_usage INTEGER,
+        prompt_token_usage INTEGER,
+        token_usage INTEGER,
+        response TEXT,
+        holdout_value REAL,
+        raw_reward REAL,
+        version INTEGER DEFAULT 1,
+        version_description TEXT DEFAULT '',
+        model TEXT DEFAULT 'gpt-4o',
+        meta TEXT,
+        achievements_json TEXT,
+        instance INTEGER DEFAULT -1,
+        depth REAL DEFAULT 0,
+        advantage REAL DEFAULT 0,
+        ticks INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    );
+    CREATE INDEX IF NOT EXISTS programs_version ON programs (version);
+    CREATE INDEX IF NOT EXISTS programs_parent_id ON programs (parent_id);
+"""
+
+# Columns that are `jsonb` in Postgres, which psycopg2 returns already parsed
+JSON_COLUMNS = {"conversation_json", "state_json", "meta", "achievements_json"}
+
+
+class SQLiteRow(list):
+    """A row that can be read by position or by column name, like psycopg2's `DictRow`"""
+
+    def __init__(self, columns: dict, values):
+        super().__init__(values)
+        self._columns = columns
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._columns[key]
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._columns else default
+
+    def keys(self):
+        return iter(self._columns)
+
+    def items(self):
+        return zip(self._columns, self)
+
+
+class SQLiteCursor:
+    """Cursor that accepts the `%s` placeholders used by `DBClient`, and decodes rows as psycopg2 would"""
+
+    def __init__(self, connection: 'SQLiteConnection'):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self._cursor.close()
+
+    @staticmethod
+    def _params(params):
+        return [json.dumps(param) if isinstance(param, (dict, list)) else param for param in params or ()]
+
+    def execute(self, query: str, params=None):
+        self._cursor.execute(query.replace("%s", "?"), self._params(params))
+
+    def executemany(self, query: str, params_list):
+        self._cursor.executemany(query.replace("%s", "?"), [self._params(params) for params in params_list])
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _decode(self, row):
+        columns = {column[0]: i for i, column in enumerate(self._cursor.description)}
+        values = list(row)
+        for name, i in columns.items():
+            if values[i] is None:
+                continue
+            if name in JSON_COLUMNS and isinstance(values[i], str):
+                values[i] = json.loads(values[i])
+            elif name == "created_at" and isinstance(values[i], str):
+                values[i] = datetime.fromisoformat(values[i])
+        return SQLiteRow(columns, values)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._decode(row) if row is not None else None
+
+    def fetchall(self):
+        return [self._decode(row) for row in self._cursor.fetchall()]
+
+
+class SQLiteConnection:
+    def __init__(self, raw: sqlite3.Connection):
+        self.raw = raw
+
+    def cursor(self, cursor_factory=None):
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+
+class SQLiteDBClient(DBClient):
+    """
+    `DBClient` backed by a SQLite file (or memory), for local runs and tests without a Postgres server.
+    Calls are serialized over a single connection.
+    """
+
+    CONVERSATION_LENGTH = "COALESCE(json_extract(meta, '$.conversation_length'), " \
+                          "json_array_length(conversation_json, '$.messages'))"
+
+    # SQLite has no DISTINCT ON, so the best program at each depth is found with a window function
+    BEAM_HEADS_QUERY = """
+        WITH ProgramsByDepth AS (
+            SELECT * FROM (
+                SELECT id, value, ROW_NUMBER() OVER (PARTITION BY depth ORDER BY value DESC) AS depth_rank
+                FROM programs
+                WHERE version = %s
+                AND state_json IS NOT NULL
+                AND value IS NOT NULL
+            ) WHERE depth_rank = 1
+        )
+        SELECT * FROM programs WHERE id IN (
+            SELECT id FROM (
+                SELECT id FROM ProgramsByDepth
+                ORDER BY value DESC
+                LIMIT %s
+            )
+            UNION
+            SELECT id FROM (
+                SELECT id FROM programs
+                WHERE version = %s
+                AND state_json IS NOT NULL
+                AND value IS NOT NULL
+                ORDER BY value DESC
+                LIMIT %s
+            )
+        )
+        ORDER BY value DESC
+        LIMIT %s
+    """
+
+    def __init__(self, database: str = ":memory:", max_conversation_length: int = 20, delta_states: bool = False):
+        super().__init__(max_conversation_length=max_conversation_length, min_connections=1, max_connections=1,
+                         delta_states=delta_states)
+        self.database = database
+        self._connection = None
+        self._connection_lock = threading.RLock()
+
+    def _ensure_pool(self):
+        if self._connection is None:
+            with self._connection_lock:
+                if self._connection is None:
+                    connection = sqlite3.connect(self.database, check_same_thread=False)
+                    connection.executescript(SCHEMA)
+                    self._connection = connection
+
+    @contextmanager
+    def get_connection(self):
+        self._ensure_pool()
+        with self._connection_lock:
+            yield SQLiteConnection(self._connection)
+
+    def execute_prepared(self, cur, name: str, params: tuple = ()):
+        # sqlite3 keeps the compiled statements of each connection in a cache, so they only need to be executed
+        cur.execute(self.PREPARED_STATEMENTS[name], params)
+
+    def _insert_programs(self, cur, values: List[tuple]) -> List[tuple]:
+        query = f"""
+            INSERT INTO programs ({', '.join(self.PROGRAM_COLUMNS)})
+            VALUES ({', '.join(['%s'] * len(self.PROGRAM_COLUMNS))})
+            RETURNING id, created_at
+        """
+        rows = []
+        for row in values:
+            cur.execute(query, row)
+            rows.append(tuple(cur.fetchone()))
+        return rows
+
+    async def cleanup(self):
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,214 @@
+import ast
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = Path(os.getenv("EMBEDDING_CACHE_DIR", Path.home() / ".cache" / "factorio" / "embeddings"))
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings, so that repeated objectives don't go back to the embeddings API.
+
+    Embeddings are kept in memory (the most recent `max_memory_entries`) and on disk as one `.npy` file per
+    (model, text), named by its hash. When more than `max_disk_entries` files exist, the least recently used are
+    removed down to `disk_low_water` (90% of `max_disk_entries` by default) - reads touch the file, so its
+    modification time is its last use. Evicting in batches means the directory is only listed once per
+    `max_disk_entries - disk_low_water` writes.
+    """
+
+    def __init__(self, embed: Callable[[str], List[float]], model: str = "text-embedding-3-small",
+                 directory: Path = DEFAULT_CACHE_DIR, max_memory_entries: int = 1024, max_disk_entries: int = 100_000,
+                 disk_low_water: Optional[int] = None):
+        self.embed = embed
+        self.model = model
+        self.directory = Path(directory)
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.disk_low_water = int(max_disk_entries * 0.9) if disk_low_water is None else disk_low_water
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._disk_entries = None
+        self._lock = threading.Lock()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode()).hexdigest()
+
+    def get(self, text: str) -> np.ndarray:
+        key = self.key(text)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self.directory / f"{key}.npy"
+        try:
+            embedding = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            embedding = np.asarray(self.embed(text), dtype=np.float32)
+            self._write(path, embedding)
+
+        with self._lock:
+            self._memory[key] = embedding
+            if len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+        return embedding
+
+    def _write(self, path: Path, embedding: np.ndarray):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so that concurrent runs never read a partial file
+        temporary_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temporary_path, "wb") as f:
+            np.save(f, embedding)
+        os.replace(temporary_path, path)
+
+        with self._lock:
+            if self._disk_entries is None:
+                self._disk_entries = sum(1 for _ in self.directory.glob("*.npy"))
+            else:
+                self._disk_entries += 1
+            if self._disk_entries <= self.max_disk_entries:
+                return
+            files = sorted(self.directory.glob("*.npy"), key=lambda file: file.stat().st_mtime)
+            for file in files[:len(files) - self.disk_low_water]:
+                file.unlink(missing_ok=True)
+            self._disk_entries = min(len(files), self.disk_low_water)
+
+
+class SkillIndex:
+    """
+    In-process copy of the `skills` table's embeddings, searched with NumPy instead of a pgvector scan.
+
+    The table is reloaded when its contents change (checked at most every `check_interval` seconds, by comparing a
+    checksum of its rows computed by the database) or after `invalidate`, which writers in this process call after
+    saving a skill.
+
+    Skill dependencies that are inventory deltas (as saved by `TailRecursiveSkillGenerator`) are also kept as a
+    matrix of the items each skill consumes, so that affordability is checked for every candidate at once.
+    """
+
+    def __init__(self, conn, version: Optional[str] = None, check_interval: float = 10):
+        self.conn = conn
+        self.version = version
+        self.check_interval = check_interval
+        self.skills: List[Dict] = []
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self.squared_norms = np.zeros(0, dtype=np.float32)
+        self.items: Dict[str, int] = {}
+        self.consumed = np.zeros((0, 0), dtype=np.float32)
+        self.parsed_dependencies = np.zeros(0, dtype=bool)
+        self._checksum = None
+        self._last_check = 0
+        self._lock = threading.Lock()
+
+    def _where(self):
+        return ("WHERE version = %s", (self.version,)) if self.version is not None else ("", ())
+
+    def invalidate(self):
+        self._checksum = None
+
+    def refresh(self):
+        """Reload the table if it has changed"""
+        if self._checksum is not None and time.time() - self._last_check < self.check_interval:
+            return
+        where, params = self._where()
+        cursor = self.conn.cursor()
+        # A hash of every row (in a fixed order), so that edits are noticed as well as inserts and deletes, without
+        # sending the embeddings back
+        cursor.execute(f"""
+            SELECT COUNT(*), md5(COALESCE(string_agg(md5(skill::text), '' ORDER BY md5(skill::text)), ''))
+            FROM public.skills skill {where}
+        """, params)
+        checksum = tuple(cursor.fetchone())
+        self._last_check = time.time()
+        if checksum == self._checksum:
+            return
+
+        cursor.execute(f"""
+            SELECT name, implementation, description, signature, dependencies, embedding
+            FROM public.skills {where}
+        """, params)
+        rows = cursor.fetchall()
+        self.load(rows)
+        self._checksum = checksum
+
+    def load(self, rows):
+        """Build the index from (name, implementation, description, signature, dependencies, embedding) rows"""
+        skills, embeddings, dependencies = [], [], []
+        for name, implementation, description, signature, dependencies_value, embedding in rows:
+            if embedding is None:
+                continue
+            if isinstance(embedding, str):  # pgvector's text format, e.g. '[0.1,0.2]'
+                embedding = json.loads(embedding)
+            skills.append({"name": name, "implementation": implementation, "description": description,
+                           "signature": signature})
+            embeddings.append(np.asarray(embedding, dtype=np.float32))
+            dependencies.append(self._parse_dependencies(dependencies_value))
+
+        items = {}
+        for required in dependencies:
+            for item, count in (required or {}).items():
+                if count < 0:
+                    items.setdefault(item, len(items))
+        consumed = np.zeros((len(skills), len(items)), dtype=np.float32)
+        for i, required in enumerate(dependencies):
+            for item, count in (required or {}).items():
+                if count < 0:
+                    consumed[i, items[item]] = -count
+
+        with self._lock:
+            self.skills = skills
+            self.embeddings = np.vstack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+            self.squared_norms = (self.embeddings ** 2).sum(axis=1)
+            self.items = items
+            self.consumed = consumed
+            self.parsed_dependencies = np.array([required is not None for required in dependencies], dtype=bool)
+
+    @staticmethod
+    def _parse_dependencies(value) -> Optional[Dict[str, int]]:
+        """Inventory deltas as a dict, {} for other dependency formats, and None if they can't be parsed"""
+        if not value:
+            return {}
+        if isinstance(value, dict):
+            return value
+        if not isinstance(value, str):
+            return {}
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return None
+        return parsed if isinstance(parsed, dict) else {}
+
+    def affordable(self, inventory: Dict[str, int]) -> np.ndarray:
+        """Mask of the skills whose consumed items are all in the inventory"""
+        available = np.zeros(len(self.items), dtype=np.float32)
+        for item, index in self.items.items():
+            available[index] = inventory.get(item, 0)
+        return self.parsed_dependencies & (self.consumed <= available).all(axis=1)
+
+    def search(self, query_embedding, n: int = 5, inventory: Optional[Dict[str, int]] = None,
+               candidates: Optional[int] = None) -> List[Dict]:
+        """
+        Return the `n` skills nearest (by L2 distance, as pgvector's `<->`) to the query embedding. With an inventory,
+        only affordable skills among the nearest `candidates` (default `n`) are returned.
+        """
+        self.refresh()
+        with self._lock:
+            if not self.skills:
+                return []
+            query = np.asarray(query_embedding, dtype=np.float32)
+            # |e - q|^2 without the constant |q|^2, which doesn't change the order
+            distances = self.squared_norms - 2 * self.embeddings @ query
+            k = min(candidates or n, len(self.skills))
+            nearest = np.argpartition(distances, k - 1)[:k]
+            nearest = nearest[np.argsort(distances[nearest])]
+            if inventory is not None:
+                nearest = nearest[self.affordable(inventory)[nearest]]
+            return [dict(self.skills[i]) for i in nearest[:n]]
@@ -13,6 +13,7 @@ from dotenv import load_dotenv
 
 from factorio_instance import FactorioInstance
 from llm_factory import LLMFactory
+from skills.skill_index import EmbeddingCache, SkillIndex
 from utilities.controller_loader import load_schema, load_definitions
 
 load_dotenv()
@@ -29,7 +30,9 @@ class SkillsDB:
             user=os.getenv("SKILLS_DB_USER"),
             password=os.getenv("SKILLS_DB_PASSWORD")
         )
-        
+        self.embeddings = EmbeddingCache(self._embed)
+        self.index = SkillIndex(self.conn)
+
     def get_all_skills(self) -> List[Dict]:
         cursor = self.conn.cursor()
         cursor.execute("SELECT name, implementation, description, signature, version, dependencies, meta FROM public.skills")
@@ -53,20 +56,15 @@ class SkillsDB:
         """, (name, implementation, description, embedding, dependencies, version, "text-embedding-3-small",
               implementation_model, signature))
         self.conn.commit()
+        self.index.invalidate()
 
-    
-    def get_embedding(self, text: str) -> List[float]:
+    @staticmethod
+    def _embed(text: str) -> List[float]:
         response = client.embeddings.create(input=text, model="text-embedding-3-small")
         return response.data[0].embedding
 
+    def get_embedding(self, text: str) -> List[float]:
+        return self.embeddings.get(text).tolist()
+
     def find_similar_functions(self, query: str, n: int = 5) -> List[Dict]:
-        cursor = self.conn.cursor()
-        query_embedding = self.get_embedding(query)
-        cursor.execute("""
-            SELECT name, implementation, description, signature
-            FROM public.skills
-            ORDER BY embedding <-> %s::vector
-            LIMIT %s
-        """, (query_embedding, n))
-        return [{"name": row[0], "implementation": row[1], "description": row[2], "signature": row[3]} for row in
-                cursor.fetchall()]
\ No newline at end of file
+        return self.index.search(self.embeddings.get(query), n)
@@ -13,6 +13,7 @@ from openai import OpenAI
 from factorio_instance import FactorioInstance
 from llm_factory import LLMFactory
 from skills.db_test_loader import TestInfo
+from skills.skill_index import EmbeddingCache, SkillIndex
 from utilities.controller_loader import load_schema, load_definitions, load_controller_names
 
 load_dotenv()
@@ -71,6 +72,8 @@ class TailRecursiveSkillGenerator:
             user="postgres",
             password=DB_PASSWORD
         )
+        self.embeddings = EmbeddingCache(self._embed)
+        self.skill_index = SkillIndex(self.conn, version='v1.1')
         self.api_schema = self._get_base_api_schema_prompt()
         self.controller_names = load_controller_names(f'{os.path.dirname(os.path.realpath(__file__))}/../controllers')
         self.llm_factory = LLMFactory(model)
@@ -299,10 +302,14 @@ Here are some examples of similar snippets for reference:
         response = self.llm_factory.call(messages=messages, max_tokens=2000)
         return response.content[0].text
 
-    def get_embedding(self, text: str) -> List[float]:
+    @staticmethod
+    def _embed(text: str) -> List[float]:
         response = client.embeddings.create(input=text, model="text-embedding-3-small")
         return response.data[0].embedding
 
+    def get_embedding(self, text: str) -> List[float]:
+        return self.embeddings.get(text).tolist()
+
     # def find_similar_functions(self, query: Objective, n: int = 5) -> List[Dict]:
     #     cursor = self.conn.cursor()
     #     query_embedding = self.get_embedding(query.objective)
@@ -317,42 +324,11 @@ Here are some examples of similar snippets for reference:
     #             cursor.fetchall()]
     def find_similar_functions(self, query: Objective, n: int = 5) -> List[Dict]:
         """Find similar functions that are achievable with current inventory"""
-        cursor = self.conn.cursor()
-        query_embedding = self.get_embedding(query.objective)
-
-        # First, get more candidates than needed since we'll filter some out
-        cursor.execute("""
-            SELECT name, implementation, description, signature, dependencies
-            FROM public.skills
-            WHERE version = 'v1.1'
-            ORDER BY embedding <-> %s::vector
-            LIMIT %s
-        """, (query_embedding, n * 2))  # Get 2x candidates
-
-        candidates = []
-        for row in cursor.fetchall():
-            name, implementation, description, signature, dependencies_str = row
-
-            # Parse dependencies string back into dictionary
-            try:
-                required_items = ast.literal_eval(dependencies_str) if dependencies_str else {}
-            except (ValueError, SyntaxError):
-                continue  # Skip if dependencies can't be parsed
-
-            # Check if we can afford this function's dependencies
-            if self.can_afford_dependencies(required_items, query.starting_inventory):
-                candidates.append({
-                    "name": name.replace("\"", ""),
-                    "implementation": implementation,
-                    "description": description,
-                    "signature": signature
-                })
-            else:
-                print(f"Skipping function '{name}' due to unaffordable dependencies: {required_items}")
-
-            if len(candidates) >= n:  # Stop once we have enough viable candidates
-                break
-
+        # Get more candidates than needed since unaffordable ones are filtered out
+        candidates = self.skill_index.search(self.embeddings.get(query.objective), n,
+                                             inventory=query.starting_inventory, candidates=n * 2)
+        for candidate in candidates:
+            candidate["name"] = candidate["name"].replace("\"", "")
         return candidates
 
     def save_function(self,
@@ -372,6 +348,7 @@ Here are some examples of similar snippets for reference:
         """, (name, implementation, description, embedding, inventory_str, version, "text-embedding-3-small",
               implementation_model, signature))
         self.conn.commit()
+        self.skill_index.invalidate()
 
     def generate_summary(self, test_info: TestInfo) -> str:
         """Generate a summary of what the test does using the LLM."""
@@ -197,3 +197,12 @@ def test_get_pipe_groups(game):
     pipes = game.get_entities()
     assert len(pipes) == 3
 
+
+
+def test_get_entities_immediately_after_insert(game):
+    """The tick barrier should make entities consistent with the previous action, without a fixed sleep"""
+    chest = game.place_entity(Prototype.IronChest, position=Position(x=0, y=0))
+    game.insert_item(Prototype.Coal, chest, quantity=5)
+
+    chests = game.get_entities({Prototype.IronChest})
+    assert chests[0].inventory.get('coal', 0) == 5
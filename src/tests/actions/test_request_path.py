@@ -17,4 +17,15 @@ def test_path(game):
     """
     path = game.request_path(Position(x=0, y=0), Position(x=10, y=0))
 
-    assert path
\ No newline at end of file
+    assert path
+
+def test_wait_for_path(game):
+    """
+    Waiting on a path request should return as soon as the game has finished it, after which the path can be read
+    """
+    path_handle = game._request_path(Position(x=0, y=0), Position(x=10, y=0))
+
+    assert game._get_path.wait(path_handle, timeout=5) == 'success'
+
+    path = game._get_path(path_handle)
+    assert path[-1].x == pytest.approx(10, abs=1)
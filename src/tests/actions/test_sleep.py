@@ -21,4 +21,17 @@ def test_sleep(game):
         game.sleep(10)
         end_time = time.time()
         elapsed_seconds = end_time-start_time
-        assert elapsed_seconds*speed - 10 < 0.05, f"Sleep function did not work as expected for speed {i}"
\ No newline at end of file
+        assert elapsed_seconds*speed - 10 < 0.05, f"Sleep function did not work as expected for speed {i}"
+
+def test_wait_ticks_at_raised_speed(game):
+    game.instance.speed(10)
+    try:
+        start_time = time.time()
+        start_tick = game.sleep.wait_ticks(0)
+        end_tick = game.sleep.wait_ticks(600)
+        elapsed_seconds = time.time() - start_time
+    finally:
+        game.instance.speed(1)
+
+    assert end_tick - start_tick >= 600
+    assert elapsed_seconds < 5, "Waiting for 10 seconds of game time at 10x speed should take about a second"
@@ -0,0 +1,21 @@
+from typing import List
+
+from factorio_entities import TransportBelt, Position, Direction
+from factorio_types import Prototype
+
+OFFSETS = {Direction.UP: (0, -1), Direction.RIGHT: (1, 0), Direction.DOWN: (0, 1), Direction.LEFT: (-1, 0)}
+
+
+def make_belt(x: float, y: float, direction: Direction, is_source=False, is_terminus=False) -> TransportBelt:
+    """A belt as `get_entities` returns it, without a game"""
+    dx, dy = OFFSETS[direction]
+    return TransportBelt(name="transport-belt", direction=direction, position=Position(x=x, y=y),
+                         input_position=Position(x=x - dx, y=y - dy), output_position=Position(x=x + dx, y=y + dy),
+                         energy=0, health=150, prototype=Prototype.TransportBelt,
+                         dimensions={"width": 1, "height": 1}, tile_dimensions={"tile_width": 1, "tile_height": 1},
+                         is_source=is_source, is_terminus=is_terminus)
+
+
+def make_line(n_belts: int, y: float = 0.5) -> List[TransportBelt]:
+    return [make_belt(x + 0.5, y, Direction.RIGHT, is_source=x == 0, is_terminus=x == n_belts - 1)
+            for x in range(n_belts)]
@@ -0,0 +1,67 @@
+import time
+
+from factorio_instance import FactorioInstance
+
+# Unfuelled furnaces, so every entity has an issue and `get_issues` does its full work
+PLACE_FURNACES = '''/c
+local surface = game.players[1].surface
+local side = math.ceil(math.sqrt({n}))
+local placed = 0
+for i = 0, side - 1 do
+    for j = 0, side - 1 do
+        if placed < {n} then
+            local entity = surface.create_entity{{name = "stone-furnace", position = {{x = 20 + i * 2, y = 20 + j * 2}},
+                                                  force = "player", raise_built = true}}
+            if entity then placed = placed + 1 end
+        end
+    end
+end
+rcon.print(placed)
+'''
+
+
+def measure_ups(instance: FactorioInstance, duration: float = 5):
+    """Run the game as fast as it can, and return the updates per second it achieved"""
+    instance.speed(1000)
+    start_tick = int(instance.rcon_client.send_command('/c rcon.print(game.tick)'))
+    start_time = time.time()
+    time.sleep(duration)
+    end_tick = int(instance.rcon_client.send_command('/c rcon.print(game.tick)'))
+    elapsed = time.time() - start_time
+    instance.speed(1)
+    return (end_tick - start_tick) / elapsed
+
+
+def run_alerts_benchmark(instance: FactorioInstance, entity_counts=(0, 1000, 10000)):
+    results = {}
+    for n in entity_counts:
+        instance.reset()
+        placed = int(instance.rcon_client.send_command(PLACE_FURNACES.format(n=n))) if n else 0
+        ups = measure_ups(instance)
+        # Entities cleared by the reset are only dropped from the tracker once the round-robin reaches them
+        tracked = int(instance.rcon_client.send_command('/c rcon.print(#global.alert_tracker.entities)'))
+        results[n] = {
+            "placed": placed,
+            "tracked": tracked,
+            "ups": ups,
+            "alerts": len(instance.get_warnings(seconds=0))
+        }
+    return results
+
+
+if __name__ == "__main__":
+    instance = FactorioInstance(address='localhost',
+                                bounding_box=200,
+                                tcp_port=27000,
+                                fast=True,
+                                cache_scripts=False,
+                                inventory={})
+
+    results = run_alerts_benchmark(instance)
+
+    print("Alert Tracking Benchmark:")
+    print("-" * 60)
+    print(f"{'Entities':<10} {'Tracked':<10} {'UPS':<10} {'Alerts':<10}")
+    print("-" * 60)
+    for n, result in results.items():
+        print(f"{result['placed']:<10} {result['tracked']:<10} {result['ups']:<10.1f} {result['alerts']:<10}")
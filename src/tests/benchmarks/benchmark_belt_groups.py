@@ -0,0 +1,62 @@
+import sys
+import time
+from typing import List
+
+from factorio_entities import TransportBelt, Direction
+from tests.belts import make_belt, make_line
+from utilities.groupable_entities import agglomerate_groupable_entities
+
+
+def make_parallel_lines(n_belts: int, line_length: int = 100) -> List[TransportBelt]:
+    return [belt for y in range(n_belts // line_length) for belt in make_line(line_length, y * 2 + 0.5)]
+
+
+def make_joining_lines(n_belts: int, branch_length: int = 10) -> List[TransportBelt]:
+    """A main line with branches side-loading onto it from below, every other tile"""
+    n_branches = n_belts // (branch_length + 2)
+    belts = make_line(n_belts - n_branches * branch_length)
+    for i in range(n_branches):
+        x = i * 2 + 0.5
+        belts.extend(make_belt(x, y + 1.5, Direction.UP, is_source=y == branch_length - 1)
+                     for y in reversed(range(branch_length)))
+    return belts
+
+
+LAYOUTS = {
+    "line": make_line,
+    "parallel_lines": make_parallel_lines,
+    "joining_lines": make_joining_lines,
+}
+
+
+def run_belt_group_benchmark(sizes=(100, 1000, 10000), repeats: int = 5):
+    results = {}
+    for layout, make_layout in LAYOUTS.items():
+        for n_belts in sizes:
+            belts = make_layout(n_belts)
+
+            start_time = time.perf_counter()
+            for _ in range(repeats):
+                groups = agglomerate_groupable_entities(belts)
+            group_duration = (time.perf_counter() - start_time) / repeats
+
+            results[(layout, len(belts))] = {
+                "groups": len(groups),
+                "group_ms": group_duration * 1000
+            }
+    return results
+
+
+def run_and_print_results(sizes=(100, 1000, 10000), repeats: int = 5):
+    results = run_belt_group_benchmark(sizes, repeats)
+
+    print(f"Belt Grouping Benchmark (repeats: {repeats}, recursion limit: {sys.getrecursionlimit()}):")
+    print("-" * 80)
+    print(f"{'Layout':<16} {'Belts':<10} {'Groups':<10} {'Group (ms)':<15}")
+    print("-" * 80)
+    for (layout, n_belts), data in results.items():
+        print(f"{layout:<16} {n_belts:<10} {data['groups']:<10} {data['group_ms']:<15.3f}")
+
+
+if __name__ == "__main__":
+    run_and_print_results()
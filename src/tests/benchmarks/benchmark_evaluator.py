@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import time
+from contextlib import ExitStack
+from typing import Iterable
+
+from factorio_instance import FactorioInstance
+from search.factorio_evaluator import FactorioEvaluator
+from search.mcts.grouped_logger import GroupedFactorioLogger
+from search.model.conversation import Conversation, Message
+from search.model.game_state import GameState
+from search.model.program import Program
+from tests.fake_server import FakeFactorioServer
+
+INVENTORY = {
+    'iron-plate': 50,
+    'coal': 50,
+    'stone-furnace': 5,
+    'burner-mining-drill': 3,
+    'iron-chest': 2,
+}
+
+# A small program mixing RCON round-trips with game time, similar in shape to what the agent writes
+PROGRAM = '''
+move_to(Position(x=5, y=5))
+chest = place_entity(Prototype.IronChest, position=Position(x=5, y=5))
+insert_item(Prototype.Coal, chest, quantity=5)
+print(inspect_inventory())
+sleep(1)
+'''
+
+
+def create_instances(ports: Iterable[int]):
+    return [FactorioInstance(address='localhost',
+                             bounding_box=200,
+                             tcp_port=port,
+                             fast=True,
+                             cache_scripts=True,
+                             inventory=INVENTORY) for port in ports]
+
+
+async def run_evaluator_benchmark(instances, n_batches: int = 5, value_accrual_time: float = 1):
+    """
+    Evaluate `n_batches` batches of one program per instance, and return programs per hour.
+    Instances are evaluated on their own worker threads, so throughput should scale with len(instances).
+    """
+    logger = GroupedFactorioLogger(n_groups=1, instances_per_group=len(instances),
+                                   ports=[instance.tcp_port for instance in instances])
+    evaluator = FactorioEvaluator(db_client=None,
+                                  instances=instances,
+                                  value_accrual_time=value_accrual_time,
+                                  logger=logger)
+    start_state = GameState.from_instance(instances[0])
+    conversation = Conversation(messages=[Message(role="system", content="benchmark")])
+
+    start_time = time.time()
+    for _ in range(n_batches):
+        programs = [Program(code=PROGRAM, conversation=conversation) for _ in instances]
+        await evaluator.evaluate_batch(programs, start_state)
+    duration = time.time() - start_time
+
+    n_programs = n_batches * len(instances)
+    return {
+        "instances": len(instances),
+        "programs": n_programs,
+        "duration": duration,
+        "programs_per_hour": n_programs / duration * 3600
+    }
+
+
+def run_and_print_results(max_instances: int = 4, n_batches: int = 5, fake_latency: float = None):
+    """
+    :param fake_latency: Run against fake servers (see tests/fake_server) with this latency per command, rather than
+    against Factorio servers on tcp/27000 onwards
+    """
+    with ExitStack() as stack:
+        if fake_latency is not None:
+            # Free ports, so that the benchmark can run alongside other servers
+            servers = [stack.enter_context(FakeFactorioServer(latency=fake_latency)) for _ in range(max_instances)]
+            instances = create_instances(server.port for server in servers)
+        else:
+            instances = create_instances(range(27000, 27000 + max_instances))
+
+        print(f"Evaluator Scaling Benchmark (batches: {n_batches}):")
+        print("-" * 80)
+        print(f"{'Instances':<10} {'Programs':<10} {'Duration':<10} {'Programs/Hour':<15} {'Speedup':<10}")
+        print("-" * 80)
+
+        baseline = None
+        for n in range(1, max_instances + 1):
+            result = asyncio.run(run_evaluator_benchmark(instances[:n], n_batches))
+            if baseline is None:
+                baseline = result['programs_per_hour']
+            print(f"{result['instances']:<10} {result['programs']:<10} {result['duration']:.2f}s"
+                  f"{'':<4} {result['programs_per_hour']:<15.2f} {result['programs_per_hour'] / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    run_and_print_results(fake_latency=float(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,107 @@
+import time
+
+from factorio_entities import Position
+from factorio_instance import FactorioInstance, Direction
+from factorio_types import Prototype, Resource
+from search.model.game_state import GameState
+from tests.fake_server import FakeFactorioServer
+
+INVENTORY = {
+    'iron-plate': 500,
+    'coal': 200,
+    'stone-furnace': 50,
+    'iron-chest': 200,
+    'transport-belt': 200,
+}
+
+
+def place_and_pickup(game: FactorioInstance):
+    chest = game.namespace.place_entity(Prototype.IronChest, position=Position(x=5, y=5))
+    game.namespace.insert_item(Prototype.Coal, chest, quantity=5)
+    game.namespace.pickup_entity(chest)
+
+
+def move_and_harvest(game: FactorioInstance):
+    position = game.namespace.nearest(Resource.Coal)
+    game.namespace.move_to(position)
+    game.namespace.harvest_resource(position, quantity=5)
+    game.namespace.move_to(Position(x=0, y=0))
+
+
+def craft(game: FactorioInstance):
+    game.namespace.craft_item(Prototype.IronGearWheel, 1)
+
+
+def get_entities(game: FactorioInstance):
+    game.namespace.get_entities()
+
+
+def place_batch(game: FactorioInstance):
+    results = game.execute_many([('place_entity', Prototype.TransportBelt, Direction.UP, Position(x=x, y=10))
+                                 for x in range(20)])
+    game.execute_many([('pickup_entity', belt) for _, belt in results])
+
+
+def capture_and_restore(game: FactorioInstance):
+    game.reset(GameState.from_instance(game))
+
+
+WORKLOADS = {
+    "place_and_pickup": place_and_pickup,
+    "move_and_harvest": move_and_harvest,
+    "craft_item": craft,
+    "get_entities": get_entities,
+    "execute_many (20)": place_batch,
+    "capture_and_restore": capture_and_restore,
+}
+
+
+def run_fake_server_benchmark(latencies=(0, 0.001, 0.005), iterations: int = 50, n_entities: int = 100):
+    """
+    Time the workloads against a fake server with each latency. The time the server spent running commands and the
+    latency it injected are subtracted from the wall time, leaving what was spent in the client (encoding commands,
+    RCON framing, parsing responses and building entities).
+    """
+    results = {}
+    for latency in latencies:
+        with FakeFactorioServer(latency=latency) as server:
+            game = FactorioInstance(address='localhost',
+                                    bounding_box=200,
+                                    tcp_port=server.port,
+                                    fast=True,
+                                    cache_scripts=True,
+                                    inventory=INVENTORY)
+            # Some entities, so that reads and captures have something to parse
+            game.execute_many([('place_entity', Prototype.IronChest, Direction.UP, Position(x=x % 20, y=20 + x // 20))
+                               for x in range(n_entities)])
+            for name, workload in WORKLOADS.items():
+                commands, time_in_commands = server.commands, server.time_in_commands
+                start_time = time.perf_counter()
+                for _ in range(iterations):
+                    workload(game)
+                duration = time.perf_counter() - start_time
+                round_trips = server.commands - commands
+                server_time = server.time_in_commands - time_in_commands
+                results[(name, latency)] = {
+                    "per_iteration_ms": duration / iterations * 1000,
+                    "round_trips": round_trips / iterations,
+                    "client_ms": (duration - server_time - round_trips * latency) / iterations * 1000,
+                }
+            game.rcon_client.close()
+    return results
+
+
+def run_and_print_results(latencies=(0, 0.001, 0.005), iterations: int = 50):
+    results = run_fake_server_benchmark(latencies, iterations)
+
+    print(f"Fake Server Benchmark (iterations: {iterations}):")
+    print("-" * 80)
+    print(f"{'Workload':<22} {'Latency (ms)':<14} {'Per iter (ms)':<15} {'Round trips':<13} {'Client (ms)':<12}")
+    print("-" * 80)
+    for (name, latency), data in results.items():
+        print(f"{name:<22} {latency * 1000:<14.1f} {data['per_iteration_ms']:<15.2f} {data['round_trips']:<13.1f} "
+              f"{data['client_ms']:<12.2f}")
+
+
+if __name__ == "__main__":
+    run_and_print_results()
@@ -185,6 +185,63 @@ def benchmark_get_resource_patch_str(game: FactorioInstance, iterations: int):
     return count
 
 
+# Agent-style program that spends most of its statements in the interpreter, with a few game calls in the loop
+INTERPRETER_PROGRAM = '''
+positions = []
+for i in range(50):
+    if i % 10 == 0:
+        positions.append(Position(x=i, y=0))
+    else:
+        offset = i * 2
+inventory = inspect_inventory()
+for position in positions:
+    distance = abs(position.x) + abs(position.y)
+print(len(positions))
+'''
+
+
+class TimedSendCommand:
+    """Wraps `send_command` of an RCON client to accumulate the time spent waiting on the server"""
+
+    def __init__(self, send_command):
+        self.send_command = send_command
+        self.elapsed = 0
+
+    def __call__(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return self.send_command(*args, **kwargs)
+        finally:
+            self.elapsed += time.perf_counter() - start_time
+
+
+def run_interpreter_benchmark(game: FactorioInstance, num_iterations: int = 100):
+    """
+    Evaluate the same program repeatedly, splitting the time spent in the Python interpreter from the time
+    spent in RCON. The first ('cold') evaluation parses and compiles the program, later ('warm') evaluations
+    reuse the nodes compiled by the namespace.
+    """
+    client = game.rcon_client
+    timed_send_command = TimedSendCommand(client.send_command)
+    client.send_command = timed_send_command
+    results = {}
+    try:
+        for name, iterations in (("cold", 1), ("warm", num_iterations)):
+            timed_send_command.elapsed = 0
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                game.eval(INTERPRETER_PROGRAM)
+            duration = time.perf_counter() - start_time
+            results[name] = {
+                "evaluations": iterations,
+                "rcon_ms": timed_send_command.elapsed / iterations * 1000,
+                "interpreter_ms": (duration - timed_send_command.elapsed) / iterations * 1000,
+            }
+    finally:
+        client.send_command = timed_send_command.send_command
+    return results
+
+
 def run_and_print_results(game: FactorioInstance, num_iterations: int = 100):
     results = run_string_benchmark(game, num_iterations)
 
@@ -205,6 +262,17 @@ def run_and_print_results(game: FactorioInstance, num_iterations: int = 100):
     print(
         f"{'Total':<20} {total_ops_per_minute:.2f} {total_ops / total_duration:.2f} {total_duration:.2f}s {total_ops}")
 
+    game.reset()
+    results = run_interpreter_benchmark(game, num_iterations)
+
+    print(f"\nInterpreter Overhead (iterations: {num_iterations}):")
+    print("-" * 80)
+    print(f"{'Evaluation':<20} {'Interpreter (ms)':<20} {'RCON (ms)':<20} {'Count':<10}")
+    print("-" * 80)
+
+    for name, data in results.items():
+        print(f"{name:<20} {data['interpreter_ms']:<20.2f} {data['rcon_ms']:<20.2f} {data['evaluations']}")
+
 
 if __name__ == "__main__":
     inventory = {
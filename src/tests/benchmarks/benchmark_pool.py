@@ -0,0 +1,91 @@
+import asyncio
+import sys
+import time
+from contextlib import ExitStack
+
+from factorio_instance import FactorioInstance
+from factorio_pool import FactorioPool
+from tests.fake_server import FakeFactorioServer
+
+
+def evaluate(instance: FactorioInstance):
+    """A stand-in for evaluating a program: a few round trips to the server"""
+    for _ in range(5):
+        instance.namespace.inspect_inventory()
+
+
+async def run_partitioned(pool: FactorioPool, n_tasks: int):
+    """Each instance runs a fixed share of the tasks, as with instance groups"""
+    async def run_share(instance, n):
+        for _ in range(n):
+            await pool.call(instance, evaluate, instance)
+
+    n_instances = len(pool.instances)
+    await asyncio.gather(*(run_share(instance, n_tasks // n_instances + (i < n_tasks % n_instances))
+                           for i, instance in enumerate(pool.instances)))
+
+
+async def run_pooled(pool: FactorioPool, n_tasks: int, task_timeout: float):
+    async def task(instance, _):
+        await pool.call(instance, evaluate, instance)
+
+    await pool.map(task, range(n_tasks), timeout=task_timeout)
+
+
+def run_pool_benchmark(n_servers: int = 30, n_bad: int = 3, n_tasks: int = 600, latency: float = 0.002,
+                       bad_latency: float = 0.5, bad_after: float = 0.2):
+    """
+    Run `n_tasks` evaluations over `n_servers` fake servers, `n_bad` of which slow down to `bad_latency` per command
+    `bad_after` seconds in, both with a fixed share of tasks per instance and with the pool.
+    """
+    results = {}
+    for name in ("partitioned", "pooled"):
+        with ExitStack() as stack:
+            servers = [stack.enter_context(FakeFactorioServer(latency=latency)) for _ in range(n_servers)]
+            instances = [FactorioInstance(address='localhost', tcp_port=server.port, fast=True, cache_scripts=True,
+                                          inventory={'iron-plate': 10}) for server in servers]
+            pool = FactorioPool(instances, probe_timeout=bad_latency / 2, reconnect_timeout=bad_latency * 2,
+                                quarantine_time=60)
+
+            async def go_bad():
+                await asyncio.sleep(bad_after)
+                for server in servers[:n_bad]:
+                    server.latency = bad_latency
+
+            async def run():
+                bad = asyncio.create_task(go_bad())
+                start_time = time.perf_counter()
+                if name == "partitioned":
+                    await run_partitioned(pool, n_tasks)
+                else:
+                    # A task on a healthy server takes ~5 round trips
+                    await run_pooled(pool, n_tasks, task_timeout=bad_latency)
+                duration = time.perf_counter() - start_time
+                await bad
+                await pool.close()
+                return duration
+
+            duration = asyncio.run(run())
+            results[name] = {
+                "seconds": duration,
+                "tasks_per_second": n_tasks / duration,
+                "quarantined": pool.stats()["quarantined"],
+            }
+            for instance in instances:
+                instance.rcon_client.close()
+    return results
+
+
+def run_and_print_results(n_servers: int = 30, n_bad: int = 3):
+    results = run_pool_benchmark(n_servers, n_bad)
+
+    print(f"Pool Benchmark ({n_servers} servers, {n_bad} of which slow down):")
+    print("-" * 60)
+    print(f"{'Scheduling':<15} {'Seconds':<12} {'Tasks/s':<12} {'Quarantined':<12}")
+    print("-" * 60)
+    for name, data in results.items():
+        print(f"{name:<15} {data['seconds']:<12.2f} {data['tasks_per_second']:<12.1f} {data['quarantined']:<12}")
+
+
+if __name__ == "__main__":
+    run_and_print_results(*map(int, sys.argv[1:3]))
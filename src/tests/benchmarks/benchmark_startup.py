@@ -0,0 +1,105 @@
+import json
+import os
+import time
+
+import factorio_lua_script_manager
+from controllers.__action import Action
+from factorio_instance import FactorioInstance
+from factorio_lua_script_manager import FactorioLuaScriptManager
+from utilities.controller_loader import get_controller_artifact
+
+INVENTORY = {
+    'iron-plate': 50,
+    'coal': 50,
+    'stone-furnace': 5,
+    'burner-mining-drill': 3,
+    'iron-chest': 2,
+}
+
+
+class CountingRCONClient:
+    """Stands in for a game that has none of the scripts, counting the round trips made to it"""
+    port = 0
+
+    def __init__(self):
+        self.round_trips = 0
+
+    def send_command(self, command):
+        self.round_trips += 1
+        return json.dumps({}) if "get_lua_script_checksums" in command else None
+
+    def send_commands(self, commands):
+        self.round_trips += 1
+        return {key: None for key in commands}
+
+
+def setup_controllers(rcon_client, cache_scripts: bool):
+    """What `FactorioInstance.setup_controllers` does, without a game"""
+    execution_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    controller_classes = get_controller_artifact(execution_path).controller_classes
+    manager = FactorioLuaScriptManager(rcon_client, cache_scripts)
+    manager.load_actions_into_game(controller_class.camel_to_snake(controller_class.__name__)
+                                   for controller_class in controller_classes.values()
+                                   if issubclass(controller_class, Action))
+    return {name: controller_class.shared(manager, None) for name, controller_class in controller_classes.items()}
+
+
+def run_controller_setup_benchmark(n_instances: int = 24):
+    """Time building every instance's controllers, from a cold process (no syntax checks cached) and a warm one"""
+    factorio_lua_script_manager._syntax_checked.clear()
+    results = {}
+    for run in ("cold", "warm"):
+        client = CountingRCONClient()
+        start_time = time.perf_counter()
+        for _ in range(n_instances):
+            setup_controllers(client, cache_scripts=False)
+        duration = time.perf_counter() - start_time
+        results[run] = {
+            "total_s": duration,
+            "per_instance_ms": duration / n_instances * 1000,
+            "round_trips_per_instance": client.round_trips / n_instances
+        }
+    return results
+
+
+def run_instance_startup_benchmark(n_instances: int = 24, base_port: int = 27000):
+    """
+    Time starting `n_instances` servers' instances with the scripts uncached (every script is sent and checked) and
+    then again with the scripts already in the games.
+    """
+    factorio_lua_script_manager._syntax_checked.clear()
+    results = {}
+    for run, cache_scripts in (("cold", False), ("warm", True)):
+        start_time = time.perf_counter()
+        for i in range(n_instances):
+            FactorioInstance(address='localhost',
+                             bounding_box=200,
+                             tcp_port=base_port + i,
+                             fast=True,
+                             cache_scripts=cache_scripts,
+                             inventory=INVENTORY)
+        duration = time.perf_counter() - start_time
+        results[run] = {"total_s": duration, "per_instance_ms": duration / n_instances * 1000}
+    return results
+
+
+def run_and_print_results(n_instances: int = 24, with_servers: bool = False):
+    print(f"Controller Setup Benchmark (instances: {n_instances}):")
+    print("-" * 80)
+    print(f"{'Run':<10} {'Total (s)':<15} {'Per instance (ms)':<20} {'Round trips':<15}")
+    print("-" * 80)
+    for run, data in run_controller_setup_benchmark(n_instances).items():
+        print(f"{run:<10} {data['total_s']:<15.3f} {data['per_instance_ms']:<20.1f} "
+              f"{data['round_trips_per_instance']:<15.1f}")
+
+    if with_servers:
+        print(f"\nInstance Startup Benchmark (instances: {n_instances}):")
+        print("-" * 80)
+        print(f"{'Run':<10} {'Total (s)':<15} {'Per instance (ms)':<20}")
+        print("-" * 80)
+        for run, data in run_instance_startup_benchmark(n_instances).items():
+            print(f"{run:<10} {data['total_s']:<15.3f} {data['per_instance_ms']:<20.1f}")
+
+
+if __name__ == "__main__":
+    run_and_print_results()
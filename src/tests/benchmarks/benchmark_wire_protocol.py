@@ -0,0 +1,95 @@
+import json
+import time
+from typing import Dict, List
+
+from factorio_rcon_utils import _lua2python, _json2python, RESPONSE_PROTOCOL_VERSION
+
+COMMAND = 'pcall(global.actions.get_entities, 1,1000,"[]")'
+
+
+def lua_dump(value) -> str:
+    """Python port of `dump()` in init/initialise.lua, to write responses in the legacy format"""
+    if isinstance(value, dict):
+        items = "".join(f"[{key if isinstance(key, int) else chr(34) + key + chr(34)}] = {lua_dump(item)},"
+                        for key, item in value.items())
+        return "{ " + items + "} "
+    if isinstance(value, list):
+        return lua_dump({index: item for index, item in enumerate(value, 1)})
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+def lua_quote(value):
+    """Quote strings the way `serialize_entity` does, as `dump()` doesn't"""
+    if isinstance(value, dict):
+        return {key: lua_quote(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [lua_quote(item) for item in value]
+    if isinstance(value, str):
+        return f'"{value}"'
+    return value
+
+
+def make_entities(n_entities: int) -> List[Dict]:
+    """Entities shaped like the output of `global.utils.serialize_entity`"""
+    return [{
+        "name": "stone-furnace",
+        "position": {"x": i + 0.5, "y": -i - 0.5},
+        "direction": 0,
+        "health": 200,
+        "status": "working",
+        "warnings": [],
+        "fuel": {"coal": 5},
+        "furnace_source": {"iron-ore": 12},
+        "furnace_result": {"iron-plate": 30},
+        "dimensions": {"width": 2, "height": 2},
+        "tile_dimensions": {"tile_width": 2, "tile_height": 2},
+        "drop_position": {"x": i + 0.5, "y": -i + 1.5},
+    } for i in range(n_entities)]
+
+
+def record_responses(n_entities: int):
+    """Return the same `get_entities` response as written by `dump()` and by `dump_response`"""
+    entities = lua_quote(make_entities(n_entities))
+    legacy = lua_dump({"a": True, "b": entities})
+    versioned = json.dumps({"v": RESPONSE_PROTOCOL_VERSION, "a": True, "b": entities}, separators=(",", ":"))
+    return legacy, versioned
+
+
+def run_parse_benchmark(sizes=(1, 10, 100, 1000), repeats: int = 20):
+    results = {}
+    for n_entities in sizes:
+        legacy, versioned = record_responses(n_entities)
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            _lua2python(COMMAND, legacy)
+        slpp_duration = (time.perf_counter() - start_time) / repeats
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            _json2python(COMMAND, versioned)
+        json_duration = (time.perf_counter() - start_time) / repeats
+
+        results[n_entities] = {
+            "slpp_ms": slpp_duration * 1000,
+            "json_ms": json_duration * 1000,
+            "speedup": slpp_duration / json_duration
+        }
+    return results
+
+
+def run_and_print_results(sizes=(1, 10, 100, 1000), repeats: int = 20):
+    results = run_parse_benchmark(sizes, repeats)
+
+    print(f"Response Parsing Benchmark (repeats: {repeats}):")
+    print("-" * 80)
+    print(f"{'Entities':<10} {'slpp (ms)':<15} {'JSON (ms)':<15} {'Speedup':<10}")
+    print("-" * 80)
+    for n_entities, data in results.items():
+        print(f"{n_entities:<10} {data['slpp_ms']:<15.3f} {data['json_ms']:<15.3f} {data['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    run_and_print_results()
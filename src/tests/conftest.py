@@ -18,13 +18,22 @@ if str(project_root) not in sys.path:
 if str(project_root / 'src') not in sys.path:
     sys.path.insert(0, str(project_root / 'src'))
 
+@pytest.fixture()
+def fake_server():
+    """A fake Factorio server, see tests/fake_server"""
+    from tests.fake_server import FakeFactorioServer
+    with FakeFactorioServer() as server:
+        yield server
+
 @pytest.fixture()#scope="session")
-def instance():
+def instance(request):
     from src.factorio_instance import FactorioInstance
+    # Set FACTORIO_FAKE_SERVER=1 to run against a fake server rather than a Factorio container on tcp/27000
+    tcp_port = request.getfixturevalue('fake_server').port if os.getenv('FACTORIO_FAKE_SERVER') else 27000
     try:
         instance = FactorioInstance(address='localhost',
                                     bounding_box=200,
-                                    tcp_port=27000,
+                                    tcp_port=tcp_port,
                                     cache_scripts=False,
                                     fast=True,
                                     inventory={
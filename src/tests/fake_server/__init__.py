@@ -0,0 +1,2 @@
+from tests.fake_server.server import FakeFactorioServer
+from tests.fake_server.world import World, ActionError
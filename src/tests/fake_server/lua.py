@@ -0,0 +1,130 @@
+"""
+A parser for the Lua literals that controllers send as arguments, i.e what `slpp.encode` writes.
+
+`slpp.decode` would do, but it's slow on the large entity states sent by `load_entity_state` and doesn't undo the
+`\\xHH` escapes that `slpp.encode` writes for bytes.
+"""
+import re
+
+_WHITESPACE = re.compile(r'\s*')
+_NUMBER = re.compile(r'-?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+_NAME = re.compile(r'[A-Za-z_]\w*')
+_STRINGS = {'"': re.compile(r'"((?:[^"\\]|\\.)*)"', re.DOTALL),
+            "'": re.compile(r"'((?:[^'\\]|\\.)*)'", re.DOTALL)}
+_ESCAPE = re.compile(r'\\(x[0-9a-fA-F]{2}|\d{1,3}|\n|.)', re.DOTALL)
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v', '\n': '\n'}
+_CONSTANTS = {'true': True, 'false': False, 'nil': None}
+
+
+class LuaSyntaxError(ValueError):
+    pass
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if escape[0] == 'x':
+        return chr(int(escape[1:], 16))
+    if escape.isdigit():
+        return chr(int(escape))
+    return _ESCAPES.get(escape, escape)
+
+
+class _Parser:
+
+    def __init__(self, text: str, position: int = 0):
+        self.text = text
+        self.position = position
+
+    def skip(self) -> str:
+        """Skip whitespace, and return the next character (or "" at the end)"""
+        self.position = _WHITESPACE.match(self.text, self.position).end()
+        return self.text[self.position:self.position + 1]
+
+    def expect(self, char: str):
+        if self.skip() != char:
+            raise LuaSyntaxError(f"Expected '{char}' at {self.position}: {self.text[self.position:self.position + 20]!r}")
+        self.position += 1
+
+    def value(self):
+        char = self.skip()
+        if char in _STRINGS:
+            match = _STRINGS[char].match(self.text, self.position)
+            if not match:
+                raise LuaSyntaxError(f"Unterminated string at {self.position}")
+            self.position = match.end()
+            body = match.group(1)
+            return _ESCAPE.sub(_unescape, body) if '\\' in body else body
+        if char == '{':
+            return self.table()
+        match = _NUMBER.match(self.text, self.position)
+        if match:
+            self.position = match.end()
+            number = match.group()
+            if number.lstrip('-')[:2] in ('0x', '0X'):
+                return int(number, 16)
+            return float(number) if any(c in number for c in '.eE') else int(number)
+        match = _NAME.match(self.text, self.position)
+        if match and match.group() in _CONSTANTS:
+            self.position = match.end()
+            return _CONSTANTS[match.group()]
+        raise LuaSyntaxError(f"Unexpected {self.text[self.position:self.position + 20]!r} at {self.position}")
+
+    def table(self):
+        """A table, as a list if it only has positional entries and as a dict otherwise"""
+        self.expect('{')
+        positional, keyed = [], {}
+        while self.skip() != '}':
+            if self.skip() == '[':
+                self.position += 1
+                key = self.value()
+                self.expect(']')
+                self.expect('=')
+                keyed[key] = self.value()
+            else:
+                match = _NAME.match(self.text, self.position)
+                after = match and _WHITESPACE.match(self.text, match.end()).end()
+                if match and match.group() not in _CONSTANTS and self.text[after:after + 1] == '=' \
+                        and self.text[after:after + 2] != '==':
+                    self.position = after + 1
+                    keyed[match.group()] = self.value()
+                else:
+                    positional.append(self.value())
+            if self.skip() in (',', ';'):
+                self.position += 1
+            elif self.skip() != '}':
+                raise LuaSyntaxError(f"Expected ',' or '}}' at {self.position}")
+        self.position += 1
+        if not keyed:
+            return positional
+        keyed.update((index, value) for index, value in enumerate(positional, 1))
+        return {key: value for key, value in keyed.items() if value is not None}
+
+    def arguments(self):
+        """Comma separated values up to (and including) a closing parenthesis"""
+        values = []
+        while self.skip() != ')':
+            if not self.skip():
+                raise LuaSyntaxError("Unterminated argument list")
+            values.append(self.value())
+            if self.skip() == ',':
+                self.position += 1
+        self.position += 1
+        return values
+
+
+def decode(text: str):
+    """Decode a single Lua literal"""
+    return _Parser(text).value()
+
+
+def decode_arguments(text: str, position: int = 0):
+    """
+    Decode the arguments of a call, starting after its opening parenthesis (or after the function in
+    `pcall(f, ...)`, in which case a leading comma is skipped).
+    :return: The arguments, and the position after the closing parenthesis
+    """
+    parser = _Parser(text, position)
+    if parser.skip() == ',':
+        parser.position += 1
+    values = parser.arguments()
+    return values, parser.position
@@ -0,0 +1,226 @@
+import json
+import random
+import re
+import socket
+import struct
+import threading
+import time
+from typing import Optional
+
+from factorio_rcon_utils import RESPONSE_PROTOCOL_VERSION
+from tests.fake_server.lua import LuaSyntaxError, decode, decode_arguments
+from tests.fake_server.world import World
+
+# RCON packet types
+AUTH = 3
+AUTH_RESPONSE = EXEC_COMMAND = 2
+RESPONSE_VALUE = 0
+
+PREFIX = re.compile(r'/(?:c|sc|command|silent-command)\s+')
+PCALL = re.compile(r'a, b = pcall\(global\.actions\.(\w+)')
+BATCH = re.compile(r'local r = \{\};')
+BATCH_CALL = re.compile(r'r\[(\d+)\] = \{pcall\(global\.actions\.(\w+)')
+PRINT_ACTION = re.compile(r'rcon\.print\(global\.actions\.(\w+)\(')
+RAW_ACTION = re.compile(r'global\.actions\.(\w+)\(')
+SET_CHECKSUM = re.compile(r"global\.set_lua_script_checksum\('([^']+)', '([0-9a-f]+)'\)")
+SET_GLOBAL = re.compile(r'global\.(\w+) = ([^\n;]+)')
+PRINT_GLOBAL = re.compile(r'rcon\.print\(global\.(\w+) or 0\)')
+SET_SPEED = re.compile(r'game\.speed = ([\d.]+)')
+CLEAR_ITEMS = re.compile(r'game\.players\[\d+\]\.clear_items_inside\(\)')
+TELEPORT = re.compile(r'game\.players\[\d+\]\.teleport\(\{(-?[\d.]+), ?(-?[\d.]+)\}\)')
+
+
+def _build_packet(packet_id: int, packet_type: int, body: str) -> bytes:
+    payload = struct.pack("<ii", packet_id, packet_type) + body.encode("utf8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+class FakeFactorioServer:
+    """
+    A stand-in for a Factorio server's RCON interface, answering the commands sent by `FactorioInstance` and its
+    controllers from a `World` rather than a game. It makes the client side (RCON round trips, Lua argument encoding,
+    response parsing, entity construction) measurable and testable without a Factorio container:
+
+        with FakeFactorioServer(latency=0.002) as server:
+            instance = FactorioInstance(address='localhost', tcp_port=server.port, fast=True)
+
+    Every command is delayed by `latency` seconds, plus or minus up to `jitter`, before it runs. Commands on the same
+    connection run in order and commands on different connections run concurrently (apart from the world itself,
+    which is locked), as with several instances of a real server.
+
+    :param port: Port to listen on, or 0 to pick a free one (see `port` once constructed)
+    :param seed: Seed of the jitter
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, password: str = 'factorio', latency: float = 0.0,
+                 jitter: float = 0.0, seed: Optional[int] = None, world: Optional[World] = None):
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.world = world or World()
+        self.lock = threading.Lock()
+
+        # Counters, e.g to assert on the round trips a call makes
+        self.commands = 0
+        self.time_in_commands = 0.0
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(64)
+        self.host, self.port = self.sock.getsockname()[:2]
+        self.connections = []
+        self.closed = False
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+
+    def start(self) -> 'FakeFactorioServer':
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
+        for conn in self.connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+                conn.close()
+            except OSError:
+                pass
+
+    def __enter__(self) -> 'FakeFactorioServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def serve(self):
+        while not self.closed:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.connections.append(conn)
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn: socket.socket):
+        buffer = b""
+        authenticated = False
+        try:
+            while True:
+                while len(buffer) < 4 or len(buffer) < 4 + struct.unpack_from("<i", buffer)[0]:
+                    data = conn.recv(65536)
+                    if not data:
+                        return
+                    buffer += data
+                size = struct.unpack_from("<i", buffer)[0]
+                packet_id, packet_type = struct.unpack_from("<ii", buffer, 4)
+                body = buffer[12:4 + size - 2].decode("utf8")
+                buffer = buffer[4 + size:]
+
+                if packet_type == AUTH:
+                    authenticated = body == self.password
+                    conn.sendall(_build_packet(packet_id if authenticated else -1, AUTH_RESPONSE, ""))
+                elif authenticated and packet_type == EXEC_COMMAND:
+                    delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+                    if delay > 0:
+                        time.sleep(delay)
+                    response = self.execute(body)
+                    conn.sendall(_build_packet(packet_id, RESPONSE_VALUE, response + "\n" if response else ""))
+        except OSError:
+            return
+
+    def execute(self, command: str) -> str:
+        """Run a console command, returning what it prints"""
+        with self.lock:
+            start = time.perf_counter()
+            self.commands += 1
+            try:
+                return self._execute(command)
+            except LuaSyntaxError as e:
+                return f"Cannot execute command. Error: {e}"
+            finally:
+                self.time_in_commands += time.perf_counter() - start
+
+    def _execute(self, command: str) -> str:
+        world = self.world
+        prefix = PREFIX.match(command)
+        command = command[prefix.end():] if prefix else command
+
+        match = PCALL.match(command)
+        if match:
+            args, _ = decode_arguments(command, match.end())
+            return self._response(*world.call(match.group(1), args))
+
+        if BATCH.match(command):
+            results, position = [], 0
+            while True:
+                match = BATCH_CALL.search(command, position)
+                if not match:
+                    break
+                args, position = decode_arguments(command, match.end())
+                success, value = world.call(match.group(2), args)
+                results.append([success, value] if value is not None else [success])
+            return self._response(True, results)
+
+        match = PRINT_ACTION.match(command)
+        if match:
+            args, _ = decode_arguments(command, match.end())
+            success, value = world.call(match.group(1), args)
+            return str(value).lower() if isinstance(value, bool) else str(value)
+
+        match = RAW_ACTION.match(command)
+        if match:
+            args, _ = decode_arguments(command, match.end())
+            success, value = world.call(match.group(1), args)
+            return "" if success else f"Cannot execute command. Error: {value}"
+
+        # The checksums of the scripts in the game, see init/checksum.lua
+        checksums = SET_CHECKSUM.findall(command)
+        if checksums:
+            world.script_checksums.update(checksums)
+            return ""
+        if command.startswith('global.clear_lua_script_checksums()'):
+            world.script_checksums.clear()
+            return ""
+        if command.startswith('rcon.print(global.get_lua_script_checksums())'):
+            return json.dumps(world.script_checksums)
+
+        if command.startswith('rcon.print(game.players[1].position)'):
+            return "{x = %s, y = %s}" % (world.player['x'], world.player['y'])
+        if command.startswith('rcon.print(dump(global.get_alerts('):
+            return "{}"
+        if command.startswith('game.reset_game_state()'):
+            world.reset()
+            return ""
+
+        match = PRINT_GLOBAL.fullmatch(command)
+        if match:
+            return str(world.globals.get(match.group(1)) or 0)
+        match = SET_SPEED.fullmatch(command)
+        if match:
+            world.set_speed(float(match.group(1)))
+            return ""
+        match = SET_GLOBAL.fullmatch(command)
+        if match:
+            world.globals[match.group(1)] = decode(match.group(2))
+            return ""
+
+        # The clear_inventory and reset_position init scripts, sent with their arguments substituted
+        if CLEAR_ITEMS.match(command):
+            return str(world.clear_inventory())
+        match = TELEPORT.match(command)
+        if match:
+            return str(world.reset_position(1, float(match.group(1)), float(match.group(2))))
+
+        # Anything else defines scripts (or does something that isn't modelled, e.g `rendering.clear()`)
+        return ""
+
+    @staticmethod
+    def _response(success: bool, value) -> str:
+        """What `dump_response` in init/initialise.lua prints"""
+        response = {'v': RESPONSE_PROTOCOL_VERSION, 'a': success}
+        if value is not None:
+            response['b'] = value
+        return json.dumps(response)
@@ -0,0 +1,717 @@
+"""
+A simplified model of a Factorio game, answering the `global.actions.*` calls made by the controllers.
+
+Only what the controllers need to build a plausible response is modelled: the player's position and inventory,
+a few resource patches, placed entities and their inventories, hand crafting, smelting in furnaces, straight line
+paths and the entity state captures used to save and restore games. Nothing else runs - drills don't mine, belts
+don't move and there is no power. Actions that aren't modelled (e.g `connect_entities`) fail as they would in a game
+that doesn't have them loaded, so callers see an error rather than a wrong answer.
+"""
+import json
+import math
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+ACTIONS = {}
+
+
+def action(*names):
+    """Register a `World` method as the handler of the Lua actions `names`"""
+    def register(method):
+        for name in names:
+            ACTIONS[name] = method
+        return method
+    return register
+
+
+class ActionError(Exception):
+    """Raised by an action to fail its `pcall`, as an `error()` in the Lua action would"""
+
+
+TICKS_PER_SECOND = 60
+
+# Tiles moved per tick when walking, i.e 8.9 tiles per second
+WALKING_SPEED = 0.15
+
+# Factorio direction -> unit vector (y points south)
+OFFSETS = {0: (0, -1), 2: (1, 0), 4: (0, 1), 6: (-1, 0)}
+
+# (width, height) when facing north, of the entities that aren't 1x1
+SIZES = {
+    'stone-furnace': (2, 2), 'steel-furnace': (2, 2), 'electric-furnace': (3, 3),
+    'burner-mining-drill': (2, 2), 'electric-mining-drill': (3, 3),
+    'assembling-machine-1': (3, 3), 'assembling-machine-2': (3, 3), 'assembling-machine-3': (3, 3),
+    'boiler': (3, 2), 'steam-engine': (3, 5), 'offshore-pump': (1, 2), 'lab': (3, 3), 'solar-panel': (3, 3),
+    'accumulator': (2, 2), 'gun-turret': (2, 2), 'big-electric-pole': (2, 2), 'substation': (2, 2),
+    'splitter': (2, 1), 'fast-splitter': (2, 1), 'express-splitter': (2, 1), 'pumpjack': (3, 3),
+    'oil-refinery': (5, 5), 'chemical-plant': (3, 3), 'storage-tank': (3, 3), 'rocket-silo': (9, 9),
+}
+
+# The inventories of each kind of entity, in the order items are inserted into them
+INVENTORIES = {
+    'chest': ('inventory',),
+    'furnace': ('fuel', 'furnace_source', 'furnace_result'),
+    'burner-drill': ('fuel',),
+    'burner-inserter': ('fuel',),
+    'boiler': ('fuel',),
+    'assembler': ('assembling_machine_input', 'assembling_machine_output'),
+    'lab': ('lab_input',),
+    'belt': ('inventory',),
+    'turret': ('turret_ammo',),
+}
+
+FUELS = {'coal', 'wood', 'solid-fuel', 'rocket-fuel', 'nuclear-fuel'}
+
+# Input -> (output, seconds to smelt one) in a furnace of crafting speed 1
+SMELTING = {'iron-ore': ('iron-plate', 3.2), 'copper-ore': ('copper-plate', 3.2), 'stone': ('stone-brick', 3.2)}
+
+# Hand craftable recipes, as product -> (products per craft, ingredients per craft)
+RECIPES = {
+    'iron-gear-wheel': (1, {'iron-plate': 2}),
+    'copper-cable': (2, {'copper-plate': 1}),
+    'electronic-circuit': (1, {'iron-plate': 1, 'copper-cable': 3}),
+    'pipe': (1, {'iron-plate': 1}),
+    'pipe-to-ground': (2, {'pipe': 10, 'iron-plate': 5}),
+    'wooden-chest': (1, {'wood': 2}),
+    'iron-chest': (1, {'iron-plate': 8}),
+    'stone-furnace': (1, {'stone': 5}),
+    'burner-mining-drill': (1, {'iron-gear-wheel': 3, 'stone-furnace': 1, 'iron-plate': 3}),
+    'electric-mining-drill': (1, {'electronic-circuit': 3, 'iron-gear-wheel': 5, 'iron-plate': 10}),
+    'burner-inserter': (1, {'iron-plate': 1, 'iron-gear-wheel': 1}),
+    'inserter': (1, {'electronic-circuit': 1, 'iron-gear-wheel': 1, 'iron-plate': 1}),
+    'transport-belt': (2, {'iron-plate': 1, 'iron-gear-wheel': 1}),
+    'underground-belt': (2, {'iron-plate': 10, 'transport-belt': 5}),
+    'splitter': (1, {'electronic-circuit': 5, 'iron-plate': 5, 'transport-belt': 4}),
+    'small-electric-pole': (2, {'wood': 1, 'copper-cable': 2}),
+    'boiler': (1, {'stone-furnace': 1, 'pipe': 4}),
+    'steam-engine': (1, {'iron-gear-wheel': 8, 'pipe': 5, 'iron-plate': 10}),
+    'offshore-pump': (1, {'electronic-circuit': 2, 'pipe': 1, 'iron-gear-wheel': 1}),
+    'assembling-machine-1': (1, {'electronic-circuit': 3, 'iron-gear-wheel': 5, 'iron-plate': 9}),
+    'lab': (1, {'electronic-circuit': 10, 'iron-gear-wheel': 10, 'transport-belt': 4}),
+    'automation-science-pack': (1, {'copper-plate': 1, 'iron-gear-wheel': 1}),
+    'firearm-magazine': (1, {'iron-plate': 4}),
+}
+
+# Resource patches, as (entity name, centre, radius, amount per tile)
+RESOURCE_PATCHES = [
+    ('iron-ore', (15, 15), 6, 5000),
+    ('copper-ore', (-15, 15), 6, 5000),
+    ('coal', (15, -15), 6, 5000),
+    ('stone', (-15, -15), 5, 5000),
+    ('tree-01', (0, 30), 5, 4),
+    ('water', (0, -30), 5, 0),
+]
+
+# What the player gets from mining a resource, and what `nearest` calls it
+MINED_ITEMS = {'tree-01': 'wood'}
+
+
+def kind_of(name: str) -> str:
+    if name in ('wooden-chest', 'iron-chest', 'steel-chest'):
+        return 'chest'
+    if name in ('stone-furnace', 'steel-furnace'):
+        return 'furnace'
+    if name == 'burner-mining-drill':
+        return 'burner-drill'
+    if name.endswith('mining-drill'):
+        return 'drill'
+    if name == 'burner-inserter':
+        return 'burner-inserter'
+    if name.endswith('inserter'):
+        return 'inserter'
+    if name.endswith('underground-belt'):
+        return 'underground-belt'
+    if name.endswith('splitter'):
+        return 'splitter'
+    if name.endswith('transport-belt'):
+        return 'belt'
+    if name.startswith('assembling-machine'):
+        return 'assembler'
+    if name.endswith('electric-pole') or name == 'substation':
+        return 'pole'
+    if name in ('pipe', 'pipe-to-ground'):
+        return 'pipe'
+    if name == 'gun-turret':
+        return 'turret'
+    return {'boiler': 'boiler', 'lab': 'lab'}.get(name, 'entity')
+
+
+def _position(x, y) -> Dict[str, float]:
+    return {'x': x, 'y': y}
+
+
+class World:
+    """
+    The game state behind a fake server. Not thread safe - the server serialises access to it.
+    :param clock: Seconds since some fixed point, from which game ticks are counted
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.speed = 1
+        self._tick_base = 0
+        self._clock_base = clock()
+        self.globals: Dict[str, Any] = {}
+        self.script_checksums: Dict[str, str] = {}
+        self.paths: Dict[int, List[Dict[str, float]]] = {}
+        self.snapshots: OrderedDict = OrderedDict()
+        self.baseline: Optional[Dict[str, str]] = None
+        self.reset()
+
+    # Game
+
+    @property
+    def tick(self) -> int:
+        return int(self._tick_base + (self.clock() - self._clock_base) * TICKS_PER_SECOND * self.speed)
+
+    def set_speed(self, speed: float):
+        self._tick_base, self._clock_base = self.tick, self.clock()
+        self.speed = speed
+
+    def reset(self):
+        self.player = {'x': 0.0, 'y': 0.0}
+        self.inventory: Counter = Counter()
+        self.produced: Counter = Counter()
+        self.entities: Dict[int, Dict] = {}
+        self.tiles: Dict[Tuple[int, int], int] = {}
+        self.next_unit_number = 1
+        self.globals['elapsed_ticks'] = 0
+        self.generate_resources()
+
+    def generate_resources(self):
+        self.resources: Dict[Tuple[int, int], List] = {}
+        for name, (cx, cy), radius, amount in RESOURCE_PATCHES:
+            for tx in range(cx - radius, cx + radius + 1):
+                for ty in range(cy - radius, cy + radius + 1):
+                    if (tx - cx) ** 2 + (ty - cy) ** 2 <= radius ** 2 and (name != 'tree-01' or (tx + ty) % 2 == 0):
+                        self.resources[(tx, ty)] = [name, amount]
+
+    def elapse(self, ticks: float):
+        """Account for game time spent by the agent"""
+        self.globals['elapsed_ticks'] = self.globals.get('elapsed_ticks', 0) + int(ticks)
+
+    def call(self, name: str, args: List) -> Tuple[bool, Any]:
+        """Run an action as `pcall` would, returning whether it succeeded and its result (or error message)"""
+        handler = ACTIONS.get(name)
+        if handler is None:
+            return False, f"[string \"global.actions.{name}\"]:1: attempt to call a nil value (action '{name}' isn't implemented by the fake server)"
+        try:
+            return True, handler(self, *args)
+        except ActionError as e:
+            return False, f"[string \"global.actions.{name}\"]:1: {e}"
+        except (TypeError, ValueError, KeyError, IndexError) as e:
+            return False, f"[string \"global.actions.{name}\"]:1: bad argument ({e})"
+
+    # Entities
+
+    @staticmethod
+    def size(name: str, direction: int) -> Tuple[int, int]:
+        width, height = SIZES.get(name, (1, 1))
+        return (height, width) if direction in (2, 6) else (width, height)
+
+    def footprint(self, name: str, direction: int, x: float, y: float):
+        """The centre an entity would be placed at, and the tiles it would cover"""
+        width, height = self.size(name, direction)
+        cx = math.floor(x) + 0.5 if width % 2 else round(x)
+        cy = math.floor(y) + 0.5 if height % 2 else round(y)
+        left, top = int(math.floor(cx - width / 2)), int(math.floor(cy - height / 2))
+        return (cx, cy), [(tx, ty) for tx in range(left, left + width) for ty in range(top, top + height)]
+
+    def entity_at(self, x: float, y: float, name: Optional[str] = None) -> Optional[Dict]:
+        unit_number = self.tiles.get((math.floor(x), math.floor(y)))
+        entity = self.entities.get(unit_number)
+        if entity is None or (name and entity['name'] != name):
+            return None
+        return entity
+
+    def find_entity(self, name: Optional[str], x: float, y: float) -> Dict:
+        entity = self.entity_at(x, y, name or None)
+        if entity is None:
+            raise ActionError(f"No {name or 'entity'} found at ({x}, {y})")
+        self._update(entity)
+        return entity
+
+    def can_place(self, name: str, direction: int, x: float, y: float) -> bool:
+        _, tiles = self.footprint(name, direction, x, y)
+        for tile in tiles:
+            if tile in self.tiles:
+                return False
+            resource = self.resources.get(tile)
+            if resource and resource[0] in ('tree-01', 'water') and name != 'offshore-pump':
+                return False
+        if kind_of(name) in ('drill', 'burner-drill'):
+            return any(tile in self.resources for tile in tiles)
+        return True
+
+    def create_entity(self, name: str, direction: int, x: float, y: float, inventories: Optional[Dict] = None,
+                      recipe: Optional[str] = None) -> Dict:
+        if not self.can_place(name, direction, x, y):
+            raise ActionError(f"Cannot place {name} at ({x}, {y}) - the space is occupied or unsuitable")
+        (cx, cy), tiles = self.footprint(name, direction, x, y)
+        entity = {
+            'unit_number': self.next_unit_number,
+            'name': name,
+            'direction': direction,
+            'position': (cx, cy),
+            'tiles': tiles,
+            'inventories': {key: Counter((inventories or {}).get(key) or {})
+                            for key in INVENTORIES.get(kind_of(name), ())},
+            'recipe': recipe,
+            'updated': self.tick,
+        }
+        self.next_unit_number += 1
+        self.entities[entity['unit_number']] = entity
+        for tile in tiles:
+            self.tiles[tile] = entity['unit_number']
+        return entity
+
+    def remove_entity(self, entity: Dict):
+        for tile in entity['tiles']:
+            self.tiles.pop(tile, None)
+        del self.entities[entity['unit_number']]
+
+    def _update(self, entity: Dict):
+        """Smelt whatever a fuelled furnace can have smelted since it was last looked at"""
+        tick = self.tick
+        if kind_of(entity['name']) == 'furnace':
+            inventories = entity['inventories']
+            source = next(iter(+inventories['furnace_source']), None)
+            if source in SMELTING and +inventories['fuel']:
+                product, seconds = SMELTING[source]
+                smelted = min(int((tick - entity['updated']) / (seconds * TICKS_PER_SECOND)),
+                              inventories['furnace_source'][source])
+                if smelted:
+                    inventories['furnace_source'][source] -= smelted
+                    inventories['furnace_result'][product] += smelted
+                    self.produced[product] += smelted
+                    entity['updated'] += int(smelted * seconds * TICKS_PER_SECOND)
+                return
+        entity['updated'] = tick
+
+    def status(self, entity: Dict) -> str:
+        inventories = entity['inventories']
+        kind = kind_of(entity['name'])
+        if 'fuel' in inventories and not +inventories['fuel']:
+            return 'no_fuel'
+        if kind == 'furnace':
+            return 'working' if +inventories['furnace_source'] else 'no_ingredients'
+        if kind == 'assembler':
+            return 'working' if entity['recipe'] else 'no_recipe'
+        if kind in ('drill', 'inserter', 'lab'):
+            return 'no_power'
+        if kind in ('burner-drill', 'burner-inserter', 'belt', 'boiler'):
+            return 'working'
+        return 'normal'
+
+    def serialize(self, entity: Dict) -> Dict:
+        """An entity as `serialize_entity` in init/serialize.lua returns it"""
+        name, direction = entity['name'], entity['direction']
+        x, y = entity['position']
+        width, height = self.size(name, direction)
+        dx, dy = OFFSETS.get(direction, (0, -1))
+        state = {
+            'name': name,
+            'type': kind_of(name),
+            'entity_number': entity['unit_number'],
+            'position': _position(x, y),
+            'direction': direction,
+            'health': 150.0,
+            'energy': 0,
+            'status': self.status(entity),
+            'warnings': [],
+            'dimensions': {'width': width, 'height': height},
+            'tile_dimensions': {'tile_width': width, 'tile_height': height},
+        }
+        for key, inventory in entity['inventories'].items():
+            state[key] = dict(+inventory)
+        kind = state['type']
+        if kind in ('inserter', 'burner-inserter'):
+            state['pickup_position'] = _position(x - dx, y - dy)
+            state['drop_position'] = _position(x + dx, y + dy)
+        elif kind in ('drill', 'burner-drill'):
+            reach = height / 2 + 0.5
+            state['drop_position'] = _position(x + dx * reach, y + dy * reach)
+            mined = Counter(self.resources[tile][0] for tile in entity['tiles'] if tile in self.resources)
+            state['resources'] = [{'name': resource, 'count': count * self.resources_per_tile(resource),
+                                   'type': 'resource'} for resource, count in mined.items()]
+        elif kind == 'belt':
+            state['input_position'] = _position(x - dx, y - dy)
+            state['output_position'] = _position(x + dx, y + dy)
+            receiver = self.entity_at(x + dx, y + dy)
+            state['is_terminus'] = receiver is None or kind_of(receiver['name']) != 'belt'
+            feeder = self.entity_at(x - dx, y - dy)
+            state['is_source'] = feeder is None or kind_of(feeder['name']) != 'belt' or feeder['direction'] != direction
+        elif kind == 'underground-belt':
+            state['type'] = 'input'
+            state['input_position'] = _position(x - dx, y - dy)
+            state['output_position'] = _position(x + dx, y + dy)
+        elif kind == 'splitter':
+            side_x, side_y = -dy * 0.5, dx * 0.5
+            state['input_positions'] = [_position(x - dx + side_x * sign, y - dy + side_y * sign) for sign in (-1, 1)]
+            state['output_positions'] = [_position(x + dx + side_x * sign, y + dy + side_y * sign) for sign in (-1, 1)]
+        elif kind == 'pipe':
+            state.update(fluidbox_id=1, flow_rate=0, contents=0)
+        elif kind == 'pole':
+            state.update(electrical_id=1, flow_rate=0)
+        elif kind == 'assembler' and entity['recipe']:
+            state['recipe'] = entity['recipe']
+        return state
+
+    @staticmethod
+    def resources_per_tile(resource: str) -> int:
+        return next(amount for name, _, _, amount in RESOURCE_PATCHES if name == resource)
+
+    def entity_states(self, x: float, y: float, radius: float, names=()) -> List[Dict]:
+        states = []
+        for entity in self.entities.values():
+            ex, ey = entity['position']
+            if abs(ex - x) <= radius and abs(ey - y) <= radius and (not names or entity['name'] in names):
+                self._update(entity)
+                states.append(self.serialize(entity))
+        return states
+
+    def load_states(self, states: List[Dict]):
+        """Replace the entities with those in `states`, as captured by `save_entity_state`"""
+        for entity in list(self.entities.values()):
+            self.remove_entity(entity)
+        for state in states:
+            position = state['position']
+            inventories = {key: value for key, value in state.items() if isinstance(value, dict) and key != 'position'}
+            self.create_entity(state['name'], state.get('direction', 0), position['x'], position['y'],
+                               inventories, state.get('recipe'))
+
+    # Player
+
+    def take(self, name: str, count: int):
+        if self.inventory[name] < count:
+            raise ActionError(f"No {name} in inventory" if not self.inventory[name]
+                              else f"Not enough {name} in inventory ({self.inventory[name]} < {count})")
+        self.inventory[name] -= count
+
+    def _craft(self, name: str, count: int, available: Counter, crafted: Counter, depth: int = 0):
+        """Craft `count` of `name` from `available`, crafting missing intermediates as the game does"""
+        if name not in RECIPES:
+            raise ActionError(f"Could not craft {name} - no hand craftable recipe")
+        products, ingredients = RECIPES[name]
+        crafts = math.ceil(count / products)
+        for ingredient, amount in ingredients.items():
+            needed = amount * crafts
+            missing = needed - available[ingredient]
+            if missing > 0:
+                if ingredient not in RECIPES or depth >= 4:
+                    raise ActionError(f"Could not craft {name} - missing {missing} {ingredient}")
+                self._craft(ingredient, missing, available, crafted, depth + 1)
+            available[ingredient] -= needed
+        crafted[name] += crafts * products
+        available[name] += crafts * products
+
+    def nearest_resource(self, name: str) -> Optional[Tuple[int, int]]:
+        px, py = self.player['x'], self.player['y']
+        tiles = [tile for tile, (resource, _) in self.resources.items()
+                 if resource == name or MINED_ITEMS.get(resource) == name]
+        if not tiles:
+            return None
+        return min(tiles, key=lambda tile: (tile[0] + 0.5 - px) ** 2 + (tile[1] + 0.5 - py) ** 2)
+
+    # Actions
+
+    @action('initialise_inventory')
+    def initialise_inventory(self, player, items):
+        self.inventory = Counter(json.loads(items) if isinstance(items, str) else items)
+        return True
+
+    @action('clear_inventory')
+    def clear_inventory(self, player=1):
+        self.inventory.clear()
+        return 1
+
+    @action('reset_position')
+    def reset_position(self, player=1, x=0, y=0):
+        self.player = {'x': float(x), 'y': float(y)}
+        return 1
+
+    @action('clear_entities')
+    def clear_entities(self, player=1):
+        for entity in list(self.entities.values()):
+            self.remove_entity(entity)
+        return True
+
+    @action('regenerate_resources')
+    def regenerate_resources(self, player=1):
+        self.generate_resources()
+        return True
+
+    @action('reset_production_stats')
+    def reset_production_stats(self, *args):
+        self.produced.clear()
+        return True
+
+    @action('clear_walking_queue', 'clear_harvest_queue', 'extend_collision_boxes', 'clear_collision_boxes')
+    def no_op(self, *args):
+        return True
+
+    @action('get_walking_queue_length', 'get_harvest_queue_length')
+    def queue_length(self, *args):
+        return 0
+
+    @action('get_resource_name_at_position')
+    def get_resource_name_at_position(self, player, x, y):
+        resource = self.resources.get((math.floor(x), math.floor(y)))
+        return resource[0] if resource else ""
+
+    @action('score')
+    def score(self, *args):
+        return {'player': float(sum(self.produced.values()))}
+
+    @action('print')
+    def print(self, *messages):
+        return ", ".join(str(message) for message in messages)
+
+    @action('sleep')
+    def sleep(self, ticks):
+        self.elapse(ticks)
+        return {'tick': self.tick, 'speed': self.speed}
+
+    @action('inspect_inventory')
+    def inspect_inventory(self, player, is_character, x=0, y=0, name=""):
+        if is_character:
+            return dict(+self.inventory)
+        entity = self.find_entity(name, x, y)
+        contents = Counter()
+        for inventory in entity['inventories'].values():
+            contents.update(inventory)
+        return dict(+contents)
+
+    @action('craft_item')
+    def craft_item(self, player, name, quantity=1):
+        available, crafted = Counter(self.inventory), Counter()
+        self._craft(name, quantity, available, crafted)
+        self.inventory = available
+        self.produced.update(crafted)
+        self.elapse(sum(crafted.values()) * 0.5 * TICKS_PER_SECOND)
+        return quantity
+
+    @action('harvest_resource')
+    def harvest_resource(self, player, x, y, count=1, radius=10):
+        tiles = sorted((tile for tile in self.resources
+                        if (tile[0] + 0.5 - x) ** 2 + (tile[1] + 0.5 - y) ** 2 <= radius ** 2
+                        and self.resources[tile][0] != 'water'),
+                       key=lambda tile: (tile[0] + 0.5 - x) ** 2 + (tile[1] + 0.5 - y) ** 2)
+        if not tiles:
+            raise ActionError(f"Nothing within reach to harvest at ({x}, {y})")
+        harvested = 0
+        for tile in tiles:
+            resource = self.resources[tile]
+            taken = min(resource[1], count - harvested)
+            item = MINED_ITEMS.get(resource[0], resource[0])
+            self.inventory[item] += taken
+            self.produced[item] += taken
+            harvested += taken
+            resource[1] -= taken
+            if not resource[1]:
+                del self.resources[tile]
+            if harvested == count:
+                break
+        self.elapse(harvested * 0.5 * TICKS_PER_SECOND)
+        return harvested
+
+    @action('nearest')
+    def nearest(self, player, name):
+        tile = self.nearest_resource(name)
+        if tile is not None:
+            return _position(tile[0] + 0.5, tile[1] + 0.5)
+        px, py = self.player['x'], self.player['y']
+        entities = [entity for entity in self.entities.values() if entity['name'] == name]
+        if not entities:
+            return None
+        x, y = min((entity['position'] for entity in entities), key=lambda p: (p[0] - px) ** 2 + (p[1] - py) ** 2)
+        return _position(x, y)
+
+    @action('get_resource_patch')
+    def get_resource_patch(self, player, name, x, y, radius=10):
+        start = (math.floor(x), math.floor(y))
+        if self.resources.get(start, [None])[0] not in (name, next((k for k, v in MINED_ITEMS.items() if v == name), None)):
+            raise ActionError(f"No {name} at ({x}, {y})")
+        # Flood fill the patch from the given tile
+        patch, frontier = {start}, [start]
+        while frontier:
+            tx, ty = frontier.pop()
+            for neighbour in ((tx + 1, ty), (tx - 1, ty), (tx, ty + 1), (tx, ty - 1)):
+                if neighbour not in patch and self.resources.get(neighbour, [None])[0] == self.resources[start][0]:
+                    patch.add(neighbour)
+                    frontier.append(neighbour)
+        xs, ys = [tile[0] for tile in patch], [tile[1] for tile in patch]
+        return {
+            'bounding_box': {'left_top': _position(min(xs), min(ys)), 'right_bottom': _position(max(xs) + 1, max(ys) + 1)},
+            'size': sum(self.resources[tile][1] for tile in patch),
+        }
+
+    @action('request_path')
+    def request_path(self, player, start_x, start_y, goal_x, goal_y, *args):
+        handle = len(self.paths) + 1
+        self.paths[handle] = [_position(start_x, start_y), _position(goal_x, goal_y)]
+        return handle
+
+    @action('get_path')
+    def get_path(self, handle, status_only=False):
+        if handle not in self.paths:
+            return 'invalid_request' if status_only else {'status': 'invalid_request'}
+        return 'success' if status_only else {'status': 'success', 'waypoints': self.paths[handle]}
+
+    @action('move_to')
+    def move_to(self, player, handle, trailing=None, is_trailing=None):
+        if handle not in self.paths:
+            raise ActionError("No path to move along")
+        goal = self.paths[handle][-1]
+        self.elapse(math.hypot(goal['x'] - self.player['x'], goal['y'] - self.player['y']) / WALKING_SPEED)
+        self.player = dict(goal)
+        return dict(goal)
+
+    @action('can_place_entity')
+    def can_place_entity(self, player, name, direction, x, y):
+        return self.can_place(name, direction, x, y)
+
+    @action('place_entity')
+    def place_entity(self, player, name, direction, x, y, exact=True):
+        self.take(name, 1)
+        try:
+            entity = self.create_entity(name, direction, x, y)
+        except ActionError:
+            self.inventory[name] += 1
+            raise
+        return self.serialize(entity)
+
+    @action('place_entity_next_to')
+    def place_entity_next_to(self, player, name, x, y, direction, spacing=0):
+        reference = self.entity_at(x, y)
+        dx, dy = OFFSETS.get(direction, (0, 1))
+        width, height = self.size(name, 0)
+        extent = (self.size(reference['name'], reference['direction']) if reference else (1, 1))
+        distance = (extent[0] if dx else extent[1]) / 2 + (width if dx else height) / 2 + spacing
+        return self.place_entity(player, name, 0, x + dx * distance, y + dy * distance)
+
+    @action('get_entities')
+    def get_entities(self, player, radius=1000, names="[]", x=None, y=None, wait_for_tick=False):
+        names = set(json.loads(names) if isinstance(names, str) else names or ())
+        if x is None or y is None:
+            x, y = self.player['x'], self.player['y']
+        return self.entity_states(x, y, radius, names)
+
+    @action('get_entity')
+    def get_entity(self, player, name, x, y):
+        return self.serialize(self.find_entity(name, x, y))
+
+    @action('pickup_entity')
+    def pickup_entity(self, player, x, y, name):
+        entity = self.find_entity(name, x, y)
+        self.remove_entity(entity)
+        self.inventory[entity['name']] += 1
+        for inventory in entity['inventories'].values():
+            self.inventory.update(inventory)
+        return True
+
+    @action('rotate_entity')
+    def rotate_entity(self, player, x, y, direction, name):
+        entity = self.find_entity(name, x, y)
+        entity['direction'] = direction
+        return self.serialize(entity)
+
+    @action('set_entity_recipe')
+    def set_entity_recipe(self, player, recipe, x, y):
+        entity = self.find_entity(None, x, y)
+        if kind_of(entity['name']) != 'assembler':
+            raise ActionError(f"{entity['name']} doesn't take a recipe")
+        entity['recipe'] = recipe
+        return self.serialize(entity)
+
+    @action('insert_item')
+    def insert_item(self, player, name, quantity, x, y, target_name=None):
+        entity = self.find_entity(target_name, x, y)
+        inventories = entity['inventories']
+        if 'fuel' in inventories and name in FUELS:
+            key = 'fuel'
+        elif 'furnace_source' in inventories and name in SMELTING:
+            key = 'furnace_source'
+        elif 'fuel' not in inventories or len(inventories) > 1:
+            key = next(iter(inventories), None)
+        else:
+            key = None
+        if key is None:
+            raise ActionError(f"Could not insert {name} into {entity['name']}")
+        quantity = min(quantity, self.inventory[name])
+        self.take(name, quantity or 1)
+        inventories[key][name] += quantity
+        return self.serialize(entity)
+
+    @action('extract_item')
+    def extract_item(self, player, name, quantity, x, y, source_name=None):
+        entity = self.find_entity(source_name, x, y)
+        extracted = 0
+        for inventory in entity['inventories'].values():
+            taken = min(inventory[name], quantity - extracted)
+            inventory[name] -= taken
+            extracted += taken
+        if not extracted:
+            raise ActionError(f"No {name} in {entity['name']}")
+        self.inventory[name] += extracted
+        return extracted
+
+    @action('save_entity_state')
+    def save_entity_state(self, player, distance=500, player_entities=True, resource_entities=False, delta=False,
+                          rebase=False):
+        states = self.entity_states(self.player['x'], self.player['y'], distance)
+        if not delta:
+            return states
+        if rebase:
+            self.baseline = {}
+        elif self.baseline is None:
+            return False
+        current = {f"{state['name']}@{state['position']['x']},{state['position']['y']}": state for state in states}
+        encoded = {key: json.dumps(state, sort_keys=True) for key, state in current.items()}
+        changed = [current[key] for key, state in encoded.items() if self.baseline.get(key) != state]
+        removed = [key for key in self.baseline if key not in current]
+        self.baseline = encoded
+        return {'changed': changed, 'removed': removed}
+
+    def _capture_baseline(self):
+        self.baseline = {f"{state['name']}@{state['position']['x']},{state['position']['y']}":
+                         json.dumps(state, sort_keys=True)
+                         for state in self.entity_states(self.player['x'], self.player['y'], 500)}
+
+    @action('load_entity_state')
+    def load_entity_state(self, player, entities):
+        self.load_states(_decode_json(entities))
+        self._capture_baseline()
+        return True
+
+    @action('restore_snapshot')
+    def restore_snapshot(self, player, key, entities=None, capacity=8):
+        if entities is not None:
+            self.snapshots[key] = _decode_json(entities)
+            while len(self.snapshots) > capacity:
+                self.snapshots.popitem(last=False)
+        if key not in self.snapshots:
+            return False
+        self.snapshots.move_to_end(key)
+        self.load_states(self.snapshots[key])
+        self._capture_baseline()
+        return True
+
+    @action('save_research_state')
+    def save_research_state(self, player):
+        return {'technologies': {}, 'research_progress': 0, 'research_queue': [], 'current_research': None}
+
+    @action('load_research_state')
+    def load_research_state(self, player, state):
+        return True
+
+
+def _decode_json(value):
+    """JSON sent as a string, or as bytes (which `slpp.encode` escapes byte by byte)"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return json.loads(value.encode('latin-1').decode('utf-8'))
+    return value
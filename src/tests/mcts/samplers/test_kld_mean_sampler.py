@@ -3,10 +3,15 @@ from unittest.mock import Mock, patch
 from collections import Counter
 
 import numpy as np
-from psycopg2.extras import DictRow
-
 from search.model.program import Program
-from search.mcts.samplers.kld_achievement_sampler import KLDiversityAchievementSampler
+from search.mcts.samplers.kld_achievement_sampler import KLDiversityAchievementSampler, AchievementMatrix
+from search.program_index import ProgramSummary
+
+
+def _summary(row):
+    return ProgramSummary(id=row['id'], version=row['version'], parent_id=None, value=None, advantage=None, visits=0,
+                          depth=0, created_at=None, conversation_length=0, has_state=True,
+                          achievements=row['achievements_json'])
 
 
 class TestKLDiversityAchievementSampler(unittest.TestCase):
@@ -53,6 +58,38 @@ class TestKLDiversityAchievementSampler(unittest.TestCase):
         self.assertIsInstance(kld, float)
         self.assertFalse(np.isnan(kld))
 
+    def test_compute_diversity_scores_matches_pairwise(self):
+        frequencies = [
+            Counter({"static-stone": 5, "static-iron-ore": 9}),
+            Counter({"static-stone": 5, "dynamic-iron-plate": 3}),
+            Counter({"dynamic-iron-plate": 1}),
+        ]
+        matrix = AchievementMatrix(window_size=10)
+        matrix.add(list(enumerate(frequencies)))
+
+        scores = self.sampler._compute_diversity_scores(matrix.counts)
+
+        expected = [
+            sum(self.sampler._compute_kl_divergence(p, q) for j, q in enumerate(frequencies) if i != j)
+            for i, p in enumerate(frequencies)
+        ]
+        np.testing.assert_allclose(scores, expected, rtol=1e-6, atol=1e-6)
+
+        # Programs without achievements are uniform over the shared vocabulary
+        matrix.add([(len(frequencies), Counter())])
+        self.assertTrue(np.isfinite(self.sampler._compute_diversity_scores(matrix.counts)).all())
+
+    def test_achievement_matrix_is_incremental(self):
+        matrix = AchievementMatrix(window_size=2)
+        matrix.add([(1, Counter({"static-stone": 1}))])
+        matrix.add([(2, Counter({"static-coal": 2})), (3, Counter({"static-stone": 3}))])
+
+        self.assertEqual(matrix.ids, [2, 3])
+        self.assertEqual(matrix.last_id, 3)
+        self.assertEqual(matrix.counts.shape, (2, 2))
+        self.assertEqual(matrix.counts[1, matrix.vocabulary["static-stone"]], 3)
+        self.assertEqual(matrix.counts[0, matrix.vocabulary["static-coal"]], 2)
+
     @patch('numpy.random.choice')
     async def test_sample_parent(self, mock_choice):
         # Mock database results
@@ -77,15 +114,8 @@ class TestKLDiversityAchievementSampler(unittest.TestCase):
             }
         ]
 
-        # Mock the database connection and cursor
-        mock_conn = Mock()
-        mock_cursor = Mock()
-        mock_cursor.fetchall.return_value = [
-            DictRow(row) for row in mock_results
-        ]
-        mock_cursor.fetchone.return_value = mock_results[0]
-        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-        self.db_client.get_connection.return_value.__enter__.return_value = mock_conn
+        # Mock the program index, newest first
+        self.db_client.index.select.return_value = [_summary(row) for row in reversed(mock_results)]
 
         # Mock numpy's random choice to return a specific ID
         mock_choice.return_value = 1
@@ -96,23 +126,12 @@ class TestKLDiversityAchievementSampler(unittest.TestCase):
         self.assertIsInstance(program, Program)
         self.assertEqual(program.id, 1)
 
-        # Verify database queries were called correctly
-        mock_cursor.execute.assert_any_call("""
-                        SELECT id, achievements_json
-                        FROM programs
-                        WHERE version = %s 
-                        AND achievements_json IS NOT NULL
-                        ORDER BY created_at DESC
-                        LIMIT %s
-                    """, (1, 3))
+        # Verify the recent programs were read from the index
+        self.assertEqual(self.db_client.index.select.call_args[1], {'limit': 3})
 
     async def test_sample_parent_no_results(self):
         # Mock empty database results
-        mock_conn = Mock()
-        mock_cursor = Mock()
-        mock_cursor.fetchall.return_value = []
-        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-        self.db_client.get_connection.return_value.__enter__.return_value = mock_conn
+        self.db_client.index.select.return_value = []
 
         # Test sampling with no results
         program = await self.sampler.sample_parent(version=1)
@@ -127,12 +146,7 @@ class TestKLDiversityAchievementSampler(unittest.TestCase):
             'conversation_json': {'messages': []}
         }
 
-        mock_conn = Mock()
-        mock_cursor = Mock()
-        mock_cursor.fetchall.return_value = [DictRow(mock_result)]
-        mock_cursor.fetchone.return_value = mock_result
-        mock_conn.cursor.return_value.__enter__.return_value = mock_cursor
-        self.db_client.get_connection.return_value.__enter__.return_value = mock_conn
+        self.db_client.index.select.return_value = [_summary(mock_result)]
 
         # Test sampling with single result
         program = await self.sampler.sample_parent(version=1)
@@ -0,0 +1,122 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from search.program_index import ProgramIndex
+
+
+def _row(id, version=1, value=1.0, advantage=None, minutes=0, visits=0):
+    return {'id': id, 'version': version, 'parent_id': None, 'value': value, 'advantage': advantage,
+            'visits': visits, 'depth': 1, 'created_at': datetime(2024, 1, 1) + timedelta(minutes=minutes),
+            'conversation_length': 3, 'has_state': True, 'achievements_json': {'static': {'coal': id}}}
+
+
+class TestProgramIndex(unittest.TestCase):
+    def setUp(self):
+        self.cursor = Mock()
+        conn = Mock()
+        conn.cursor.return_value.__enter__ = Mock(return_value=self.cursor)
+        conn.cursor.return_value.__exit__ = Mock(return_value=False)
+        self.db_client = Mock()
+        self.db_client.get_connection.return_value.__enter__ = Mock(return_value=conn)
+        self.db_client.get_connection.return_value.__exit__ = Mock(return_value=False)
+        self.index = ProgramIndex(self.db_client, refresh_interval=60)
+
+    def _load(self, rows, programs, visits=()):
+        """Select version 1 for the first time, loading the window `rows` (newest first) and its aggregates"""
+        self.cursor.fetchone.return_value = {'programs': programs, 'max_depth': 1}
+        self.cursor.fetchall.side_effect = [rows, list(visits)]
+        programs = self.index.select(1)
+        self.cursor.fetchall.side_effect = None
+        self.cursor.fetchall.return_value = []
+        return programs
+
+    def test_select_is_newest_first_and_filtered(self):
+        # The window is fetched newest first
+        programs = self._load([_row(2, minutes=2), _row(1, minutes=0)], 2)
+
+        self.assertEqual([program.id for program in programs], [2, 1])
+        self.assertEqual(self.index.select(1, lambda program: program.id == 1)[0].id, 1)
+        self.assertEqual([program.id for program in self.index.select(1, limit=1)], [2])
+        self.assertEqual(programs[0].achievements, {'static': {'coal': 2}})
+
+    def test_select_only_queries_when_a_refresh_is_due(self):
+        self._load([_row(2), _row(1)], 2)
+        queries = self.cursor.execute.call_count
+
+        for _ in range(10):
+            self.index.select(1)
+            self.index.stats(1)
+        self.assertEqual(self.cursor.execute.call_count, queries)
+
+        self.index.poll_interval = 0
+        self.index.select(1)
+        self.assertEqual(self.cursor.execute.call_count, queries + 1)
+
+    def test_refresh_only_fetches_new_programs(self):
+        self._load([_row(2), _row(1)], 2)
+        self.assertEqual(self.cursor.execute.call_args_list[0][0][1], (1, self.index.window))
+
+        self.cursor.fetchall.return_value = [_row(3, minutes=5)]
+        self.index.refresh(1)
+        programs = self.index.select(1)
+
+        self.assertEqual(self.cursor.execute.call_args[0][1], (1, 2))
+        self.assertEqual([program.id for program in programs], [3, 2, 1])
+
+    def test_full_refresh_only_reloads_changing_columns(self):
+        self._load([_row(2), _row(1)], 2)
+
+        self.cursor.fetchall.side_effect = [[{'id': 1, 'value': 2.0, 'advantage': 0.5, 'visits': 3}],
+                                            [{'visits': 3, 'programs': 1}], []]
+        self.index.refresh(1, full=True)
+
+        reload, visits, poll = self.cursor.execute.call_args_list[-3:]
+        self.assertNotIn('conversation', reload[0][0])
+        self.assertEqual(reload[0][1], (1, 1, 2))
+        self.assertEqual(poll[0][1], (1, 2))
+        self.assertEqual((self.index.programs[1].value, self.index.programs[1].visits), (2.0, 3))
+        self.assertEqual(visits[0][1], (1,))
+        self.assertEqual(self.index.stats(1, refresh=False).visit_stats()['max_visits'], 3)
+
+    def test_counts_are_kept_as_programs_arrive(self):
+        self._load([_row(2), _row(1)], 10)
+        self.assertEqual(self.cursor.execute.call_args_list[1][0][1], (1, 2))
+
+        # Ours, then picked up again by a refresh along with one of another process
+        program = Mock(id=3, version=1, parent_id=None, value=1.0, advantage=None, visits=0, depth=2, state=None,
+                       achievements={}, created_at=datetime(2024, 1, 1))
+        program.conversation.messages = []
+        self.index.add(program)
+        self.assertEqual(self.index.count(1), 11)
+
+        self.cursor.fetchall.return_value = [_row(3), _row(4)]
+        self.index.refresh(1)
+        self.assertEqual(self.index.count(1), 12)
+        self.assertFalse(self.index._added[1])
+
+    def test_only_the_window_of_a_version_is_kept(self):
+        self.index.window = 2
+        self._load([_row(3), _row(2)], 3)
+
+        self.cursor.fetchall.return_value = [_row(4, minutes=5)]
+        self.index.refresh(1)
+        programs = self.index.select(1)
+
+        self.assertEqual([program.id for program in programs], [4, 3])
+        self.assertEqual(sorted(self.index.programs), [3, 4])
+        self.assertEqual(self.index.count(1), 4)
+
+    def test_visit_updates_visits_and_advantages(self):
+        self._load([_row(2), _row(1)], 2)
+
+        self.index.visit(1, 2, {2: 0.5})
+        self.index.update(2, {'value': 3.0})
+
+        self.assertEqual(self.index.programs[1].visits, 2)
+        self.assertEqual(self.index.programs[2].advantage, 0.5)
+        self.assertEqual(self.index.programs[2].value, 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
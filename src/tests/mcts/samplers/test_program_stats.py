@@ -0,0 +1,72 @@
+import random
+import statistics
+import unittest
+from datetime import datetime
+from unittest.mock import Mock
+
+import numpy as np
+
+from search.program_index import ProgramIndex
+from search.program_stats import CountSketch
+
+
+def _row(id, version=1, value=1.0, advantage=None, visits=0):
+    return {'id': id, 'version': version, 'parent_id': None, 'value': value, 'advantage': advantage,
+            'visits': visits, 'depth': 1, 'created_at': datetime(2024, 1, 1),
+            'conversation_length': 3, 'has_state': True, 'achievements_json': None}
+
+
+class TestProgramStats(unittest.TestCase):
+    def test_count_sketch_quantiles_match_percentile_cont(self):
+        visits = [random.randint(1, 30) for _ in range(501)]
+        sketch = CountSketch()
+        for count in visits:
+            sketch.add(count)
+
+        for q in (0, 0.1, 0.5, 0.75, 1):
+            self.assertAlmostEqual(sketch.quantile(q), np.percentile(visits, q * 100))
+        self.assertEqual((sketch.min, sketch.max), (min(visits), max(visits)))
+        self.assertAlmostEqual(sketch.mean, statistics.mean(visits))
+
+    def test_index_keeps_stats_of_the_whole_version(self):
+        cursor = Mock()
+        conn = Mock()
+        conn.cursor.return_value.__enter__ = Mock(return_value=cursor)
+        conn.cursor.return_value.__exit__ = Mock(return_value=False)
+        db_client = Mock()
+        db_client.get_connection.return_value.__enter__ = Mock(return_value=conn)
+        db_client.get_connection.return_value.__exit__ = Mock(return_value=False)
+        index = ProgramIndex(db_client, refresh_interval=60)
+
+        # Aggregated over the version, beyond the window: program 99 has 5 visits
+        cursor.fetchone.return_value = {'programs': 10, 'max_depth': 4}
+        cursor.fetchall.side_effect = [[_row(3), _row(2), _row(1, visits=2)],
+                                       [{'visits': 2, 'programs': 1}, {'visits': 5, 'programs': 1}]]
+        index.refresh(1)
+        cursor.fetchall.side_effect = None
+        cursor.fetchall.return_value = [_row(5)]  # Of another process
+
+        index.visit(1, 2, {})
+        index.visit(2, 1, {})
+        index.visit(99, 3, {}, version=1, visits=8)
+        program = Mock(id=4, version=1, parent_id=None, value=1.0, advantage=None, visits=0, depth=12, state=None,
+                       achievements={}, created_at=datetime(2024, 1, 1))
+        program.conversation.messages = []
+        index.add(program)
+        index.refresh(1, full=False)
+
+        stats = index.stats(1, refresh=False)
+        self.assertEqual((stats.programs, stats.max_depth), (12, 6))
+        self.assertEqual(stats.visit_stats(), {'avg_visits': 13 / 3, 'min_visits': 1, 'max_visits': 8,
+                                               'median_visits': 4})
+
+        # A full refresh aggregates the visits again, including those of the new programs
+        cursor.fetchall.side_effect = [[], [{'visits': 4, 'programs': 2}], [_row(6, visits=4)]]
+        index.refresh(1, full=True)
+        stats = index.stats(1, refresh=False)
+        self.assertEqual(stats.programs, 13)
+        self.assertEqual(stats.visit_stats(), {'avg_visits': 4, 'min_visits': 4, 'max_visits': 4,
+                                               'median_visits': 4})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import json
+from unittest.mock import Mock
+
+import pytest
+
+from search.model.game_state import GameState, apply_entity_delta, decode_entities, encode_entities
+
+
+def _chest(x, coal, entity_number=1):
+    return {'name': '"iron-chest"',
+            'position': {'x': str(x), 'y': '0.5'},
+            'entity_number': entity_number,
+            'inventories': {'chest': {'coal': str(coal)}}}
+
+
+def _delta_state(parent: GameState, changed, removed):
+    return GameState(entities=None,
+                     inventory={},
+                     research=None,
+                     parent_hash=parent.entities_hash(),
+                     entities_delta=encode_entities({'changed': changed, 'removed': removed}))
+
+
+def test_apply_entity_delta():
+    entities = [_chest(1, 5, 10), _chest(2, 5, 11), _chest(3, 5, 12)]
+    delta = {'changed': [_chest(2, 7, 40), _chest(4, 1, 41)], 'removed': ['iron-chest@3,0.5']}
+
+    result = apply_entity_delta(entities, delta)
+
+    coal = {state['position']['x']: state['inventories']['chest']['coal'] for state in result}
+    assert coal == {'1': '5', '2': '7', '4': '1'}
+    assert sorted(state['entity_number'] for state in result) == [1, 2, 3]
+
+
+def test_apply_entity_delta_with_empty_lua_tables():
+    # slpp returns empty Lua tables as dicts
+    assert apply_entity_delta([_chest(1, 5)], {'changed': {}, 'removed': {}}) == [_chest(1, 5)]
+
+
+def test_rebuild_from_chain_of_deltas():
+    root = GameState(entities=encode_entities([_chest(1, 5)]), inventory={}, research=None)
+    child = _delta_state(root, [_chest(2, 5)], [])
+    grandchild = _delta_state(GameState.from_chain([root, child]), [_chest(1, 9)], ['iron-chest@2,0.5'])
+    child.entities = None
+
+    state = GameState.from_chain([root, child, grandchild])
+
+    assert decode_entities(state.entities) == [_chest(1, 9)]
+
+
+def test_resolve_against_wrong_parent():
+    root = GameState(entities=encode_entities([_chest(1, 5)]), inventory={}, research=None)
+    other = GameState(entities=encode_entities([]), inventory={}, research=None)
+    child = _delta_state(root, [_chest(2, 5)], [])
+
+    with pytest.raises(ValueError):
+        child.resolve(other)
+
+
+def test_captures_only_rebuild_their_entities_when_needed():
+    root = GameState(entities=encode_entities([_chest(1, 5)]), inventory={}, research=None)
+    instance = Mock(entity_baseline=root)
+    instance.namespace.inspect_inventory.return_value = {}
+    del instance.namespace.persistent_vars
+
+    instance.namespace._save_entity_state.return_value = {'changed': [_chest(2, 5)], 'removed': []}
+    first = GameState.from_instance(instance)
+    instance.namespace._save_entity_state.return_value = {'changed': [], 'removed': ['iron-chest@1,0.5']}
+    second = GameState.from_instance(instance)
+
+    assert first.entities is None and second.entities is None
+    assert second.parent_hash == first.entities_hash()
+    assert decode_entities(second.resolve().entities) == [_chest(2, 5)]
+    assert decode_entities(first.entities) == [_chest(1, 5), _chest(2, 5, 2)]
+
+
+def test_hashing_a_state_without_entities():
+    with pytest.raises(ValueError):
+        GameState(entities=None, inventory={}, research=None).entities_hash()
+
+
+def test_compact_raw_omits_entities():
+    root = GameState(entities=encode_entities([_chest(1, 5)]), inventory={}, research=None)
+    child = _delta_state(root, [_chest(2, 5)], []).resolve(root)
+
+    data = json.loads(child.to_raw(compact=True))
+    assert 'entities' not in data
+
+    parsed = GameState.parse(data)
+    assert parsed.entities is None
+    assert parsed.resolve(root).entities == child.entities
+    assert 'entities' in json.loads(child.to_raw())
+
+
+def test_chunked_programs_store_deltas_only_against_saved_parents():
+    from search.mcts.chunked_mcts import ChunkedMCTS
+    from search.model.conversation import Conversation, Message
+    from search.model.program import Program
+    from search.sqlite_db_client import SQLiteDBClient
+
+    initial = GameState(entities=encode_entities([_chest(1, 5)]), inventory={}, research=None)
+    first = _delta_state(initial, [_chest(2, 5)], []).resolve(initial)
+    # Captured partway through the second chunk, and never saved as a program
+    partway = _delta_state(first, [_chest(3, 5)], []).resolve(first)
+    second = _delta_state(partway, [_chest(1, 9)], []).resolve(partway)
+    third = _delta_state(second, [], ['iron-chest@2,0.5']).resolve(second)
+
+    db = SQLiteDBClient(delta_states=True)
+    mcts = ChunkedMCTS(None, db, None, None, "", initial_state=initial)
+    conversation = Conversation(messages=[Message(role="system", content="system")])
+    chunks = [Program(code=f"chunk_{i}", conversation=conversation, state=state, value=0.0, advantage=0.0,
+                      response="ok") for i, state in enumerate((first, second, third))]
+
+    async def evaluate_chunks(chunks, start_state, instance_id):
+        return chunks, [[] for _ in chunks], [{} for _ in chunks]
+    mcts._evaluate_chunks = evaluate_chunks
+
+    async def run():
+        program = Program(code="", conversation=conversation, token_usage=3, completion_token_usage=3,
+                          prompt_token_usage=3)
+        await mcts._process_program_chunks(program, chunks, initial, instance_id=0, parent_id=None,
+                                           skip_failures=False)
+
+    try:
+        asyncio.run(run())
+        with db.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT id, parent_id, state_json FROM programs ORDER BY id")
+                rows = cur.fetchall()
+        # Only the third chunk was captured against the state of the program before it
+        assert ['entities' in row['state_json'] for row in rows] == [True, True, False]
+
+        resolved = [db._resolve_state(Program(id=row['id'], parent_id=row['parent_id'], code="",
+                                              conversation=conversation, state=GameState.parse(row['state_json'])))
+                    for row in rows]
+        assert [program.state.entities for program in resolved] == [first.entities, second.entities, third.entities]
+    finally:
+        asyncio.run(db.cleanup())
@@ -0,0 +1,112 @@
+import asyncio
+import unittest
+from unittest.mock import Mock, AsyncMock
+
+from search.program_buffer import ProgramWriteBuffer
+
+
+class FakeDBClient:
+    def __init__(self):
+        self.batches = []
+
+    async def create_programs(self, programs):
+        self.batches.append(list(programs))
+        for i, program in enumerate(programs):
+            program.id = i + 1
+        return programs
+
+
+class TestProgramWriteBuffer(unittest.TestCase):
+    def test_flushes_when_full(self):
+        db_client = FakeDBClient()
+
+        async def run():
+            buffer = ProgramWriteBuffer(db_client, max_size=3, max_delay=60)
+            futures = [buffer.add(Mock()) for _ in range(3)]
+            return await asyncio.wait_for(asyncio.gather(*futures), timeout=1)
+
+        programs = asyncio.run(run())
+        self.assertEqual(len(db_client.batches), 1)
+        self.assertEqual([program.id for program in programs], [1, 2, 3])
+
+    def test_flushes_after_delay(self):
+        db_client = FakeDBClient()
+
+        async def run():
+            buffer = ProgramWriteBuffer(db_client, max_size=100, max_delay=0.01)
+            first, second = buffer.add(Mock()), buffer.add(Mock())
+            await asyncio.wait_for(asyncio.gather(first, second), timeout=1)
+            third = buffer.add(Mock())
+            await buffer.close()
+            return third.done()
+
+        self.assertTrue(asyncio.run(run()))
+        self.assertEqual([len(batch) for batch in db_client.batches], [2, 1])
+
+    def test_failed_batch_fails_every_program(self):
+        db_client = Mock()
+
+        async def create_programs(programs):
+            raise ValueError("Database unavailable")
+        db_client.create_programs = create_programs
+
+        async def run():
+            buffer = ProgramWriteBuffer(db_client, max_size=2)
+            futures = [buffer.add(Mock()), buffer.add(Mock())]
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            with self.assertRaises(ValueError):
+                await buffer.close()
+            return results
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    def test_close_waits_for_flushes_under_way(self):
+        db_client = FakeDBClient()
+        create_programs = db_client.create_programs
+
+        async def slow_create_programs(programs):
+            await asyncio.sleep(0.05)
+            return await create_programs(programs)
+        db_client.create_programs = slow_create_programs
+
+        async def run():
+            buffer = ProgramWriteBuffer(db_client, max_size=2, max_delay=60)
+            futures = [buffer.add(Mock()), buffer.add(Mock())]
+            await asyncio.sleep(0)  # Let the flush start
+            await buffer.close()
+            return [future.done() for future in futures]
+
+        self.assertEqual(asyncio.run(run()), [True, True])
+        self.assertEqual([len(batch) for batch in db_client.batches], [2])
+
+    def test_mcts_iterations_save_through_the_buffer(self):
+        from search.mcts.mcts import MCTS
+
+        db_client = FakeDBClient()
+        visits = []
+
+        async def visit(parent_id, children):
+            # Only once the children are saved
+            visits.append((parent_id, children, len(db_client.batches)))
+
+        async def run():
+            buffer = ProgramWriteBuffer(db_client, max_size=100, max_delay=60)
+            sampler = Mock(sample_parent=AsyncMock(return_value=Mock(id=7)), visit=visit)
+            evaluator = Mock(evaluate_batch=AsyncMock(side_effect=lambda programs, state: programs))
+            mcts = MCTS(Mock(model="model"), db_client, evaluator, sampler, "", None, write_buffer=buffer)
+            mcts._generate_programs_batch = AsyncMock(side_effect=lambda *args: [Mock(value=1.0), Mock(value=1.0)])
+
+            for iteration in range(2):
+                await mcts.run_iteration(2, False, iteration, 2)
+            unsaved = len(db_client.batches)
+            await mcts.flush_writes()
+            return unsaved
+
+        self.assertEqual(asyncio.run(run()), 0)
+        self.assertEqual([len(batch) for batch in db_client.batches], [4])
+        self.assertEqual(visits, [(7, 2, 1), (7, 2, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
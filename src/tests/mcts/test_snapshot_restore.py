@@ -0,0 +1,34 @@
+from factorio_entities import Position
+from factorio_types import Prototype
+from search.model.game_state import GameState
+
+
+def test_hot_and_cold_restore_match(instance):
+    instance.namespace.place_entity(Prototype.IronChest, position=Position(x=2, y=2))
+    game_state = GameState.from_instance(instance)
+
+    # Cold: the state is sent to the game and kept resident
+    instance.reset(game_state)
+    cold_entities = instance.namespace.get_entities()
+    assert game_state.entities_hash() in instance._resident_snapshots
+
+    # Hot: restored from the resident copy
+    instance.reset(game_state)
+    hot_entities = instance.namespace.get_entities()
+
+    assert [e.name for e in cold_entities] == [e.name for e in hot_entities]
+    assert [e.position for e in cold_entities] == [e.position for e in hot_entities]
+
+
+def test_evicted_snapshot_is_sent_again(instance):
+    instance.snapshot_capacity = 1
+    first = GameState.from_instance(instance)
+    instance.namespace.place_entity(Prototype.IronChest, position=Position(x=2, y=2))
+    second = GameState.from_instance(instance)
+
+    instance.reset(first)
+    instance.reset(second)
+    assert list(instance._resident_snapshots) == [second.entities_hash()]
+
+    instance.reset(first)
+    assert len(instance.namespace.get_entities()) == 0
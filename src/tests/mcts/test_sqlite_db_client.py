@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+
+from search.mcts.samplers.beam_sampler import BeamSampler
+from search.mcts.samplers.db_sampler import DBSampler
+from search.model.conversation import Conversation, Message
+from search.model.program import Program
+from search.sqlite_db_client import SQLiteDBClient
+
+
+class FirstProgramSampler(DBSampler):
+    async def sample_parent(self, version=1, **kwargs):
+        programs = self.db_client.index.select(version)
+        return await self.db_client.get_program(programs[-1].id) if programs else None
+
+
+def _program(code, value, parent_id=None, version=1):
+    conversation = Conversation(messages=[Message(role="system", content="system"),
+                                          Message(role="assistant", content=code)])
+    return Program(code=code, conversation=conversation, value=value, parent_id=parent_id, version=version,
+                   achievements={"static": {"stone": 1}}, meta={"model": "test"})
+
+
+class TestSQLiteDBClient(unittest.TestCase):
+    def setUp(self):
+        self.db_client = SQLiteDBClient()
+
+    def tearDown(self):
+        asyncio.run(self.db_client.cleanup())
+
+    def test_programs_round_trip(self):
+        async def run():
+            created = await self.db_client.create_programs([_program("a = 1", 1.0), _program("b = 2", 2.0)])
+            loaded = await self.db_client.get_program(created[1].id)
+            updated = await self.db_client.update_program(created[0].id, {"value": 5.0})
+            rewards = await self.db_client.get_all_program_rewards(version=1)
+            return created, loaded, updated, rewards
+
+        created, loaded, updated, rewards = asyncio.run(run())
+        self.assertEqual([program.id for program in created], [1, 2])
+        self.assertEqual(loaded.code, "b = 2")
+        self.assertEqual(loaded.conversation.messages[1].content, "b = 2")
+        self.assertEqual(loaded.achievements, {"static": {"stone": 1}})
+        self.assertEqual(loaded.created_at, created[1].created_at)
+        self.assertEqual(updated.value, 5.0)
+        self.assertEqual(sorted(rewards), [2.0, 5.0])
+
+    def test_visit_updates_visits_and_advantages(self):
+        sampler = FirstProgramSampler(self.db_client)
+
+        async def run():
+            parent = await self.db_client.create_program(_program("parent", 0.0))
+            await self.db_client.create_programs([_program("child", 1.0, parent.id),
+                                                  _program("child", 3.0, parent.id)])
+            await sampler.visit(parent.id, 2)
+            sampled = await sampler.sample_parent()
+            return sampled, await self.db_client.get_parent_visit_stats(version=1)
+
+        sampled, visit_stats = asyncio.run(run())
+        self.assertEqual(sampled.visits, 2)
+        self.assertEqual(visit_stats['max_visits'], 2)
+        self.assertEqual(sorted(summary.advantage for summary in self.db_client.index.select(1)
+                                if summary.parent_id), [-1.0, 1.0])
+
+    def test_blocking_calls_do_not_block_the_event_loop(self):
+        get_connection = self.db_client.get_connection
+        connection_threads = []
+
+        @contextmanager
+        def slow_connection():
+            # As a busy database would, only hand the connection over after a while
+            connection_threads.append(threading.get_ident())
+            time.sleep(0.1)
+            with get_connection() as conn:
+                yield conn
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            created = await self.db_client.create_program(_program("a = 1", 1.0))
+            self.db_client.get_connection = slow_connection
+            task = asyncio.create_task(ticker())
+            program = await self.db_client.get_program(created.id)
+            stats = await BeamSampler(self.db_client).get_beam_stats(version=1)
+            task.cancel()
+            return ticks, program, stats, threading.get_ident()
+
+        ticks, program, stats, loop_thread = asyncio.run(run())
+        self.assertEqual(program.code, "a = 1")
+        self.assertEqual(stats["beam_size"], 1)
+        self.assertEqual(len(connection_threads), 2)
+        self.assertNotIn(loop_thread, connection_threads)
+        self.assertGreater(ticks, 10)
+
+if __name__ == '__main__':
+    unittest.main()
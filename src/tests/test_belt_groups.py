@@ -0,0 +1,31 @@
+from factorio_entities import Direction
+from tests.belts import make_belt, make_line
+from utilities.groupable_entities import agglomerate_groupable_entities
+
+
+def test_long_line_is_one_group():
+    belts = make_line(5000)
+    groups = agglomerate_groupable_entities(belts)
+    assert len(groups) == 1
+    assert groups[0].belts == belts
+    assert groups[0].inputs == [belts[0]] and groups[0].outputs == [belts[-1]]
+
+
+def test_joining_lines_are_merged():
+    main = make_line(5)
+    branch = [make_belt(2.5, 2.5, Direction.UP, is_source=True), make_belt(2.5, 1.5, Direction.UP)]
+    separate = make_line(3, y=10.5)
+    groups = agglomerate_groupable_entities(main + branch + separate)
+
+    assert [len(group.belts) for group in groups] == [7, 3]
+    assert groups[0].position == main[0].position
+    assert {(belt.position.x, belt.position.y) for belt in groups[0].inputs} == {(0.5, 0.5), (2.5, 2.5)}
+
+
+def test_unfed_loop_is_kept_as_its_own_group():
+    loop = [make_belt(0.5, 0.5, Direction.RIGHT), make_belt(1.5, 0.5, Direction.DOWN),
+            make_belt(1.5, 1.5, Direction.LEFT), make_belt(0.5, 1.5, Direction.UP)]
+    groups = agglomerate_groupable_entities(make_line(3, y=10.5) + loop)
+
+    assert sorted(len(group.belts) for group in groups) == [3, 4]
+
@@ -0,0 +1,41 @@
+import os
+
+from utilities import controller_loader
+from utilities.controller_loader import get_controller_artifact, hash_sources
+
+EXECUTION_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def test_artifact_is_built_once_per_source_hash():
+    first = get_controller_artifact(EXECUTION_PATH)
+    second = get_controller_artifact(EXECUTION_PATH)
+
+    assert first is second
+    assert first.source_hash == hash_sources(EXECUTION_PATH)
+
+
+def test_artifact_contains_system_prompt_and_controllers():
+    artifact = get_controller_artifact(EXECUTION_PATH)
+
+    assert "class Prototype(enum.Enum" in artifact.system_prompt
+    assert "place_entity(" in artifact.schema
+    assert artifact.controller_classes['place_entity'].__name__ == "PlaceObject"
+    assert '_get_path' in artifact.controller_classes
+
+
+def test_sources_are_only_hashed_again_when_they_change(monkeypatch):
+    get_controller_artifact(EXECUTION_PATH)
+    hashed = []
+    monkeypatch.setattr(controller_loader, '_artifacts', {})
+    monkeypatch.setattr(controller_loader, 'hash_sources', lambda path: hashed.append(path) or "changed")
+    monkeypatch.setattr(controller_loader, 'build_controller_artifact',
+                        lambda path, source_hash: controller_loader.ControllerArtifact(source_hash, "", "", "", {}))
+
+    get_controller_artifact(EXECUTION_PATH)
+    assert hashed == []
+
+    # A source was modified since it was last hashed
+    stats = controller_loader._source_hashes[EXECUTION_PATH][0]
+    monkeypatch.setitem(controller_loader._source_hashes, EXECUTION_PATH, (stats[1:], "stale"))
+    assert get_controller_artifact(EXECUTION_PATH).source_hash == "changed"
+    assert hashed == [EXECUTION_PATH]
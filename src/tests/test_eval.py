@@ -109,6 +109,76 @@ def test_sleep():
     score, goal, result = instance.eval_with_error("time.sleep(10)", timeout=60)
     assert "10" in result
 
+def test_timeout_off_main_thread():
+    from concurrent.futures import ThreadPoolExecutor
+
+    instance = FactorioInstance(address='localhost',
+                                bounding_box=200,
+                                tcp_port=27000,
+                                fast=True,
+                                # cache_scripts=False,
+                                inventory={})
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        score, goal, result = executor.submit(instance.eval_with_error, "while True:\n\tpass", timeout=2).result()
+    assert "TimeoutError" in result
+
+def test_timeout_in_natively_executed_code(fake_server):
+    instance = FactorioInstance(address='localhost', tcp_port=fake_server.port, fast=True, inventory={})
+
+    # Function bodies and comprehensions run natively rather than statement by statement
+    for program in ("def f():\n\twhile True:\n\t\tpass\n\nf()",
+                    "x = [i for i in iter(int, 1)]"):
+        score, goal, result = instance.eval_with_error(program, timeout=0.5)
+        assert "TimeoutError" in result
+
+    # The timeout isn't an Exception, so `except Exception` doesn't catch it
+    program = "def f():\n\twhile True:\n\t\ttry:\n\t\t\twhile True:\n\t\t\t\tpass\n\t\texcept Exception:\n\t\t\tpass\n\nf()"
+    score, goal, result = instance.eval_with_error(program, timeout=0.5)
+    assert "TimeoutError" in result
+
+    # A program that does catch it and carries on is stopped by its next loop
+    program = "def f():\n\ttry:\n\t\twhile True:\n\t\t\tpass\n\texcept:\n\t\tpass\n\twhile True:\n\t\tpass\n\nf()"
+    score, goal, result = instance.eval_with_error(program, timeout=0.5)
+    assert "TimeoutError" in result
+
+    # The tools still work afterwards
+    score, goal, result = instance.eval_with_error("print(inspect_inventory())", timeout=5)
+    assert "Error" not in result
+
+
+def test_timeout_lets_running_tool_calls_finish(fake_server):
+    instance = FactorioInstance(address='localhost', tcp_port=fake_server.port, fast=True, inventory={'coal': 5})
+    fake_server.latency = 0.5
+
+    # The first call runs past the deadline, and the second isn't started
+    program = "def f():\n\tprint(inspect_inventory())\n\tprint(inspect_inventory())\n\nf()"
+    score, goal, result = instance.eval_with_error(program, timeout=0.2)
+    assert "coal" in result and "TimeoutError" in result
+    assert result.count("coal") == 1
+
+    # So the connection is left in a usable state
+    fake_server.latency = 0
+    score, goal, result = instance.eval_with_error("print(inspect_inventory())", timeout=5)
+    assert "coal" in result and "Error" not in result
+
+def test_repeated_eval_reuses_compiled_nodes():
+    instance = FactorioInstance(address='localhost',
+                                bounding_box=200,
+                                tcp_port=27000,
+                                fast=True,
+                                # cache_scripts=False,
+                                inventory={})
+
+    program = "def double(x: int) -> int:\n\treturn x * 2\n\nfor i in range(3):\n\tif i > 0:\n\t\tprint(double(i))"
+    _, _, first = instance.eval_with_error(program, timeout=60)
+    _, _, second = instance.eval_with_error(program, timeout=60)
+    assert first == second
+    assert "2" in second and "4" in second
+
+    loop = instance.namespace._parse(program).body[1]
+    assert loop.iter._compiled['eval'] is not None
+
 def test_prototype_attribute_error():
     instance = FactorioInstance(address='localhost',
                                 bounding_box=200,
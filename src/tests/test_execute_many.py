@@ -0,0 +1,52 @@
+import pytest
+
+from factorio_entities import Position
+from factorio_instance import Direction
+from factorio_types import Prototype
+
+
+@pytest.fixture()
+def game(instance):
+    instance.reset()
+    yield instance
+
+
+def test_execute_many_places_entities_in_one_round_trip(game):
+    chests = game.namespace.inspect_inventory()[Prototype.IronChest]
+    calls = [('place_entity', Prototype.IronChest, Direction.UP, Position(x=x, y=0)) for x in range(2)]
+    calls.append(('inspect_inventory',))
+
+    results = game.execute_many(calls)
+
+    assert len(results) == 3
+    assert all(success for success, _ in results)
+    (_, first), (_, second), (_, inventory) = results
+    assert first.name == 'iron-chest' and second.position.x > first.position.x
+    assert inventory[Prototype.IronChest] == chests - 2
+    assert len(game.namespace.get_entities({Prototype.IronChest})) == 2
+
+
+def test_execute_many_reports_errors_per_call(game):
+    calls = [('place_entity', Prototype.IronChest, Direction.UP, Position(x=0, y=0)),
+             ('place_entity', Prototype.IronChest, Direction.UP, Position(x=0, y=0)),  # Occupied
+             ('place_entity', Prototype.IronChest, Direction.UP, Position(x=2, y=0))]
+
+    (first, _), (second, error), (third, _) = game.execute_many(calls)
+
+    assert first and third
+    assert not second and "Could not place iron-chest" in str(error)
+
+
+def test_execute_many_checks_arguments_before_running(game):
+    with pytest.raises(ValueError):
+        game.execute_many([('place_entity', Prototype.IronChest, Direction.UP, Position(x=0, y=0)),
+                           ('place_entity', Prototype.IronChest, "up", Position(x=2, y=0))])
+    assert game.namespace.get_entities() == []
+
+
+def test_programs_can_batch_tool_calls(game):
+    score, goal, result = game.eval_with_error(
+        "results = execute_many([('place_entity', Prototype.IronChest, Direction.UP, Position(x=x, y=0))"
+        " for x in range(2)])\n"
+        "print([chest.position.x for _, chest in results])")
+    assert "[0.5, 1.5]" in result
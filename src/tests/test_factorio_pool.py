@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from collections import Counter
+from contextlib import ExitStack
+
+import pytest
+
+from factorio_instance import FactorioInstance
+from factorio_pool import FactorioPool, IDLE, QUARANTINED
+from tests.fake_server import FakeFactorioServer
+
+
+@pytest.fixture()
+def servers():
+    with ExitStack() as stack:
+        yield [stack.enter_context(FakeFactorioServer()) for _ in range(3)]
+
+
+def connect(servers, **kwargs):
+    instances = [FactorioInstance(address='localhost', tcp_port=server.port, fast=True, cache_scripts=True,
+                                  inventory={'iron-plate': 10}) for server in servers]
+    return FactorioPool(instances, **kwargs)
+
+
+async def inspect(pool, instance, _):
+    await pool.call(instance, instance.namespace.inspect_inventory)
+    return instance.tcp_port
+
+
+def test_tasks_are_stolen_from_slow_servers(servers):
+    servers[0].latency = 0.05
+    pool = connect(servers)
+
+    async def run():
+        try:
+            return await pool.map(lambda instance, item: inspect(pool, instance, item), range(30))
+        finally:
+            await pool.close()
+
+    tasks = Counter(asyncio.run(run()))
+    assert sum(tasks.values()) == 30
+    assert tasks[servers[0].port] < tasks[servers[1].port] and tasks[servers[0].port] < tasks[servers[2].port]
+
+
+def test_unresponsive_server_is_quarantined_then_recovers(servers):
+    pool = connect(servers, probe_timeout=0.2, reconnect_timeout=0.5, quarantine_time=0.1, max_quarantine_time=0.1)
+    wedged, instance = servers[0], pool.instances[0]
+
+    async def run():
+        try:
+            wedged.latency = 1
+            ports = await pool.map(lambda instance, item: inspect(pool, instance, item), range(12), timeout=0.3)
+            quarantined = pool.health[instance].status
+
+            # It stays quarantined until the reconnect that timed out gives up on its command
+            wedged.latency = 0
+            for _ in range(20):
+                await asyncio.sleep(0.1)
+                await pool.check_health()
+                if pool.health[instance].status != QUARANTINED:
+                    break
+            return ports, quarantined, pool.health[instance].status
+        finally:
+            await pool.close()
+
+    ports, quarantined, recovered = asyncio.run(run())
+    # Every task ran, on the servers that answered
+    assert len(ports) == 12 and wedged.port not in ports
+    assert quarantined == QUARANTINED
+    assert recovered == IDLE
+
+
+def test_task_errors_are_raised_when_the_instance_is_healthy(servers):
+    pool = connect(servers[:1])
+
+    async def fail(instance):
+        raise ValueError("Bad program")
+
+    async def run():
+        try:
+            with pytest.raises(ValueError):
+                await pool.run(fail)
+            return pool.stats()
+        finally:
+            await pool.close()
+
+    assert asyncio.run(run())[IDLE] == 1
+
+
+def test_instance_is_not_leased_again_while_a_timed_out_call_runs(servers):
+    pool = connect(servers[:1], probe_timeout=0.1, quarantine_time=0)
+    instance = pool.instances[0]
+    stuck = threading.Event()
+
+    async def run():
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.run(lambda instance: pool.call(instance, stuck.wait, 5), timeout=0.1, retries=0)
+            # Still running on the instance's worker thread
+            quarantined = pool.health[instance].status
+
+            stuck.set()
+            await pool.check_health()
+            return quarantined, pool.health[instance].status
+        finally:
+            await pool.close()
+
+    assert asyncio.run(run()) == (QUARANTINED, IDLE)
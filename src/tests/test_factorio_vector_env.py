@@ -0,0 +1,122 @@
+import threading
+from contextlib import ExitStack
+
+import numpy as np
+import pytest
+
+gym = pytest.importorskip("gymnasium")
+from gymnasium import spaces
+
+from envs import FactorioEnv, FactorioVectorEnv
+from envs.factorio_environment import ITEMS
+from factorio_instance import FactorioInstance
+from factorio_types import Prototype
+from tests.fake_server import FakeFactorioServer
+
+
+class InFlight:
+    """Counts the steps running at once, and the most there have been"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.maximum = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.maximum = max(self.maximum, self.current)
+
+    def __exit__(self, *args):
+        with self.lock:
+            self.current -= 1
+
+
+class CraftingEnv(gym.Env):
+    """Crafts gear wheels (action 1) until it runs out of iron plates"""
+    metadata = {}
+    observation_space = spaces.Dict({'inventory': spaces.Box(0, 100, shape=(2,), dtype=np.int64)})
+    action_space = spaces.Discrete(2)
+
+    def __init__(self, tcp_port: int, in_flight: InFlight = None):
+        self.instance = FactorioInstance(address='localhost', tcp_port=tcp_port, fast=True, cache_scripts=True,
+                                         inventory={'iron-plate': 4})
+        self.in_flight = in_flight or InFlight()
+
+    def _get_obs(self):
+        inventory = self.instance.namespace.inspect_inventory()
+        return {'inventory': np.array([inventory[Prototype.IronPlate], inventory[Prototype.IronGearWheel]])}
+
+    def reset(self, *, seed=None, options=None):
+        self.instance.reset()
+        return self._get_obs(), {}
+
+    def step(self, action):
+        with self.in_flight:
+            reward = self.instance.namespace.craft_item(Prototype.IronGearWheel) if action == 1 else 0
+            observation = self._get_obs()
+        return observation, reward, observation['inventory'][0] < 2, False, {}
+
+    def close(self):
+        self.instance.rcon_client.close()
+
+
+@pytest.fixture()
+def servers():
+    with ExitStack() as stack:
+        yield [stack.enter_context(FakeFactorioServer()) for _ in range(3)]
+
+
+def test_environments_are_stepped_together(servers):
+    env = FactorioVectorEnv.from_ports([server.port for server in servers], env_class=CraftingEnv)
+    try:
+        observations, infos = env.reset()
+        assert observations['inventory'].tolist() == [[4, 0]] * 3
+
+        observations, rewards, terminations, truncations, infos = env.step(np.array([1, 0, 1]))
+        assert observations['inventory'].tolist() == [[2, 1], [4, 0], [2, 1]]
+        assert rewards.tolist() == [1, 0, 1] and not terminations.any()
+
+        # Finished episodes are reset straight away
+        observations, rewards, terminations, truncations, infos = env.step(np.array([1, 1, 0]))
+        assert terminations.tolist() == [True, False, False]
+        assert infos['final_obs'][0]['inventory'].tolist() == [0, 2]
+        assert observations['inventory'].tolist() == [[4, 0], [2, 1], [2, 1]]
+    finally:
+        env.close()
+
+
+def test_environments_wait_on_their_servers_concurrently(servers):
+    in_flight = InFlight()
+    env = FactorioVectorEnv.from_ports([server.port for server in servers], env_class=CraftingEnv,
+                                       in_flight=in_flight)
+    try:
+        env.reset()
+        for server in servers:
+            server.latency = 0.05
+
+        env.step(np.zeros(3, dtype=int))
+        # Each step waits on its server (inspect_inventory), while the others' steps are running too
+        assert in_flight.maximum == 3
+    finally:
+        env.close()
+
+
+def test_factorio_envs_run_programs(servers):
+    env = FactorioVectorEnv.from_ports([server.port for server in servers], inventory={'iron-plate': 4},
+                                       fast=True, cache_scripts=True)
+    try:
+        assert env.single_observation_space == FactorioEnv(tcp_port=servers[0].port).observation_space
+        observations, infos = env.reset()
+        plates = ITEMS.index('iron-plate')
+        assert observations['inventory'][:, plates].tolist() == [4] * 3
+
+        programs = ("craft_item(Prototype.IronGearWheel, 2)", "print(inspect_inventory())", "craft_item(")
+        observations, rewards, terminations, truncations, infos = env.step(programs)
+        assert observations['inventory'][:, plates].tolist() == [0, 4, 4]
+        assert observations['inventory'][0, ITEMS.index('iron-gear-wheel')] == 2
+        assert "iron-plate" in infos['result'][1]
+        assert "Error" in infos['result'][2]
+        assert not terminations.any() and not truncations.any()
+    finally:
+        env.close()
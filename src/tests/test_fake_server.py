@@ -0,0 +1,65 @@
+import time
+
+from slpp import slpp as lua
+
+from factorio_entities import Position
+from factorio_instance import FactorioInstance, Direction
+from factorio_types import Prototype, Resource
+from rcon.factorio_rcon import RCONClient
+from search.model.game_state import GameState
+from tests.fake_server import FakeFactorioServer
+from tests.fake_server.lua import decode, decode_arguments
+
+
+def test_lua_literals_are_decoded():
+    value = {'name': 'iron-chest', 'position': {'x': 1.5, 'y': -2}, 'items': [1, 2, 3], 'quoted': 'a "b"\nc'}
+    assert decode(lua.encode(value)) == value
+    assert decode(lua.encode(b'{"a": "\xc3\xa9"}')).encode('latin-1') == b'{"a": "\xc3\xa9"}'
+
+    command = 'a, b = pcall(global.actions.place_entity, 1,"iron-chest",0,nil,true); rcon.print(dump_response(a, b))'
+    args, end = decode_arguments(command, len('a, b = pcall(global.actions.place_entity'))
+    assert args == [1, 'iron-chest', 0, None, True]
+    assert command[end:].startswith('; rcon.print')
+
+
+def test_latency_is_injected(fake_server):
+    fake_server.latency = 0.05
+    client = RCONClient('127.0.0.1', fake_server.port, 'factorio')
+    try:
+        start = time.perf_counter()
+        assert client.send_command('/c rcon.print(global.elapsed_ticks or 0)') == '0'
+        assert time.perf_counter() - start >= 0.05
+        assert fake_server.commands == 1
+    finally:
+        client.close()
+
+
+def test_instance_runs_against_fake_server(fake_server):
+    game = FactorioInstance(address='localhost', tcp_port=fake_server.port, fast=True, cache_scripts=True,
+                            inventory={'iron-plate': 20, 'coal': 10, 'iron-chest': 3})
+    try:
+        namespace = game.namespace
+        position = namespace.nearest(Resource.Stone)
+        namespace.move_to(position)
+        assert namespace.harvest_resource(position, quantity=10) == 10
+        assert namespace.craft_item(Prototype.StoneFurnace) == 1
+
+        chest = namespace.place_entity(Prototype.IronChest, position=Position(x=2, y=2))
+        chest = namespace.insert_item(Prototype.Coal, chest, quantity=5)
+        assert chest.inventory['coal'] == 5
+        assert namespace.inspect_inventory()[Prototype.Coal] == 5
+
+        state = GameState.from_instance(game)
+        namespace.pickup_entity(chest)
+        assert namespace.get_entities() == []
+
+        game.reset(state)
+        restored, = namespace.get_entities()
+        assert restored.position == chest.position and restored.inventory['coal'] == 5
+
+        calls = [('place_entity', Prototype.IronChest, Direction.UP, Position(x=5, y=5))] * 2
+        (placed, placed_chest), (occupied, error) = game.execute_many(calls)
+        assert placed and placed_chest.position == Position(x=5.5, y=5.5)
+        assert not occupied and 'occupied' in str(error)
+    finally:
+        game.rcon_client.close()
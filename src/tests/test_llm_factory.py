@@ -0,0 +1,147 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_factory import LLMFactory
+
+
+class MockOpenAIServer:
+    """
+    OpenAI-compatible chat completions server. Rejects the first `rate_limited` requests with a 429, and records
+    the connections it was called on and the most requests it served at once.
+    """
+
+    def __init__(self, delay=0.0, rate_limited=0):
+        self.delay = delay
+        self.rate_limited = rate_limited
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with server.lock:
+                    server.requests += 1
+                    server.connections.add(self.client_address)
+                    rate_limited = server.rate_limited > 0
+                    server.rate_limited -= 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    time.sleep(server.delay)
+                    if rate_limited:
+                        self.reply(429, {"error": {"message": "Rate limited", "type": "rate_limit_error"}},
+                                   {"retry-after-ms": "10"})
+                    else:
+                        self.reply(200, server.completion(body))
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+            def reply(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def completion(body):
+        content = body['messages'][-1]['content']
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body['model'],
+            "choices": [{"index": 0,
+                         "message": {"role": "assistant", "content": f"echo {content}"},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture()
+def mock_server(monkeypatch):
+    servers = []
+
+    def start(**kwargs):
+        server = MockOpenAIServer(**kwargs)
+        servers.append(server)
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        return server
+
+    monkeypatch.setattr(LLMFactory, "_clients", {})
+    monkeypatch.setattr(LLMFactory, "_semaphores", {})
+    yield start
+    for server in servers:
+        server.close()
+
+
+def _acall(factory, content):
+    return factory.acall(messages=[{"role": "system", "content": "system"}, {"role": "user", "content": content}])
+
+
+def test_client_is_reused_across_calls(mock_server):
+    server = mock_server()
+    factory = LLMFactory("gpt-4o-mini")
+
+    async def run():
+        first = await _acall(factory, "a")
+        second = await _acall(factory, "b")
+        return first, second, len(LLMFactory._clients)
+
+    first, second, n_clients = asyncio.run(run())
+    assert first.choices[0].message.content == "echo a"
+    assert second.choices[0].message.content == "echo b"
+    assert n_clients == 1
+    assert len(server.connections) == 1, "The second call should reuse the kept-alive connection"
+
+
+def test_concurrency_is_bounded_per_provider(mock_server, monkeypatch):
+    server = mock_server(delay=0.05)
+    monkeypatch.setattr(LLMFactory, "max_concurrent_requests", 3)
+    factory = LLMFactory("gpt-4o-mini")
+
+    async def run():
+        return await asyncio.gather(*(_acall(factory, str(i)) for i in range(12)))
+
+    responses = asyncio.run(run())
+    assert [response.choices[0].message.content for response in responses] == [f"echo {i}" for i in range(12)]
+    assert server.max_in_flight <= 3
+
+
+def test_rate_limited_requests_are_retried(mock_server):
+    server = mock_server(rate_limited=2)
+    factory = LLMFactory("gpt-4o-mini")
+
+    response = asyncio.run(_acall(factory, "retry"))
+    assert response.choices[0].message.content == "echo retry"
+    assert server.requests == 3
@@ -0,0 +1,72 @@
+import json
+
+import factorio_lua_script_manager
+from controllers.connect_entities import ConnectEntities
+from controllers.get_entities import GetEntities
+from factorio_lua_script_manager import FactorioLuaScriptManager
+
+
+class RecordingRCONClient:
+    """Records the commands sent to it, and answers checksum requests like init/checksum.lua"""
+    port = 0
+
+    def __init__(self, game_checksums=None):
+        self.game_checksums = game_checksums or {}
+        self.batches = []
+
+    def send_command(self, command):
+        if "get_lua_script_checksums" in command:
+            return json.dumps(self.game_checksums)
+        return None
+
+    def send_commands(self, commands):
+        self.batches.append(dict(commands))
+        return {key: None for key in commands}
+
+
+def test_changed_actions_are_sent_in_one_batch():
+    manager = FactorioLuaScriptManager(RecordingRCONClient(), cache_scripts=True)
+    manager.load_actions_into_game(["get_entities", "move_to", "get_entities"])
+
+    assert len(manager.rcon_client.batches) == 1
+    batch = manager.rcon_client.batches[0]
+    assert list(batch) == ["get_entities", "move_to", "__checksums"]
+    assert "global.set_lua_script_checksum('move_to'" in batch["__checksums"]
+
+    manager.load_action_into_game("move_to")
+    assert len(manager.rcon_client.batches) == 1
+
+
+def test_unchanged_actions_are_not_sent():
+    uncached = FactorioLuaScriptManager(RecordingRCONClient(), cache_scripts=False)
+    client = RecordingRCONClient({"move_to": uncached.calculate_checksum(uncached.action_scripts["move_to"])})
+    manager = FactorioLuaScriptManager(client, cache_scripts=True)
+
+    manager.load_actions_into_game(["move_to"])
+    assert client.batches == []
+
+
+def test_syntax_is_checked_once_per_script(monkeypatch):
+    checks = []
+    check = FactorioLuaScriptManager._check_lua_syntax
+
+    def record(lua, script):
+        checks.append(script)
+        return check(lua, script)
+
+    monkeypatch.setattr(FactorioLuaScriptManager, "_check_lua_syntax", staticmethod(record))
+    monkeypatch.setattr(factorio_lua_script_manager, "_syntax_checked", {})
+    for _ in range(3):
+        FactorioLuaScriptManager(RecordingRCONClient(), cache_scripts=False).load_action_into_game("move_to")
+
+    assert len(checks) == 1
+
+
+def test_controllers_are_shared():
+    manager = FactorioLuaScriptManager(RecordingRCONClient(), cache_scripts=False)
+    connect_entities = ConnectEntities.shared(manager, None)
+
+    assert ConnectEntities.shared(manager, None) is connect_entities
+    assert connect_entities.get_entity.get_entities is connect_entities.get_entities
+    assert GetEntities.shared(manager, None) is connect_entities.get_entities
+    assert len(manager.rcon_client.batches) == len(manager.loaded_actions)
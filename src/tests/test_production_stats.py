@@ -44,3 +44,12 @@ class TestProductionStats(unittest.TestCase):
 
 if __name__ == '__main__':
     unittest.main()
+
+
+def test_price_list_is_cached(instance):
+    prices = instance.namespace._price_list()
+    assert prices['iron-plate'] > prices['iron-ore']
+
+    checksum = instance.namespace._price_list.checksum
+    assert instance.namespace._price_list() is prices
+    assert instance.namespace._price_list.checksum == checksum
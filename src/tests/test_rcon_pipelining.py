@@ -0,0 +1,128 @@
+import asyncio
+import socket
+import struct
+import threading
+
+import pytest
+
+from rcon.factorio_rcon import PipelinedRCONClient, RCONReceiveError, ClientBusy
+
+
+def _build_packet(packet_id, packet_type, body):
+    payload = struct.pack("<ii", packet_id, packet_type) + body.encode("utf8") + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+def _read_packet(conn, buffer):
+    while len(buffer) < 4 or len(buffer) < 4 + struct.unpack_from("<i", buffer)[0]:
+        data = conn.recv(4096)
+        if not data:
+            return None, buffer
+        buffer += data
+    size = struct.unpack_from("<i", buffer)[0]
+    packet_id, packet_type = struct.unpack_from("<ii", buffer, 4)
+    body = buffer[12:4 + size - 2].decode("utf8")
+    return (packet_id, packet_type, body), buffer[4 + size:]
+
+
+class FakeRCONServer:
+    """Answers `batch` commands at a time in reverse order, so responses only match by packet id"""
+
+    def __init__(self, batch=1, silent=()):
+        self.batch = batch
+        self.silent = set(silent)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(1)
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        conn, _ = self.sock.accept()
+        buffer = b""
+        (auth_id, _, _), buffer = _read_packet(conn, buffer)
+        conn.sendall(_build_packet(auth_id, 2, ""))
+        while True:
+            received = []
+            while len(received) < self.batch:
+                packet, buffer = _read_packet(conn, buffer)
+                if packet is None:
+                    return
+                received.append(packet)
+            replies = b"".join(_build_packet(packet_id, 0, f"echo {body}\n")
+                               for packet_id, _, body in reversed(received)
+                               if body not in self.silent)
+            conn.sendall(replies)
+
+    def close(self):
+        self.sock.close()
+
+
+def test_out_of_order_responses_are_matched_by_id():
+    server = FakeRCONServer(batch=5)
+    client = PipelinedRCONClient("127.0.0.1", server.port, "factorio", timeout=5)
+    try:
+        responses = client.send_commands({f"cmd{i}": f"/c {i}" for i in range(5)})
+        assert responses == {f"cmd{i}": f"echo /c {i}" for i in range(5)}
+    finally:
+        client.close()
+        server.close()
+
+
+def test_concurrent_callers_share_one_socket():
+    server = FakeRCONServer(batch=4)
+    client = PipelinedRCONClient("127.0.0.1", server.port, "factorio", timeout=5)
+    results = {}
+
+    def call(index):
+        results[index] = client.send_command(f"/c {index}")
+
+    try:
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {i: f"echo /c {i}" for i in range(4)}
+    finally:
+        client.close()
+        server.close()
+
+
+def test_async_api():
+    server = FakeRCONServer(batch=3)
+    client = PipelinedRCONClient("127.0.0.1", server.port, "factorio", timeout=5)
+
+    async def run():
+        return await asyncio.gather(*(client.send_command_async(f"/c {i}") for i in range(3)))
+
+    try:
+        assert asyncio.run(run()) == [f"echo /c {i}" for i in range(3)]
+    finally:
+        client.close()
+        server.close()
+
+
+def test_timeout_abandons_only_the_late_command():
+    server = FakeRCONServer(batch=1, silent={"/c never"})
+    client = PipelinedRCONClient("127.0.0.1", server.port, "factorio", timeout=0.5)
+    try:
+        with pytest.raises(RCONReceiveError):
+            client.send_command("/c never")
+        assert client.send_command("/c 1") == "echo /c 1"
+    finally:
+        client.close()
+        server.close()
+
+
+def test_submitting_beyond_max_in_flight_times_out():
+    server = FakeRCONServer(silent={"/c never"})
+    client = PipelinedRCONClient("127.0.0.1", server.port, "factorio", timeout=0.2, max_in_flight=1)
+    try:
+        client.submit_command("/c never")
+        with pytest.raises(ClientBusy):
+            client.submit_command("/c 1")
+    finally:
+        client.close()
+        server.close()
@@ -1,6 +1,6 @@
 import pytest
 
-from factorio_rcon_utils import _lua2python
+from factorio_rcon_utils import _lua2python, _json2python
 from factorio_types import Prototype
 
 @pytest.fixture()
@@ -13,4 +13,20 @@ def test_lua_2_python():
     command = 'pcall(global.actions.place_entity_next_to, 1,"steam-engine",-11.5,20.0,1,0)'
     response, timing = _lua2python(command, lua_response)
 
-    assert response['b'] == '"global.actions.place_entity_next_to = functio..."]:204: Cannot place entity at the position {x = -8.5, y = 20.5} with direction 2. Nearby entities: {}'
\ No newline at end of file
+    assert response['b'] == '"global.actions.place_entity_next_to = functio..."]:204: Cannot place entity at the position {x = -8.5, y = 20.5} with direction 2. Nearby entities: {}'
+
+def test_json_2_python_matches_lua_2_python():
+    # The same result of `get_entities`, as written by `dump()` and by `dump_response`
+    command = 'pcall(global.actions.get_entities, 1,1000,"[]")'
+    lua_response = '{ ["a"] = true,["b"] = { [1] = { ["name"] = "iron-chest",["position"] = { ["x"] = 0.5,["y"] = -1.5,} ,["direction"] = 0,["status"] = working,["inventory"] = { ["coal"] = 5,} ,["warnings"] = { } ,} ,[2] = { ["name"] = "pipe",["position"] = { ["x"] = 2,["y"] = 3,} ,} ,} ,} '
+    json_response = '{"v":1,"a":true,"b":[{"name":"\\"iron-chest\\"","position":{"x":0.5,"y":-1.5},"direction":0,"status":"working","inventory":{"coal":5},"warnings":[]},{"name":"\\"pipe\\"","position":{"x":2,"y":3}}]}'
+
+    expected, _ = _lua2python(command, lua_response)
+    response, _ = _json2python(command, json_response)
+    assert response == expected
+
+
+def test_json_2_python_falls_back_to_lua():
+    command = 'pcall(global.actions.inspect_inventory, 1)'
+    assert _json2python(command, '{ ["a"] = true,["b"] = { ["coal"] = 5,} ,} ') is None
+    assert _json2python(command, '{"v":0,"a":true}') is None
@@ -0,0 +1,96 @@
+import time
+
+from skills.skill_index import EmbeddingCache, SkillIndex
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.result = None
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        self.result = [(len(self.rows), repr(sorted(self.rows)))] if "COUNT(*)" in query else list(self.rows)
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.cursor_ = FakeCursor(rows)
+
+    def cursor(self):
+        return self.cursor_
+
+
+def _skill(name, embedding, dependencies=None):
+    return name, f"def {name}(): pass", f"{name} description", f"{name}()", dependencies, str(list(embedding))
+
+
+def test_embedding_cache_reuses_embeddings(tmp_path):
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [float(len(text)), 1.0]
+
+    cache = EmbeddingCache(embed, directory=tmp_path, max_memory_entries=1, max_disk_entries=3, disk_low_water=2)
+    assert cache.get("iron").tolist() == [4.0, 1.0]
+    cache.get("iron")
+    assert calls == ["iron"]
+
+    # Evicted from memory, but still on disk. Uses are spaced out, as file modification times are coarse
+    for text in ["copper", "stone", "iron", "coal"]:
+        time.sleep(0.02)
+        cache.get(text)
+    assert calls == ["iron", "copper", "stone", "coal"]
+
+    # Past the limit, only the two most recently used embeddings are kept on disk
+    assert sorted(path.name for path in tmp_path.glob("*.npy")) == sorted(
+        f"{cache.key(text)}.npy" for text in ["iron", "coal"])
+
+
+def test_search_orders_by_distance_and_filters_affordable():
+    rows = [
+        _skill("far", [10.0, 10.0]),
+        _skill("near", [1.0, 0.0], "{'iron-plate': -5, 'iron-gear-wheel': 2}"),
+        _skill("nearest", [0.0, 0.0], "{'stone': -10}"),
+        _skill("broken", [0.5, 0.5], "{'stone': "),
+    ]
+    index = SkillIndex(FakeConnection(rows))
+
+    assert [skill["name"] for skill in index.search([0.1, 0.0], n=3)] == ["nearest", "broken", "near"]
+
+    affordable = index.search([0.1, 0.0], n=2, inventory={"iron-plate": 5}, candidates=4)
+    assert [skill["name"] for skill in affordable] == ["near", "far"]
+
+    mask = index.affordable({"stone": 10, "iron-plate": 1})
+    assert mask.tolist() == [True, False, True, False]
+
+
+def test_index_reloads_when_rows_change():
+    conn = FakeConnection([_skill("a", [0.0, 0.0])])
+    index = SkillIndex(conn, check_interval=0)
+    assert len(index.search([0.0, 0.0], n=5)) == 1
+
+    conn.cursor_.rows.append(_skill("b", [1.0, 1.0]))
+    assert [skill["name"] for skill in index.search([1.0, 1.0], n=5)] == ["b", "a"]
+
+    loads = sum("embedding" in query for query in conn.cursor_.queries)
+    index.search([1.0, 1.0], n=5)
+    assert sum("embedding" in query for query in conn.cursor_.queries) == loads
+
+
+def test_index_reloads_when_rows_are_edited():
+    conn = FakeConnection([_skill("a", [0.0, 0.0])])
+    index = SkillIndex(conn, check_interval=0)
+    assert index.search([0.0, 0.0], n=5)[0]["description"] == "a description"
+
+    # Same number of rows, different contents
+    conn.cursor_.rows[0] = _skill("a", [0.0, 0.0])[:2] + ("a better description",) + _skill("a", [0.0, 0.0])[3:]
+    assert index.search([0.0, 0.0], n=5)[0]["description"] == "a better description"
@@ -1,7 +1,11 @@
+import hashlib
 import os
 import importlib.util
 import inspect
-from typing import Any, List, Tuple, Optional
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Tuple, Optional, Dict
 import ast
 
 def load_module_from_path(path: str) -> Optional[Any]:
@@ -175,6 +179,120 @@ def parse_file_for_structure(file_path: str) -> str:
         code = file.read()
     return extract_class_structure(code)
 
+
+@dataclass
+class ControllerArtifact:
+    """
+    Everything derived from the controller, type and entity sources: the system prompt and the controller classes.
+    Built once per content hash of those sources, and shared by every `FactorioInstance` in the process.
+    """
+    source_hash: str
+    schema: str
+    type_definitions: str
+    entity_definitions: str
+    controller_classes: Dict[str, type]  # Module name -> controller class
+
+    @property
+    def system_prompt(self) -> str:
+        return f"```types\n{self.type_definitions}\n```\n```objects\n{self.entity_definitions}\n```\n```tools\n{self.schema}\n```"
+
+
+_artifacts: Dict[str, ControllerArtifact] = {}
+# Execution path -> the stats of its sources when they were last hashed, and their hash
+_source_hashes: Dict[str, Tuple[Tuple[Tuple[str, int, int], ...], str]] = {}
+_artifacts_lock = threading.Lock()
+
+
+def _source_files(execution_path: str) -> List[str]:
+    controllers_path = os.path.join(execution_path, "controllers")
+    controller_files = sorted(os.path.join(controllers_path, file)
+                              for file in os.listdir(controllers_path) if file.endswith(".py"))
+    return controller_files + [os.path.join(execution_path, "factorio_types.py"),
+                               os.path.join(execution_path, "factorio_entities.py")]
+
+
+def _stat_sources(execution_path: str) -> Tuple[Tuple[str, int, int], ...]:
+    """The path, modification time and size of each source, which is enough to tell that none of them changed"""
+    stats = []
+    for path in _source_files(execution_path):
+        stat = os.stat(path)
+        stats.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(stats)
+
+
+def hash_sources(execution_path: str) -> str:
+    """Content hash of the sources that the system prompt and controller classes are derived from"""
+    digest = hashlib.md5()
+    for path in _source_files(execution_path):
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def load_controller_classes(folder_path: str) -> Dict[str, type]:
+    """Import every controller module in `folder_path`, returning the controller class of each by module name"""
+    def snake_to_camel(snake_str):
+        return "".join(word.capitalize() for word in snake_str.split("_"))
+
+    controller_classes = {}
+    for file in os.listdir(folder_path):
+        # Check if the file is a Python file and is not a base class (e.g `__action.py`)
+        if file.endswith(".py") and not file.startswith("__"):
+            module_name = Path(file).stem
+            module_spec = importlib.util.spec_from_file_location(module_name, os.path.join(folder_path, file))
+            module = importlib.util.module_from_spec(module_spec)
+            module_spec.loader.exec_module(module)
+
+            class_name = snake_to_camel(module_name)
+
+            # We have to rename these because on windows environments it fails silently (for some reason)
+            if module_name == "place_entity":
+                class_name = "PlaceObject"
+            if module_name == "score":
+                class_name = "Reward"
+            controller_classes[module_name.lower()] = getattr(module, class_name)
+    return controller_classes
+
+
+def build_controller_artifact(execution_path: str, source_hash: str) -> ControllerArtifact:
+    folder_path = f'{execution_path}/controllers'
+    schema = load_schema(folder_path, with_docstring=True).replace("temp_module.", "")
+    type_definitions = load_definitions(f'{execution_path}/factorio_types.py')
+    # Filter `import` statements and `from` statements
+    type_definitions = "\n".join(list(
+        filter(lambda x: not x.startswith("import") and not x.startswith("from") and not x.lstrip().startswith('#'), type_definitions.split("\n"))))
+    type_definitions = type_definitions.replace("\n\n\n", "\n").replace("\n\n", "\n").strip()
+    # get everything from and including class Prototype(enum.Enum):
+    type_definitions = type_definitions[type_definitions.index("class Prototype(enum.Enum"):]
+    entity_definitions = parse_file_for_structure(f'{execution_path}/factorio_entities.py')
+
+    return ControllerArtifact(source_hash=source_hash,
+                              schema=schema,
+                              type_definitions=type_definitions,
+                              entity_definitions=entity_definitions,
+                              controller_classes=load_controller_classes(folder_path))
+
+
+def get_controller_artifact(execution_path: str) -> ControllerArtifact:
+    """
+    Get the controller artifact of the sources under `execution_path`, building it the first time it is needed
+    (or when the sources have changed) rather than re-importing and re-parsing them for every instance.
+    The sources are only read and hashed again when one of their modification times or sizes has changed.
+    """
+    stats = _stat_sources(execution_path)
+    with _artifacts_lock:
+        cached = _source_hashes.get(execution_path)
+        if cached is not None and cached[0] == stats:
+            source_hash = cached[1]
+        else:
+            source_hash = hash_sources(execution_path)
+            _source_hashes[execution_path] = (stats, source_hash)
+        if source_hash not in _artifacts:
+            _artifacts[source_hash] = build_controller_artifact(execution_path, source_hash)
+        return _artifacts[source_hash]
+
+
 if __name__ == "__main__":
     # get execution path
     execution_path = os.path.dirname(os.path.realpath(__file__))
@@ -2,11 +2,8 @@ from collections import defaultdict
 from statistics import mean
 from typing import List
 
-from neptune.cli import status
-
 from factorio_entities import TransportBelt, BeltGroup, Position, Entity, EntityGroup, PipeGroup, Inventory, \
     EntityStatus, Pipe, ElectricityGroup
-from factorio_instance import Direction
 from factorio_types import Prototype
 
 
@@ -220,40 +217,100 @@ def should_merge_groups(group1, group2, prototype):
         g1_outputs = {(out.output_position.x, out.output_position.y) for out in group1.outputs}
         g2_outputs = {(out.output_position.x, out.output_position.y) for out in group2.outputs}
 
-        is_adjacent = False
-
-        for belt1 in group1.belts:
-            pos1 = (belt1.position.x, belt1.position.y)
-            for belt2 in group2.belts:
-                pos2 = (belt2.position.x, belt2.position.y)
-                # Check if pipes are orthogonally adjacent
-                if ((abs(pos1[0] - pos2[0]) == 1 and pos1[1] == pos2[1]) or
-                        (abs(pos1[1] - pos2[1]) == 1 and pos1[0] == pos2[0])):
-                    is_adjacent = True
         # Check if any output position from group1 matches any belt position in group2
         # or if any output position from group2 matches any belt position in group1
-        return bool(g1_outputs & g2_positions or g2_outputs & g1_positions) or is_adjacent
+        return bool(g1_outputs & g2_positions or g2_outputs & g1_positions) or \
+            _are_orthogonally_adjacent(g1_positions, g2_positions)
 
     elif prototype == Prototype.Pipe:
         # For pipes, use existing orthogonal neighbor checking logic
-        for pipe1 in group1.pipes:
-            pos1 = (pipe1.position.x, pipe1.position.y)
-            for pipe2 in group2.pipes:
-                pos2 = (pipe2.position.x, pipe2.position.y)
-                # Check if pipes are orthogonally adjacent
-                if ((abs(pos1[0] - pos2[0]) == 1 and pos1[1] == pos2[1]) or
-                        (abs(pos1[1] - pos2[1]) == 1 and pos1[0] == pos2[0])):
-                    return True
-        return False
+        return _are_orthogonally_adjacent({(pipe.position.x, pipe.position.y) for pipe in group1.pipes},
+                                          {(pipe.position.x, pipe.position.y) for pipe in group2.pipes})
 
     return False
 
 
+def _are_orthogonally_adjacent(positions1, positions2) -> bool:
+    """Check if any position in one set is orthogonally adjacent to a position in the other"""
+    return any((x + dx, y + dy) in positions2
+               for x, y in positions1
+               for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)))
+
+
+class _DisjointSet:
+    """Union-find over the integers 0..n-1, with path halving and union by size"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+
+
+def _walk_forward(belt, belts_by_position, visited) -> List[TransportBelt]:
+    """
+    Follow a belt's outputs until the line ends or reaches a belt that has already been walked, which is included so
+    that the two lines are merged.
+    """
+    group = []
+    if (belt.position.x, belt.position.y) in visited:
+        return group
+    belt.is_source = True
+    group.append(belt)
+    while True:
+        visited.add((belt.position.x, belt.position.y))
+        output = belt.output_position
+        next_belt = belts_by_position.get((output.x, output.y))
+        if next_belt is None:
+            group[-1].is_terminus = True
+            return group
+        group.append(next_belt)
+        if (next_belt.position.x, next_belt.position.y) in visited:
+            return group
+        belt = next_belt
+
+
+def _walk_backward(belt, belts_by_position, visited) -> List[TransportBelt]:
+    """As `_walk_forward`, following inputs. The group is returned in the direction of flow."""
+    group = []
+    if (belt.position.x, belt.position.y) in visited:
+        return group
+    belt.is_terminus = True
+    group.append(belt)
+    while True:
+        visited.add((belt.position.x, belt.position.y))
+        input = belt.input_position
+        prev_belt = belts_by_position.get((input.x, input.y))
+        if prev_belt is None:
+            group[-1].is_source = True
+            break
+        group.append(prev_belt)
+        if (prev_belt.position.x, prev_belt.position.y) in visited:
+            break
+        belt = prev_belt
+    group.reverse()
+    return group
+
+
 def construct_belt_groups(belts: List[TransportBelt], prototype):
     belts_by_position = {}
     source_belts = []
     terminal_belts = []
-    visited = {}
+    visited = set()
     initial_groups = []
 
     for belt in belts:
@@ -271,65 +328,49 @@ def construct_belt_groups(belts: List[TransportBelt], prototype):
             position=belts[0].position
         )]
 
-    def walk_forward(belt, group):
-        if (belt.position.x, belt.position.y) in visited:
-            return group
-        if not group:
-            belt.is_source = True
-            group.append(belt)
-        visited[(belt.position.x, belt.position.y)] = True
-        output = belt.output_position
-        if (output.x, output.y) in belts_by_position:
-            next_belt = belts_by_position[(output.x, output.y)]
-            group.append(next_belt)
-            walk_forward(next_belt, group)
-        else:
-            group[-1].is_terminus = True
-        return group
-
-    def walk_backward(belt, group):
-        if (belt.position.x, belt.position.y) in visited:
-            return group
-        if not group:
-            belt.is_terminus = True
-            group.append(belt)
-        visited[(belt.position.x, belt.position.y)] = True
-        input = belt.input_position
-        if (input.x, input.y) in belts_by_position:
-            prev_belt = belts_by_position[(input.x, input.y)]
-            group.insert(0, prev_belt)
-            walk_backward(prev_belt, group)
-        else:
-            group[0].is_source = True
-        return group
-
     for source in source_belts:
-        group = walk_forward(source, [])
+        group = _walk_forward(source, belts_by_position, visited)
         if group:
             initial_groups.append(group)
 
     for terminal in terminal_belts:
-        group = walk_backward(terminal, [])
+        group = _walk_backward(terminal, belts_by_position, visited)
         if group:
             initial_groups.append(group)
 
-    final_groups = []
-    while initial_groups:
-        current = initial_groups.pop(0)
-        restart = True
-
-        while restart:
-            restart = False
-            i = 0
-            while i < len(initial_groups):
-                if any(belt in current for belt in initial_groups[i]):
-                    current.extend([b for b in initial_groups[i] if b not in current])
-                    initial_groups.pop(i)
-                    restart = True
-                else:
-                    i += 1
-
-        final_groups.append(current)
+    # Loops that no line feeds into or out of aren't reached by either walk, so they become groups of their own
+    loop_belts = [belt for position, belt in belts_by_position.items() if position not in visited]
+    if loop_belts:
+        index = {(belt.position.x, belt.position.y): i for i, belt in enumerate(loop_belts)}
+        loops = _DisjointSet(len(loop_belts))
+        for i, belt in enumerate(loop_belts):
+            j = index.get((belt.output_position.x, belt.output_position.y))
+            if j is not None:
+                loops.union(i, j)
+        groups_by_root = {}
+        for i, belt in enumerate(loop_belts):
+            groups_by_root.setdefault(loops.find(i), []).append(belt)
+        initial_groups.extend(groups_by_root.values())
+
+    # Merge groups that share a belt (where one line joins another), keeping the order they were found in
+    owner = {}
+    merged = _DisjointSet(len(initial_groups))
+    for i, group in enumerate(initial_groups):
+        for belt in group:
+            j = owner.setdefault((belt.position.x, belt.position.y), i)
+            if j != i:
+                merged.union(i, j)
+
+    groups_by_root = {}
+    seen = set()
+    for i, group in enumerate(initial_groups):
+        merged_group = groups_by_root.setdefault(merged.find(i), [])
+        for belt in group:
+            position = (belt.position.x, belt.position.y)
+            if position not in seen:
+                seen.add(position)
+                merged_group.append(belt)
+    final_groups = list(groups_by_root.values())
 
     return [_construct_group(
         id=i,
@@ -643,79 +684,6 @@ def _calculate_pipe_endpoints(pipe_group):
     return input_positions
 
 
-def _get_endpoint_objects(belt_group):
-    """
-    Calculate the input and output belt objects that are the endpoints of the belt group.
-    Handles both straight and curved belt connections.
-    """
-    # Create maps using position tuples as keys
-    pos_to_belt = {(belt.position.x, belt.position.y): belt for belt in belt_group}
-
-    def can_belts_connect(upstream_belt, downstream_belt):
-        """Check if two belts can connect based on their positions and directions"""
-        upstream_out = (upstream_belt.output_position.x, upstream_belt.output_position.y)
-        downstream_pos = (downstream_belt.position.x, downstream_belt.position.y)
-        downstream_in = (downstream_belt.input_position.x, downstream_belt.input_position.y)
-
-        # Direct connection - output matches input
-        if upstream_out == downstream_in:
-            return True
-
-        # Corner case - check if belts form a valid curve
-        # If downstream belt is at the output position of upstream belt
-        if upstream_out == downstream_pos:
-            # Valid curves: RIGHT->DOWN, DOWN->LEFT, LEFT->UP, UP->RIGHT
-            valid_curves = {
-                (Direction.RIGHT, Direction.DOWN),
-                (Direction.DOWN, Direction.LEFT),
-                (Direction.LEFT, Direction.UP),
-                (Direction.UP, Direction.RIGHT)
-            }
-            return (upstream_belt.direction, downstream_belt.direction) in valid_curves
-
-        # If upstream belt is at the input position of downstream belt
-        if (upstream_belt.position.x, upstream_belt.position.y) == downstream_in:
-            valid_curves = {
-                (Direction.RIGHT, Direction.DOWN),
-                (Direction.DOWN, Direction.LEFT),
-                (Direction.LEFT, Direction.UP),
-                (Direction.UP, Direction.RIGHT)
-            }
-            return (upstream_belt.direction, downstream_belt.direction) in valid_curves
-
-        return False
-
-    # Use positions as dictionary keys to track connections
-    input_sources = {}  # position -> position of belt that outputs to it
-    for downstream_belt in belt_group:
-        downstream_pos = (downstream_belt.position.x, downstream_belt.position.y)
-        for upstream_belt in belt_group:
-            upstream_pos = (upstream_belt.position.x, upstream_belt.position.y)
-            if upstream_pos != downstream_pos and can_belts_connect(upstream_belt, downstream_belt):
-                input_sources[downstream_pos] = upstream_pos
-                break
-
-    input_belts = []
-    output_belts = []
-
-    # Find input belts - belts that have no input source
-    for belt in belt_group:
-        belt_pos = (belt.position.x, belt.position.y)
-        if belt_pos not in input_sources:
-            input_belts.append(belt)
-
-    # Find output belts - belts that don't output to any other belt
-    for upstream_belt in belt_group:
-        is_output = True
-        for downstream_belt in belt_group:
-            if downstream_belt != upstream_belt and can_belts_connect(upstream_belt, downstream_belt):
-                is_output = False
-                break
-        if is_output:
-            output_belts.append(upstream_belt)
-
-    return input_belts, output_belts
-
 # def _get_endpoint_objects3(belt_group):
 #     """
 #     Calculate the input and output belt objects that are the endpoints of the belt group.
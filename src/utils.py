@@ -117,16 +117,19 @@ def eval_program_with_profits(instance, program, profit_config):
         post_production_flows = instance.get_production_stats()
         profits = get_profits(pre_production_flows, 
                               post_production_flows,
-                              profit_config = profit_config)
+                              profit_config = profit_config,
+                              price_list = instance.namespace._price_list())
         return output_list, result, error, profits
 
 
 def get_profits(pre_production_flows, 
                 post_production_flows,
                 profit_config = {"max_static_unit_profit_cap": 5,
-                                 "dynamic_profit_multiplier": 10}):
+                                 "dynamic_profit_multiplier": 10},
+                price_list = None):
         """
         Calculate the dynamic production flows between two states
+        price_list: The game's price list (`namespace._price_list()`), otherwise it is read from pre_production_flows
         """
         max_static_unit_profit_cap = profit_config["max_static_unit_profit_cap"]
         dynamic_profit_multiplier = profit_config["dynamic_profit_multiplier"]
@@ -140,13 +143,15 @@ def get_profits(pre_production_flows,
         if isinstance(post_production_flows["crafted"], dict):
             post_production_flows["crafted"] = [item for item in post_production_flows["crafted"].values()]
         new_production_flows = get_new_production_flows(pre_production_flows, post_production_flows)
+        if price_list is None:
+            price_list = pre_production_flows["price_list"]
         # merge the crafted and harvested dicts to one dict
         static_profits, new_production_flows = get_static_profits(new_production_flows, 
-                                                                  pre_production_flows["price_list"],
+                                                                  price_list,
                                                                   max_craft_cap = max_static_unit_profit_cap) 
         total_profits["static"] = static_profits
         dynamic_profits= get_dynamic_profits(new_production_flows, 
-                                                                    pre_production_flows["price_list"],
+                                                                    price_list,
                                                                     dynamic_profit_multiplier = dynamic_profit_multiplier)
         total_profits["dynamic"] = dynamic_profits
         total_profits["total"] = static_profits + dynamic_profits